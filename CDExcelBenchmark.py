@@ -0,0 +1,478 @@
+#####################################################################################
+## Import Modules
+#####################################################################################
+
+import sqlite3
+import os.path
+import sys
+import argparse
+import concurrent.futures
+import multiprocessing
+import threading
+import shutil
+import tempfile
+import platform
+import time
+import json
+
+import CDExcelMessenger
+import CDExcelFixtures
+from CDExcelMessenger import LazyModule, SQLAuditor
+
+
+pd = LazyModule("pandas")
+
+
+#####################################################################################
+## Function: getCurrentRSS()
+#####################################################################################
+'''
+This function gets the resident set size (RSS) of the current process.
+/proc/self/statm is read on Linux, and GetProcessMemoryInfo() is used on Windows.
+
+OUTPUT:
+'currentRSS' = The RSS in bytes, or None if it can't be measured.
+'''
+
+def getCurrentRSS():
+    try:
+        with open("/proc/self/statm", "r") as statmFile:
+            return int(statmFile.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import ctypes
+        import ctypes.wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", ctypes.wintypes.DWORD), ("PageFaultCount", ctypes.wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize
+
+    except Exception:
+        return None
+
+
+# The number of seconds between the RSS samples of measure()
+sampleSeconds = 0.002
+
+
+#####################################################################################
+## Function: measure()
+#####################################################################################
+'''
+This function times a call, samples the RSS of the process while the call runs, and counts the SQL statements it runs
+on connections opened by connectToCDResultsFile().
+Connections that were opened before the call have to be watched by the benchmark first, see SQLAuditor.watch().
+The RSS is sampled by a thread every 'sampleSeconds', so the peak only covers the call and not the setup of the case.
+
+INPUT:
+'auditor' = The SQLAuditor of the benchmark.
+'function' = The function to call.
+'args' = The arguments of the function.
+'kwargs' = The keyword arguments of the function.
+
+OUTPUT:
+'seconds' = The number of seconds the call took.
+'peakRSSBytes' = The highest RSS sampled during the call in bytes, or None if the RSS can't be measured.
+'''
+
+def measure(auditor, function, *args, **kwargs):
+    peakRSSList = [getCurrentRSS()]
+    stopEvent = threading.Event()
+
+    def sampleRSS():
+        while not stopEvent.wait(sampleSeconds):
+            peakRSSList[0] = max(peakRSSList[0], getCurrentRSS())
+
+    sampler = None
+    if peakRSSList[0] is not None:
+        sampler = threading.Thread(target=sampleRSS, daemon=True)
+        sampler.start()
+
+    SQLAuditor.active = auditor
+    try:
+        startTime = time.perf_counter()
+        function(*args, **kwargs)
+        seconds = time.perf_counter() - startTime
+    finally:
+        SQLAuditor.active = None
+        stopEvent.set()
+        if sampler is not None:
+            sampler.join()
+
+    if peakRSSList[0] is None:
+        return seconds, None
+    return seconds, max(peakRSSList[0], getCurrentRSS())
+
+
+#####################################################################################
+## Benchmark cases
+#####################################################################################
+'''
+Each benchmark case gets the paths to copies of the fixture files and the SQLAuditor of the benchmark.
+The case prepares its input without timing or sampling it, then measures the code being benchmarked with measure().
+
+INPUT:
+'cdResultsFilePath' = The path to a copy of the fixture CD results file.
+'excelFilePath' = The path to a copy of the fixture Excel file.
+'auditor' = The SQLAuditor of the benchmark.
+
+OUTPUT:
+'seconds' = The number of seconds the benchmarked code took.
+'peakRSSBytes' = The peak RSS while the benchmarked code ran, see measure().
+'''
+
+def benchTidyData(cdResultsFilePath, excelFilePath, auditor):
+    return measure(auditor, CDExcelMessenger.tidyData, excelFilePath, CDExcelFixtures.fixtureColsToKeepDict, CDExcelFixtures.fixtureOptionsDict, verbose = False)
+
+def benchUpdateCDResultsFile(cdResultsFilePath, excelFilePath, auditor):
+    return measure(auditor, CDExcelMessenger.updateCDResultsFile, cdResultsFilePath, excelFilePath, "Peak", ["Name", "Checked", "Tags"], verbose = False)
+
+def benchUpdateExcelFile(cdResultsFilePath, excelFilePath, auditor):
+    return measure(auditor, CDExcelMessenger.updateExcelFile, cdResultsFilePath, excelFilePath, "Peak", "Data", ["Checked", "Tags"],
+                   newPeakSheetName = "Peak", newDataSheetName = "Data", verbose = False)
+
+def benchCreateCompoundIDColumns(cdResultsFilePath, excelFilePath, auditor):
+    peakTable = pd.read_excel(excelFilePath, sheet_name = "Peak")
+    conn = CDExcelMessenger.connectToCDResultsFile(cdResultsFilePath)
+    cursor = conn.cursor()
+    try:
+        auditor.watch(conn, cdResultsFilePath)
+        return measure(auditor, lambda: CDExcelMessenger.addCompoundIDColumn(cdResultsFilePath, cursor,
+                       CDExcelMessenger.createCompoundIDColumns(cdResultsFilePath, cursor, len(peakTable.index), None, peakTable, "Peak")[0]))
+    finally:
+        cursor.close()
+        conn.close()
+
+def benchTagStringToBytes(cdResultsFilePath, excelFilePath, auditor):
+    tagStringList = pd.read_excel(excelFilePath, sheet_name = "Peak")["Tags"].tolist()
+    conn = CDExcelMessenger.connectToCDResultsFile(cdResultsFilePath, readOnly = True)
+    cursor = conn.cursor()
+    try:
+        auditor.watch(conn, cdResultsFilePath)
+        return measure(auditor, lambda: [CDExcelMessenger.tagStringToBytes(tagString, cdResultsFilePath, cursor) for tagString in tagStringList])
+    finally:
+        cursor.close()
+        conn.close()
+
+def benchTagBytesToString(cdResultsFilePath, excelFilePath, auditor):
+    conn = CDExcelMessenger.connectToCDResultsFile(cdResultsFilePath, readOnly = True)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT Tags FROM ConsolidatedUnknownCompoundItems ORDER BY ID;")
+        tagBytesList = [row[0] for row in cursor.fetchall()]
+        auditor.watch(conn, cdResultsFilePath)
+        return measure(auditor, lambda: [CDExcelMessenger.tagBytesToString(tagBytes, cdResultsFilePath, cursor) for tagBytes in tagBytesList])
+    finally:
+        cursor.close()
+        conn.close()
+
+def benchCleanupPeakTable(cdResultsFilePath, excelFilePath, auditor):
+    peakTable = pd.read_excel(excelFilePath, sheet_name = "Compounds")
+    peakTable["Idx"] = list(range(1, len(peakTable.index) + 1))
+    peakTable["UID"] = [CDExcelFixtures.fixtureOptionsDict["UIDPrefix"]+str(i) for i in peakTable["Idx"]]
+    return measure(auditor, CDExcelMessenger.CleanupPeakTable, peakTable, CDExcelFixtures.fixtureColsToKeepDict, CDExcelFixtures.fixtureOptionsDict)
+
+def benchValidatingDataPeakTables(cdResultsFilePath, excelFilePath, auditor):
+    dataTable = pd.read_excel(excelFilePath, sheet_name = "Data")
+    peakTable = pd.read_excel(excelFilePath, sheet_name = "Peak")
+    return measure(auditor, CDExcelMessenger.validatingDataPeakTables, dataTable, peakTable, CDExcelFixtures.fixtureOptionsDict)
+
+def benchMergeMetaintoData(cdResultsFilePath, excelFilePath, auditor):
+    metaTable = pd.read_excel(excelFilePath, sheet_name = "Meta")
+    dataTable = pd.read_excel(excelFilePath, sheet_name = "Data")
+    dataTable = dataTable[["Idx", "Filename"] + [col for col in dataTable.columns if str(col).startswith("M")]]
+    return measure(auditor, CDExcelMessenger.MergeMetaintoData, dataTable, metaTable)
+
+
+# The benchmark cases, and the sheets of the fixture Excel file that each case needs
+benchmarkCaseDict = {
+    "tidyData": (benchTidyData, ["Compounds", "Meta"]),
+    "updateCDResultsFile": (benchUpdateCDResultsFile, ["Peak"]),
+    "updateExcelFile": (benchUpdateExcelFile, ["Peak", "Data"]),
+    "createCompoundIDColumns": (benchCreateCompoundIDColumns, ["Peak"]),
+    "tagStringToBytes": (benchTagStringToBytes, ["Peak"]),
+    "tagBytesToString": (benchTagBytesToString, ["Peak"]),
+    "CleanupPeakTable": (benchCleanupPeakTable, ["Compounds"]),
+    "validatingDataPeakTables": (benchValidatingDataPeakTables, ["Peak", "Data"]),
+    "MergeMetaintoData": (benchMergeMetaintoData, ["Meta", "Data"]),
+}
+
+
+#####################################################################################
+## Function: runBenchmarkCase()
+#####################################################################################
+'''
+This function runs one benchmark case on copies of the fixture files. It runs in a new spawned worker process of runBenchmarks(),
+so the memory of the process that created the fixtures isn't counted in the peak RSS of the case.
+
+INPUT:
+'caseName' = The name of the benchmark case, see benchmarkCaseDict.
+'cdResultsFilePath' = The path to the fixture CD results file.
+'excelFilePath' = The path to the fixture Excel file.
+'workDir' = The folder to copy the fixture files to.
+
+OUTPUT:
+'result' = A dictionary with the keys 'seconds', 'peakRSSBytes', 'sqlStatements', 'status' ("ok" or "error"), and 'error'.
+'''
+
+def runBenchmarkCase(caseName, cdResultsFilePath, excelFilePath, workDir):
+    result = {"seconds": None, "peakRSSBytes": None, "sqlStatements": None, "status": "ok", "error": None}
+    caseCDResultsFilePath = os.path.join(workDir, caseName+".cdResult")
+    caseExcelFilePath = os.path.join(workDir, caseName+".xlsx")
+    try:
+        shutil.copyfile(cdResultsFilePath, caseCDResultsFilePath)
+        shutil.copyfile(excelFilePath, caseExcelFilePath)
+        auditor = SQLAuditor()
+        seconds, result["peakRSSBytes"] = benchmarkCaseDict[caseName][0](caseCDResultsFilePath, caseExcelFilePath, auditor)
+        result["seconds"] = round(seconds, 6)
+        result["sqlStatements"] = auditor.toDict()["statements"]
+
+    # A failed case doesn't stop the other cases
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+
+    finally:
+        for path in [caseCDResultsFilePath, caseExcelFilePath]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    return result
+
+
+#####################################################################################
+## Function: runBenchmarks()
+#####################################################################################
+'''
+This function benchmarks the entry points and hot helpers of CDExcelMessenger at several scales, using fixtures created by CDExcelFixtures.py.
+Each case runs in its own spawned worker process and records the wall time, the peak RSS while the benchmarked code runs,
+and the number of SQL statements.
+If a case is repeated, the fastest run is kept. The fixtures are deterministic for a given seed, so the results can be compared between runs.
+Excel sheets can only have 16,384 columns, so the cases that need the Data sheet are skipped if there are too many compounds.
+
+INPUT:
+'scaleList' = A list of the numbers of compounds to benchmark (default is [1000, 10000]).
+'caseList' = A list of the benchmark cases to run, see benchmarkCaseDict. If this value is None, all cases are run.
+'sampleCount' = The number of sample files of the fixtures (default is 20).
+'seed' = The seed of the fixtures (default is 0).
+'repeat' = The number of times to run each case (default is 1).
+'outputFilePath' = The path of a JSON file to save the results in (default is None).
+'baselineFilePath' = The path of a JSON file with the results of an earlier run to compare to, see compareBenchmarks() (default is None).
+'threshold' = The fraction that a case can be slower than the baseline before it is a regression (default is 0.1).
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+
+OUTPUT:
+'resultDict' = A dictionary with the environment of the run and a list of 'results', one for each case and scale.
+'report' = A list of messages that can be printed to console if 'verbose' is True, including any regressions.
+'''
+
+def runBenchmarks(scaleList = None, caseList = None, sampleCount = 20, seed = 0, repeat = 1, outputFilePath = None, baselineFilePath = None, threshold = 0.1, verbose = True):
+    workDir = None
+    try:
+        # Validate the arguments
+        if scaleList is None:
+            scaleList = [1000, 10000]
+        if caseList is None:
+            caseList = list(benchmarkCaseDict)
+        if type(scaleList) != list or not all(type(scale) == int and scale > 0 for scale in scaleList):
+            raise TypeError("TypeError", "Make sure 'scaleList' is a list of positive integer values")
+        if type(caseList) != list or not all(case in benchmarkCaseDict for case in caseList):
+            raise ValueError("ValueError", "Make sure 'caseList' is a list of benchmark cases, the cases are "+", ".join(benchmarkCaseDict))
+        if type(repeat) != int or repeat < 1:
+            raise TypeError("TypeError", "Make sure 'repeat' is a positive integer value")
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+        resultDict = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "sampleCount": sampleCount,
+            "seed": seed,
+            "results": [],
+        }
+        report = []
+
+        workDir = tempfile.mkdtemp(prefix="CDExcelBenchmark")
+        for scale in scaleList:
+            if verbose:
+                print("Creating fixtures with "+str(scale)+" compounds")
+            cdResultsFilePath = os.path.join(workDir, "fixture"+str(scale)+".cdResult")
+            excelFilePath = os.path.join(workDir, "fixture"+str(scale)+".xlsx")
+            # The fixtures don't have duplicate compounds, so every row is matched and each case runs its full path
+            CDExcelFixtures.createCDResultsFixture(cdResultsFilePath, scale, sampleCount, seed = seed, duplicateFraction = 0.0, verbose = False)
+            CDExcelFixtures.createWorkbookFixture(excelFilePath, scale, sampleCount, seed = seed, duplicateFraction = 0.0, verbose = False)
+            sheetList = pd.ExcelFile(excelFilePath).sheet_names
+
+            for caseName in caseList:
+                result = {"case": caseName, "compounds": scale}
+                missingSheetList = [sheet for sheet in benchmarkCaseDict[caseName][1] if sheet not in sheetList]
+                if missingSheetList != []:
+                    result.update({"seconds": None, "peakRSSBytes": None, "sqlStatements": None, "status": "skipped",
+                                   "error": "The fixture doesn't have the sheets "+", ".join(missingSheetList)})
+                else:
+                    # Each run gets a new spawned worker process, so neither this process nor an earlier case adds to the peak RSS.
+                    # A forked worker would inherit the RSS of this process, which grows while the fixtures are created
+                    runList = []
+                    for i in range(repeat):
+                        with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                            runList.append(executor.submit(runBenchmarkCase, caseName, cdResultsFilePath, excelFilePath, workDir).result())
+                    okRunList = [run for run in runList if run["status"] == "ok"]
+                    if okRunList == []:
+                        result.update(runList[0])
+                    else:
+                        result.update(min(okRunList, key=lambda run: run["seconds"]))
+                        result["peakRSSBytes"] = max(run["peakRSSBytes"] or 0 for run in okRunList) or None
+
+                resultDict["results"].append(result)
+                if result["status"] == "ok":
+                    message = caseName+" with "+str(scale)+" compounds: "+str(round(result["seconds"], 3))+" seconds, "+str(result["sqlStatements"])+" SQL statements"
+                    if result["peakRSSBytes"] is not None:
+                        message = message+", "+str(round(result["peakRSSBytes"] / 1048576, 1))+" MB peak RSS"
+                else:
+                    message = caseName+" with "+str(scale)+" compounds "+result["status"]+": "+str(result["error"])
+                report.append(message)
+                if verbose:
+                    print(message)
+
+        if outputFilePath is not None:
+            with open(outputFilePath, "w") as outputFile:
+                json.dump(resultDict, outputFile, indent=2)
+            report.append("Saved the results to "+outputFilePath)
+
+        if baselineFilePath is not None:
+            try:
+                with open(baselineFilePath, "r") as baselineFile:
+                    baselineDict = json.load(baselineFile)
+            except FileNotFoundError:
+                raise FileNotFoundError("FileNotFoundError", "Can't find "+baselineFilePath)
+            report = report + compareBenchmarks(resultDict, baselineDict, threshold)
+
+        if verbose:
+            for i in report[len(resultDict["results"]):]:
+                print(i)
+        else:
+            return resultDict, report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+    finally:
+        if workDir is not None:
+            shutil.rmtree(workDir, ignore_errors=True)
+
+
+#####################################################################################
+## Function: compareBenchmarks()
+#####################################################################################
+'''
+This function compares the results of runBenchmarks() to a baseline saved by an earlier run.
+A case is a regression if it is more than 'threshold' slower than the baseline and the difference is more than 'minSeconds',
+if it runs more SQL statements than the baseline, or if its peak RSS is more than 'rssThreshold' higher than the baseline.
+Cases that are faster by more than 'threshold' are reported as improvements.
+
+INPUT:
+'resultDict' = The results of runBenchmarks().
+'baselineDict' = The results of an earlier run of runBenchmarks().
+'threshold' = The fraction that a case can be slower than the baseline before it is a regression (default is 0.1).
+'minSeconds' = The smallest difference in seconds that counts as a regression, so noise in fast cases isn't reported (default is 0.05).
+'rssThreshold' = The fraction that the peak RSS of a case can be higher than the baseline before it is a regression (default is 0.2).
+
+OUTPUT:
+'report' = A list of messages. Each regression starts with "REGRESSION:".
+'''
+
+def compareBenchmarks(resultDict, baselineDict, threshold = 0.1, minSeconds = 0.05, rssThreshold = 0.2):
+    baselineResultDict = {}
+    for result in baselineDict.get("results", []):
+        baselineResultDict[(result["case"], result["compounds"])] = result
+
+    report = []
+    regressionCount = 0
+    for result in resultDict["results"]:
+        baseline = baselineResultDict.get((result["case"], result["compounds"]))
+        if baseline is None or result["status"] != "ok" or baseline.get("status") != "ok":
+            continue
+        name = result["case"]+" with "+str(result["compounds"])+" compounds"
+
+        change = result["seconds"] / baseline["seconds"] - 1 if baseline["seconds"] > 0 else 0
+        if change > threshold and result["seconds"] - baseline["seconds"] > minSeconds:
+            report.append("REGRESSION: "+name+" took "+str(round(result["seconds"], 3))+" seconds, "+str(round(100 * change))+"% slower than the baseline ("+str(round(baseline["seconds"], 3))+" seconds)")
+            regressionCount += 1
+        elif change < -threshold and baseline["seconds"] - result["seconds"] > minSeconds:
+            report.append("Improvement: "+name+" took "+str(round(result["seconds"], 3))+" seconds, "+str(round(-100 * change))+"% faster than the baseline ("+str(round(baseline["seconds"], 3))+" seconds)")
+
+        if result["sqlStatements"] is not None and baseline.get("sqlStatements") is not None and result["sqlStatements"] > baseline["sqlStatements"]:
+            report.append("REGRESSION: "+name+" ran "+str(result["sqlStatements"])+" SQL statements, the baseline ran "+str(baseline["sqlStatements"]))
+            regressionCount += 1
+
+        if result["peakRSSBytes"] is not None and baseline.get("peakRSSBytes") and result["peakRSSBytes"] > baseline["peakRSSBytes"] * (1 + rssThreshold):
+            report.append("REGRESSION: "+name+" peaked at "+str(round(result["peakRSSBytes"] / 1048576, 1))+" MB RSS, the baseline peaked at "+str(round(baseline["peakRSSBytes"] / 1048576, 1))+" MB")
+            regressionCount += 1
+
+    report.append(str(regressionCount)+" regressions compared to the baseline")
+    return report
+
+
+#####################################################################################
+## Function: main()
+#####################################################################################
+'''
+This function is the command line interface of CDExcelBenchmark.py, e.g.
+python CDExcelBenchmark.py --scales 1000 10000 --output baseline.json
+python CDExcelBenchmark.py --scales 1000 10000 --baseline baseline.json --threshold 0.1
+python CDExcelBenchmark.py --cases tagBytesToString tagStringToBytes --scales 100000
+
+INPUT:
+'argList' = A list of command line arguments (default is None), if this value is left as None, sys.argv is used.
+
+OUTPUT:
+'exitCode' = 0 if there were no errors or regressions, otherwise 1.
+'''
+
+def main(argList = None):
+    parser = argparse.ArgumentParser(prog="CDExcelBenchmark", description="Benchmark CDExcelMessenger with synthetic fixtures.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000], help="The numbers of compounds to benchmark")
+    parser.add_argument("--cases", nargs="+", default=None, help="The benchmark cases to run: "+", ".join(benchmarkCaseDict))
+    parser.add_argument("--samples", type=int, default=20, help="The number of sample files of the fixtures")
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the fixtures")
+    parser.add_argument("--repeat", type=int, default=1, help="The number of times to run each case, the fastest run is kept")
+    parser.add_argument("--output", default=None, help="The path of a JSON file to save the results in")
+    parser.add_argument("--baseline", default=None, help="The path of a JSON file with the results of an earlier run to compare to")
+    parser.add_argument("--threshold", type=float, default=0.1, help="The fraction that a case can be slower than the baseline")
+    args = parser.parse_args(argList)
+
+    try:
+        resultDict, report = runBenchmarks(args.scales, args.cases, args.samples, args.seed, args.repeat, args.output, args.baseline, args.threshold, verbose = False)
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    for i in report:
+        print(i)
+    if any(result["status"] == "error" for result in resultDict["results"]) or any(i.startswith("REGRESSION:") for i in report):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
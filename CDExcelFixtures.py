@@ -0,0 +1,588 @@
+#####################################################################################
+## Import Modules
+#####################################################################################
+
+import sqlite3
+import os.path
+import sys
+import argparse
+
+import CDExcelMessenger
+from CDExcelMessenger import LazyModule
+
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+
+# The Tags of the fixtures, the first four are the Tags used to assign MSI levels
+fixtureTagNameList = ["goodRT", "mzVault", "putativeCompound", "putativeClass", "background", "isotope", "adduct", "review"]
+
+# The colsToKeepDict and optionsDict used to create the Peak and Data sheets of the fixture workbooks
+fixtureColsToKeepDict = {
+    "Idx": "Idx",
+    "UID": "UID",
+    "Name": "Name",
+    "Checked": "Checked",
+    "Tags": "Tags",
+    "Formula": "Formula",
+    "RT [min]": "RT",
+    "Calc. MW": "MW",
+    "MS2": "MS2",
+    "# ChemSpider Results": "ChemSpiderRes",
+    "# mzVault Results": "MzVaultRes",
+    "# mzCloud Results": "MzCloudRes",
+    "mzCloud Best Match": "mzCloudMatch",
+    "mzVault Best Match": "mzVaultMatch",
+    "<Mass List Match: >": "mzList_"
+}
+
+fixtureOptionsDict = {
+    "CIMCBlib": True,
+    "MSHit": True,
+    "mzmatch": 70,
+    "UIDPrefix": "M"
+}
+
+# The columns of the compound table, each tuple contains the DB name, display name, CD data type, and whether or not the column can be edited in CD
+fixtureColTupleList = [
+    ("ID", "ID", "Int32", 0),
+    ("Name", "Name", "String", 1),
+    ("Formula", "Formula", "String", 0),
+    ("Checked", "Checked", "Boolean", 1),
+    ("Tags", "Tags", "Binary", 1),
+    ("MolecularWeight", "Calc. MW", "Double", 0),
+    ("RetentionTime", "RT [min]", "Double", 0),
+    ("MSnStatus", "MS2", "String", 0),
+    ("NumberOfChemSpiderResults", "# ChemSpider Results", "Int32", 0),
+    ("NumberOfMzVaultResults", "# mzVault Results", "Int32", 0),
+    ("NumberOfMzCloudResults", "# mzCloud Results", "Int32", 0),
+    ("MzCloudBestMatch", "mzCloud Best Match", "Double", 0),
+    ("MzVaultBestMatch", "mzVault Best Match", "Double", 0),
+    ("MassListMatch", "Mass List Match: Endogenous Metabolites", "String", 0),
+    ("Area", "Area", "Binary", 0),
+]
+
+
+#####################################################################################
+## Function: validateFixtureInput()
+#####################################################################################
+'''
+This function does some basic validation of the user input.
+
+INPUT:
+'compoundCount' = The number of compounds.
+'sampleCount' = The number of sample files.
+'tagCount' = The number of Tags.
+'seed' = The seed of the random number generator.
+'duplicateFraction' = The fraction of compounds that have the same MW and RT as another compound.
+'verbose' = Boolean value that controls the output to the console.
+'''
+
+def validateFixtureInput(compoundCount, sampleCount, tagCount, seed, duplicateFraction, verbose):
+    if type(compoundCount) != int or compoundCount < 1:
+        raise TypeError("TypeError", "Make sure 'compoundCount' is a positive integer value")
+    if type(sampleCount) != int or sampleCount < 1:
+        raise TypeError("TypeError", "Make sure 'sampleCount' is a positive integer value")
+    if type(tagCount) != int or tagCount < 0:
+        raise TypeError("TypeError", "Make sure 'tagCount' is a positive integer value or 0")
+    if type(seed) != int:
+        raise TypeError("TypeError", "Make sure 'seed' is an integer value")
+    if type(duplicateFraction) not in [int, float] or duplicateFraction < 0 or duplicateFraction > 0.5:
+        raise ValueError("ValueError", "Make sure 'duplicateFraction' is a number between 0 and 0.5")
+    if type(verbose) != bool:
+        raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+
+#####################################################################################
+## Function: validateFixtureBatches()
+#####################################################################################
+'''
+This function makes sure every batch of a fixture has at least 3 QCs, so tidyData() can create the Peak and Data sheets,
+see createFixtureMetaTable().
+
+INPUT:
+'sampleCount' = The number of sample files.
+'batchCount' = The number of batches.
+'''
+
+def validateFixtureBatches(sampleCount, batchCount):
+    if type(batchCount) != int or batchCount < 1:
+        raise TypeError("TypeError", "Make sure 'batchCount' is a positive integer value")
+    if batchCount > sampleCount:
+        raise ValueError("ValueError", "Make sure 'batchCount' isn't larger than 'sampleCount'")
+
+    metaTable = createFixtureMetaTable(sampleCount, batchCount)
+    qcCountSeries = metaTable[metaTable["SampleType"] == "QC"].groupby("Batch").size().reindex(range(1, batchCount + 1), fill_value=0)
+    if qcCountSeries.min() < 3:
+        raise ValueError("ValueError", "Make sure each batch has at least 12 injections, tidyData() needs 3 QCs in each batch and batch "
+                         +str(int(qcCountSeries.idxmin()))+" of "+str(sampleCount)+" injections in "+str(batchCount)+" batches only has "+str(int(qcCountSeries.min()))+" QCs")
+
+
+#####################################################################################
+## Function: getFixtureTagNames()
+#####################################################################################
+'''
+This function gets the names of the Tags of a fixture.
+
+INPUT:
+'tagCount' = The number of Tags.
+
+OUTPUT:
+'tagNameList' = A list of Tag names.
+'''
+
+def getFixtureTagNames(tagCount):
+    tagNameList = fixtureTagNameList[:tagCount]
+    for i in range(len(tagNameList), tagCount):
+        tagNameList.append("Tag "+str(i + 1))
+
+    return tagNameList
+
+
+#####################################################################################
+## Function: createFixtureMetaTable()
+#####################################################################################
+'''
+This function creates the Meta table of a fixture. A Blank is run first and last, every fourth injection is a QC,
+the injection before the last Blank is a QC, and the other injections are Samples. The injections are split evenly into batches,
+tidyData() needs at least 3 QCs in each batch, so each batch should have at least 12 injections.
+
+INPUT:
+'sampleCount' = The number of sample files.
+'batchCount' = The number of batches.
+
+OUTPUT:
+'metaTable' = The Meta table as a dataframe.
+'''
+
+def createFixtureMetaTable(sampleCount, batchCount):
+    sampleTypeList = []
+    for i in range(sampleCount):
+        if sampleCount > 2 and i in [0, sampleCount - 1]:
+            sampleTypeList.append("Blank")
+        elif i % 4 == 1 or i == sampleCount - 2:
+            sampleTypeList.append("QC")
+        else:
+            sampleTypeList.append("Sample")
+
+    metaTable = pd.DataFrame({
+        "Filename": ["S"+str(i + 1).zfill(4)+".raw" for i in range(sampleCount)],
+        "SampleType": sampleTypeList,
+        "SampleID": [sampleTypeList[i]+str(i + 1).zfill(4) for i in range(sampleCount)],
+        "Order": list(range(1, sampleCount + 1)),
+        "Batch": [i * batchCount // sampleCount + 1 for i in range(sampleCount)],
+    })
+
+    return metaTable
+
+
+#####################################################################################
+## Function: createFixtureValues()
+#####################################################################################
+'''
+This function creates the values of the compounds of a fixture. All values come from one seeded random number generator,
+so the same arguments always create the same values.
+The MWs follow a log-normal distribution around 300 Da, the RTs are skewed towards the start of a 20 minute run,
+and 'duplicateFraction' of the compounds have the same MW and RT as another compound, like the duplicates CD can report.
+The areas drift with the injection order, QCs vary less than Samples, Blanks are low, and about 5% of the areas are missing.
+
+INPUT:
+'compoundCount' = The number of compounds.
+'sampleCount' = The number of sample files.
+'tagCount' = The number of Tags.
+'seed' = The seed of the random number generator.
+'duplicateFraction' = The fraction of compounds that have the same MW and RT as another compound.
+'metaTable' = The Meta table created by createFixtureMetaTable().
+
+OUTPUT:
+'valueDict' = A dictionary with the display names of the columns as the keys, and arrays of values as the values.
+    The areas are under "Area" as a compound x sample array, and the Tags are under "Tags" as a compound x Tag array of booleans.
+'''
+
+def createFixtureValues(compoundCount, sampleCount, tagCount, seed, duplicateFraction, metaTable):
+    rng = np.random.default_rng(seed)
+    valueDict = {}
+
+    valueDict["ID"] = np.arange(1, compoundCount + 1)
+
+    # MWs between 60 and 1500 Da, and RTs between 0.5 and 20 minutes
+    mwArray = np.clip(rng.lognormal(np.log(300), 0.45, compoundCount), 60, 1500).round(5)
+    rtArray = (0.5 + 19.5 * rng.beta(1.5, 2.5, compoundCount)).round(3)
+
+    # Copy the MW and RT of another compound to the duplicates
+    duplicateCount = int(compoundCount * duplicateFraction)
+    if duplicateCount > 0 and compoundCount > 1:
+        duplicateIndexArray = rng.choice(compoundCount, duplicateCount, replace=False)
+        sourceIndexArray = rng.integers(0, compoundCount, duplicateCount)
+        mwArray[duplicateIndexArray] = mwArray[sourceIndexArray]
+        rtArray[duplicateIndexArray] = rtArray[sourceIndexArray]
+    valueDict["Calc. MW"] = mwArray
+    valueDict["RT [min]"] = rtArray
+
+    # About a third of the compounds are named, a few with a CIMCB library ID
+    nameTypeArray = rng.random(compoundCount)
+    nameList = []
+    for i in range(compoundCount):
+        if nameTypeArray[i] < 0.05:
+            nameList.append("ECU"+str(i % 10000).zfill(4)+"_Compound "+str(i + 1))
+        elif nameTypeArray[i] < 0.35:
+            nameList.append("Compound "+str(i + 1))
+        else:
+            nameList.append("")
+    valueDict["Name"] = np.array(nameList, dtype=object)
+
+    carbonArray = np.maximum(1, (mwArray / 14).astype(int))
+    valueDict["Formula"] = np.array(["C"+str(carbonArray[i])+" H"+str(2 * carbonArray[i])+" O"+str(i % 7 + 1) for i in range(compoundCount)], dtype=object)
+    valueDict["Checked"] = rng.random(compoundCount) < 0.02
+
+    valueDict["MS2"] = rng.choice(np.array(["DDA for preferred ion", "DDA for other ion", "No MS2"], dtype=object), compoundCount, p=[0.4, 0.2, 0.4])
+    valueDict["# ChemSpider Results"] = rng.poisson(2, compoundCount)
+    valueDict["# mzVault Results"] = rng.poisson(0.5, compoundCount)
+    valueDict["# mzCloud Results"] = rng.poisson(1, compoundCount)
+
+    # Compounds without results don't have a best match
+    valueDict["mzCloud Best Match"] = np.where(valueDict["# mzCloud Results"] > 0, (100 * rng.beta(5, 2, compoundCount)).round(1), np.nan)
+    valueDict["mzVault Best Match"] = np.where(valueDict["# mzVault Results"] > 0, (100 * rng.beta(5, 2, compoundCount)).round(1), np.nan)
+    valueDict["Mass List Match: Endogenous Metabolites"] = rng.choice(np.array(["Full match", "Partial match", "No matches found"], dtype=object), compoundCount, p=[0.15, 0.1, 0.75])
+
+    # Each Tag is checked for about a tenth of the compounds
+    valueDict["Tags"] = rng.random((compoundCount, tagCount)) < 0.1
+
+    # Each compound has a base area and a drift over the run, the noise depends on the sample type
+    baseArray = rng.lognormal(12, 2, compoundCount)
+    driftArray = rng.normal(0, 0.3, compoundCount)
+    orderArray = (metaTable["Order"].to_numpy() - 1) / max(1, sampleCount - 1) - 0.5
+    sampleTypeArray = metaTable["SampleType"].to_numpy()
+    noiseArray = np.where(sampleTypeArray == "QC", 0.1, 0.4)
+    areaArray = baseArray[:, None] * np.exp(driftArray[:, None] * orderArray[None, :]) * rng.lognormal(0, 1, (compoundCount, sampleCount)) ** noiseArray[None, :]
+    areaArray[:, sampleTypeArray == "Blank"] *= 0.02
+    areaArray[rng.random((compoundCount, sampleCount)) < 0.05] = np.nan
+    valueDict["Area"] = areaArray.round(2)
+
+    return valueDict
+
+
+#####################################################################################
+## Function: createCDResultsFixture()
+#####################################################################################
+'''
+This function creates a synthetic CD results file that is compatible with CDExcelMessenger.
+It has the tables checked by validateCDResultsFile(), the compound table, the Tags, and the sample files.
+Like a file created by CD, the compound table has no index on MolecularWeight and RetentionTime. The areas are stored as CD stores them, one 8 byte double and one flag byte for each sample file.
+The file is deterministic for a given seed, so it can be used to benchmark CDExcelMessenger offline.
+An existing file at 'cdResultsFilePath' is replaced.
+
+INPUT:
+'cdResultsFilePath' = The path of the CD results file to create.
+'compoundCount' = The number of compounds (default is 1000).
+'sampleCount' = The number of sample files (default is 20).
+'tagCount' = The number of Tags (default is 4).
+'seed' = The seed of the random number generator (default is 0).
+'duplicateFraction' = The fraction of compounds that have the same MW and RT as another compound (default is 0).
+'batchCount' = The number of batches (default is 1).
+'chunkSize' = The number of compounds to insert at a time (default is 50000).
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def createCDResultsFixture(cdResultsFilePath, compoundCount = 1000, sampleCount = 20, tagCount = 4, seed = 0, duplicateFraction = 0, batchCount = 1, chunkSize = 50000, verbose = True):
+    conn = None
+    try:
+        validateFixtureInput(compoundCount, sampleCount, tagCount, seed, duplicateFraction, verbose)
+        if type(cdResultsFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
+
+        if verbose:
+            print("Creating values")
+        metaTable = createFixtureMetaTable(sampleCount, batchCount)
+        valueDict = createFixtureValues(compoundCount, sampleCount, tagCount, seed, duplicateFraction, metaTable)
+        tagNameList = getFixtureTagNames(tagCount)
+
+        if os.path.exists(cdResultsFilePath):
+            os.remove(cdResultsFilePath)
+        conn = sqlite3.connect(cdResultsFilePath)
+        cursor = conn.cursor()
+
+        if verbose:
+            print("Creating "+cdResultsFilePath)
+        cursor.execute("CREATE TABLE CustomDataTypes (Value INTEGER PRIMARY KEY, Name TEXT);")
+        cdDataTypeDict = {"Binary": 1, "String": 2, "Double": 3, "Int32": 4, "Int64": 5, "Boolean": 6}
+        cursor.executemany("INSERT INTO CustomDataTypes (Value, Name) VALUES ((?), (?));", [(value, name) for name, value in cdDataTypeDict.items()])
+
+        cursor.execute("CREATE TABLE DataTypes (DataTypeID INTEGER PRIMARY KEY, TableName TEXT);")
+        cursor.executemany("INSERT INTO DataTypes (DataTypeID, TableName) VALUES ((?), (?));", [(1, "WorkflowInputFiles"), (7, "ConsolidatedUnknownCompoundItems")])
+
+        cursor.execute("CREATE TABLE DataTypesColumns (DataTypeID INTEGER, DBColumnName TEXT, CustomDataType INTEGER, Nullable INTEGER, ValueType TEXT, \
+                        Creator INTEGER, Finalizer INTEGER, Property_Guid TEXT, Property_DisplayName TEXT, Property_Description TEXT, \
+                        Property_FormatString TEXT, Property_SortDirection INTEGER, Property_SemanticDescription TEXT, \
+                        Grid_DataVisibility INTEGER, Grid_VisiblePosition INTEGER, Grid_ColumnWidth INTEGER, \
+                        Grid_GridCellControlGuid TEXT, Grid_AllowEdit INTEGER, Grid_Background INTEGER);")
+        for position, (colDBName, colDisplayName, dataType, allowEdit) in enumerate(fixtureColTupleList):
+            cursor.execute("INSERT INTO DataTypesColumns (DataTypeID, DBColumnName, CustomDataType, Nullable, ValueType, Creator, Finalizer, \
+                            Property_Guid, Property_DisplayName, Property_Description, Property_FormatString, Property_SortDirection, \
+                            Property_SemanticDescription, Grid_DataVisibility, Grid_VisiblePosition, Grid_ColumnWidth, \
+                            Grid_GridCellControlGuid, Grid_AllowEdit, Grid_Background) \
+                            VALUES (7, (?), (?), 1, '', 0, -1, '', (?), '', '', 1, '', 4, (?), -1, '', (?), 0);",
+                            (colDBName, cdDataTypeDict[dataType], colDisplayName, position, allowEdit))
+
+        colDefList = []
+        for colDBName, colDisplayName, dataType, allowEdit in fixtureColTupleList:
+            sqlType = {"Binary": "BLOB", "String": "TEXT", "Double": "REAL"}.get(dataType, "INTEGER")
+            colDefList.append(colDBName+" "+sqlType+(" PRIMARY KEY" if colDBName == "ID" else ""))
+        cursor.execute("CREATE TABLE ConsolidatedUnknownCompoundItems ("+", ".join(colDefList)+");")
+
+        # The Tags are all visible in CD
+        cursor.execute("CREATE TABLE DataDistributionBoxes (BoxID INTEGER PRIMARY KEY, Name TEXT, Description TEXT);")
+        cursor.execute("CREATE TABLE DataDistributionBoxExtendedData (BoxID INTEGER, Name TEXT, ValueString TEXT);")
+        for i in range(tagCount):
+            cursor.execute("INSERT INTO DataDistributionBoxes (BoxID, Name, Description) VALUES ((?), (?), '');", (i + 1, tagNameList[i]))
+            cursor.execute("INSERT INTO DataDistributionBoxExtendedData (BoxID, Name, ValueString) VALUES ((?), 'EntityItemTagVisibility', 'True');", (i + 1, ))
+
+        cursor.execute("CREATE TABLE WorkflowInputFiles (FileID INTEGER PRIMARY KEY, FileName TEXT);")
+        cursor.executemany("INSERT INTO WorkflowInputFiles (FileID, FileName) VALUES ((?), (?));",
+                           [(i + 1, "C:\\Data\\"+metaTable.at[i, "Filename"]) for i in range(sampleCount)])
+
+        if verbose:
+            print("Inserting "+str(compoundCount)+" compounds")
+        # Each area is stored as a little-endian double followed by a flag byte, the flag is 0 if the area is missing
+        areaRecordArray = np.zeros((compoundCount, sampleCount), dtype=[("area", "<f8"), ("flag", "u1")])
+        areaRecordArray["area"] = np.nan_to_num(valueDict["Area"])
+        areaRecordArray["flag"] = ~np.isnan(valueDict["Area"])
+
+        # Each Tag is stored as two bytes, both are 1 if the Tag is checked
+        tagByteArray = np.repeat(valueDict["Tags"].astype(np.uint8), 2, axis=1)
+
+        colDBNameList = [colTuple[0] for colTuple in fixtureColTupleList]
+        sql = "INSERT INTO ConsolidatedUnknownCompoundItems ("+", ".join(colDBNameList)+") VALUES ("+", ".join(["(?)"] * len(colDBNameList))+");"
+        for start in range(0, compoundCount, chunkSize):
+            end = min(compoundCount, start + chunkSize)
+            colValueList = []
+            for colDBName, colDisplayName, dataType, allowEdit in fixtureColTupleList:
+                if colDBName == "Area":
+                    colValueList.append([areaRecordArray[i].tobytes() for i in range(start, end)])
+                elif colDBName == "Tags":
+                    colValueList.append([tagByteArray[i].tobytes() for i in range(start, end)])
+                else:
+                    colValueList.append([None if pd.isna(value) else value for value in valueDict[colDisplayName][start:end].tolist()])
+            cursor.executemany(sql, zip(*colValueList))
+
+        conn.commit()
+        conn.close()
+        conn = None
+
+        report = ["Created "+cdResultsFilePath+" with "+str(compoundCount)+" compounds, "+str(sampleCount)+" sample files, and "+str(tagCount)+" Tags (seed "+str(seed)+")"]
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        if conn is not None:
+            conn.close()
+
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: createWorkbookFixture()
+#####################################################################################
+'''
+This function creates a synthetic Excel file that matches the CD results file created by createCDResultsFixture() with the same arguments.
+The Compounds sheet is in the format exported by CD, the Meta sheet describes the sample files,
+and the Peak and Data sheets are created from them with tidyFrames(), using fixtureColsToKeepDict and fixtureOptionsDict.
+Excel sheets can only have 16,384 columns, so the Data sheet is left out if there are too many compounds,
+and the Compounds, Peak, and Data sheets are left out if there are more than 1,048,575 compounds.
+
+INPUT:
+'excelFilePath' = The path of the Excel file to create.
+'compoundCount' = The number of compounds (default is 1000).
+'sampleCount' = The number of sample files (default is 20).
+'tagCount' = The number of Tags (default is 4).
+'seed' = The seed of the random number generator (default is 0).
+'duplicateFraction' = The fraction of compounds that have the same MW and RT as another compound (default is 0).
+'batchCount' = The number of batches (default is 1).
+'sheetList' = A list of the sheets to create, from "Compounds", "Meta", "Peak", and "Data" (default is all four).
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def createWorkbookFixture(excelFilePath, compoundCount = 1000, sampleCount = 20, tagCount = 4, seed = 0, duplicateFraction = 0, batchCount = 1, sheetList = None, verbose = True):
+    try:
+        validateFixtureInput(compoundCount, sampleCount, tagCount, seed, duplicateFraction, verbose)
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+        if sheetList is None:
+            sheetList = ["Compounds", "Meta", "Peak", "Data"]
+        if type(sheetList) != list or not all(sheet in ["Compounds", "Meta", "Peak", "Data"] for sheet in sheetList):
+            raise ValueError("ValueError", "Make sure 'sheetList' is a list of \"Compounds\", \"Meta\", \"Peak\", or \"Data\"")
+        if "Peak" in sheetList or "Data" in sheetList:
+            validateFixtureBatches(sampleCount, batchCount)
+
+        if verbose:
+            print("Creating values")
+        metaTable = createFixtureMetaTable(sampleCount, batchCount)
+        valueDict = createFixtureValues(compoundCount, sampleCount, tagCount, seed, duplicateFraction, metaTable)
+        tagNameList = getFixtureTagNames(tagCount)
+
+        # Create the Compounds table in the format exported by CD, with an Area column for each sample file
+        compDict = {}
+        for colDBName, colDisplayName, dataType, allowEdit in fixtureColTupleList:
+            if colDBName == "Tags":
+                compDict["Tags"] = [";".join([tagNameList[j] for j in np.flatnonzero(tagRow)]) for tagRow in valueDict["Tags"]]
+            elif colDBName not in ["ID", "Area"]:
+                compDict[colDisplayName] = valueDict[colDisplayName]
+        for i in range(sampleCount):
+            compDict["Area: "+metaTable.at[i, "Filename"]+" (F"+str(i + 1)+")"] = valueDict["Area"][:, i]
+        compTable = pd.DataFrame(compDict)
+
+        report = []
+        sheetDict = {}
+        if "Meta" in sheetList:
+            sheetDict["Meta"] = metaTable
+        if compoundCount > 1048575:
+            report.append("WARNING: "+str(compoundCount)+" compounds don't fit on an Excel sheet, only the Meta sheet was created")
+        else:
+            if "Compounds" in sheetList:
+                sheetDict["Compounds"] = compTable
+            if "Peak" in sheetList or "Data" in sheetList:
+                if verbose:
+                    print("Creating Peak sheet and Data sheet")
+                dataTable, peakTable, tidyReport, stats = CDExcelMessenger.tidyFrames(compTable, metaTable, fixtureColsToKeepDict, fixtureOptionsDict, verbose = False)
+                if "Peak" in sheetList:
+                    sheetDict["Peak"] = peakTable
+                if "Data" in sheetList:
+                    if len(dataTable.columns) > 16384:
+                        report.append("WARNING: the Data sheet would have "+str(len(dataTable.columns))+" columns, which doesn't fit on an Excel sheet, Data sheet skipped")
+                    else:
+                        sheetDict["Data"] = dataTable
+
+        if verbose:
+            print("Saving "+excelFilePath)
+        with pd.ExcelWriter(excelFilePath, engine="openpyxl") as writer:
+            for sheet in ["Compounds", "Meta", "Peak", "Data"]:
+                if sheet in sheetDict:
+                    sheetDict[sheet].to_excel(writer, sheet_name=sheet, index=False)
+
+        report.append("Created "+excelFilePath+" with the sheets "+", ".join(sheetDict)+" (seed "+str(seed)+")")
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # If permission to the Excel file was denied
+    except PermissionError:
+        if verbose:
+            print("Couldn't gain permission to "+excelFilePath+". Make sure the file is not open in another program")
+        else:
+            raise PermissionError("PermissionError", "Couldn't gain permission to "+excelFilePath+". Make sure the file is not open in another program")
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: createFixtures()
+#####################################################################################
+'''
+This function creates a CD results file and an Excel file that match each other, see createCDResultsFixture() and createWorkbookFixture().
+
+INPUT:
+'cdResultsFilePath' = The path of the CD results file to create.
+'excelFilePath' = The path of the Excel file to create.
+'compoundCount' = The number of compounds (default is 1000).
+'sampleCount' = The number of sample files (default is 20).
+'tagCount' = The number of Tags (default is 4).
+'seed' = The seed of the random number generator (default is 0).
+'duplicateFraction' = The fraction of compounds that have the same MW and RT as another compound (default is 0).
+'batchCount' = The number of batches (default is 1).
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def createFixtures(cdResultsFilePath, excelFilePath, compoundCount = 1000, sampleCount = 20, tagCount = 4, seed = 0, duplicateFraction = 0, batchCount = 1, verbose = True):
+    try:
+        report = createCDResultsFixture(cdResultsFilePath, compoundCount, sampleCount, tagCount, seed, duplicateFraction, batchCount, verbose = False)
+        report = report + createWorkbookFixture(excelFilePath, compoundCount, sampleCount, tagCount, seed, duplicateFraction, batchCount, verbose = False)
+
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: main()
+#####################################################################################
+'''
+This function is the command line interface of CDExcelFixtures.py, e.g.
+python CDExcelFixtures.py fixture.cdResult fixture.xlsx --compounds 100000 --samples 40 --tags 8 --seed 1
+
+INPUT:
+'argList' = A list of command line arguments (default is None), if this value is left as None, sys.argv is used.
+
+OUTPUT:
+'exitCode' = 0 if the fixtures were created, otherwise 1.
+'''
+
+def main(argList = None):
+    parser = argparse.ArgumentParser(prog="CDExcelFixtures", description="Create a synthetic CD results file and a matching Excel file.")
+    parser.add_argument("cdResultsFilePath", help="The path of the CD results file to create")
+    parser.add_argument("excelFilePath", nargs="?", default=None, help="The path of the Excel file to create, no Excel file is created if left out")
+    parser.add_argument("--compounds", type=int, default=1000, help="The number of compounds")
+    parser.add_argument("--samples", type=int, default=20, help="The number of sample files")
+    parser.add_argument("--tags", type=int, default=4, help="The number of Tags")
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the random number generator")
+    parser.add_argument("--duplicates", type=float, default=0.0, help="The fraction of compounds with the same MW and RT as another compound, these can't be matched by updateExcelFile()")
+    parser.add_argument("--batches", type=int, default=1, help="The number of batches")
+    args = parser.parse_args(argList)
+
+    try:
+        # The Excel file is checked before the CD results file is created
+        if args.excelFilePath is not None:
+            validateFixtureBatches(args.samples, args.batches)
+        report = createCDResultsFixture(args.cdResultsFilePath, args.compounds, args.samples, args.tags, args.seed, args.duplicates, args.batches, verbose = False)
+        if args.excelFilePath is not None:
+            report = report + createWorkbookFixture(args.excelFilePath, args.compounds, args.samples, args.tags, args.seed, args.duplicates, args.batches, verbose = False)
+
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    for i in report:
+        print(i)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
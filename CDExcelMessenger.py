@@ -4,10 +4,420 @@
 
 import sqlite3
 import os.path
+import sys
+import argparse
+import concurrent.futures
 import re
-import pandas as pd
+import time
+import hashlib
+import json
+import zipfile
+import urllib.request
+import xml.etree.ElementTree as ET
+import importlib
+import cProfile
+import tracemalloc
+
+
+#####################################################################################
+## Class: LazyModule
+#####################################################################################
+'''
+This class defers the import of a module until one of its attributes is used.
+pandas (and openpyxl through pandas) take a long time to import, and the command line interface 
+doesn't need them for --help, validation, or schema inspection.
+
+INPUT:
+'moduleName' = The name of the module to import.
+'''
+
+class LazyModule:
+    def __init__(self, moduleName):
+        self.moduleName = moduleName
+        self.module = None
+
+    def __getattr__(self, name):
+        if self.module is None:
+            self.module = importlib.import_module(self.moduleName)
+        return getattr(self.module, name)
+
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
    
 
+#####################################################################################
+## Class: PhaseTimer
+#####################################################################################
+'''
+This class times the phases of a run, and counts the rows, cells, and bytes processed in each phase.
+Only time.perf_counter() is called when a phase starts or stops, so a PhaseTimer can be left on for every run.
+Pass a new PhaseTimer to the 'timer' argument of a function for each run. The phases can be read from
+toDict() after the run, and a summary is added to the report of the function.
+The run can also be profiled with cProfile and tracemalloc. Profiling slows the run down, so it is off by default.
+
+INPUT:
+'logFilePath' = The path of a file to append the timings of each run to as a line of JSON. If this value is None,
+    the timings aren't logged.
+'profileFilePath' = The path of a .prof file to save the cProfile stats of the run to, it can be read with pstats or snakeviz.
+    If this value is None, the run isn't profiled (default is None).
+'topAllocations' = The number of lines that allocated the most memory during the run to report, using tracemalloc.
+    The peak memory of each phase is also reported. If this value is 0, memory isn't traced (default is 0).
+    Only two snapshots are taken, when the run begins and when it ends, so the phases don't add to the overhead,
+    but tracing every allocation still makes the run about 2 to 5 times slower.
+'auditSQL' = Boolean value that controls whether or not the SQL statements run on the CD results file are counted
+    and their query plans checked, see SQLAuditor (default is False).
+'''
+
+class PhaseTimer:
+    def __init__(self, logFilePath = None, profileFilePath = None, topAllocations = 0, auditSQL = False):
+        if type(topAllocations) != int or topAllocations < 0:
+            raise TypeError("TypeError", "Make sure 'topAllocations' is a positive integer value or 0")
+        self.logFilePath = logFilePath
+        self.profileFilePath = profileFilePath
+        self.topAllocations = topAllocations
+        self.auditSQL = auditSQL
+        self.auditor = None
+        self.profiler = None
+        self.snapshot = None
+        self.allocationList = None
+        self.startedTracing = False
+        self.functionName = None
+        self.depth = 0
+        self.startTime = None
+        self.seconds = 0.0
+        self.phaseDict = {}
+        self.currentPhase = None
+        self.phaseStartTime = None
+
+    # Start timing a run, the phases of functions called by the first function are added to the same run
+    def begin(self, functionName):
+        if self.depth == 0:
+            self.functionName = functionName
+            if self.auditSQL:
+                self.auditor = SQLAuditor()
+                SQLAuditor.active = self.auditor
+            if self.topAllocations > 0:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self.startedTracing = True
+                self.snapshot = self.takeSnapshot()
+            if self.profileFilePath is not None:
+                self.profiler = cProfile.Profile()
+                self.profiler.enable()
+            self.startTime = time.perf_counter()
+        self.depth += 1
+
+    # Stop the current phase and start timing a new one, the time is added to the phase if it has been timed before
+    def phase(self, phaseName):
+        self.stop()
+        if phaseName not in self.phaseDict:
+            self.phaseDict[phaseName] = {"phase": phaseName, "seconds": 0.0, "rows": 0, "cells": 0, "bytes": 0}
+        self.currentPhase = phaseName
+        if self.auditor is not None:
+            self.auditor.phaseName = phaseName
+
+        # The peak memory of the phase is measured from when it starts
+        if self.snapshot is not None:
+            tracemalloc.reset_peak()
+        self.phaseStartTime = time.perf_counter()
+
+    # Take a tracemalloc snapshot, without the memory used by tracemalloc itself
+    def takeSnapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+    # Pause the profiler, so the snapshots don't show up in the profile
+    def pauseProfiler(self, paused):
+        if self.profiler is not None:
+            if paused:
+                self.profiler.disable()
+            else:
+                self.profiler.enable()
+
+    # Count the rows, cells, and bytes processed in the current phase
+    def count(self, rows = 0, cells = 0, bytes = 0):
+        if self.currentPhase is not None:
+            self.phaseDict[self.currentPhase]["rows"] += int(rows)
+            self.phaseDict[self.currentPhase]["cells"] += int(cells)
+            self.phaseDict[self.currentPhase]["bytes"] += int(bytes)
+
+    # Stop the current phase, if a phase runs more than once its peak memory is the highest peak
+    def stop(self):
+        if self.currentPhase is not None:
+            phase = self.phaseDict[self.currentPhase]
+            phase["seconds"] += time.perf_counter() - self.phaseStartTime
+            if self.snapshot is not None:
+                phase["peakMemoryBytes"] = max(phase.get("peakMemoryBytes", 0), tracemalloc.get_traced_memory()[1])
+            self.currentPhase = None
+
+    # Get the lines that allocated the most memory since the run began, from the memory that is still allocated
+    def addAllocations(self):
+        self.allocationList = []
+        for stat in self.takeSnapshot().compare_to(self.snapshot, "lineno"):
+            if stat.size_diff <= 0:
+                continue
+            self.allocationList.append({"location": str(stat.traceback[0]), "bytes": stat.size_diff, "blocks": stat.count_diff})
+            if len(self.allocationList) >= self.topAllocations:
+                break
+        self.snapshot = None
+
+    # Stop timing the run, log the timings, and return a summary for the report
+    # Nothing is returned to the functions called by the first function
+    def end(self):
+        self.depth -= 1
+        if self.depth > 0:
+            return []
+        self.finish()
+
+        if self.logFilePath is not None:
+            with open(self.logFilePath, "a") as logFile:
+                logFile.write(json.dumps(self.toDict())+"\n")
+
+        return self.getReport()
+
+    # Stop timing a run that failed, so it isn't profiled after the error
+    # The profile is still saved, the timings aren't logged
+    def abort(self):
+        if self.depth > 0:
+            self.depth = 0
+            self.finish()
+
+    # Stop the current phase, the profiler, and the memory tracing
+    def finish(self):
+        self.stop()
+        self.seconds = time.perf_counter() - self.startTime
+        if self.snapshot is not None:
+            self.pauseProfiler(True)
+            self.addAllocations()
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profileFilePath)
+            self.profiler = None
+        if self.startedTracing:
+            tracemalloc.stop()
+            self.startedTracing = False
+        if self.auditor is not None and SQLAuditor.active is self.auditor:
+            SQLAuditor.active = None
+            self.auditor.explain()
+
+    # Get the timings as a dictionary, with the throughput of each phase
+    def toDict(self):
+        phaseList = []
+        for phase in self.phaseDict.values():
+            phase = dict(phase)
+            phase["seconds"] = round(phase["seconds"], 6)
+            for unit in ["rows", "cells", "bytes"]:
+                if phase["seconds"] > 0 and phase[unit] > 0:
+                    phase[unit+"PerSecond"] = round(phase[unit] / phase["seconds"], 1)
+            phaseList.append(phase)
+
+        timingDict = {"function": self.functionName, "time": time.strftime("%Y-%m-%d %H:%M:%S"), "seconds": round(self.seconds, 6), "phases": phaseList}
+        if self.allocationList is not None:
+            timingDict["allocations"] = self.allocationList
+        if self.auditor is not None:
+            timingDict["sql"] = self.auditor.toDict()
+
+        return timingDict
+
+    # Get a summary of the timings that can be printed to console
+    def getReport(self):
+        report = []
+        for phase in self.toDict()["phases"]:
+            message = "Timing: "+phase["phase"]+" took "+str(round(phase["seconds"], 3))+" seconds"
+            countList = []
+            for unit in ["rows", "cells", "bytes"]:
+                if phase[unit] > 0:
+                    countList.append(str(phase[unit])+" "+unit)
+            if "rowsPerSecond" in phase:
+                countList.append(str(round(phase["rowsPerSecond"]))+" rows/second")
+            if countList != []:
+                message = message+" ("+", ".join(countList)+")"
+            report.append(message)
+            if "peakMemoryBytes" in phase:
+                report.append("Memory: "+phase["phase"]+" peaked at "+self.formatBytes(phase["peakMemoryBytes"]))
+        report.append("Timing: "+str(self.functionName)+" took "+str(round(self.seconds, 3))+" seconds in total")
+        if self.allocationList is not None:
+            report.append("Memory: the lines that allocated the most memory that was still allocated at the end of the run")
+            for allocation in self.allocationList:
+                report.append("    "+self.formatBytes(allocation["bytes"])+" in "+str(allocation["blocks"])+" blocks at "+allocation["location"])
+        if self.profileFilePath is not None:
+            report.append("Profile saved to "+self.profileFilePath)
+        if self.auditor is not None:
+            report = report + self.auditor.getReport()
+
+        return report
+
+    # Format a number of bytes as KB or MB
+    def formatBytes(self, byteCount):
+        if byteCount < 1048576:
+            return str(round(byteCount / 1024, 1))+" KB"
+        return str(round(byteCount / 1048576, 1))+" MB"
+
+
+#####################################################################################
+## Class: SQLAuditor
+#####################################################################################
+'''
+This class counts the SQL statements run on the CD results file by their shape, and checks the query plan of each shape.
+The shape of a statement is the statement with its values replaced by ?, so the statements run for each row are counted together.
+Every connection opened by connectToCDResultsFile() while an SQLAuditor is active is watched with sqlite3's trace callback,
+and its cursors are AuditedCursors, which time each execute and fetch call and add the time to the shape of the statement.
+So the time of a shape only includes the time spent in SQLite, not the Python code run between statements.
+Connections opened in another way can also be watched with watch(), but their statements are only counted.
+When the run ends, EXPLAIN QUERY PLAN is run once for each shape, and the shapes that scan a whole table are flagged.
+An SQLAuditor is created by a PhaseTimer with 'auditSQL' set to True, see PhaseTimer.
+'''
+
+class SQLAuditor:
+    # The SQLAuditor of the run that is being timed, or None
+    active = None
+
+    def __init__(self):
+        self.shapeDict = {}
+        self.lastShape = None
+        self.phaseName = None
+        self.filePath = None
+
+    # Watch the statements run on a connection to a CD results file
+    def watch(self, conn, cdResultsFilePath):
+        if self.filePath is None:
+            self.filePath = cdResultsFilePath
+        conn.set_trace_callback(self.trace)
+        if isinstance(conn, AuditedConnection):
+            conn.auditor = self
+
+    # Count a statement
+    def trace(self, statement):
+        shape = self.getShape(statement)
+        if shape not in self.shapeDict:
+            self.shapeDict[shape] = {"shape": shape, "count": 0, "seconds": 0.0, "phase": self.phaseName, "example": statement, "plan": None, "scans": []}
+        self.shapeDict[shape]["count"] += 1
+        self.lastShape = shape
+
+    # Time a call to an AuditedCursor, the time is added to the shape of the statement the call ran,
+    # or for fetch calls to the shape of the last statement the cursor ran
+    def timeCall(self, cursor, method, *args):
+        self.lastShape = None
+        startTime = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            seconds = time.perf_counter() - startTime
+            if self.lastShape is not None:
+                cursor.shape = self.lastShape
+            if cursor.shape is not None:
+                self.shapeDict[cursor.shape]["seconds"] += seconds
+
+    # Replace the values in a statement with ?, and the lists of values with ...
+    def getShape(self, statement):
+        shape = re.sub(r"[xX]'[0-9a-fA-F]*'", "?", statement)
+        shape = re.sub(r"'(?:[^']|'')*'", "?", shape)
+        shape = re.sub(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?![\w.])", "?", shape)
+        shape = re.sub(r"\(\s*\?\s*\)", "?", shape)
+        shape = re.sub(r"\?(?:\s*,\s*\?)+", "...", shape)
+        return re.sub(r"\s+", " ", shape).strip()
+
+    # Run EXPLAIN QUERY PLAN once for each shape on a new read-only connection, and flag the full table scans
+    def explain(self):
+        if self.filePath is None or not os.path.exists(self.filePath):
+            return
+        conn = connectToCDResultsFile(self.filePath, readOnly = True)
+        try:
+            for shapeInfo in self.shapeDict.values():
+                if not re.match(r"\s*(SELECT|UPDATE|DELETE|INSERT|WITH)\b", shapeInfo["example"], re.IGNORECASE):
+                    continue
+                try:
+                    planList = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN "+shapeInfo["example"]).fetchall()]
+                except sqlite3.Error:
+                    continue
+                shapeInfo["plan"] = planList
+                shapeInfo["scans"] = [plan for plan in planList if plan.startswith("SCAN") and "INDEX" not in plan]
+        finally:
+            conn.close()
+
+    # Get the shapes as a dictionary, with the slowest shapes first
+    def toDict(self):
+        shapeList = []
+        for shapeInfo in sorted(self.shapeDict.values(), key=lambda shapeInfo: shapeInfo["seconds"], reverse=True):
+            shapeInfo = dict(shapeInfo)
+            shapeInfo["seconds"] = round(shapeInfo["seconds"], 6)
+            del shapeInfo["example"]
+            shapeList.append(shapeInfo)
+
+        return {"statements": sum(shapeInfo["count"] for shapeInfo in shapeList), "shapes": shapeList}
+
+    # Get a summary of the slowest shapes that can be printed to console
+    # Full table scans that are run for each row are also added, because they get slower as the table grows
+    def getReport(self, shapeCount = 10):
+        sqlDict = self.toDict()
+        report = ["SQL: "+str(sqlDict["statements"])+" statements in "+str(len(sqlDict["shapes"]))+" shapes"]
+        for i in range(len(sqlDict["shapes"])):
+            shapeInfo = sqlDict["shapes"][i]
+            if i >= shapeCount and (shapeInfo["scans"] == [] or shapeInfo["count"] < 10):
+                continue
+            report.append("    "+str(shapeInfo["count"])+" x "+str(round(shapeInfo["seconds"], 3))+" seconds: "+shapeInfo["shape"][:200])
+            for scan in shapeInfo["scans"]:
+                report.append("        WARNING: full table scan ("+scan+")"+(", run "+str(shapeInfo["count"])+" times" if shapeInfo["count"] > 1 else ""))
+
+        return report
+
+
+#####################################################################################
+## Class: AuditedConnection
+#####################################################################################
+'''
+This class is the SQLite connection opened by connectToCDResultsFile() while an SQLAuditor is active.
+Its cursors, including the ones used by conn.execute(), are AuditedCursors.
+'''
+
+class AuditedConnection(sqlite3.Connection):
+    auditor = None
+
+    def cursor(self, factory = None):
+        cursor = super().cursor(factory or AuditedCursor)
+        if isinstance(cursor, AuditedCursor):
+            cursor.auditor = self.auditor
+        return cursor
+
+
+#####################################################################################
+## Class: AuditedCursor
+#####################################################################################
+'''
+This class is an SQLite cursor that times its execute and fetch calls with its SQLAuditor, see SQLAuditor.timeCall().
+'''
+
+class AuditedCursor(sqlite3.Cursor):
+    auditor = None
+    shape = None
+
+    def timeCall(self, method, *args):
+        if self.auditor is None:
+            return method(*args)
+        return self.auditor.timeCall(self, method, *args)
+
+    def execute(self, *args):
+        return self.timeCall(super().execute, *args)
+
+    def executemany(self, *args):
+        return self.timeCall(super().executemany, *args)
+
+    def executescript(self, *args):
+        return self.timeCall(super().executescript, *args)
+
+    def fetchone(self):
+        return self.timeCall(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self.timeCall(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self.timeCall(super().fetchall)
+
+    def __next__(self):
+        return self.timeCall(super().__next__)
+
+
 #####################################################################################
 ## Function: formatStringToSQLiteColumn()
 #####################################################################################  
@@ -372,6 +782,137 @@ def tagBytesToString(tagBytes, cdResultsFilePath, cursor):
         raise e
 
 
+#####################################################################################
+## Function: getTagPositions()
+#####################################################################################
+'''
+This function gets the position of each Tag in the tag bytes stored in the CD results file.
+Each Tag takes up two bytes, in the order the Tags are listed in DataDistributionBoxExtendedData.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+
+OUTPUT:
+'tagPositionDict' = A dictionary with the Tag names as the keys. The values are tuples that contain
+    the position of the Tag (starting at 0) and whether or not the Tag is visible in CD.
+'''
+
+def getTagPositions(cdResultsFilePath, cursor):
+    try:
+        # Get the IDs of all tags, and whether or not they are visible
+        cursor.execute("SELECT BoxID, ValueString FROM DataDistributionBoxExtendedData WHERE Name = 'EntityItemTagVisibility';")
+        tagIDList = cursor.fetchall()
+
+        # Get the Names of all the tags
+        cursor.execute("SELECT BoxID, Name FROM DataDistributionBoxes;")
+        tagNameDict = {}
+        for ID, name in cursor.fetchall():
+            tagNameDict[ID] = name
+
+        tagPositionDict = {}
+        for position in range(len(tagIDList)):
+            ID, visibility = tagIDList[position]
+            if ID in tagNameDict:
+                tagPositionDict[tagNameDict[ID]] = (position, visibility == "True")
+
+        return tagPositionDict
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: getTagCondition()
+#####################################################################################
+'''
+This function creates an SQLite condition that checks the tag bytes of the compounds,
+so compounds can be found by their Tags without converting the tag bytes of every row in Python.
+A Tag is checked if both of its bytes are 1.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'tagPositionDict' = The dictionary created by getTagPositions().
+'tagNameList' = A list of Tag names.
+'match' = "all" if the compounds must have all the Tags, "any" if they must have at least one of the Tags,
+    or "none" if they must have none of the Tags.
+
+OUTPUT:
+'condition' = The SQLite condition.
+'paramList' = A list of the values for the condition.
+'''
+
+def getTagCondition(cdResultsFilePath, tagPositionDict, tagNameList, match):
+    if match not in ["all", "any", "none"]:
+        raise ValueError("ValueError", "Make sure 'match' is \"all\", \"any\", or \"none\"")
+    if type(tagNameList) != list or len(tagNameList) == 0 or not all(type(tag) == str for tag in tagNameList):
+        raise TypeError("TypeError", "Make sure the Tags are a list of string values")
+
+    conditionList = []
+    paramList = []
+    for tag in tagNameList:
+        if tag not in tagPositionDict:
+            raise ValueError("ValueError", "The Tag \""+tag+"\" can't be found in "+cdResultsFilePath)
+
+        # SQLite positions start at 1, compounds without any Tags have NULL tag bytes
+        conditionList.append("COALESCE(substr(Tags, (?), 2), X'') = X'0101'")
+        paramList.append(2 * tagPositionDict[tag][0] + 1)
+
+    if match == "all":
+        return "("+" AND ".join(conditionList)+")", paramList
+    elif match == "any":
+        return "("+" OR ".join(conditionList)+")", paramList
+    else:
+        return "NOT ("+" OR ".join(conditionList)+")", paramList
+
+
+#####################################################################################
+## Function: findCompoundsWithTags()
+#####################################################################################
+'''
+This function finds the compounds in a CD results file by their Tags.
+The tag bytes are checked by SQLite, so only the IDs of the matching compounds are returned to Python.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'tagNameList' = A list of Tag names.
+'match' = "all" if the compounds must have all the Tags, "any" if they must have at least one of the Tags,
+    or "none" if they must have none of the Tags (default is "all").
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up (default is 5.0).
+
+OUTPUT:
+'IDList' = A list of the IDs of the matching compounds.
+'''
+
+def findCompoundsWithTags(cdResultsFilePath, tagNameList, match = "all", busyTimeout = 5.0):
+    # Validate 'cdResultsFilePath'
+    if type(cdResultsFilePath) != str:
+        raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
+
+    # If the results file can't be found
+    if os.path.exists(cdResultsFilePath) == False:
+        raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
+
+    conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True, busyTimeout = busyTimeout)
+    cursor = conn.cursor()
+    try:
+        validateCDResultsFile(cursor, cdResultsFilePath)
+        condition, paramList = getTagCondition(cdResultsFilePath, getTagPositions(cdResultsFilePath, cursor), tagNameList, match)
+        cursor.execute("SELECT ID FROM ConsolidatedUnknownCompoundItems WHERE "+condition+" ORDER BY ID;", paramList)
+        IDList = [ID[0] for ID in cursor.fetchall()]
+
+        return IDList
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+    finally:
+        cursor.close()
+        conn.close()
+
+
 #####################################################################################
 ## Function: getColNamesForUpdatingCD()
 #####################################################################################
@@ -679,87 +1220,610 @@ def fillNAValuesInDF(peakTable):
 
 
 #####################################################################################
-## Function: createCompoundIDColumns()
+## Function: getTagStringForRow()
 #####################################################################################
 '''
-This function adds the Compound Discoverer (CD) results file compound IDs to the Excel file.
-Rows in the CD database and the Excel file are matched using the RetentionTime and MolecularWeight.
-This is slow, but we only need to do this once. Matching rows will be faster once we have gotten the IDs.
+This function creates the tag string for one row of the Excel data. The tag string
+contains the tags only found in the Excel 'Tags' column that are in the current cell,
+followed by the tags in 'tagList' that have True or 1 values in the current row.
+
+INPUT:
+'peakTable' = The DataFrame containing Excel data.
+'row' = The row of the DataFrame.
+'colDisplayName' = The display name of the Tags column.
+'tagsInTagsCol' = A list of unique tags that were only found in the 'Tags' column of the Excel file.
+'tagList' = A list of valid tags the user chose.
+
+OUTPUT:
+'tagString' = The tags of the row, ';' is the delimiter.
+'''
+
+def getTagStringForRow(peakTable, row, colDisplayName, tagsInTagsCol, tagList):
+    tagString = ""
+
+    # If there are tags that are only found in the excel 'Tags' column
+    if tagsInTagsCol != []:
+
+        # If the current Excel cell is not empty
+        if pd.notnull(peakTable.at[row,colDisplayName]):
+            currTagString = peakTable.at[row,colDisplayName]
+            # Make sure the Tags value in Excel is a string
+            if type(currTagString) == str:
+                tagStringSplit = currTagString.split(";")
+                for tag in tagsInTagsCol:
+                    if tag in tagStringSplit:
+                        tagString = tagString + tag + ";"
+            else:
+                raise TypeError("TypeError", str(currTagString)+" in the Tags column should be a string")
+
+    # If the user wants to update the Tags in CD using values from chosen Excel columns
+    if tagList is not None and tagList != []:
+
+        # Create a tagString containing Tags that contain True or 1 values in the current Excel row
+        for tag in tagList:
+            if tag in peakTable.columns:
+                tagValue = peakTable.at[row,tag]
+                if tagValue == True or tagValue == 1:
+                    tagString = tagString + tag + ";"
+
+    # Remove the last ;
+    if len(tagString) > 0:
+        tagString = tagString[:-1]
+
+    return tagString
+
+
+#####################################################################################
+## Function: normalizeSyncValue()
+#####################################################################################
+'''
+This function converts a cell value into a string so that values read from the Excel file
+and values read from the CD results file can be hashed and compared with each other.
+
+INPUT:
+'value' = The cell value.
+'isTags' = Boolean value, True if the value is a tag string. The order of the tags is ignored.
+
+OUTPUT:
+'value' = The value as a string.
+'''
+
+def normalizeSyncValue(value, isTags = False):
+    # Empty cells
+    if value is None or (not isinstance(value, (str, bytes)) and pd.isna(value)):
+        return ""
+
+    # Tag strings, the order of the tags doesn't matter
+    if isTags:
+        tagSet = set()
+        for tag in str(value).split(";"):
+            if tag.strip() != "":
+                tagSet.add(tag.strip())
+        return ";".join(sorted(tagSet))
+
+    # Boolean values (this has to be checked before numbers, because bool is a number in Python)
+    if pd.api.types.is_bool(value):
+        return str(bool(value))
+
+    # Numeric values, ints and floats with the same value are treated as equal
+    if pd.api.types.is_number(value):
+        return repr(float(value))
+
+    # Bytes
+    if isinstance(value, bytes):
+        return value.hex()
+
+    return str(value)
+
+
+#####################################################################################
+## Function: getRowHash()
+#####################################################################################
+'''
+This function creates a content hash for one row of synced values.
+
+INPUT:
+'rowValues' = A dictionary of normalized values (see normalizeSyncValue()) with the column display names as the keys,
+    or a tuple of raw values read from the CD results file.
+
+OUTPUT:
+'rowHash' = The hash as a hex string.
+'''
+
+def getRowHash(rowValues):
+    if isinstance(rowValues, dict):
+        rowBytes = json.dumps(rowValues, sort_keys=True).encode("utf-8")
+    else:
+        rowBytes = repr(rowValues).encode("utf-8")
+
+    return hashlib.sha1(rowBytes).hexdigest()
+
+
+#####################################################################################
+## Function: createSyncStateTables()
+#####################################################################################
+'''
+This function creates the sync state tables in the CD results file if they don't exist.
+'CDExcelMessengerSyncState' holds a hash of the synced columns for each compoundID, separately for each sync key (see getSyncRowKey()),
+so a push, a pull, and a syncBoth() of the same file don't overwrite each other's state.
+'CDExcelMessengerSheetState' holds a hash of each Excel sheet that has been synced.
+A sync state table without sync keys, from an earlier version, is dropped, so the next incremental sync updates every row once.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'''
+
+def createSyncStateTables(cdResultsFilePath, cursor):
+    try:
+        cursor.execute("SELECT COUNT(*) FROM pragma_table_info('CDExcelMessengerSyncState');")
+        tableExists = cursor.fetchall()[0][0] > 0
+        cursor.execute("SELECT COUNT(*) FROM pragma_table_info('CDExcelMessengerSyncState') WHERE name = 'SyncKey';")
+        if tableExists and cursor.fetchall()[0][0] == 0:
+            cursor.execute("DROP TABLE CDExcelMessengerSyncState;")
+        cursor.execute("CREATE TABLE IF NOT EXISTS CDExcelMessengerSyncState (SyncKey TEXT, compoundID INTEGER, ExcelHash TEXT, CDHash TEXT, RowValues TEXT, PRIMARY KEY (SyncKey, compoundID));")
+        cursor.execute("CREATE TABLE IF NOT EXISTS CDExcelMessengerSheetState (SheetKey TEXT PRIMARY KEY, SheetHash TEXT, CDHash TEXT, Columns TEXT);")
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: syncStateTablesExist()
+#####################################################################################
+'''
+This function checks if the tables that store the state of incremental syncs exist in the CD results file.
+This lets a read-only connection check for a previous sync without having to create the tables.
 
 INPUT:
 'cdResultsFilePath' = The path to a CD results file.
-'conn' = The SQLite connection.
 'cursor' = An SQLite cursor.
-'peakRowCount' = The number of rows in the Excel Peak sheet.
-'excelFilePath' = The path to an Excel file.
-'peakTable' = The dataframe containing Excel data.
-'peakSheetName' = The name of the Excel sheet containing the peak data.
 
 OUTPUT:
-'peakTable' = The dataframe containing the Excel data, now with IDs.
-'report' = A list of messages that can be printed to console if 'verbose' is True.
+'exists' = Boolean value, True if both tables exist and the sync state table has sync keys.
 '''
 
-def createCompoundIDColumns(cdResultsFilePath, conn, cursor, peakRowCount, excelFilePath, peakTable, peakSheetName):
+def syncStateTablesExist(cdResultsFilePath, cursor):
     try:
-        report = []
-    
-        # list to hold the IDs that will get added to the Excel file
-        IDList = []
-            
-        # If the compoundID column doesn't exist in CD, create it
-        cursor.execute("SELECT COUNT(*) AS CNTREC FROM pragma_table_info('ConsolidatedUnknownCompoundItems') WHERE name='compoundID';")
-        if cursor.fetchall()[0][0] == 0:
-            cursor.execute("ALTER TABLE ConsolidatedUnknownCompoundItems ADD COLUMN compoundID")
-            
-            # Get the ID of the compound table in the CD database
-            cursor.execute("SELECT DataTypeID FROM DataTypes WHERE TableName = 'ConsolidatedUnknownCompoundItems';")
-            compoundTblID = cursor.fetchall()[0][0]
-            
-            # Get the custom data types and their IDs from CD, then store those values in a dictionary
-            # The dictionary keys will be the data types and the dictionary values will be the IDs
-            cursor.execute("SELECT Value, Name FROM CustomDataTypes;")
-            cdDataTypeDict = {}
-            for dataType in cursor.fetchall():
-                cdDataTypeDict[dataType[1]] = dataType[0]
-                
-            # Add compoundID details to columns table
-            cursor.execute("INSERT INTO DataTypesColumns \
-                            (DataTypeID, DBColumnName, CustomDataType, Nullable, ValueType,\
-                            Creator, Finalizer, Property_Guid, Property_DisplayName, Property_Description, \
-                            Property_FormatString, Property_SortDirection, Property_SemanticDescription, \
-                            Grid_DataVisibility, Grid_VisiblePosition, Grid_ColumnWidth, \
-                            Grid_GridCellControlGuid, Grid_AllowEdit, Grid_Background) \
-                            VALUES \
-                            ((?), 'compoundID', (?), 1, '3245F562-3044-4BC0-9091-3813CA7AE5BC', \
-                            0, -1, '', 'compoundID', 'The database unique IDs. Matches with the Excel file.', \
-                            '', 1, '',\
-                            4, 0, -1, \
-                            '', 0, 0);", (compoundTblID, str(cdDataTypeDict["String"]), ))
-                                
-            # Set Cleaned to False for all rows
-            cursor.execute("UPDATE ConsolidatedUnknownCompoundItems SET compoundID = NULL;") 
-            
-        # Create a MolecularWeight & RetentionTime INDEX which improves performance with the upcoming SELECT statement
-        cursor.execute("CREATE INDEX IF NOT EXISTS MW_RT ON ConsolidatedUnknownCompoundItems (MolecularWeight, RetentionTime);")
-    
-        # The MW and RT columns likely have one of these names
-        if "Calc. MW" in peakTable.columns:
-            mwName = "Calc. MW"
-        elif "MW" in peakTable.columns:
-            mwName = "MW"
-        elif "MolecularWeight" in peakTable.columns:
-            mwName = "MolecularWeight"
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('CDExcelMessengerSyncState', 'CDExcelMessengerSheetState');")
+        if cursor.fetchall()[0][0] != 2:
+            return False
+        cursor.execute("SELECT COUNT(*) FROM pragma_table_info('CDExcelMessengerSyncState') WHERE name = 'SyncKey';")
+        return cursor.fetchall()[0][0] == 1
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: getSyncSheetKey()
+#####################################################################################
+'''
+This function creates the key used to store a sheet hash in the sheet state table.
+The key includes the options of the sync, so changing an option won't skip the next sync.
+
+INPUT:
+'operation' = The name of the sync operation (e.g. "push" or "pull").
+'excelFilePath' = The path to an Excel file.
+'sheetNameList' = A list of the Excel sheet names.
+'optionList' = A list of the options the user chose.
+
+OUTPUT:
+'sheetKey' = The key as a string.
+'''
+
+def getSyncSheetKey(operation, excelFilePath, sheetNameList, optionList):
+    return operation+":"+os.path.abspath(excelFilePath)+":"+json.dumps(sheetNameList)+":"+json.dumps(optionList, sort_keys=True)
+
+
+#####################################################################################
+## Function: getSyncRowKey()
+#####################################################################################
+'''
+This function creates the key used to store the row hashes of a sync in the sync state table.
+Each direction and set of synced columns has its own key, so alternating a push and a pull only compares
+each row with the last sync in the same direction.
+
+INPUT:
+'operation' = The name of the sync operation (e.g. "push", "pull", or "sync").
+'colNameList' = A list of the synced column names.
+
+OUTPUT:
+'syncKey' = The key as a string.
+'''
+
+def getSyncRowKey(operation, colNameList):
+    return operation+":"+json.dumps(sorted(set(colNameList)))
+
+
+#####################################################################################
+## Function: getExcelSheetXMLPath()
+#####################################################################################
+'''
+This function finds the path of a sheet's XML file inside an Excel (.xlsx) file.
+
+INPUT:
+'excelZip' = The Excel file opened as a zipfile.ZipFile.
+'excelFilePath' = The path to an Excel file.
+'sheetName' = The name of the Excel sheet.
+
+OUTPUT:
+'sheetXMLPath' = The path of the sheet XML inside the Excel file.
+'''
+
+def getExcelSheetXMLPath(excelZip, excelFilePath, sheetName):
+    mainNS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    relNS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+    # Get the relationship ID of the sheet from the workbook
+    workbook = ET.fromstring(excelZip.read("xl/workbook.xml"))
+    relID = None
+    for sheet in workbook.iter(mainNS+"sheet"):
+        if sheet.get("name") == sheetName:
+            relID = sheet.get(relNS+"id")
+
+    # If the Excel file doesn't have the sheet
+    if relID is None:
+        raise ValueError("ValueError", "Can't find "+sheetName+" in "+excelFilePath)
+
+    # Get the path of the sheet XML from the workbook relationships
+    rels = ET.fromstring(excelZip.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels:
+        if rel.get("Id") == relID:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target[1:]
+            return "xl/"+target
+
+    raise ValueError("ValueError", "Can't find "+sheetName+" in "+excelFilePath)
+
+
+#####################################################################################
+## Function: getExcelSheetHash()
+#####################################################################################
+'''
+This function creates a hash of Excel sheets without parsing the cells.
+The raw sheet XML and the shared strings of the workbook are hashed.
+
+INPUT:
+'excelFilePath' = The path to an Excel file.
+'sheetNameList' = A list of the Excel sheet names.
+
+OUTPUT:
+'sheetHash' = The hash as a hex string.
+'''
+
+def getExcelSheetHash(excelFilePath, sheetNameList):
+    try:
+        sheetHash = hashlib.sha1()
+        with zipfile.ZipFile(excelFilePath) as excelZip:
+            for sheetName in sheetNameList:
+                sheetHash.update(excelZip.read(getExcelSheetXMLPath(excelZip, excelFilePath, sheetName)))
+
+            # Cell strings are stored in the shared strings file
+            if "xl/sharedStrings.xml" in excelZip.namelist():
+                sheetHash.update(excelZip.read("xl/sharedStrings.xml"))
+
+        return sheetHash.hexdigest()
+
+    # If the Excel file can't be found
+    except FileNotFoundError:
+        raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+    # If permission to the Excel file was denied
+    except PermissionError:
+        raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+    # If the Excel file isn't an .xlsx file
+    except zipfile.BadZipFile:
+        raise ValueError("ValueError", excelFilePath+" is not an .xlsx file")
+
+
+#####################################################################################
+## Function: getSheetState()
+#####################################################################################
+'''
+This function gets the stored state of a synced Excel sheet.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'sheetKey' = The key created by getSyncSheetKey().
+
+OUTPUT:
+'sheetState' = A tuple containing the sheet hash, the CD table hash, and a list of the synced column DB names,
+    or None if the sheet hasn't been synced.
+'''
+
+def getSheetState(cdResultsFilePath, cursor, sheetKey):
+    try:
+        cursor.execute("SELECT SheetHash, CDHash, Columns FROM CDExcelMessengerSheetState WHERE SheetKey = (?);", (sheetKey, ))
+        results = cursor.fetchall()
+        if results == []:
+            return None
+
+        return results[0][0], results[0][1], json.loads(results[0][2])
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: saveSheetState()
+#####################################################################################
+'''
+This function stores the state of a synced Excel sheet.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'sheetKey' = The key created by getSyncSheetKey().
+'sheetHash' = The hash created by getExcelSheetHash().
+'cdHash' = The hash created by getCDTableHash().
+'colDBNameList' = A list of the synced column DB names.
+'''
+
+def saveSheetState(cdResultsFilePath, cursor, sheetKey, sheetHash, cdHash, colDBNameList):
+    try:
+        cursor.execute("INSERT OR REPLACE INTO CDExcelMessengerSheetState (SheetKey, SheetHash, CDHash, Columns) VALUES ((?), (?), (?), (?));", (sheetKey, sheetHash, cdHash, json.dumps(colDBNameList), ))
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: getSyncState()
+#####################################################################################
+'''
+This function gets the stored sync state of every compound for one sync key.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'syncKey' = The key created by getSyncRowKey().
+
+OUTPUT:
+'syncStateDict' = A dictionary with the compoundIDs as the keys.
+    The values are tuples containing the Excel hash, the CD hash, and the synced values as a JSON string.
+'''
+
+def getSyncState(cdResultsFilePath, cursor, syncKey):
+    try:
+        syncStateDict = {}
+        cursor.execute("SELECT compoundID, ExcelHash, CDHash, RowValues FROM CDExcelMessengerSyncState WHERE SyncKey = (?);", (syncKey, ))
+        for syncRow in cursor.fetchall():
+            syncStateDict[syncRow[0]] = (syncRow[1], syncRow[2], syncRow[3])
+
+        return syncStateDict
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: saveSyncState()
+#####################################################################################
+'''
+This function stores the sync state of compounds for one sync key.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'syncKey' = The key created by getSyncRowKey().
+'syncRowList' = A list of tuples. Each tuple contains a compoundID, the Excel hash, the CD hash,
+    and the dictionary of synced values.
+'''
+
+def saveSyncState(cdResultsFilePath, cursor, syncKey, syncRowList):
+    try:
+        syncRowList = [(syncKey, ID, excelHash, cdHash, json.dumps(rowValues, sort_keys=True)) for ID, excelHash, cdHash, rowValues in syncRowList]
+        cursor.executemany("INSERT OR REPLACE INTO CDExcelMessengerSyncState (SyncKey, compoundID, ExcelHash, CDHash, RowValues) VALUES ((?), (?), (?), (?), (?));", syncRowList)
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: getCDRowHashes()
+#####################################################################################
+'''
+This function reads the synced columns of every compound in one query and
+creates a hash of the raw values for each compound.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'colDBNameList' = A list of the column DB names to hash. All columns must exist in the compound table.
+
+OUTPUT:
+'cdHashDict' = A dictionary with the compound IDs as the keys and the hashes as the values.
+'''
+
+def getCDRowHashes(cdResultsFilePath, cursor, colDBNameList):
+    try:
+        cdHashDict = {}
+
+        # If there are no columns, every compound gets the same hash
+        selectCols = ""
+        for colDBName in colDBNameList:
+            selectCols += ", "+colDBName
+
+        cursor.execute("SELECT ID"+selectCols+" FROM ConsolidatedUnknownCompoundItems;")
+        while True:
+            cdRowList = cursor.fetchmany(10000)
+            if cdRowList == []:
+                break
+            for cdRow in cdRowList:
+                cdHashDict[cdRow[0]] = getRowHash(tuple(cdRow[1:]))
+
+        return cdHashDict
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: getCDTableHash()
+#####################################################################################
+'''
+This function combines the row hashes from getCDRowHashes() into one hash for the compound table.
+
+INPUT:
+'cdHashDict' = A dictionary with the compound IDs as the keys and the hashes as the values.
+
+OUTPUT:
+'cdHash' = The hash as a hex string.
+'''
+
+def getCDTableHash(cdHashDict):
+    tableHash = hashlib.sha1()
+    for ID in sorted(cdHashDict):
+        tableHash.update((str(ID)+":"+cdHashDict[ID]+";").encode("utf-8"))
+
+    return tableHash.hexdigest()
+
+
+#####################################################################################
+## Function: getExcelRowValuesForUpdatingCD()
+#####################################################################################
+'''
+This function gets the normalized values of one Excel row for the columns that are
+going to be updated in the CD results file. The values match the values that updateCDResultsFile() writes.
+
+INPUT:
+'peakTable' = The DataFrame containing Excel data.
+'row' = The row of the DataFrame.
+'colNameTupleList' = A list of tuples. Each tuple contains a column's DB name and display name.
+'tagsInTagsCol' = A list of unique tags that were only found in the 'Tags' column of the Excel file.
+'tagList' = A list of valid tags the user chose.
+
+OUTPUT:
+'rowValues' = A dictionary with the column display names as the keys and the normalized values as the values.
+    If Tags also come from the 'tagList' columns, the Tags key includes the 'tagList' names, because
+    the Tags written to CD are then different from the Excel 'Tags' column.
+'''
+
+def getExcelRowValuesForUpdatingCD(peakTable, row, colNameTupleList, tagsInTagsCol, tagList):
+    rowValues = {}
+    for colDBName, colDisplayName in colNameTupleList:
+        if colDBName == "Tags":
+            tagKey = colDisplayName
+            if tagList is not None and tagList != []:
+                tagKey = colDisplayName+":"+";".join(tagList)
+            rowValues[tagKey] = normalizeSyncValue(getTagStringForRow(peakTable, row, colDisplayName, tagsInTagsCol, tagList), True)
+        elif colDBName == "Checked":
+            rowValues[colDisplayName] = str(bool(peakTable.at[row,colDisplayName]))
+        elif colDBName == "Notes" and "Notes" not in peakTable.columns:
+            rowValues[colDisplayName] = ""
         else:
-            raise ValueError("ValueError", "Can't find 'MW' column in the Excel file")
-        if "RT [min]" in peakTable.columns:
-            rtName = "RT [min]"
-        elif "RT" in peakTable.columns:
-            rtName = "RT"
-        elif "RetentionTime" in peakTable.columns:
-            rtName = "RetentionTime"
+            rowValues[colDisplayName] = normalizeSyncValue(peakTable.at[row,colDisplayName])
+
+    return rowValues
+
+
+#####################################################################################
+## Function: getExcelRowValuesForUpdatingExcel()
+#####################################################################################
+'''
+This function gets the normalized values of one Excel row for the columns that are
+going to be updated in the Excel file.
+
+INPUT:
+'peakTable' = The DataFrame containing Excel data.
+'row' = The row of the DataFrame.
+'syncColList' = A list of the display names of the synced columns.
+
+OUTPUT:
+'rowValues' = A dictionary with the column display names as the keys and the normalized values as the values.
+'''
+
+def getExcelRowValuesForUpdatingExcel(peakTable, row, syncColList):
+    rowValues = {}
+    for colDisplayName in syncColList:
+        if colDisplayName not in peakTable.columns:
+            rowValues[colDisplayName] = ""
         else:
-            raise ValueError("ValueError", "Can't find 'RT' column in the Excel file")
+            rowValues[colDisplayName] = normalizeSyncValue(peakTable.at[row,colDisplayName], colDisplayName == "Tags")
+
+    return rowValues
+
+
+#####################################################################################
+## Function: getMWRTColumnNames()
+#####################################################################################
+'''
+This function gets the names of the molecular weight and retention time columns of a peak table.
+
+INPUT:
+'peakTable' = The peak table as a dataframe.
+'sourceName' = The name of the peak table used in messages.
+
+OUTPUT:
+'mwName' = The name of the molecular weight column.
+'rtName' = The name of the retention time column.
+'''
+
+def getMWRTColumnNames(peakTable, sourceName):
+    # The MW and RT columns likely have one of these names
+    if "Calc. MW" in peakTable.columns:
+        mwName = "Calc. MW"
+    elif "MW" in peakTable.columns:
+        mwName = "MW"
+    elif "MolecularWeight" in peakTable.columns:
+        mwName = "MolecularWeight"
+    else:
+        raise ValueError("ValueError", "Can't find 'MW' column in "+sourceName)
+    if "RT [min]" in peakTable.columns:
+        rtName = "RT [min]"
+    elif "RT" in peakTable.columns:
+        rtName = "RT"
+    elif "RetentionTime" in peakTable.columns:
+        rtName = "RetentionTime"
+    else:
+        raise ValueError("ValueError", "Can't find 'RT' column in "+sourceName)
+
+    return mwName, rtName
+
+
+#####################################################################################
+## Function: createCompoundIDColumns()
+#####################################################################################
+'''
+This function adds the Compound Discoverer (CD) results file compound IDs to the Excel file.
+Rows in the CD database and the Excel file are matched using the RetentionTime and MolecularWeight.
+The rounded MolecularWeight and RetentionTime of every compound are read with one query and the rows are matched in a dictionary,
+so nothing is written to the CD results file and no write lock is needed. The IDs are written to CD by addCompoundIDColumn().
+Matching rows will be faster once we have gotten the IDs.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'peakRowCount' = The number of rows in the Excel Peak sheet.
+'excelFilePath' = The path to an Excel file, or None if the peak table didn't come from an Excel file.
+'peakTable' = The dataframe containing Excel data.
+'peakSheetName' = The name of the Excel sheet containing the peak data.
+
+OUTPUT:
+'peakTable' = The dataframe containing the Excel data, now with IDs. The rows that didn't match exactly one compound have no ID.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def createCompoundIDColumns(cdResultsFilePath, cursor, peakRowCount, excelFilePath, peakTable, peakSheetName):
+    try:
+        report = []
+    
+        # list to hold the IDs that will get added to the Excel file, one for each row
+        IDList = []
+    
+        # Get the names of the MW and RT columns
+        mwName, rtName = getMWRTColumnNames(peakTable, "the Excel file")
         
         # Make sure the MW and RT columns are float columns
         if peakTable.dtypes[mwName] != "float64":
@@ -768,6 +1832,16 @@ def createCompoundIDColumns(cdResultsFilePath, conn, cursor, peakRowCount, excel
         if peakTable.dtypes[rtName] != "float64":
             raise TypeError("TypeError", rtName+" is not a float column in the Excel file")
         
+        # Get the IDs of the compounds for each MolecularWeight and RetentionTime
+        # Round MolecularWeight to 5 decimal places and RetentionTime to 3 decimal places because those values are stored in that format in the Excel file
+        cursor.execute("SELECT ID, ROUND(MolecularWeight, 5), ROUND(RetentionTime, 3) FROM ConsolidatedUnknownCompoundItems;")
+        cdIDDict = {}
+        for ID, MW, RT in cursor.fetchall():
+            cdIDDict.setdefault((MW, RT), []).append(ID)
+        
+        # The peaks that match more than one row are reported together after the loop
+        ambiguousList = []
+        
         # Loop through each row in the excel file
         for row in range(peakRowCount):
             if pd.notnull(peakTable.at[row,mwName]) and pd.notnull(peakTable.at[row,rtName]):
@@ -776,47 +1850,46 @@ def createCompoundIDColumns(cdResultsFilePath, conn, cursor, peakRowCount, excel
                 MW = peakTable.at[row,mwName]
                 RT = peakTable.at[row,rtName]
                         
-                # Get the ID of the current row and column from the CD results file
-                # Round MolecularWeight to 5 decimal places and RetentionTime to 3 decimal places because those values are stored in that format in the Excel file
-                cursor.execute("SELECT ID FROM ConsolidatedUnknownCompoundItems WHERE ROUND(MolecularWeight, 5) = ROUND((?), 5) and ROUND(RetentionTime, 3) = ROUND((?), 3);", (str(MW), str(RT), ))     
-                selectStatementResults = cursor.fetchall()
+                # Get the IDs of the rows in the CD results file with the same molecular weight and retention time
+                matchList = cdIDDict.get((round(float(MW), 5), round(float(RT), 3)), [])
                         
                 # If exactly one row in the CD results file matched with a row in the Excel file
-                if len(selectStatementResults) == 1:
-                    ID = selectStatementResults[0][0]
-                    # Add current ID to the ID list which will be added to the Excel file
-                    IDList.append(ID)
-                
-                    # Add the ID to the compoundID column in the CD results file
-                    cursor.execute("UPDATE ConsolidatedUnknownCompoundItems SET compoundID = (?) WHERE ID = (?);", (str(ID), str(ID), )) 
+                if len(matchList) == 1:
+                    IDList.append(matchList[0])
             
                 # If multiple rows in the CD results file matched with a row in the Excel file
-                elif len(selectStatementResults) > 1:
-                    report.append("WARNING: multiple rows in "+cdResultsFilePath+" have molecular weight = "+str(MW)+" and retention time = "+str(RT)+", peak ignored")
+                elif len(matchList) > 1:
+                    IDList.append(None)
+                    ambiguousList.append("MW = "+str(MW)+", RT = "+str(RT)+" ("+str(len(matchList))+" rows)")
 
                 # If no rows in the CD results file matched with a row in the Excel file
                 else:
+                    IDList.append(None)
                     report.append("WARNING: no rows in "+cdResultsFilePath+" have molecular weight = "+str(MW)+" and retention time = "+str(RT)+", peak ignored")
             
             # One of the MW or RT cells was empty
             else:
                 raise ValueError("ValueError", "At least one of the cells in the "+mwName+" or "+rtName+" columns are empty")
         
-        # Drop the INDEX that was created earlier because it is not needed anymore   
-        cursor.execute("DROP INDEX IF EXISTS MW_RT;")
+        # Report the peaks that matched multiple rows in one message, groupCDFeatures() shows the groups of rows they matched
+        if ambiguousList != []:
+            report.append("WARNING: "+str(len(ambiguousList))+" peaks matched multiple rows in "+cdResultsFilePath+" with the same molecular weight and retention time, peaks ignored (use groupCDFeatures() to see the groups): "+"; ".join(ambiguousList[:10])+("; ..." if len(ambiguousList) > 10 else ""))
                 
         try:        
             # Update the peak dataframe with the ID list, then save the dataframe to the Excel file 
+            # The IDs are the primary keys of the CD compound table, so the Excel file can be saved before the IDs are written to CD
             IDData = pd.DataFrame (IDList, columns = ["compoundID"])
             peakTable = pd.concat([IDData, peakTable], axis=1)
             
-            with pd.ExcelWriter(
-                excelFilePath,
-                mode="a",
-                engine="openpyxl",
-                if_sheet_exists="replace",
-            ) as writer:
-                peakTable.to_excel(writer, sheet_name=peakSheetName, index=False)  
+            # If the peak table didn't come from an Excel file, the caller keeps the new column
+            if excelFilePath is not None:
+                with pd.ExcelWriter(
+                    excelFilePath,
+                    mode="a",
+                    engine="openpyxl",
+                    if_sheet_exists="replace",
+                ) as writer:
+                    peakTable.to_excel(writer, sheet_name=peakSheetName, index=False)  
         
         # If the Excel file doesn't have the correct sheet
         except ValueError:
@@ -830,10 +1903,9 @@ def createCompoundIDColumns(cdResultsFilePath, conn, cursor, peakRowCount, excel
         except PermissionError:
             raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
                 
-        report.append("Column: \"compoundID\" added to "+excelFilePath)
-        report.append("Column: \"compoundID\" added to "+cdResultsFilePath)
+        if excelFilePath is not None:
+            report.append("Column: \"compoundID\" added to "+excelFilePath)
     
-        conn.commit()
         return peakTable, report    
     
     # Operational Error 
@@ -843,20 +1915,203 @@ def createCompoundIDColumns(cdResultsFilePath, conn, cursor, peakRowCount, excel
     # Other errors
     except Exception as e:
         raise e
-        
+
 
 #####################################################################################
-## Function: validateCDResultsFile()
+## Function: addCompoundIDColumn()
 #####################################################################################
 '''
-This function checks that the CD Results file database is compatible with CDExcelMessenger
+This function writes the compound IDs matched by createCompoundIDColumns() to the compoundID column of the 
+Compound Discoverer (CD) results file, and adds the column if it doesn't exist.
+The IDs are written with one batched statement, so this is meant to run in the write transaction of the caller.
 
 INPUT:
-'cursor' = An SQLite cursor.
 'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'peakTable' = The dataframe containing Excel data, with the compoundID column.
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
 '''
-        
-def validateCDResultsFile(cursor, cdResultsFilePath):
+
+def addCompoundIDColumn(cdResultsFilePath, cursor, peakTable):
+    try:
+        # If the compoundID column doesn't exist in CD, create it
+        cursor.execute("SELECT COUNT(*) AS CNTREC FROM pragma_table_info('ConsolidatedUnknownCompoundItems') WHERE name='compoundID';")
+        if cursor.fetchall()[0][0] == 0:
+            cursor.execute("ALTER TABLE ConsolidatedUnknownCompoundItems ADD COLUMN compoundID")
+            
+            # Get the ID of the compound table in the CD database
+            cursor.execute("SELECT DataTypeID FROM DataTypes WHERE TableName = 'ConsolidatedUnknownCompoundItems';")
+            compoundTblID = cursor.fetchall()[0][0]
+            
+            # Get the custom data types and their IDs from CD, then store those values in a dictionary
+            # The dictionary keys will be the data types and the dictionary values will be the IDs
+            cursor.execute("SELECT Value, Name FROM CustomDataTypes;")
+            cdDataTypeDict = {}
+            for dataType in cursor.fetchall():
+                cdDataTypeDict[dataType[1]] = dataType[0]
+                
+            # Add compoundID details to columns table
+            cursor.execute("INSERT INTO DataTypesColumns \
+                            (DataTypeID, DBColumnName, CustomDataType, Nullable, ValueType,\
+                            Creator, Finalizer, Property_Guid, Property_DisplayName, Property_Description, \
+                            Property_FormatString, Property_SortDirection, Property_SemanticDescription, \
+                            Grid_DataVisibility, Grid_VisiblePosition, Grid_ColumnWidth, \
+                            Grid_GridCellControlGuid, Grid_AllowEdit, Grid_Background) \
+                            VALUES \
+                            ((?), 'compoundID', (?), 1, '3245F562-3044-4BC0-9091-3813CA7AE5BC', \
+                            0, -1, '', 'compoundID', 'The database unique IDs. Matches with the Excel file.', \
+                            '', 1, '',\
+                            4, 0, -1, \
+                            '', 0, 0);", (compoundTblID, str(cdDataTypeDict["String"]), ))
+                                
+            # Set compoundID to NULL for all rows
+            cursor.execute("UPDATE ConsolidatedUnknownCompoundItems SET compoundID = NULL;") 
+        
+        # Add the IDs to the compoundID column in the CD results file
+        updateList = []
+        for ID in peakTable["compoundID"]:
+            if pd.notnull(ID):
+                updateList.append((str(int(ID)), str(int(ID))))
+        cursor.executemany("UPDATE ConsolidatedUnknownCompoundItems SET compoundID = (?) WHERE ID = (?);", updateList)
+        
+        return ["Column: \"compoundID\" added to "+cdResultsFilePath]
+    
+    # Operational Error 
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+    
+    # Other errors
+    except Exception as e:
+        raise e
+        
+
+#####################################################################################
+## Function: connectToCDResultsFile()
+#####################################################################################
+'''
+This function opens an SQLite connection to a CD results file.
+In read-only mode the file is opened with a "file:...?mode=ro" URI, so no write locks are taken and
+the file can be read while Compound Discoverer has it open. The file is also memory-mapped and the page cache is increased.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'readOnly' = Boolean value that controls whether or not the connection is read-only (default is False).
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up (default is 5.0).
+
+OUTPUT:
+'conn' = The SQLite connection.
+'''
+
+def connectToCDResultsFile(cdResultsFilePath, readOnly = False, busyTimeout = 5.0):
+    try:
+        # The statements are timed by the cursors of an AuditedConnection if the run is being audited
+        connectionClass = sqlite3.Connection
+        if SQLAuditor.active is not None:
+            connectionClass = AuditedConnection
+
+        if not readOnly:
+            conn = sqlite3.connect(cdResultsFilePath, timeout=busyTimeout, factory=connectionClass)
+        else:
+            conn = sqlite3.connect("file:"+urllib.request.pathname2url(os.path.abspath(cdResultsFilePath))+"?mode=ro", uri=True, timeout=busyTimeout, factory=connectionClass)
+
+        # Count the statements if the run is being audited, see SQLAuditor
+        if SQLAuditor.active is not None:
+            SQLAuditor.active.watch(conn, cdResultsFilePath)
+        if not readOnly:
+            return conn
+        
+        # Map up to 256 MB of the file into memory and use a 64 MB page cache
+        conn.execute("PRAGMA mmap_size = 268435456;")
+        conn.execute("PRAGMA cache_size = -65536;")
+
+        return conn
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: reopenCDResultsFileForWriting()
+#####################################################################################
+'''
+This function closes a read-only connection to a CD results file and opens a read-write connection in its place.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'conn' = The read-only SQLite connection.
+'cursor' = The read-only SQLite cursor.
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up (default is 5.0).
+
+OUTPUT:
+'conn' = The read-write SQLite connection.
+'cursor' = The read-write SQLite cursor.
+'''
+
+def reopenCDResultsFileForWriting(cdResultsFilePath, conn, cursor, busyTimeout = 5.0):
+    cursor.close()
+    conn.close()
+    conn = connectToCDResultsFile(cdResultsFilePath, busyTimeout = busyTimeout)
+    cursor = conn.cursor()
+
+    return conn, cursor
+
+
+#####################################################################################
+## Function: beginImmediate()
+#####################################################################################
+'''
+This function starts a write transaction with BEGIN IMMEDIATE, so the write lock is taken before any changes are made.
+If another process has the CD results file locked, SQLite waits for the busy timeout of the connection, 
+then the transaction is retried with an exponential backoff.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'conn' = The SQLite connection.
+'cursor' = An SQLite cursor.
+'lockRetries' = The number of times to retry if the CD results file is locked (default is 5).
+'backoff' = The number of seconds to wait before the first retry, the wait is doubled after each retry (default is 0.5).
+
+OUTPUT:
+'lockWaitTime' = The number of seconds spent waiting for the lock.
+'''
+
+def beginImmediate(cdResultsFilePath, conn, cursor, lockRetries = 5, backoff = 0.5):
+    # A transaction has already been started
+    if conn.in_transaction:
+        return 0.0
+
+    startTime = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            cursor.execute("BEGIN IMMEDIATE;")
+            return time.perf_counter() - startTime
+
+        # Only retry if the CD results file is locked by another process
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise e
+            if attempt >= lockRetries:
+                raise TimeoutError("TimeoutError", "Couldn't get write access to "+cdResultsFilePath+" after waiting "+str(round(time.perf_counter() - startTime, 3))+" seconds. Make sure the file isn't being updated by another process")
+            time.sleep(backoff * 2 ** attempt)
+            attempt += 1
+
+
+#####################################################################################
+## Function: validateCDResultsFile()
+#####################################################################################
+'''
+This function checks that the CD Results file database is compatible with CDExcelMessenger
+
+INPUT:
+'cursor' = An SQLite cursor.
+'cdResultsFilePath' = The path to a CD results file.
+'''
+        
+def validateCDResultsFile(cursor, cdResultsFilePath):
 
     # First check that all the required tables in the database
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='CustomDataTypes';")
@@ -986,6 +2241,110 @@ def validateCDResultsFile(cursor, cdResultsFilePath):
         raise Exception("Custom data type \"Int64\" can't be found in "+cdResultsFilePath+", CDExcelMessenger is compatible with CD 3.3 and isn't compatible with your version of CD")
             
                         
+#####################################################################################
+## Function: backupCDResultsFile()
+#####################################################################################
+'''
+This function takes an online snapshot of the CD results file with the SQLite backup API.
+The database is copied a chunk of pages at a time through a separate read connection, so the snapshot can be taken
+while the write lock is held by 'conn'.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'conn' = The SQLite connection that is going to write to the CD results file.
+'backupFilePath' = The path of the sidecar file to store the snapshot in. If this value is None,
+    the snapshot is kept in memory. An in-memory snapshot is lost if the process crashes, and since the fast write
+    settings turn off fsync (see setFastWritePragmas()), the CD results file can't be recovered after a crash without a sidecar file.
+'pages' = The number of pages to copy at a time.
+
+OUTPUT:
+'backupConn' = The SQLite connection to the snapshot.
+'''
+
+def backupCDResultsFile(cdResultsFilePath, conn, backupFilePath = None, pages = 1024):
+    try:
+        if backupFilePath is None:
+            backupConn = sqlite3.connect(":memory:")
+        else:
+            backupConn = sqlite3.connect(backupFilePath)
+        
+        # SQLite can't back up a database from a connection that is writing to it
+        sourceConn = sqlite3.connect(cdResultsFilePath)
+        sourceConn.backup(backupConn, pages=pages)
+        sourceConn.close()
+
+        return backupConn
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: Couldn't back up "+cdResultsFilePath+". It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, or there isn't enough space for the backup.")
+
+
+#####################################################################################
+## Function: restoreCDResultsFile()
+#####################################################################################
+'''
+This function restores the CD results file from a snapshot taken by backupCDResultsFile().
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'conn' = The SQLite connection.
+'backupConn' = The SQLite connection to the snapshot.
+'backupFilePath' = The path of the sidecar file the snapshot is stored in, or None.
+'pages' = The number of pages to copy at a time.
+'removeBackup' = Boolean value, default is False. If True, the sidecar file is deleted once the CD results file has been restored.
+
+OUTPUT:
+'message' = A message that can be printed to console if 'verbose' is True.
+'''
+
+def restoreCDResultsFile(cdResultsFilePath, conn, backupConn, backupFilePath = None, pages = 1024, removeBackup = False):
+    try:
+        # Undo the changes that haven't been committed before copying the snapshot back
+        if conn.in_transaction:
+            conn.rollback()
+        backupConn.backup(conn, pages=pages)
+        backupConn.close()
+        if removeBackup and backupFilePath is not None:
+            os.remove(backupFilePath)
+
+        return cdResultsFilePath+" restored from the backup"
+
+    # If the snapshot couldn't be copied back, the sidecar file still has it
+    except sqlite3.Error:
+        if backupFilePath is None:
+            return "WARNING: "+cdResultsFilePath+" couldn't be restored from the backup"
+        else:
+            return "WARNING: "+cdResultsFilePath+" couldn't be restored from the backup, the backup is saved in "+backupFilePath
+
+
+#####################################################################################
+## Function: setFastWritePragmas()
+#####################################################################################
+'''
+This function relaxes the journal and sync settings and increases the page cache of an SQLite connection.
+These settings should only be used when a snapshot of the CD results file has been taken with backupCDResultsFile().
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'''
+
+def setFastWritePragmas(cdResultsFilePath, cursor):
+    try:
+        # Keep the rollback journal in memory and don't wait for fsync
+        cursor.execute("PRAGMA journal_mode = MEMORY;")
+        cursor.execute("PRAGMA synchronous = OFF;")
+
+        # Use a 256 MB page cache and keep temporary tables in memory
+        cursor.execute("PRAGMA cache_size = -262144;")
+        cursor.execute("PRAGMA temp_store = MEMORY;")
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
 #####################################################################################
 ## Function: validateUpdateCDInput()
 #####################################################################################
@@ -998,21 +2357,34 @@ INPUT:
 'peakSheetName' = The name of the Excel sheet containing the peak data.
 'excelColList' = a list of columns in the Excel file that the user wishes to update.
 'tagList' = The list of Tags that the user wishes to use.
-'verbose' = Boolean value that controls the output to the console. 
+'verbose' = Boolean value that controls the output to the console.
+'incremental' = Boolean value that controls whether or not only the changed rows get updated.
+'fastWrite' = Boolean value that controls whether or not the fast write settings are used.
+'backupFilePath' = The path of the sidecar backup file, or None.
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up.
+'lockRetries' = The number of times to retry starting a write transaction if the CD results file is locked.
+'peakTable' = The peak table as a dataframe, or None if the peak table is read from the Excel file.
 '''
 
-def validateUpdateCDInput(cdResultsFilePath, excelFilePath, peakSheetName, excelColList, tagList, verbose):
+def validateUpdateCDInput(cdResultsFilePath, excelFilePath, peakSheetName, excelColList, tagList, verbose, incremental = False, fastWrite = False, backupFilePath = None, busyTimeout = 5.0, lockRetries = 5, peakTable = None):
     # Validate 'cdResultsFilePath'
     if type(cdResultsFilePath) != str:
         raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
-     
-    # Validate 'excelFilePath'
-    if type(excelFilePath) != str:
-        raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+    
+    # Validate 'peakTable', the Excel file is only needed if the peak table isn't given
+    if peakTable is not None:
+        if not isinstance(peakTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'peakTable' is a pandas DataFrame")
+        if excelFilePath is not None or peakSheetName is not None:
+            raise ValueError("ValueError", "Make sure 'excelFilePath' and 'peakSheetName' are None when 'peakTable' is given")
+    else:
+        # Validate 'excelFilePath'
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
 
-    # Validate 'peakSheetName'
-    if type(peakSheetName) != str:
-        raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
+        # Validate 'peakSheetName'
+        if type(peakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
     
     # Validate 'excelColList'
     if excelColList is not None:
@@ -1031,11 +2403,38 @@ def validateUpdateCDInput(cdResultsFilePath, excelFilePath, peakSheetName, excel
         for i in tagList:
             if type(i) != str:
                 raise TypeError("TypeError", "Make sure all values of 'tagList' are string values")
-    
+
     # Validate 'verbose'
     if type(verbose) != bool:
         raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
-    
+
+    # Validate 'incremental'
+    if type(incremental) != bool:
+        raise TypeError("TypeError", "Make sure 'incremental' is a boolean value")
+
+    # Validate 'fastWrite'
+    if type(fastWrite) != bool:
+        raise TypeError("TypeError", "Make sure 'fastWrite' is a boolean value")
+
+    # Validate 'backupFilePath'
+    if backupFilePath is not None:
+        if type(backupFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'backupFilePath' is a string value")
+        if os.path.abspath(backupFilePath) == os.path.abspath(cdResultsFilePath):
+            raise ValueError("ValueError", "Make sure 'backupFilePath' is not the path of the CD results file")
+
+    # Validate 'busyTimeout'
+    if type(busyTimeout) != int and type(busyTimeout) != float:
+        raise TypeError("TypeError", "Make sure 'busyTimeout' is a numeric value")
+    if busyTimeout < 0:
+        raise ValueError("ValueError", "Make sure 'busyTimeout' is not negative")
+
+    # Validate 'lockRetries'
+    if type(lockRetries) != int:
+        raise TypeError("TypeError", "Make sure 'lockRetries' is an integer value")
+    if lockRetries < 0:
+        raise ValueError("ValueError", "Make sure 'lockRetries' is not negative")
+
 
 #####################################################################################
 ## Function: updateCDResultsFile()
@@ -1044,7 +2443,8 @@ def validateUpdateCDInput(cdResultsFilePath, excelFilePath, peakSheetName, excel
 This function imports data from an Excel file to a Compound Discoverer (CD) results file.
 
 INPUT:
-'cdResultsFilePath' = The path to a CD results file
+'cdResultsFilePath' = The path to a CD results file, or a list of the paths to CD results files aligned by alignCDResultsFiles().
+    If a list is given, the values are imported into every file, see updateAlignedCDResultsFiles().
 'excelFilePath' = The path to an Excel file
 'peakSheetName' = The name of the Excel sheet containing the peak data
 'excelColList' = a list of columns in the Excel file that the user wishes to update (default is None), if this value is left as None, 
@@ -1052,32 +2452,114 @@ INPUT:
 'tagList' = The list of Tags that the user wishes to use.
 'verbose' = Boolean value that controls the output to the console. 
     If False, hide outputs and return the outputs as a list.
+'incremental' = Boolean value, default is False. If True, a hash of the Excel sheet and of each synced row is stored in the CD results file,
+    the update is skipped if the Excel sheet hasn't changed since the last sync, and otherwise only the rows that changed are updated.
+'fastWrite' = Boolean value, default is False. If True, the Excel file is read and the compound IDs are matched first, then the write lock is taken,
+    a snapshot of the CD results file is taken with the SQLite backup API, and all changes (including the compound IDs) are written
+    in one BEGIN IMMEDIATE transaction with an in-memory journal, no fsync, and a larger page cache.
+    If anything goes wrong, the CD results file is restored from the snapshot.
+'backupFilePath' = The path of a sidecar file to keep the snapshot in when 'fastWrite' is True (default is None).
+    If this value is left as None, the snapshot is kept in 'cdResultsFilePath' + ".backup" and the file is deleted once the changes
+    have been committed or the CD results file has been restored. If the restore fails, the file is kept so the CD results file can be recovered by hand.
+    The snapshot is always written to disk because no fsync is done during a fast write, so a crash could otherwise leave the CD results file corrupted with no backup.
+    If 'cdResultsFilePath' is a list, this is the directory to keep the snapshots in.
+'busyTimeout' = The number of seconds SQLite waits for a lock held by another process before giving up (default is 5.0).
+'lockRetries' = The number of times to retry starting the write transaction if the CD results file is locked (default is 5).
+    The wait before each retry is doubled, starting at half a second.
+'alignmentSheetName' = The name of the sheet with the alignment table, only used if 'cdResultsFilePath' is a list (default is "Alignment").
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+The write lock is only taken after the Excel file has been read and the compound IDs have been matched and saved to the Excel file.
+Only the changes to the CD results file are made while the lock is held, each column is written with one batched statement,
+so other users of the CD results file are locked out for as short a time as possible. The time spent waiting for the lock is added to the report.
     
 OUTPUT:    
 'report' = A list of messages that can be printed to console if 'verbose' is True.
 '''
     
-def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelColList = None, tagList = None, verbose = True):
+def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelColList = None, tagList = None, verbose = True, incremental = False, fastWrite = False, backupFilePath = None, busyTimeout = 5.0, lockRetries = 5, alignmentSheetName = "Alignment", timer = None):
+    # Aligned CD results files are each updated from the same sheet
+    if type(cdResultsFilePath) == list:
+        return updateAlignedCDResultsFiles(cdResultsFilePath, excelFilePath, peakSheetName, alignmentSheetName, excelColList, tagList, verbose, incremental, fastWrite, backupFilePath, busyTimeout, lockRetries, timer)
+
+    # The peak sheet is read and the compoundID column is saved to it by pushFrame()
+    result = pushFrame(cdResultsFilePath, None, excelColList, tagList, verbose, incremental, fastWrite, backupFilePath, busyTimeout, lockRetries, excelFilePath, peakSheetName, timer)
+    if not verbose and result is not None:
+        return result[1]
+
+
+#####################################################################################
+## Function: pushFrame()
+#####################################################################################
+'''
+This function imports data from a peak table dataframe to a Compound Discoverer (CD) results file.
+updateCDResultsFile() reads the peak table from an Excel file and passes it through this function, 
+so a peak table made by tidyFrames() or returned by pullFrame() can be pushed without saving it to an Excel file first.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'peakTable' = The peak table as a dataframe. The dataframe isn't changed, a copy is returned.
+    If this value is None, the peak table is read from 'peakSheetName' in 'excelFilePath'.
+'excelColList' = a list of columns in the peak table that the user wishes to update (default is None), if this value is left as None, 
+    all editable columns will be updated (Tags, Checked, Name, and any columns the user has added to the CD results file).
+'tagList' = The list of Tags that the user wishes to use.
+'verbose' = Boolean value that controls the output to the console. 
+'incremental' = Boolean value, default is False. If True, a hash of each synced row is stored in the CD results file,
+    and only the rows that changed since the last push of the same columns are updated, only these rows get Cleaned set to True.
+    If the peak table is read from an Excel file, the update is also skipped if the Excel sheet hasn't changed since the last sync.
+'fastWrite' = Boolean value, default is False (see updateCDResultsFile()).
+'backupFilePath' = The path of a sidecar file to keep the fast write snapshot in (see updateCDResultsFile()).
+'busyTimeout' = The number of seconds SQLite waits for a lock held by another process before giving up (default is 5.0).
+'lockRetries' = The number of times to retry starting the write transaction if the CD results file is locked (default is 5).
+'excelFilePath' = The path to an Excel file (default is None). Only used if 'peakTable' is None.
+'peakSheetName' = The name of the Excel sheet containing the peak data (default is None). Only used if 'peakTable' is None.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'peakTable' = The peak table as a dataframe, with the compoundID column added if it was missing.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+    
+def pushFrame(cdResultsFilePath, peakTable, excelColList = None, tagList = None, verbose = True, incremental = False, fastWrite = False, backupFilePath = None, busyTimeout = 5.0, lockRetries = 5, excelFilePath = None, peakSheetName = None, timer = None):
     # Set the sqlite connection and cursor values to None so that they can be closed during exceptions
     # only if the exception happened after the connections have been set
     conn = None
     cursor = None
+    backupConn = None
+    removeBackup = False
+    lockWaitTime = 0.0
     report = []
     
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("pushFrame")
+    
     try:
         # Basic validation of user input
+        timer.phase("Validate arguments")
         if verbose:
             print("Validating arguments")
-        validateUpdateCDInput(cdResultsFilePath, excelFilePath, peakSheetName, excelColList, tagList, verbose)
+        validateUpdateCDInput(cdResultsFilePath, excelFilePath, peakSheetName, excelColList, tagList, verbose, incremental, fastWrite, backupFilePath, busyTimeout, lockRetries, peakTable)
+        
+        # The name of the peak table used in messages
+        if excelFilePath is not None:
+            sourceName = excelFilePath
+        else:
+            sourceName = "the peak table"
     
         # If the results file can't be found
         if os.path.exists(cdResultsFilePath) == False:
             raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
           
         # Open connection to the Compound Discoverer File
+        timer.phase("Open CD results file")
         if verbose == True: 
             print("Connecting to "+cdResultsFilePath)
-        conn = sqlite3.connect(cdResultsFilePath)
+        conn = connectToCDResultsFile(cdResultsFilePath, busyTimeout = busyTimeout)
         cursor = conn.cursor()
         
         # Check that the CD results file is a compatible version
@@ -1085,6 +2567,26 @@ def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelCo
             print("Validating the compatiblity of "+cdResultsFilePath)
         validateCDResultsFile(cursor, cdResultsFilePath)
         
+        # If the Excel sheet hasn't changed since the last incremental sync, there is nothing to update
+        if incremental:
+            createSyncStateTables(cdResultsFilePath, cursor)
+        if incremental and excelFilePath is not None:
+            sheetKey = getSyncSheetKey("push", excelFilePath, [peakSheetName], [excelColList, tagList])
+            sheetState = getSheetState(cdResultsFilePath, cursor, sheetKey)
+            if sheetState is not None and sheetState[0] == getExcelSheetHash(excelFilePath, [peakSheetName]):
+                conn.commit()
+                cursor.close()
+                conn.close()
+                
+                report.append("No changes found in \""+peakSheetName+"\" since the last sync, "+cdResultsFilePath+" not updated")
+                timingReport = timer.end()
+                if reportTiming:
+                    report = report + timingReport
+                if verbose:
+                    for i in report:
+                        print(i)
+                return peakTable, report
+        
         # Get the custom data types and their IDs from CD, then store those values in a dictionary
         # The dictionary keys will be the data types and the dictionary values will be the IDs
         cursor.execute("SELECT Value, Name FROM CustomDataTypes;")
@@ -1092,29 +2594,77 @@ def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelCo
         for dataType in cursor.fetchall():
             cdDataTypeDict[dataType[1]] = dataType[0]
                 
-        try:
-            # Get Excel data in a dataframe, fill NA values in that dataframe, and get the number of rows in that dataframe
-            if verbose: 
-                print("Importing data from "+excelFilePath)
-            peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)
-            peakTable = fillNAValuesInDF(peakTable)
+        # Use a copy of the peak table that was given, so the caller's dataframe isn't changed
+        timer.phase("Read peak table")
+        if peakTable is not None:
+            peakTable = fillNAValuesInDF(peakTable.reset_index(drop=True).copy())
             peakRowCount = len(peakTable.index)
+        
+        else:
+            try:
+                # Get Excel data in a dataframe, fill NA values in that dataframe, and get the number of rows in that dataframe
+                if verbose: 
+                    print("Importing data from "+excelFilePath)
+                peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)
+                peakTable = fillNAValuesInDF(peakTable)
+                peakRowCount = len(peakTable.index)
+                timer.count(bytes = os.path.getsize(excelFilePath))
             
-        # If the Excel file doesn't have the correct sheet
-        except ValueError:
-            raise ValueError("ValueError", "Can't find "+peakSheetName+" in "+excelFilePath)
+            # If the Excel file doesn't have the correct sheet
+            except ValueError:
+                raise ValueError("ValueError", "Can't find "+peakSheetName+" in "+excelFilePath)
         
-        # If the Excel file can't be found
-        except FileNotFoundError:
-            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+            # If the Excel file can't be found
+            except FileNotFoundError:
+                raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
     
-        # If permission to the Excel file was denied
-        except PermissionError:
-            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")  
+            # If permission to the Excel file was denied
+            except PermissionError:
+                raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")  
+
+        timer.count(rows = peakRowCount, cells = peakTable.size)
+
+        # If the Excel data doesn't contain the CD database IDs, match them and save them to the Excel file before the write lock is taken
+        compoundIDsMatched = "compoundID" not in peakTable.columns
+        if compoundIDsMatched:
+            timer.phase("Match compound IDs")
+            if verbose:
+                print("Adding column \"compoundID\" to "+sourceName)
+            peakTable, newReport = createCompoundIDColumns(cdResultsFilePath, cursor, peakRowCount, excelFilePath, peakTable, peakSheetName) 
+            if verbose:
+                for i in newReport:
+                    print(i)
+            else:
+                for i in newReport:
+                    report.append(i)
+            
+            timer.count(rows = peakRowCount)
+
+        # Now that the peak table has been read and matched, take the write lock before the CD results file is changed
+        # With the fast write settings, the connection is in autocommit mode so the changes are only committed at the end
+        timer.phase("Wait for write access")
+        if fastWrite:
+            conn.commit()
+            setFastWritePragmas(cdResultsFilePath, cursor)
+            conn.isolation_level = None
+        lockWaitTime += beginImmediate(cdResultsFilePath, conn, cursor, lockRetries)
+        
+        # Take a snapshot of the CD results file, then write all changes in the same transaction with the fast write settings
+        if fastWrite:
+            timer.phase("Back up CD results file")
+            if verbose:
+                print("Backing up "+cdResultsFilePath)
+            
+            # An in-memory snapshot wouldn't survive a crash, so the snapshot defaults to a sidecar file
+            if backupFilePath is None:
+                backupFilePath = cdResultsFilePath+".backup"
+                removeBackup = True
+            backupConn = backupCDResultsFile(cdResultsFilePath, conn, backupFilePath)
 
         # Get list of tuples
         # Each tuple will contains the column DB name and display name
-        colNameTupleList, newReport = getColNamesForUpdatingCD(cdResultsFilePath, cursor, peakTable, excelFilePath, excelColList)
+        timer.phase("Prepare columns")
+        colNameTupleList, newReport = getColNamesForUpdatingCD(cdResultsFilePath, cursor, peakTable, sourceName, excelColList)
         if verbose:
             for i in newReport:
                 print(i)
@@ -1128,7 +2678,7 @@ def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelCo
             # Get the valid Tags
             # 'tagsInTagsCol' is going to be a list of unique tags that are only found in the Tags column in the Excel file
             # 'tagList' is going to be a list of valid Tags that the user chose
-            tagList, tagsInTagsCol, newReport = getValidTagNames(peakTable, excelFilePath, tagList, cursor)
+            tagList, tagsInTagsCol, newReport = getValidTagNames(peakTable, sourceName, tagList, cursor)
             if verbose:
                 for i in newReport:
                     print(i)
@@ -1173,8 +2723,9 @@ def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelCo
             else:
                 report.append("Column: \"Cleaned\" added to "+cdResultsFilePath)
             
-        # Set Cleaned to False for all rows
-        cursor.execute("UPDATE ConsolidatedUnknownCompoundItems SET Cleaned = 'False';") 
+        # Set Cleaned to False for all rows, an incremental sync only changes the Cleaned values of the rows that changed
+        if not incremental:
+            cursor.execute("UPDATE ConsolidatedUnknownCompoundItems SET Cleaned = 'False';")
         
         # If the 'originalName' column doesn't exist, create it
         cursor.execute("SELECT COUNT(*) AS CNTREC FROM pragma_table_info('ConsolidatedUnknownCompoundItems') WHERE name='originalName';")
@@ -1202,11 +2753,9 @@ def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelCo
             # Set originalName values
             cursor.execute("UPDATE ConsolidatedUnknownCompoundItems SET originalName = Name;") 
         
-        # If the Excel data doesn't contain the CD database IDs, add them
-        if "compoundID" not in peakTable.columns:
-            if verbose:
-                print("Adding column \"compoundID\" to "+excelFilePath)
-            peakTable, newReport = createCompoundIDColumns(cdResultsFilePath, conn, cursor, peakRowCount, excelFilePath, peakTable, peakSheetName) 
+        # Write the matched IDs to the CD results file in the same transaction as the other changes
+        if compoundIDsMatched:
+            newReport = addCompoundIDColumn(cdResultsFilePath, cursor, peakTable)
             if verbose:
                 for i in newReport:
                     print(i)
@@ -1214,13 +2763,60 @@ def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelCo
                 for i in newReport:
                     report.append(i)
 
+        # Find the rows that changed since the last incremental sync, the other rows don't need to be updated
+        if incremental:
+            timer.phase("Find changed rows")
+            syncKey = getSyncRowKey("push", [colNameTuple[1] for colNameTuple in colNameTupleList] + list(tagList or []))
+            syncStateDict = getSyncState(cdResultsFilePath, cursor, syncKey)
+            
+            # The first incremental push sets Cleaned to False for all rows, like a full push
+            if syncStateDict == {}:
+                cursor.execute("UPDATE ConsolidatedUnknownCompoundItems SET Cleaned = 'False';")
+            
+            # Only existing columns can be hashed in CD, if a column is going to be added every row needs to be updated
+            colDBNameList = []
+            newColumn = False
+            for colDBName, colDisplayName in colNameTupleList:
+                cursor.execute("SELECT COUNT(*) AS CNTREC FROM pragma_table_info('ConsolidatedUnknownCompoundItems') WHERE name=(?);", (colDBName, ))
+                if cursor.fetchall()[0][0] == 0:
+                    newColumn = True
+                else:
+                    colDBNameList.append(colDBName)
+            cdHashDict = getCDRowHashes(cdResultsFilePath, cursor, colDBNameList)
+            
+            changedRowSet = set()
+            excelRowValueDict = {}
+            for row in range(peakRowCount):
+                try:
+                    ID = int(peakTable.at[row,"compoundID"])
+                except (TypeError, ValueError):
+                    continue
+                excelRowValueDict[row] = getExcelRowValuesForUpdatingCD(peakTable, row, colNameTupleList, tagsInTagsCol, tagList)
+                
+                # A row has changed if the Excel values or the CD values are different from the last sync
+                if newColumn or ID not in syncStateDict or ID not in cdHashDict:
+                    changedRowSet.add(row)
+                elif syncStateDict[ID][0] != getRowHash(excelRowValueDict[row]) or syncStateDict[ID][1] != cdHashDict[ID]:
+                    changedRowSet.add(row)
+            
+            if verbose:
+                print(str(len(changedRowSet))+" of "+str(peakRowCount)+" rows changed since the last sync")
+            else:
+                report.append(str(len(changedRowSet))+" of "+str(peakRowCount)+" rows changed since the last sync")
+
         # Loop through each column tuple in the list of tuples, to update each column in the list
         for colNameTuple in colNameTupleList:
 
             # Get the column DB name and display name
             colDBName = colNameTuple[0]
             colDisplayName = colNameTuple[1]
-
+            
+            # The Tags are timed separately because each tag string is encoded to bytes
+            if colDBName == "Tags":
+                timer.phase("Encode tags")
+            else:
+                timer.phase("Collect column values")
+
             # If the display name isn't a column in the Excel data, set default type
             if colDisplayName not in peakTable.columns:
                 colDataType = "object"
@@ -1310,66 +2906,43 @@ def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelCo
                         if colDataType == "int64":
                             cursor.execute("SELECT CustomDataType FROM DataTypesColumns WHERE DataTypeID = (?) AND Property_DisplayName = (?);", (compoundTblID, colDisplayName, ))
                             if cursor.fetchall()[0][0] != cdDataTypeDict["Int64"]:
-                                raise TypeError("TypeError", colDisplayName+" data type in "+excelFilePath+" doesn't match data type in "+cdResultsFilePath)
+                                raise TypeError("TypeError", colDisplayName+" data type in "+sourceName+" doesn't match data type in "+cdResultsFilePath)
 
                         # Float column
                         elif colDataType == "float64":
                             cursor.execute("SELECT CustomDataType FROM DataTypesColumns WHERE DataTypeID = (?) AND Property_DisplayName = (?);", (compoundTblID, colDisplayName, ))
                             if cursor.fetchall()[0][0] != cdDataTypeDict["Double"]:
-                                raise TypeError("TypeError", colDisplayName+" data type in "+excelFilePath+" doesn't match data type in "+cdResultsFilePath)
+                                raise TypeError("TypeError", colDisplayName+" data type in "+sourceName+" doesn't match data type in "+cdResultsFilePath)
                 
                         # Bool or object column (both are stored in CD as strings)
                         else:
                             cursor.execute("SELECT CustomDataType FROM DataTypesColumns WHERE DataTypeID = (?) AND Property_DisplayName = (?);", (compoundTblID, colDisplayName, ))
                             if cursor.fetchall()[0][0] != cdDataTypeDict["String"]:
-                                raise TypeError("TypeError", colDisplayName+" data type in "+excelFilePath+" doesn't match data type in "+cdResultsFilePath)
+                                raise TypeError("TypeError", colDisplayName+" data type in "+sourceName+" doesn't match data type in "+cdResultsFilePath)
 
-            # Loop through each row in the Excel file, to update the current column in the CD results file
+            # Loop through each row in the Excel file, to get the new values of the current column
+            # The values are written with one statement after the loop
+            updateList = []
             for row in range(peakRowCount):
                 
+                # Rows that haven't changed since the last incremental sync are skipped
+                if incremental and row not in changedRowSet:
+                    continue
+                
                 # The Excel ID is needed to match rows between the excel file and CD results file
                 ID = peakTable.at[row,"compoundID"]
                 
                 # The Tags column needs to be handled differently
                 if colDBName == "Tags":
-                    tagString = ""
-                    
-                    # If there are tags that are only found in the excel 'Tags' column
-                    if tagsInTagsCol != []:
-                    
-                        # If the current Excel cell is not empty
-                        if pd.notnull(peakTable.at[row,colDisplayName]):
-                            currTagString = peakTable.at[row,colDisplayName]
-                            # Make sure the Tags value in Excel is a string
-                            if type(currTagString) == str:
-                                tagStringSplit = currTagString.split(";")
-                                for tag in tagsInTagsCol:
-                                    if tag in tagStringSplit:
-                                        tagString = tagString + tag + ";"
-                            else:
-                                raise TypeError("TypeError", str(currTagString)+" in the Tags column should be a string")
-                        
-                    # If the user wants to update the Tags in CD using values from chosen Excel columns
-                    if tagList is not None and tagList != []:
-                        
-                        # Create a tagString containing Tags that contain True or 1 values in the current Excel row
-                        for tag in tagList:
-                            if tag in peakTable.columns:
-                                tagValue = peakTable.at[row,tag]
-                                if tagValue == True or tagValue == 1:
-                                    tagString = tagString + tag + ";"                    
-                    
-                    # Remove the last ;
-                    if len(tagString) > 0:
-                        tagString = tagString[:-1]
+                    # Get the Tags of the current row
+                    tagString = getTagStringForRow(peakTable, row, colDisplayName, tagsInTagsCol, tagList)
                     
                     # Convert the tag string to bytes that CD can read
                     value = tagStringToBytes(tagString, cdResultsFilePath, cursor)
                     if value == None:
                         value = b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
 
-                    # Update the current row and column in the CD results file, also set Cleaned to True    
-                    cursor.execute("UPDATE ConsolidatedUnknownCompoundItems SET "+colDBName+" = (?), Cleaned = 'True' WHERE ID = (?);", (value, str(ID), ))  
+                    updateList.append((value, str(ID)))
                                             
                 # If the column isn't the Tags column
                 else:
@@ -1395,31 +2968,67 @@ def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelCo
                             if value.bit_length() > 64: 
                                 raise ValueError("ValueError", "The value '"+str(value)+"' is too large. 64 bits is the maximum size for numeric values.")
                     
-                    # Update the current row and column in the CD results file, also set Cleaned to True
-                    cursor.execute("UPDATE ConsolidatedUnknownCompoundItems SET "+colDBName+" = (?), Cleaned = 'True' WHERE ID = (?);", (str(value), str(ID), ))   
+                    updateList.append((str(value), str(ID)))
+
+            # Update the current column in the CD results file, also set Cleaned to True
+            timer.phase("Write to CD results file")
+            timer.count(rows = len(updateList), cells = len(updateList))
+            cursor.executemany("UPDATE ConsolidatedUnknownCompoundItems SET "+colDBName+" = (?), Cleaned = 'True' WHERE ID = (?);", updateList)
 
             if verbose:
                 print("Column: \""+colDisplayName+"\" updated")
             else:    
                 report.append("Column: \""+colDisplayName+"\" updated")
         
+        # Store the new sync state of the changed rows and of the Excel sheet
+        if incremental:
+            timer.phase("Save sync state")
+            colDBNameList = [colNameTuple[0] for colNameTuple in colNameTupleList]
+            cdHashDict = getCDRowHashes(cdResultsFilePath, cursor, colDBNameList)
+            syncRowList = []
+            for row in changedRowSet:
+                ID = int(peakTable.at[row,"compoundID"])
+                if ID in cdHashDict:
+                    syncRowList.append((ID, getRowHash(excelRowValueDict[row]), cdHashDict[ID], excelRowValueDict[row]))
+            saveSyncState(cdResultsFilePath, cursor, syncKey, syncRowList)
+            
+            # The sheet hash is taken after the compoundID column has been added to the sheet
+            if excelFilePath is not None:
+                saveSheetState(cdResultsFilePath, cursor, sheetKey, getExcelSheetHash(excelFilePath, [peakSheetName]), getCDTableHash(cdHashDict), colDBNameList)
+        
         # Save changes to CD database
+        timer.phase("Commit")
         conn.commit()
             
         # Close the connection to the Compound Discoverer file
         cursor.close()
         conn.close()
+        
+        # The snapshot isn't needed anymore, a sidecar file given by the user is kept
+        if backupConn is not None:
+            backupConn.close()
+            if removeBackup:
+                os.remove(backupFilePath)
+        
+        report.append("Waited "+str(round(lockWaitTime, 3))+" seconds for write access to "+cdResultsFilePath)
             
+        report.append(cdResultsFilePath+" updated")
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
         if verbose: 
-            report.append(cdResultsFilePath+" updated")
             for i in report:
                 print(i)
-        else:
-            report.append(cdResultsFilePath+" updated")
-            return report
+        return peakTable, report
     
     # Operational Error 
     except sqlite3.OperationalError:
+        timer.abort()
+        # Restore the CD results file from the snapshot taken before the fast write
+        restoreMessage = None
+        if backupConn is not None:
+            restoreMessage = restoreCDResultsFile(cdResultsFilePath, conn, backupConn, backupFilePath, removeBackup = removeBackup)
+        
         # Close the connection to the Compound Discoverer file
         if cursor is not None:
             cursor.close()
@@ -1429,11 +3038,19 @@ def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelCo
         if verbose:
             print("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
             print("Any changes to "+cdResultsFilePath+" have not been saved")
+            if restoreMessage is not None:
+                print(restoreMessage)
         else:
             raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
       
     # Get info about other errors
     except Exception as e:
+        timer.abort()
+        # Restore the CD results file from the snapshot taken before the fast write
+        restoreMessage = None
+        if backupConn is not None:
+            restoreMessage = restoreCDResultsFile(cdResultsFilePath, conn, backupConn, backupFilePath, removeBackup = removeBackup)
+        
         # Close the connection to the Compound Discoverer file
         if cursor is not None:
             cursor.close()
@@ -1443,6 +3060,8 @@ def updateCDResultsFile(cdResultsFilePath, excelFilePath, peakSheetName, excelCo
         if verbose:
             print(e)
             print("Any changes to "+cdResultsFilePath+" have not been saved")
+            if restoreMessage is not None:
+                print(restoreMessage)
         else:    
             raise e
     
@@ -1462,26 +3081,42 @@ INPUT:
 'removeCheckedRows' = Boolean value that controls whether or not rows get deleted in the Excel file if the row is Checked in CD.
 'newPeakSheetName' = The name of the new Peak sheet to be used in the Excel file
 'newDataSheetName' = The name of the new Data sheet to be used in the Excel file
-'verbose' = Boolean value that controls the output to the console. 
+'verbose' = Boolean value that controls the output to the console.
+'incremental' = Boolean value that controls whether or not only the changed rows get updated.
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up.
+'peakTable' = The peak table as a dataframe, or None if the peak table is read from the Excel file.
+'dataTable' = The data table as a dataframe, or None.
 '''
 
-def validateUpdateExcelInput(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetName, excelColList, removeCheckedRows, newPeakSheetName, newDataSheetName, verbose):
+def validateUpdateExcelInput(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetName, excelColList, removeCheckedRows, newPeakSheetName, newDataSheetName, verbose, incremental = False, busyTimeout = 5.0, peakTable = None, dataTable = None):
     # Validate 'cdResultsFilePath'
     if type(cdResultsFilePath) != str:
         raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
-     
-    # Validate 'excelFilePath'
-    if type(excelFilePath) != str:
-        raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+    
+    # Validate 'peakTable' and 'dataTable', the Excel file is only needed if the peak table isn't given
+    if peakTable is not None:
+        if not isinstance(peakTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'peakTable' is a pandas DataFrame")
+        if dataTable is not None and not isinstance(dataTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'dataTable' is a pandas DataFrame")
+        if excelFilePath is not None or peakSheetName is not None or dataSheetName is not None:
+            raise ValueError("ValueError", "Make sure 'excelFilePath', 'peakSheetName', and 'dataSheetName' are None when 'peakTable' is given")
+    else:
+        if dataTable is not None:
+            raise ValueError("ValueError", "Make sure 'dataTable' is only given with 'peakTable'")
+        
+        # Validate 'excelFilePath'
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
 
-    # Validate 'peakSheetName'
-    if type(peakSheetName) != str:
-        raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
+        # Validate 'peakSheetName'
+        if type(peakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
         
-    # Validate 'dataSheetName'
-    if dataSheetName is not None:
-        if type(dataSheetName) != str:
-            raise TypeError("TypeError", "Make sure 'dataSheetName' is a string value")
+        # Validate 'dataSheetName'
+        if dataSheetName is not None:
+            if type(dataSheetName) != str:
+                raise TypeError("TypeError", "Make sure 'dataSheetName' is a string value")
     
     # Validate 'excelColList'
     if excelColList is not None:
@@ -1507,6 +3142,16 @@ def validateUpdateExcelInput(cdResultsFilePath, excelFilePath, peakSheetName, da
     # Validate 'verbose'
     if type(verbose) != bool:
         raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+    # Validate 'incremental'
+    if type(incremental) != bool:
+        raise TypeError("TypeError", "Make sure 'incremental' is a boolean value")
+
+    # Validate 'busyTimeout'
+    if type(busyTimeout) != int and type(busyTimeout) != float:
+        raise TypeError("TypeError", "Make sure 'busyTimeout' is a numeric value")
+    if busyTimeout < 0:
+        raise ValueError("ValueError", "Make sure 'busyTimeout' is not negative")
     
         
 #####################################################################################
@@ -1529,83 +3174,208 @@ INPUT:
     if left as "", the user will be asked if they would like to overwrite the data sheet
 'verbose' = Boolean value that controls the output to the console. 
     If False, hide outputs and return the outputs as a list.
+'incremental' = Boolean value, default is False. If True, a hash of the Excel sheets and of each synced row is stored in the CD results file,
+    the update is skipped if neither the Excel sheets nor the synced CD columns have changed since the last sync,
+    and otherwise only the rows that changed are updated.
+'busyTimeout' = The number of seconds SQLite waits for a lock held by another process before giving up (default is 5.0).
+'msiLevelDict' = A dictionary of MSI levels, see msiFrames() (default is None). If this value isn't None, an MSI column
+    is added to the peak sheet from the updated Tag columns before it is saved, so assignMSI() doesn't have to save the Excel file again.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+The CD results file is opened read-only and memory-mapped, so it can be read while Compound Discoverer has it open.
+It is only reopened for writing if the compoundID column has to be added or the incremental sync state has to be saved.
+    
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+    
+def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetName = None, excelColList = None, removeCheckedRows = False, newPeakSheetName = "", newDataSheetName = "", verbose = True, incremental = False, busyTimeout = 5.0, msiLevelDict = None, timer = None):
+    # The sheets are read and saved by pullFrame()
+    result = pullFrame(cdResultsFilePath, None, None, excelColList, removeCheckedRows, verbose, incremental, busyTimeout, excelFilePath, peakSheetName, dataSheetName, newPeakSheetName, newDataSheetName, msiLevelDict, timer)
+    if not verbose and result is not None:
+        return result[2]
+
+
+#####################################################################################
+## Function: pullFrame()
+#####################################################################################
+'''
+This function imports data from a Compound Discoverer (CD) results file into a peak table dataframe.
+updateExcelFile() reads the sheets from an Excel file, passes them through this function, and saves them,
+so a peak table made by tidyFrames() or returned by pushFrame() can be updated without an Excel file.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'peakTable' = The peak table as a dataframe. The dataframe isn't changed, a copy is returned.
+    If this value is None, the peak table is read from 'peakSheetName' in 'excelFilePath'.
+'dataTable' = The data table as a dataframe (default is None). Only used if 'peakTable' is given.
+'excelColList' = A list of columns in the peak table that the user wishes to update (default is None), if this value is left as None, 
+    all editable columns will be updated (Tags, Checked, Name, and any columns the user has added to the CD results file).
+'removeCheckedRows' = Boolean value that controls whether or not rows get deleted in the peak table if the row is Checked in CD.
+'verbose' = Boolean value that controls the output to the console. 
+'incremental' = Boolean value, default is False. If True, a hash of each synced row is stored in the CD results file,
+    and only the rows that changed since the last pull of the same columns are updated. If the tables are read from an Excel file, 
+    the update is also skipped if neither the Excel sheets nor the synced CD columns have changed since the last sync.
+'busyTimeout' = The number of seconds SQLite waits for a lock held by another process before giving up (default is 5.0).
+'excelFilePath' = The path to an Excel file (default is None). Only used if 'peakTable' is None.
+'peakSheetName' = The name of the Excel sheet containing the peak table (default is None). Only used if 'peakTable' is None.
+'dataSheetName' = The name of the Excel sheet containing the data table (default is None). Only used if 'peakTable' is None.
+'newPeakSheetName' = The name of the new Peak sheet (see updateExcelFile()). Only used if 'peakTable' is None.
+'newDataSheetName' = The name of the new Data sheet (see updateExcelFile()). Only used if 'peakTable' is None.
+'msiLevelDict' = A dictionary of MSI levels, see msiFrames() (default is None). If this value isn't None, 
+    an MSI column is added to the peak table after the Checked rows are removed.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
     
 OUTPUT:
+'peakTable' = The updated peak table as a dataframe.
+'dataTable' = The updated data table as a dataframe, or None if no data table was given.
 'report' = A list of messages that can be printed to console if 'verbose' is True.
 '''
     
-def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetName = None, excelColList = None, removeCheckedRows = False, newPeakSheetName = "", newDataSheetName = "", verbose = True):
+def pullFrame(cdResultsFilePath, peakTable, dataTable = None, excelColList = None, removeCheckedRows = False, verbose = True, incremental = False, busyTimeout = 5.0, excelFilePath = None, peakSheetName = None, dataSheetName = None, newPeakSheetName = "", newDataSheetName = "", msiLevelDict = None, timer = None):
     # Set the sqlite connection and cursor variables to None so that they can be closed during exceptions
     # only if the exception happened after the connections have been set
     conn = None
     cursor = None
     report = []
     
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("pullFrame")
+    
     try:
         # Basic validation on user input
+        timer.phase("Validate arguments")
         if verbose:
             print("Validating arguments")
-        validateUpdateExcelInput(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetName, excelColList, removeCheckedRows, newPeakSheetName, newDataSheetName, verbose)
+        validateUpdateExcelInput(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetName, excelColList, removeCheckedRows, newPeakSheetName, newDataSheetName, verbose, incremental, busyTimeout, peakTable, dataTable)
+        if msiLevelDict is not None:
+            validateMSILevelDict(msiLevelDict)
+        
+        # The name of the peak table used in messages
+        if excelFilePath is not None:
+            sourceName = excelFilePath
+        else:
+            sourceName = "the peak table"
     
         # If the results file can't be found
         if os.path.exists(cdResultsFilePath) == False:
             raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
 
-        # Open connection to the Compound Discoverer File
+        # Open a read-only connection to the Compound Discoverer File
+        timer.phase("Open CD results file")
         if verbose == True: 
             print("Connecting to "+cdResultsFilePath)
-        conn = sqlite3.connect(cdResultsFilePath)
+        conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True, busyTimeout = busyTimeout)
         cursor = conn.cursor()
+        readOnly = True
         
         # Check that the CD results file is a compatible version
         if verbose:
             print("Validating the compatiblity of "+cdResultsFilePath)
         validateCDResultsFile(cursor, cdResultsFilePath)
         
-        # Get Peak table
-        try:
-            if verbose == True: 
-                print("Importing data from "+excelFilePath)
-            # Get Excel data in a dataframe, fill NA values in that dataframe, and get the number of rows in that dataframe
-            peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)            
-            peakTable = fillNAValuesInDF(peakTable)
-            peakRowCount = len(peakTable.index)
+        # If the Excel sheets and the synced CD columns haven't changed since the last incremental sync, there is nothing to update
+        if incremental:
+            # The sync state tables can only be created with a read-write connection
+            if not syncStateTablesExist(cdResultsFilePath, cursor):
+                conn, cursor = reopenCDResultsFileForWriting(cdResultsFilePath, conn, cursor, busyTimeout)
+                readOnly = False
+                createSyncStateTables(cdResultsFilePath, cursor)
+                conn.commit()
+        if incremental and excelFilePath is not None:
+            sheetNameList = [peakSheetName]
+            if dataSheetName is not None:
+                sheetNameList.append(dataSheetName)
+            sheetKey = getSyncSheetKey("pull", excelFilePath, sheetNameList, [excelColList, removeCheckedRows, newPeakSheetName, newDataSheetName])
+            sheetState = getSheetState(cdResultsFilePath, cursor, sheetKey)
+            if sheetState is not None and sheetState[0] == getExcelSheetHash(excelFilePath, sheetNameList):
+                if sheetState[1] == getCDTableHash(getCDRowHashes(cdResultsFilePath, cursor, sheetState[2])):
+                    cursor.close()
+                    conn.close()
+                    
+                    report.append("No changes found in \""+peakSheetName+"\" or "+cdResultsFilePath+" since the last sync, "+excelFilePath+" not updated")
+                    timingReport = timer.end()
+                    if reportTiming:
+                        report = report + timingReport
+                    if verbose:
+                        for i in report:
+                            print(i)
+                    return peakTable, dataTable, report
         
-        # If the Excel file doesn't have the correct sheet
-        except ValueError:
-            raise ValueError("ValueError", "Can't find "+peakSheetName+" in "+excelFilePath)
+        # Use copies of the tables that were given, so the caller's dataframes aren't changed
+        timer.phase("Read peak table")
+        if peakTable is not None:
+            peakTable = fillNAValuesInDF(peakTable.reset_index(drop=True).copy())
+            peakRowCount = len(peakTable.index)
+            peakColumnList = list(peakTable.columns)
+            if dataTable is not None:
+                dataTable = dataTable.copy()
         
-        # If the Excel file can't be found
-        except FileNotFoundError:
-            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
-    
-        # If permission to the Excel file was denied
-        except PermissionError:
-            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
-
-        # Get Data table
-        if dataSheetName is not None:
+        else:
+            # Get Peak table
             try:
-                # Get data sheet
-                dataTable = pd.read_excel(excelFilePath, sheet_name = dataSheetName)            
-        
+                if verbose == True: 
+                    print("Importing data from "+excelFilePath)
+                # Get Excel data in a dataframe, fill NA values in that dataframe, and get the number of rows in that dataframe
+                peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)            
+                peakTable = fillNAValuesInDF(peakTable)
+                peakRowCount = len(peakTable.index)
+                peakColumnList = list(peakTable.columns)
+            
             # If the Excel file doesn't have the correct sheet
             except ValueError:
-                raise ValueError("ValueError", "Can't find "+dataSheetName+" in "+excelFilePath)
-        
+                raise ValueError("ValueError", "Can't find "+peakSheetName+" in "+excelFilePath)
+            
             # If the Excel file can't be found
             except FileNotFoundError:
                 raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
-    
+        
             # If permission to the Excel file was denied
             except PermissionError:
                 raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+            # Get Data table
+            if dataSheetName is not None:
+                try:
+                    # Get data sheet
+                    dataTable = pd.read_excel(excelFilePath, sheet_name = dataSheetName)            
+                    timer.count(rows = len(dataTable.index), cells = dataTable.size)
+            
+                # If the Excel file doesn't have the correct sheet
+                except ValueError:
+                    raise ValueError("ValueError", "Can't find "+dataSheetName+" in "+excelFilePath)
+            
+                # If the Excel file can't be found
+                except FileNotFoundError:
+                    raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
         
+                # If permission to the Excel file was denied
+                except PermissionError:
+                    raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+            
+        timer.count(rows = peakRowCount, cells = peakTable.size)
+        if excelFilePath is not None:
+            timer.count(bytes = os.path.getsize(excelFilePath))
+            
         # If the Excel data doesn't contain the CD database IDs, add them
         if "compoundID" not in peakTable.columns:
+            timer.phase("Match compound IDs")
+            timer.count(rows = peakRowCount)
             if verbose:
-                print("Adding column \"compoundID\" to "+excelFilePath)
-            peakTable, newReport = createCompoundIDColumns(cdResultsFilePath, conn, cursor, peakRowCount, excelFilePath, peakTable, peakSheetName)
+                print("Adding column \"compoundID\" to "+sourceName)
+            peakTable, newReport = createCompoundIDColumns(cdResultsFilePath, cursor, peakRowCount, excelFilePath, peakTable, peakSheetName)
+            
+            # The IDs are matched with the read-only connection, only writing them needs write access
+            if readOnly:
+                conn, cursor = reopenCDResultsFileForWriting(cdResultsFilePath, conn, cursor, busyTimeout)
+                readOnly = False
+            newReport += addCompoundIDColumn(cdResultsFilePath, cursor, peakTable)
+            conn.commit()
             if verbose:
                 for i in newReport:
                     print(i)
@@ -1614,6 +3384,8 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
                     report.append(i)
         
         # If the user chose to import Tag data into Excel columns
+        timer.phase("Prepare columns")
+        tagList = []
         if "Tags" in excelColList:
             # Get the IDs of visible tags from CD results file 
             cursor.execute("SELECT BoxID FROM DataDistributionBoxExtendedData WHERE Name = 'EntityItemTagVisibility' AND ValueString = 'True';")
@@ -1654,9 +3426,9 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
                     newColList.append(pd.DataFrame (defaultValList, columns = [tag]))
                     tagList.append(tag)
                     if verbose:
-                        print("Column: \""+tag+"\" added to "+excelFilePath)
+                        print("Column: \""+tag+"\" added to "+sourceName)
                     else:    
-                        report.append("Column: \""+tag+"\" added to "+excelFilePath)
+                        report.append("Column: \""+tag+"\" added to "+sourceName)
                 
                 # If the current tag is in the Excel file
                 else:
@@ -1664,30 +3436,30 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
                     if peakTable.dtypes[tag] == "bool":
                         tagList.append(tag)
                         if verbose:
-                            print("Column: \""+tag+"\" updated in "+excelFilePath)
+                            print("Column: \""+tag+"\" updated in "+sourceName)
                         else:
-                            report.append("Column: \""+tag+"\" updated in "+excelFilePath)
+                            report.append("Column: \""+tag+"\" updated in "+sourceName)
                     
                     # If the Excel column is binary
                     elif peakTable.dtypes[tag] == "int64":
                         if tag in binaryCols:    
                             tagList.append(tag)
                             if verbose:
-                                print("Column: \""+tag+"\" updated in "+excelFilePath)
+                                print("Column: \""+tag+"\" updated in "+sourceName)
                             else:
-                                report.append("Column: \""+tag+"\" updated in "+excelFilePath)
+                                report.append("Column: \""+tag+"\" updated in "+sourceName)
                         else:
                             if verbose:
-                                print("WARNING: column \""+tag+"\" already exists in "+excelFilePath+", but is not a boolean or binary column, column ignored")
+                                print("WARNING: column \""+tag+"\" already exists in "+sourceName+", but is not a boolean or binary column, column ignored")
                             else:
-                                report.append("WARNING: column \""+tag+"\" already exists in "+excelFilePath+", but is not a boolean or binary column, column ignored")
+                                report.append("WARNING: column \""+tag+"\" already exists in "+sourceName+", but is not a boolean or binary column, column ignored")
                         
                     # If the Excel column is not bool or binary
                     else:
                         if verbose:
-                            print("WARNING: column \""+tag+"\" already exists in "+excelFilePath+", but is not a boolean or binary column, column ignored")
+                            print("WARNING: column \""+tag+"\" already exists in "+sourceName+", but is not a boolean or binary column, column ignored")
                         else:
-                            report.append("WARNING: column \""+tag+"\" already exists in "+excelFilePath+", but is not a boolean or binary column, column ignored")
+                            report.append("WARNING: column \""+tag+"\" already exists in "+sourceName+", but is not a boolean or binary column, column ignored")
             
             # If there was at least one visible tag
             if newColList != []:
@@ -1708,7 +3480,60 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
         # Get the ID of compound table
         cursor.execute("SELECT DataTypeID FROM DataTypes WHERE TableName = 'ConsolidatedUnknownCompoundItems';")
         compoundTblID = cursor.fetchall()[0][0]
+        
+        # Find the rows that changed since the last incremental sync, the other rows don't need to be updated
+        if incremental:
+            timer.phase("Find changed rows")
+            colDBNameList = [colNameTuple[0] for colNameTuple in colNameTupleList]
+            cdHashDict = getCDRowHashes(cdResultsFilePath, cursor, colDBNameList)
+            
+            # The individual Tag columns are also synced
+            syncColList = [colNameTuple[1] for colNameTuple in colNameTupleList]
+            if "Tags" in excelColList:
+                syncColList = syncColList + tagList
+            syncKey = getSyncRowKey("pull", syncColList)
+            syncStateDict = getSyncState(cdResultsFilePath, cursor, syncKey)
+            
+            # If a column is going to be added to the Excel file, every row needs to be updated
+            newColumn = False
+            for colDisplayName in syncColList:
+                if colDisplayName not in peakColumnList:
+                    newColumn = True
+            
+            changedRowSet = set()
+            for row in range(peakRowCount):
+                try:
+                    ID = int(peakTable.at[row,"compoundID"])
+                except (TypeError, ValueError):
+                    continue
+                
+                # A row has changed if the Excel values or the CD values are different from the last sync
+                if newColumn or ID not in syncStateDict or ID not in cdHashDict:
+                    changedRowSet.add(row)
+                elif syncStateDict[ID][0] != getRowHash(getExcelRowValuesForUpdatingExcel(peakTable, row, syncColList)) or syncStateDict[ID][1] != cdHashDict[ID]:
+                    changedRowSet.add(row)
+            
+            if verbose:
+                print(str(len(changedRowSet))+" of "+str(peakRowCount)+" rows changed since the last sync")
+            else:
+                report.append(str(len(changedRowSet))+" of "+str(peakRowCount)+" rows changed since the last sync")
  
+        # Find the compounds that have each Tag with one SQLite query per Tag,
+        # so the tag bytes don't have to be converted in Python to update the individual Tag columns
+        tagIDSetDict = {}
+        tagStringDict = {}
+        if "Tags" in [colNameTuple[0] for colNameTuple in colNameTupleList] and tagList != []:
+            timer.phase("Find tagged compounds")
+            tagPositionDict = getTagPositions(cdResultsFilePath, cursor)
+            for tag in tagList:
+                tagIDSetDict[tag] = set()
+                
+                # Only visible Tags are shown in the Excel file
+                if tag in tagPositionDict and tagPositionDict[tag][1]:
+                    condition, paramList = getTagCondition(cdResultsFilePath, tagPositionDict, [tag], "all")
+                    cursor.execute("SELECT ID FROM ConsolidatedUnknownCompoundItems WHERE "+condition+";", paramList)
+                    tagIDSetDict[tag] = set([ID[0] for ID in cursor.fetchall()])
+
         # Loop through each column tuple in the list of tuples, to update each column in the list
         for colNameTuple in colNameTupleList:
                 
@@ -1721,17 +3546,23 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
                 peakTable[colDisplayName] = [""]*peakRowCount
                 
                 if verbose:
-                    print("Column: \""+colDisplayName+"\" added to "+excelFilePath)
+                    print("Column: \""+colDisplayName+"\" added to "+sourceName)
                 else:
-                    report.append("Column: \""+colDisplayName+"\" added to "+excelFilePath)
+                    report.append("Column: \""+colDisplayName+"\" added to "+sourceName)
                 
             # If the column is already in the Excel file
             else:
                 if verbose:
-                    print("Column: \""+colDisplayName+"\" updated in "+excelFilePath)
+                    print("Column: \""+colDisplayName+"\" updated in "+sourceName)
                 else:
-                    report.append("Column: \""+colDisplayName+"\" updated in "+excelFilePath)
+                    report.append("Column: \""+colDisplayName+"\" updated in "+sourceName)
                      
+            # The Tags are timed separately because each tag string is decoded from bytes
+            if colDBName == "Tags":
+                timer.phase("Decode tags")
+            else:
+                timer.phase("Read from CD results file")
+                
             # Check if the column data type is boolean, the colIsBool variable gets used to make sure the column stays boolean
             colIsBool = False
             if peakTable.dtypes[colDisplayName] == "bool":
@@ -1739,33 +3570,42 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
                 
             # Loop through each row in the excel file
             for row in range(peakRowCount):
+                
+                # Rows that haven't changed since the last incremental sync are skipped
+                if incremental and row not in changedRowSet:
+                    continue
                    
                 # The Excel ID is needed to match rows between the excel file and CD results file
                 ID = peakTable.at[row,"compoundID"]
+                timer.count(rows = 1, cells = 1)
                         
                 # Get the value of the current row and column from the CD results file    
                 cursor.execute("SELECT "+colDBName+" FROM ConsolidatedUnknownCompoundItems WHERE ID = (?);", (str(ID), ))     
-                value = cursor.fetchall()[0][0]
+                selectStatementResults = cursor.fetchall()
+                
+                # Rows that didn't match exactly one compound in the CD results file have no ID
+                if selectStatementResults == []:
+                    continue
+                value = selectStatementResults[0][0]
                 
                 # The Tags column needs to be handled differently
                 if colDBName == "Tags":
                    
                     # Update the current row and column in the Excel data frame after converting the bytes value to a string
-                    tagString = tagBytesToString(value, cdResultsFilePath, cursor)
-                    peakTable.at[row,colDisplayName] = tagString                        
-                    
-                    # Create a list of tags, ';' is the delimiter
-                    tagStringSplit = tagString.split(";")
+                    # Each different bytes value is only converted once
+                    if value not in tagStringDict:
+                        tagStringDict[value] = tagBytesToString(value, cdResultsFilePath, cursor)
+                    peakTable.at[row,colDisplayName] = tagStringDict[value]
                     
                     # Update the individual Tag columns
                     if tagList != []:                
                         # Loop through the list of all tags
                         for tag in tagList:
                             
-                            # If the current tag is in 'tagStringSplit', 
+                            # If the current ID is in the ID set of the current tag, 
                             # that means the current tag for this row is checked in the CD results file,
                             # and we can update the tag column in the Excel file
-                            if tag in tagStringSplit:
+                            if int(ID) in tagIDSetDict[tag]:
                                 # update the tag column in the Excel file
                                 peakTable.at[row,tag] = True
                             else:
@@ -1805,13 +3645,28 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
             if colIsBool:                 
                 peakTable[colDisplayName] = peakTable[colDisplayName].astype('bool')
         
+        # Store the new sync state of the changed rows
+        if incremental:
+            timer.phase("Save sync state")
+            syncRowList = []
+            for row in changedRowSet:
+                ID = int(peakTable.at[row,"compoundID"])
+                if ID in cdHashDict:
+                    rowValues = getExcelRowValuesForUpdatingExcel(peakTable, row, syncColList)
+                    syncRowList.append((ID, getRowHash(rowValues), cdHashDict[ID], rowValues))
+            if readOnly:
+                conn, cursor = reopenCDResultsFileForWriting(cdResultsFilePath, conn, cursor, busyTimeout)
+                readOnly = False
+            saveSyncState(cdResultsFilePath, cursor, syncKey, syncRowList)
+        
         # If the user wishes to drop rows that have been checked
         if removeCheckedRows:
+            timer.phase("Remove checked rows")
             if "Checked" in peakTable.columns:
                 if peakTable.dtypes["Checked"] == "bool":
                     uidList = []
                     # If the user provided the data sheet, we need to get the 'UID' of the rows we are going to drop from the peak sheet
-                    if dataSheetName is not None:
+                    if dataTable is not None:
                         if "UID" in peakTable.columns:
                             if peakTable.dtypes["UID"] == "object":
                                 # Loop through the rows of the peak Table to get the 'UID' values of rows that are being dropped
@@ -1835,7 +3690,16 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
                             print("Columns dropped from data sheet")
                         else:
                             report.append("Columns dropped from data sheet")
-            
+        
+        # Add the MSI levels from the updated Tag columns
+        if msiLevelDict is not None:
+            peakTable, newReport = msiFrames(peakTable, msiLevelDict, verbose = False, timer = timer)
+            if verbose:
+                for i in newReport:
+                    print(i)
+            else:
+                for i in newReport:
+                    report.append(i)
         
         # Order Excel columns, put tag columns after the 'Tags' column
         firstCols = []
@@ -1851,6 +3715,8 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
             firstCols.append("Name")
         if "Notes" in peakTable.columns:
             firstCols.append("Notes")
+        if "MSI" in peakTable.columns:
+            firstCols.append("MSI")
         if "Tags" in peakTable.columns:
             firstCols.append("Tags")
         for i in tagList:
@@ -1858,8 +3724,13 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
                 
         peakTable = peakTable[firstCols + [c for c in peakTable if c not in firstCols]] 
         
+        # The sheets are only saved if the tables came from an Excel file
+        if excelFilePath is None:
+            peakSheetName = None
+            dataSheetName = None
+        
         # If user has chosen a new name for the peak sheet
-        if newPeakSheetName != "":
+        elif newPeakSheetName != "":
             peakSheetName = newPeakSheetName
         else:
             choice = input("Would you like to overwrite \""+peakSheetName+"\" (y/n)")
@@ -1876,6 +3747,8 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
                     dataSheetName = None
         
         try:
+            if peakSheetName is not None or dataSheetName is not None:
+                timer.phase("Save Excel file")
             if peakSheetName is not None:
                 # Update the peak sheet in the Excel file 
                 if verbose:
@@ -1887,6 +3760,7 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
                     if_sheet_exists="replace",
                 ) as writer:
                     peakTable.to_excel(writer, sheet_name=peakSheetName, index=False) 
+                timer.count(rows = len(peakTable.index), cells = peakTable.size)
             
             if dataSheetName is not None:
                 try:
@@ -1900,6 +3774,7 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
                         if_sheet_exists="replace",
                     ) as writer:
                         dataTable.to_excel(writer, sheet_name=dataSheetName, index=False) 
+                    timer.count(rows = len(dataTable.index), cells = dataTable.size)
         
                 # If the Excel file doesn't have the correct sheet
                 except ValueError:
@@ -1924,22 +3799,37 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
     
         # If permission to the Excel file was denied
         except PermissionError:
-            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")  
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        if peakSheetName is not None or dataSheetName is not None:
+            timer.count(bytes = os.path.getsize(excelFilePath))
+        
+        # Store the sync state of the Excel sheets, the sheet hash is taken after the sheets have been saved
+        if incremental:
+            timer.phase("Save sync state")
+            if excelFilePath is not None:
+                saveSheetState(cdResultsFilePath, cursor, sheetKey, getExcelSheetHash(excelFilePath, sheetNameList), getCDTableHash(cdHashDict), colDBNameList)
+            conn.commit()
 
         # Close the connection to the Compound Discoverer file
         cursor.close()
         conn.close()
-        
-        if verbose: 
+
+        if excelFilePath is not None:
             report.append(excelFilePath+" updated")
+        else:
+            report.append("Peak table updated")
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
             for i in report:
                 print(i)
-        else:
-            report.append(excelFilePath+" updated")
-            return report
+        return peakTable, dataTable, report
         
     # Operational Error 
     except sqlite3.OperationalError:
+        timer.abort()
         # Close the connection to the Compound Discoverer file
         if cursor is not None:
             cursor.close()
@@ -1953,6 +3843,7 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
     
     # Get info about other errors
     except Exception as e:
+        timer.abort()
         # Close the connection to the Compound Discoverer file
         if cursor is not None:
             cursor.close()
@@ -1966,102 +3857,622 @@ def updateExcelFile(cdResultsFilePath, excelFilePath, peakSheetName, dataSheetNa
  
  
 #####################################################################################
-## CleanupPeakTable()
+## Function: validateSyncBothInput()
 #####################################################################################
 '''
-This function cleans the peak table and produces stats
+This function makes sure the user input for syncing the Excel file and the CD results file is all valid
 
 INPUT:
-'peakTable' = The peak table.
-'colsToKeepDict' = Dictionary containing peak columns to keep and the columns new name.
-'optionsDict' = Dictionary containing options and the users chosen values for those options.
-
-RETURN:
-'peakTable' = Peak table after cleaning.
-'report' = Output to print to console is Verbose is True.
-'stats' = Stast produced by this function.
+'cdResultsFilePath' = The path to a CD results file.
+'excelFilePath' = The path to an Excel file.
+'peakSheetName' = The name of the Excel sheet containing the peak table.
+'excelColList' = a list of columns in the Excel file that the user wishes to sync.
+'newPeakSheetName' = The name of the new Peak sheet to be used in the Excel file.
+'verbose' = Boolean value that controls the output to the console.
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up.
+'lockRetries' = The number of times to retry starting a write transaction if the CD results file is locked.
 '''
 
-def CleanupPeakTable(peakTable,colsToKeepDict,optionsDict):
-    
-    newDict = {}
-    report = [] 
+def validateSyncBothInput(cdResultsFilePath, excelFilePath, peakSheetName, excelColList, newPeakSheetName, verbose, busyTimeout = 5.0, lockRetries = 5):
+    # Validate 'cdResultsFilePath'
+    if type(cdResultsFilePath) != str:
+        raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
 
-    # Loop through each entry in the colsToKeepDict
-    for name, newName in colsToKeepDict.items():
+    # Validate 'excelFilePath'
+    if type(excelFilePath) != str:
+        raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
 
-        # If the user has indicated that the current entry is associated with multiple columns in the Peak table
-        if name.startswith("<") and name.endswith(">"):
-            name = name[1:-1]
+    # Validate 'peakSheetName'
+    if type(peakSheetName) != str:
+        raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
 
-            # Get a list of indexes for the columns that start with 'name'
-            found = []
-            for i in range(len(peakTable.columns)):
-                if peakTable.columns[i].startswith(name):
-                    found.append(i)
+    # Validate 'excelColList'
+    if excelColList is not None:
+        if type(excelColList)!= list:
+            raise TypeError("TypeError", "Make sure 'excelColList' is a list")
 
-            # If no columns in the Peak table started with 'name'
-            if found == []:
-                report.append("WARNING: Column \""+name+"\" wasn't found in the Peak table, column ignored.")
+        for i in excelColList:
+            if type(i) != str:
+                raise TypeError("TypeError", "Make sure all values of 'excelColList' are string values")
 
-            # If at least one column in the Peak table starts with 'name'
-            else:
+    # Validate 'newPeakSheetName'
+    if type(newPeakSheetName) != str:
+        raise TypeError("TypeError", "Make sure 'newPeakSheetName' is a string value")
 
-                # For each column in the Peak table that starts with 'name',
-                # add a new entry in 'NewDict' with the original column name as the key,
-                # and a reformated column name as the value of that entry
-                for j in range(len(found)):
-                    label = peakTable.columns[found[j]]
-                    label = label.replace(name, "", 1)
-                    label = label.strip()      
-                    newDict[peakTable.columns[found[j]]] = newName+label
+    # Validate 'verbose'
+    if type(verbose) != bool:
+        raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
 
-        # If the current entry is supposed to be associated with just one column in the Peak table    
-        else:
-            # Get a list of indexes for the columns that have the name 'name'
-            found = []
-            for i in range(len(peakTable.columns)):
-                if peakTable.columns[i] == name:
-                    found.append(i)
+    # Validate 'busyTimeout'
+    if type(busyTimeout) != int and type(busyTimeout) != float:
+        raise TypeError("TypeError", "Make sure 'busyTimeout' is a numeric value")
+    if busyTimeout < 0:
+        raise ValueError("ValueError", "Make sure 'busyTimeout' is not negative")
 
-            # If no columns in the Peak table have the name 'name'
-            if found == []:
-                report.append("WARNING: Column \""+name+"\" wasn't found in the Peak table, column ignored.")
+    # Validate 'lockRetries'
+    if type(lockRetries) != int:
+        raise TypeError("TypeError", "Make sure 'lockRetries' is an integer value")
+    if lockRetries < 0:
+        raise ValueError("ValueError", "Make sure 'lockRetries' is not negative")
 
-            # If multiple columns in the Peak table have the name 'name'
-            elif len(found) > 1:
-                report.append("ERROR multiple entries of: Column \""+name+"\", column ignored.")
 
-            # If exactly one column in the Peak table have the name 'name'
-            else:
-                newDict[peakTable.columns[found[0]]] = newName
-    
-    # Get the correct columns in a list
-    cols = ['Idx', 'UID', 'Name']
-    for key in newDict:
-        if key not in cols:
-            cols.append(key)
-            
-    # Make sure Peak only has the columns we need
-    peakTable = peakTable[cols]
-    peakTable = peakTable.rename(columns=newDict)
-    
-    # Create CIMCBlib column and move the CIMCB ID code.
-    if optionsDict["CIMCBlib"]:
+#####################################################################################
+## Function: getColNamesForSyncingBoth()
+#####################################################################################
+'''
+This function gets a list of tuples.
+Each tuple will contain a column DB name and a column Display name.
+This function will get the columns that can be synced in both directions. A column can be synced in
+both directions if getColNamesForUpdatingCD() and getColNamesForUpdatingExcel() both allow the column,
+and the column already exists in the Excel file and the CD results file. The Tags column can be synced
+if getColNamesForUpdatingExcel() allows it.
 
-        # Tracks if the CIMCBlib column is in Peak
-        CIMCBlibInPeak = False
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'peakTable' = A DataFrame containing Excel data.
+'excelFilePath' = The path to an Excel file.
+'excelColList' = A list of columns in the Excel file that the user wishes to sync. If this value is None,
+    all editable columns will be synced.
 
-        # Loop through each row of Peak and get the current Label.     
-        for i in range(len(peakTable.index)):
-            currLabel = peakTable.at[i,"Name"]
-            
-            if type(currLabel) == str:
-            
-                # If the current label starts with 'ECU', add the CIMCBlib column if it doesn't exist,
-                if currLabel.startswith("ECU"):
-                    if CIMCBlibInPeak == False:
-                        if 'CIMCBlib' not in peakTable.columns:
+OUTPUT:
+'colNameTupleList' = A list of tuples. Each tuple contains a column's DB name and display name.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def getColNamesForSyncingBoth(cdResultsFilePath, cursor, peakTable, excelFilePath, excelColList):
+    try:
+        report = []
+
+        # Get the columns that can be updated in each direction
+        # Both functions can warn about the same column, so each warning is only reported once
+        # The Tags column is handled by getColNamesForUpdatingExcel() only
+        cdExcelColList = excelColList
+        if excelColList is not None:
+            cdExcelColList = [colDisplayName for colDisplayName in excelColList if colDisplayName != "Tags"]
+        cdColNameTupleList, newReport = getColNamesForUpdatingCD(cdResultsFilePath, cursor, peakTable, excelFilePath, cdExcelColList)
+        for i in newReport:
+            if i not in report:
+                report.append(i)
+        excelColNameTupleList, newReport = getColNamesForUpdatingExcel(cdResultsFilePath, cursor, peakTable, excelColList)
+        for i in newReport:
+            if i not in report:
+                report.append(i)
+
+        cdColDBNameList = [colNameTuple[0] for colNameTuple in cdColNameTupleList]
+
+        # This list is the output for this function
+        colNameTupleList = []
+
+        # Loop through the columns that can be updated in the Excel file
+        for colDBName, colDisplayName in excelColNameTupleList:
+
+            # If the column can't be updated in the CD results file, getColNamesForUpdatingCD() has already reported it
+            if colDBName != "Tags" and colDBName not in cdColDBNameList:
+                continue
+
+            # If the column is not in the Excel file
+            if colDisplayName not in peakTable.columns:
+                warning = "WARNING: \""+colDisplayName+"\" can't be found in "+excelFilePath+", column ignored"
+                if warning not in report:
+                    report.append(warning)
+                continue
+
+            colNameTupleList.append((colDBName, colDisplayName))
+
+        # Columns that can only be added to the CD results file aren't synced
+        syncedDBNameList = [colNameTuple[0] for colNameTuple in colNameTupleList]
+        for colDBName, colDisplayName in cdColNameTupleList:
+            if colDBName not in syncedDBNameList and colDisplayName in peakTable.columns:
+                cursor.execute("SELECT COUNT(*) AS CNTREC FROM pragma_table_info('ConsolidatedUnknownCompoundItems') WHERE name=(?);", (colDBName, ))
+                if cursor.fetchall()[0][0] == 0:
+                    report.append("WARNING: \""+colDisplayName+"\" can't be found in "+cdResultsFilePath+", use updateCDResultsFile() to add the column, column ignored")
+
+        return colNameTupleList, report
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+    # Other errors
+    except Exception as e:
+        raise e
+
+
+#####################################################################################
+## Function: syncBoth()
+#####################################################################################
+'''
+This function syncs an Excel file and a Compound Discoverer (CD) results file in one pass.
+Each file is read once. Every cell is compared with the last synced state that earlier runs of syncBoth() stored in the CD results file.
+Cells that were only edited in the Excel file are written to the CD results file, cells that were only edited in the CD results file are written
+to the Excel file, and cells that were edited in both files are reported as conflicts and left unchanged.
+If a compound has no sync state yet, every cell that is different in the two files is reported as a conflict. The state stored by
+incremental runs of updateCDResultsFile() and updateExcelFile() is kept separately and isn't used, so the first syncBoth() of a file
+reports every cell that is different as a conflict.
+The Excel file is only saved after the changes to the CD results file have been committed. If it can't be saved, the sync state of the
+rows that should have been updated in the Excel file is removed, so the next sync reports those cells as conflicts instead of
+writing the old Excel values to the CD results file.
+Only the columns that already exist in both files are synced. Tags are matched by the Tag names that are already in CD.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'excelFilePath' = The path to an Excel file.
+'peakSheetName' = The name of the Excel sheet containing the peak table.
+'excelColList' = A list of columns in the Excel file that the user wishes to sync (default is None), if this value is left as None,
+    all editable columns will be synced.
+'newPeakSheetName' = The name of the new Peak sheet to be used in the Excel file, default is ""
+    if left as "", the peak sheet will be overwritten if any cells were updated in the Excel file.
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+'busyTimeout' = The number of seconds SQLite waits for a lock held by another process before giving up (default is 5.0).
+'lockRetries' = The number of times to retry starting the write transaction if the CD results file is locked (default is 5).
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'conflictList' = A list of tuples. Each tuple contains the compoundID, the column display name,
+    the Excel value, and the CD value of a cell that was edited in both files.
+'''
+
+def syncBoth(cdResultsFilePath, excelFilePath, peakSheetName, excelColList = None, newPeakSheetName = "", verbose = True, busyTimeout = 5.0, lockRetries = 5, timer = None):
+    # Set the sqlite connection and cursor variables to None so that they can be closed during exceptions
+    # only if the exception happened after the connections have been set
+    conn = None
+    cursor = None
+    committed = False
+    lockWaitTime = 0.0
+    report = []
+    conflictList = []
+
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("syncBoth")
+
+    try:
+        # Basic validation on user input
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        validateSyncBothInput(cdResultsFilePath, excelFilePath, peakSheetName, excelColList, newPeakSheetName, verbose, busyTimeout, lockRetries)
+
+        # If the results file can't be found
+        if os.path.exists(cdResultsFilePath) == False:
+            raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
+
+        # Open connection to the Compound Discoverer File
+        timer.phase("Open CD results file")
+        if verbose:
+            print("Connecting to "+cdResultsFilePath)
+        conn = connectToCDResultsFile(cdResultsFilePath, busyTimeout = busyTimeout)
+        cursor = conn.cursor()
+
+        # Check that the CD results file is a compatible version
+        if verbose:
+            print("Validating the compatiblity of "+cdResultsFilePath)
+        validateCDResultsFile(cursor, cdResultsFilePath)
+        createSyncStateTables(cdResultsFilePath, cursor)
+
+        # Get Peak table
+        timer.phase("Read peak table")
+        try:
+            if verbose:
+                print("Importing data from "+excelFilePath)
+            # Get Excel data in a dataframe, fill NA values in that dataframe, and get the number of rows in that dataframe
+            peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)
+            peakTable = fillNAValuesInDF(peakTable)
+            peakRowCount = len(peakTable.index)
+            timer.count(rows = peakRowCount, cells = peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If the Excel file doesn't have the correct sheet
+        except ValueError:
+            raise ValueError("ValueError", "Can't find "+peakSheetName+" in "+excelFilePath)
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        # If the Excel data doesn't contain the CD database IDs, add them
+        # The IDs are written to the CD results file with the other changes, after the write lock is taken
+        compoundIDsMatched = "compoundID" not in peakTable.columns
+        if compoundIDsMatched:
+            timer.phase("Match compound IDs")
+            timer.count(rows = peakRowCount)
+            if verbose:
+                print("Adding column \"compoundID\" to "+excelFilePath)
+            peakTable, newReport = createCompoundIDColumns(cdResultsFilePath, cursor, peakRowCount, excelFilePath, peakTable, peakSheetName)
+            if verbose:
+                for i in newReport:
+                    print(i)
+            else:
+                for i in newReport:
+                    report.append(i)
+
+        # Get list of tuples
+        # Each tuple will contains the column DB name and display name
+        colNameTupleList, newReport = getColNamesForSyncingBoth(cdResultsFilePath, cursor, peakTable, excelFilePath, excelColList)
+        if verbose:
+            for i in newReport:
+                print(i)
+        else:
+            for i in newReport:
+                report.append(i)
+        colDBNameList = [colNameTuple[0] for colNameTuple in colNameTupleList]
+
+        # Read the synced columns of every compound from the CD results file in one query
+        timer.phase("Read from CD results file")
+        if verbose:
+            print("Importing data from "+cdResultsFilePath)
+        selectCols = ""
+        for colDBName in colDBNameList:
+            selectCols += ", "+colDBName
+        cursor.execute("SELECT ID"+selectCols+" FROM ConsolidatedUnknownCompoundItems;")
+        cdValueDict = {}
+        for cdRow in cursor.fetchall():
+            cdValueDict[cdRow[0]] = cdRow[1:]
+        timer.count(rows = len(cdValueDict), cells = len(cdValueDict) * len(colDBNameList))
+
+        # Get the last synced state of every compound, the base values only come from earlier runs of syncBoth()
+        syncColList = [colNameTuple[1] for colNameTuple in colNameTupleList]
+        syncKey = getSyncRowKey("sync", syncColList)
+        syncStateDict = getSyncState(cdResultsFilePath, cursor, syncKey)
+
+        # Rows without Tags get one \x00\x00 for each Tag in CD
+        cursor.execute("SELECT BoxID FROM DataDistributionBoxExtendedData WHERE Name = 'EntityItemTagVisibility';")
+        emptyTagBytes = b"\x00\x00" * len(cursor.fetchall())
+
+        # Most rows share the same Tags, so converted Tags are cached
+        tagStringDict = {}
+        tagBytesDict = {}
+
+        # 'cdUpdateDict' will hold the values to write to each CD column, 'syncRowDict' will hold the new synced values of each row
+        cdUpdateDict = {}
+        for colDBName in colDBNameList:
+            cdUpdateDict[colDBName] = []
+        syncRowDict = {}
+        excelCellCount = 0
+        excelIDSet = set()
+
+        # The Checked column and boolean Excel columns are compared as boolean values
+        boolColList = []
+        for colDBName, colDisplayName in colNameTupleList:
+            if colDBName == "Checked" or (colDBName != "Tags" and peakTable.dtypes[colDisplayName] == "bool"):
+                boolColList.append(colDisplayName)
+        cdCellCount = 0
+
+        timer.phase("Compare values")
+        timer.count(rows = peakRowCount, cells = peakRowCount * len(colNameTupleList))
+        if verbose:
+            print("Comparing "+excelFilePath+" and "+cdResultsFilePath)
+
+        # Loop through each row in the Excel file
+        for row in range(peakRowCount):
+
+            # The Excel ID is needed to match rows between the excel file and CD results file
+            try:
+                ID = int(peakTable.at[row,"compoundID"])
+            except (TypeError, ValueError):
+                continue
+            if ID not in cdValueDict:
+                report.append("WARNING: compoundID "+str(ID)+" can't be found in "+cdResultsFilePath+", row ignored")
+                continue
+
+            # Get the values of the row from the last sync
+            baseValues = {}
+            if ID in syncStateDict:
+                baseValues = json.loads(syncStateDict[ID][2])
+            newBaseValues = {}
+
+            # Loop through each synced column
+            for i in range(len(colNameTupleList)):
+                colDBName, colDisplayName = colNameTupleList[i]
+                isTags = colDBName == "Tags"
+                colIsBool = colDisplayName in boolColList
+
+                # Get the CD value in the same format as the Excel value
+                cdValue = cdValueDict[ID][i]
+                if isTags:
+                    if cdValue not in tagStringDict:
+                        tagStringDict[cdValue] = tagBytesToString(cdValue, cdResultsFilePath, cursor)
+                    cdValue = tagStringDict[cdValue]
+                elif colIsBool:
+                    if type(cdValue) == str:
+                        cdValue = cdValue.upper() == "TRUE"
+                    else:
+                        cdValue = bool(cdValue)
+
+                excelValue = peakTable.at[row,colDisplayName]
+                if colIsBool:
+                    excelValue = bool(excelValue)
+
+                excelNorm = normalizeSyncValue(excelValue, isTags)
+                cdNorm = normalizeSyncValue(cdValue, isTags)
+                baseNorm = baseValues.get(colDisplayName)
+
+                # If the cell is the same in both files
+                if excelNorm == cdNorm:
+                    newBaseValues[colDisplayName] = excelNorm
+
+                # If the cell was only edited in the CD results file, update the Excel data
+                elif baseNorm == excelNorm:
+                    peakTable.at[row,colDisplayName] = cdValue
+                    newBaseValues[colDisplayName] = cdNorm
+                    excelCellCount = excelCellCount + 1
+                    excelIDSet.add(ID)
+
+                # If the cell was only edited in the Excel file, update the CD results file
+                elif baseNorm == cdNorm:
+                    if isTags:
+                        if excelValue not in tagBytesDict:
+                            tagBytes = tagStringToBytes(excelValue, cdResultsFilePath, cursor)
+                            if tagBytes is None:
+                                tagBytes = emptyTagBytes
+                            tagBytesDict[excelValue] = tagBytes
+                        value = tagBytesDict[excelValue]
+                    elif colDBName == "Checked":
+                        value = int(excelValue)
+                    else:
+                        value = str(excelValue)
+                    cdUpdateDict[colDBName].append((value, ID))
+                    newBaseValues[colDisplayName] = excelNorm
+                    cdCellCount = cdCellCount + 1
+
+                # If the cell was edited in both files, or the row has never been synced
+                else:
+                    conflictList.append((ID, colDisplayName, excelValue, cdValue))
+                    if baseNorm is None:
+                        report.append("CONFLICT: compoundID "+str(ID)+" column \""+colDisplayName+"\" is different in both files and hasn't been synced before (Excel: \""+excelNorm+"\", CD: \""+cdNorm+"\"), cell not updated")
+                    else:
+                        report.append("CONFLICT: compoundID "+str(ID)+" column \""+colDisplayName+"\" was edited in both files since the last sync (Excel: \""+excelNorm+"\", CD: \""+cdNorm+"\"), cell not updated")
+                        newBaseValues[colDisplayName] = baseNorm
+
+            syncRowDict[ID] = (row, newBaseValues)
+
+        # Update the CD results file, one statement for each column
+        timer.phase("Wait for write access")
+        if verbose:
+            print("Updating "+cdResultsFilePath)
+        lockWaitTime += beginImmediate(cdResultsFilePath, conn, cursor, lockRetries)
+        timer.phase("Write to CD results file")
+        timer.count(rows = cdCellCount, cells = cdCellCount)
+        if compoundIDsMatched:
+            report += addCompoundIDColumn(cdResultsFilePath, cursor, peakTable)
+        cursor.execute("SELECT COUNT(*) AS CNTREC FROM pragma_table_info('ConsolidatedUnknownCompoundItems') WHERE name='Cleaned';")
+        if cursor.fetchall()[0][0] == 0:
+            cleanedSQL = ""
+        else:
+            cleanedSQL = ", Cleaned = 'True'"
+        for colDBName in colDBNameList:
+            if cdUpdateDict[colDBName] != []:
+                cursor.executemany("UPDATE ConsolidatedUnknownCompoundItems SET "+colDBName+" = (?)"+cleanedSQL+" WHERE ID = (?);", cdUpdateDict[colDBName])
+
+        # This is to make sure boolean columns stay boolean in the Excel file
+        for colDisplayName in boolColList:
+            peakTable[colDisplayName] = peakTable[colDisplayName].astype('bool')
+
+        # Store the new sync state of every synced row
+        timer.phase("Save sync state")
+        cdHashDict = getCDRowHashes(cdResultsFilePath, cursor, colDBNameList)
+        syncRowList = []
+        for ID in syncRowDict:
+            row, newBaseValues = syncRowDict[ID]
+            syncRowList.append((ID, getRowHash(getExcelRowValuesForUpdatingExcel(peakTable, row, syncColList)), cdHashDict[ID], newBaseValues))
+        saveSyncState(cdResultsFilePath, cursor, syncKey, syncRowList)
+
+        # Save changes to CD database
+        timer.phase("Commit")
+        conn.commit()
+        committed = True
+
+        # Save the Excel file once, only if it changed, and only after the changes to the CD results file have been committed
+        if newPeakSheetName != "":
+            peakSheetName = newPeakSheetName
+        elif excelCellCount == 0:
+            peakSheetName = None
+
+        if peakSheetName is not None:
+            timer.phase("Save Excel file")
+            try:
+                if verbose:
+                    print("Saving changes to sheet \""+peakSheetName+"\"")
+                with pd.ExcelWriter(
+                    excelFilePath,
+                    mode="a",
+                    engine="openpyxl",
+                    if_sheet_exists="replace",
+                ) as writer:
+                    peakTable.to_excel(writer, sheet_name=peakSheetName, index=False)
+                timer.count(rows = peakRowCount, cells = peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+            except Exception as e:
+                # The new sync state of the rows updated in the Excel file assumes the sheet was saved,
+                # remove it so the next sync reports those cells as conflicts instead of writing the old Excel values to CD
+                cursor.executemany("DELETE FROM CDExcelMessengerSyncState WHERE SyncKey = (?) AND compoundID = (?);", [(syncKey, ID) for ID in excelIDSet])
+                conn.commit()
+
+                # If the Excel file can't be found
+                if type(e) == FileNotFoundError:
+                    raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath+". The changes to "+cdResultsFilePath+" have been saved")
+
+                # If permission to the Excel file was denied
+                if type(e) == PermissionError:
+                    raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program. The changes to "+cdResultsFilePath+" have been saved")
+                raise e
+
+        # Close the connection to the Compound Discoverer file
+        cursor.close()
+        conn.close()
+
+        report.append(str(excelCellCount)+" cells updated in "+excelFilePath)
+        report.append(str(cdCellCount)+" cells updated in "+cdResultsFilePath)
+        report.append(str(len(conflictList))+" conflicts")
+        report.append("Waited "+str(round(lockWaitTime, 3))+" seconds for write access to "+cdResultsFilePath)
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report, conflictList
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        timer.abort()
+        # Close the connection to the Compound Discoverer file
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+        if verbose:
+            print("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+            if not committed:
+                print("Any changes to "+cdResultsFilePath+" have not been saved")
+        else:
+            raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+    # Get info about other errors
+    except Exception as e:
+        timer.abort()
+        # Close the connection to the Compound Discoverer file
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+        if verbose:
+            print(e)
+            if not committed:
+                print("Any changes to "+cdResultsFilePath+" have not been saved")
+        else:
+            raise e
+
+
+#####################################################################################
+## CleanupPeakTable()
+#####################################################################################
+'''
+This function cleans the peak table and produces stats
+
+INPUT:
+'peakTable' = The peak table.
+'colsToKeepDict' = Dictionary containing peak columns to keep and the columns new name.
+'optionsDict' = Dictionary containing options and the users chosen values for those options.
+
+RETURN:
+'peakTable' = Peak table after cleaning.
+'report' = Output to print to console is Verbose is True.
+'stats' = Stast produced by this function.
+'''
+
+def CleanupPeakTable(peakTable,colsToKeepDict,optionsDict):
+    
+    newDict = {}
+    report = [] 
+
+    # Loop through each entry in the colsToKeepDict
+    for name, newName in colsToKeepDict.items():
+
+        # If the user has indicated that the current entry is associated with multiple columns in the Peak table
+        if name.startswith("<") and name.endswith(">"):
+            name = name[1:-1]
+
+            # Get a list of indexes for the columns that start with 'name'
+            found = []
+            for i in range(len(peakTable.columns)):
+                if peakTable.columns[i].startswith(name):
+                    found.append(i)
+
+            # If no columns in the Peak table started with 'name'
+            if found == []:
+                report.append("WARNING: Column \""+name+"\" wasn't found in the Peak table, column ignored.")
+
+            # If at least one column in the Peak table starts with 'name'
+            else:
+
+                # For each column in the Peak table that starts with 'name',
+                # add a new entry in 'NewDict' with the original column name as the key,
+                # and a reformated column name as the value of that entry
+                for j in range(len(found)):
+                    label = peakTable.columns[found[j]]
+                    label = label.replace(name, "", 1)
+                    label = label.strip()      
+                    newDict[peakTable.columns[found[j]]] = newName+label
+
+        # If the current entry is supposed to be associated with just one column in the Peak table    
+        else:
+            # Get a list of indexes for the columns that have the name 'name'
+            found = []
+            for i in range(len(peakTable.columns)):
+                if peakTable.columns[i] == name:
+                    found.append(i)
+
+            # If no columns in the Peak table have the name 'name'
+            if found == []:
+                report.append("WARNING: Column \""+name+"\" wasn't found in the Peak table, column ignored.")
+
+            # If multiple columns in the Peak table have the name 'name'
+            elif len(found) > 1:
+                report.append("ERROR multiple entries of: Column \""+name+"\", column ignored.")
+
+            # If exactly one column in the Peak table have the name 'name'
+            else:
+                newDict[peakTable.columns[found[0]]] = newName
+    
+    # Get the correct columns in a list
+    cols = ['Idx', 'UID', 'Name']
+    for key in newDict:
+        if key not in cols:
+            cols.append(key)
+            
+    # Make sure Peak only has the columns we need
+    peakTable = peakTable[cols]
+    peakTable = peakTable.rename(columns=newDict)
+    
+    # Create CIMCBlib column and move the CIMCB ID code.
+    if optionsDict["CIMCBlib"]:
+
+        # Tracks if the CIMCBlib column is in Peak
+        CIMCBlibInPeak = False
+
+        # Loop through each row of Peak and get the current Label.     
+        for i in range(len(peakTable.index)):
+            currLabel = peakTable.at[i,"Name"]
+            
+            if type(currLabel) == str:
+            
+                # If the current label starts with 'ECU', add the CIMCBlib column if it doesn't exist,
+                if currLabel.startswith("ECU"):
+                    if CIMCBlibInPeak == False:
+                        if 'CIMCBlib' not in peakTable.columns:
                             # Add new column to Peak with empty values
                             peakTable["CIMCBlib"] = ""
                             CIMCBlibInPeak = True
@@ -2074,480 +4485,5913 @@ def CleanupPeakTable(peakTable,colsToKeepDict,optionsDict):
                     peakTable.at[i,"CIMCBlib"] = temp[0]
                     peakTable.at[i,"Name"] = temp[1]    
         
-        if 'CIMCBlib' in peakTable.columns:
-            # Make sure the first four columns of Peak are 'Idx', 'UID', 'CIMCBlib', and 'Name'
-            peakTable = peakTable[['Idx', 'UID', 'CIMCBlib', 'Name'] + [c for c in peakTable if c not in ['Idx', 'UID', 'CIMCBlib', 'Name']]] 
+        if 'CIMCBlib' in peakTable.columns:
+            # Make sure the first four columns of Peak are 'Idx', 'UID', 'CIMCBlib', and 'Name'
+            peakTable = peakTable[['Idx', 'UID', 'CIMCBlib', 'Name'] + [c for c in peakTable if c not in ['Idx', 'UID', 'CIMCBlib', 'Name']]] 
+        else:
+            # Make sure the first three columns of Peak are 'Idx', 'Name', and 'Label'
+            peakTable = peakTable[['Idx', 'UID', 'Name'] + [c for c in peakTable if c not in ['Idx', 'UID', 'Name']]] 
+            
+    stats = [];
+            
+    # Get the sum of rows that have a MS2 hit
+    if optionsDict["MSHit"]:
+    
+        # Add new column to Peak table with False values, 
+        # these values will be changed to True during the upcoming loop if there is a ms2Hit
+        peakTable["ms2Hit"] = False
+        
+        # If the MS2 column is in Peak, loop through each row of Peak, and track ms2Hits
+        if 'MS2' in peakTable.columns:
+            ms2hits = 0
+            for i in range(len(peakTable.index)):
+                if peakTable.at[i,"MS2"] != "No MS2":
+                    ms2hits = ms2hits + 1
+                    peakTable.at[i,"ms2Hit"] = True
+            
+            stats.append(str(ms2hits) + " peaks with MS2 spectra")
+
+    # Peak cleaning stats.
+
+    # Get the indexes for the column that start with 'mzList_'
+    found = -1
+    for i in range(len(peakTable.columns)):
+        if peakTable.columns[i].startswith("mzList_"):
+            found = i
+            
+    # Get the number of mass hits
+    massHit = []
+    massHitSum = 0
+    if found != -1:
+        for i in range(len(peakTable.index)):
+            if peakTable.iloc[i, found] != "No matches found":
+                massHit.append(1)
+                massHitSum = massHitSum + 1
+            else:
+                massHit.append(0)
+    else:
+        massHit = [0] * len(peakTable.index)
+
+    # Get the number of vault hits
+    vaultHit = []
+    vaultHitSum = 0
+    if "mzVaultMatch" in peakTable.columns:   
+        for i in range(len(peakTable.index)):
+            if float(peakTable.at[i, "mzVaultMatch"]) > optionsDict["mzmatch"]:
+                vaultHit.append(1)
+                vaultHitSum = vaultHitSum + 1
+            else:
+                vaultHit.append(0)
+    else:
+        vaultHit = [0] * len(peakTable.index)
+        
+    # Get the number of cloud hits
+    cloudHit = []
+    cloudHitSum = 0
+    if "mzCloudMatch" in peakTable.columns:   
+        for i in range(len(peakTable.index)):
+            if float(peakTable.at[i, "mzCloudMatch"]) > optionsDict["mzmatch"]:
+                cloudHit.append(1)
+                cloudHitSum = cloudHitSum + 1
+            else:
+                cloudHit.append(0)
+    else:
+        cloudHit = [0] * len(peakTable.index)
+            
+    # Get the number of mass, vault, and cloud hits        
+    peakTable["Hit"] = 0
+    hitSum = 0
+    for i in range(len(peakTable.index)):
+        hit = cloudHit[i] + vaultHit[i]*10 + 100*massHit[i] 
+        peakTable.at[i, "Hit"] = hit
+        if hit > 0:
+            hitSum = hitSum + 1
+
+    stats.append(str(massHitSum) + " MassList hits")
+    stats.append(str(vaultHitSum) + " mzVault hits")
+    stats.append(str(cloudHitSum) + " mzCloud hits")
+    if hitSum == 1:
+        stats.append(str(hitSum) + " unique hit")
+    else:
+        stats.append(str(hitSum) + " unique hits")
+
+    return peakTable, report, stats
+
+
+#####################################################################################
+## MergeMetaintoData()
+#####################################################################################
+'''
+This function merges Meta columns into the Data table
+
+INPUT:
+'dataTable' = The Data table.
+'metaTable' = The Meta table.
+
+OUTPUT:
+'dataTable' = The Data table after Meta columns have been added.
+'''
+
+def MergeMetaintoData(dataTable, metaTable):
+
+    # Make sure Meta table contains the necessary columns
+    metaHeader = metaTable.columns
+    if all(item in metaHeader for item in ["Filename", "Batch", "Order", "SampleID", "SampleType"]) == False:
+        raise Exception("MetaTable must contain columns: 'Filename','Batch','Order','SampleID' & 'SampleType'")
+    
+    # Make sure Data table contains the necessary columns    
+    dataHeader = dataTable.columns            
+    if all(item in dataHeader for item in ["Idx", "Filename"]) == False:
+        raise Exception("DataTable must contain columns: 'Idx','Filename'")        
+    
+    # Sort Data and Meta tables by the 'Filename' column, 
+    # and check that the 'Filename' columns are identical in both tables
+    tempData = dataTable.sort_values(by=["Filename"])
+    
+    tempMeta = metaTable.sort_values(by=["Filename"])
+    dataFilenames = tempData["Filename"]        
+    metaFilenames = tempMeta["Filename"]
+    if dataFilenames.equals(metaFilenames) == False:
+        raise Exception("MetaTable & DataTable must have identical Filenames")
+    
+    # Drop 'Filename' from the Meta table becasue we don't need it any more,
+    # but we do still need it in the Data table
+    tempMeta = tempMeta.drop(columns=['Filename'])
+    
+    # If their are any duplicate columns still in the Data and Meta tables,
+    # remove that column from the Data table
+    for i in tempData.columns:
+        if i in tempMeta.columns:
+            tempData = tempData.drop(columns=i)
+        
+    # Concatinate the Data and Meta tables,
+    # there should be no duplicate columns now
+    tempData = pd.concat([tempData, tempMeta], axis=1)
+    
+    # Make sure the first two columns of Data are 'Idx', and 'Filename',
+    # then the next columns should be the Meta columns, followed by the other Data columns
+    tempCols = ['Idx', 'Filename'] 
+    for i in tempMeta.columns:
+        tempCols.append(i)
+    tempData = tempData[tempCols + [c for c in tempData if c not in tempCols]] 
+    
+    # Sort Data by 'Idx' before returning Data
+    dataTable = tempData.sort_values(by=['Idx'])
+    return dataTable
+
+
+#####################################################################################
+## validatingDataPeakTables()
+#####################################################################################
+'''
+This function validates the Data table and Peak table.
+
+INPUT:
+'dataTable' = The Data table.
+'peakTable' = The Peak table.
+'optionsDict' = Dictionary containing options and the values the user chose for those options.
+
+OUTPUT:
+'dataTable' = The Data table after validation.
+'peakTable' = The Peak table after validation.
+
+'''
+
+def validatingDataPeakTables(dataTable, peakTable, optionsDict):
+
+    #column names
+    peakHeader = peakTable.columns
+
+    # if UID or Name not in peak columns
+    if "UID" not in peakHeader or "Name" not in peakHeader:
+        raise Exception("TidyData:PeakTableError", "PeakTable must contain columns ''UID'' & ''Name''")
+
+    # Make sure all values in the 'UID' column are unique
+    peakList = peakTable["UID"]
+    peaks = peakList.duplicated()
+    if True in peaks.values:
+        raise Exception("TidyData:PeakTableError", "All ''Names'' in the PeakSheet must be unique.")
+    
+    # Make sure the peak names are identical in the DataSheet and PeakSheet
+    peakList = peakList.values
+    dataHeader = dataTable.columns
+    dataHeader = dataHeader.values
+    temp = []
+    for i in dataHeader:
+        if i in peakList:
+            temp.append(i)
+    if len(peakList) != len(temp):
+        raise Exception("TidyData:DataTableError", "The peak names in the DataSheet should be unique, and exactly match the peak names in the PeakSheet.")
+    else:
+        for i in range(len(peakList)):
+            if peakList[i] != temp[i]:
+                raise Exception("TidyData:DataTableError", "The peak names in the DataSheet should be unique, and exactly match the peak names in the PeakSheet.")
+
+    # Make sure SampleID, SampleType, Order, and Batch are in data columns
+    if "SampleID" not in dataHeader or "SampleType" not in dataHeader or "Order" not in dataHeader or "Batch" not in dataHeader:
+        raise Exception("TidyData:DataTableError", "DataTable must contain columns ''SampleID'', ''SampleType'', ''Order'', & ''Batch''")
+
+    # Make sure SampleIDs are strings
+    if dataTable.dtypes["SampleID"] != "object":
+        dataTable["SampleID"] = dataTable["SampleID"].apply(str)
+    
+    # A list containing the valid sample types
+    validSampleTypes = ["Sample", "QC", "Blank", "Reference"]
+    
+    # Make sure the Data table is sorted by Batch then Order,
+    # and make sure the Order values are increasing integers
+    dataTable = dataTable.sort_values(by=['Batch', 'Order'])
+    prevOrder = -1
+    prevBatch = -1
+    batchSum = 0
+    for i in range(len(dataTable.index)):
+        currOrder = dataTable.at[i, "Order"]
+        if currOrder.dtype == "int64" and currOrder > prevOrder:
+            prevOrder = currOrder
+        else:
+            raise Exception("TidyData:QCRSCDataTableError", "DataTable ''Order'' column must contain unique increasing integer values matching to increasing batch number.")
+        
+        # Make sure the Batch values are integers with no missing values
+        currBatch = dataTable.at[i, "Batch"]
+        if currBatch.dtype != "int64" or currBatch is None:
+            raise Exception("QCRSC:DataTableError", "DataTable ''Batch'' column must contain integer values and no missing values")
+        if currBatch > prevBatch:
+            batchSum = batchSum + 1
+            prevBatch = currBatch
+            
+        # Make sure the Sample types are valid
+        currSampleType = dataTable.at[i, "SampleType"]
+        if currSampleType not in validSampleTypes:
+            raise Exception("QCRSC:QCRSCDataTableError", "DataTable ''SampleType'' column values must be one of the following: ''Sample'',''QC'',''Blank'', or ''Reference''")
+        
+    # Remove Data columns that share names with sample types
+    if "QC" in dataHeader:
+        dataTable = dataTable.drop(columns=['QC'])
+    if "Reference" in dataHeader:
+        dataTable = dataTable.drop(columns=['Reference'])
+    if "Blank" in dataHeader:
+        dataTable = dataTable.drop(columns=['Blank'])
+    if "Sample" in dataHeader:
+        dataTable = dataTable.drop(columns=['Sample'])
+        
+    # Add sample types columns and set to boolean values 
+    qcSum = 0
+    for i in range(len(dataTable.index)):
+        currSampleType = dataTable.at[i, "SampleType"]
+        if currSampleType == "QC":    
+            qcSum = qcSum + 1
+            dataTable.loc[i,["QC","Blank","Reference","Sample"]] = [True,False,False,False]         
+        elif currSampleType == "Blank":
+            dataTable.loc[i,["QC","Blank","Reference","Sample"]] = [False,True,False,False]
+        elif currSampleType == "Reference":
+            dataTable.loc[i,["QC","Blank","Reference","Sample"]] = [False,False,True,False]
+        elif currSampleType == "Sample":
+            dataTable.loc[i,["QC","Blank","Reference","Sample"]] = [False,False,False,True]
+
+    # Make sure their are at least 3 QCs samples for each Batch
+    if qcSum < batchSum*3:
+        raise Exception("QCRSC:DataTableError", "There has to be 3 or more QCs per batch for this data to be valid for QC assessment!")
+    
+    # Make sure the column in the Data table are ordered correctly,
+    # the order will be 'firstCols', 'midCols', then the 'peakList'
+    midCols = ["SampleType", "Order", "Batch", "QC", "Blank", "Reference", "Sample"]
+    firstCols = []
+    for i in dataTable.columns:
+        if i not in peakList and i not in midCols:
+            firstCols.append(i)
+    firstCols = firstCols + midCols
+    dataTable = dataTable[firstCols + [c for c in dataTable if c not in firstCols]] 
+    
+    return dataTable, peakTable
+
+
+#####################################################################################
+## validatingTidyDataInput()
+#####################################################################################
+'''
+This function makes sure the user input for creating the TidyData is all valid
+
+INPUT:
+'excelFilePath' = The path to an Excel file.
+'colsToKeepDict' = Dictionary containing the Peak columns the user wants to keep and the name the column should be renamed to.
+'optionsDict' = Dictionary containing options and the user choices to those options.
+'verbose' = Boolean value that controls the output to the console. 
+'''
+
+def validateTidyDataInput(excelFilePath, colsToKeepDict, optionsDict, verbose):
+    # Validate 'excelFilePath'
+    if type(excelFilePath) != str:
+        raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+    
+    # Validate 'colsToKeepDict'
+    try:
+        for key, value in colsToKeepDict.items():
+            if type(key) != str:
+                raise ValueError("ValueError", "Make sure all keys in 'colsToKeepDict' are string values")
+            if type(value) != str:
+                raise ValueError("ValueError", "Make sure all values in 'colsToKeepDict' are string values")
+                
+    # If 'colsToKeepDict' isn't a dictionary
+    except AttributeError:
+        raise ValueError("ValueError", "Make sure 'colsToKeepDict' is a dictionary")
+    
+    # Validate 'optionsDict'
+    try:
+        if type(optionsDict["CIMCBlib"]) != bool:
+            raise TypeError("TypeError", "Make sure you set 'CIMCBlib' to a boolean value")
+        if type(optionsDict["MSHit"]) != bool:
+            raise TypeError("TypeError", "Make sure you set 'MSHit' to a boolean value")
+        if type(optionsDict["mzmatch"]) != int and type(optionsDict["mzmatch"] != float):
+            raise TypeError("TypeError", "Make sure you set 'mzmatch' to a float or an integer value")
+        if type(optionsDict["UIDPrefix"]) != str:
+            raise TypeError("TypeError", "Make sure you set 'UIDPrefix' to a string value")
+
+    # If 'optionsDict' isn't a dictionary
+    except TypeError:
+        raise TypeError("TypeError", "Make sure 'optionsDict' is a dictionary")
+        
+    # If one of the Keys can't be found
+    except KeyError:
+        raise KeyError("KeyError", "Make sure 'optionsDict' has the keys 'CIMCBlib', 'MSHit', 'mzmatch', 'ColumnWarning', and 'UIDPrefix'")
+
+    # Validate 'verbose'
+    if type(verbose) != bool:
+        raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+
+#####################################################################################
+## tidyData()
+#####################################################################################
+'''
+This function converts an Excel file into the TidyData format.
+This function expects the Excel file to have a Compounds table produced by CD and 
+a Meta table created from that Compounds table.
+
+INPUT:
+'excelFilePath' = The path to an Excel file.
+'colsToKeepDict' = Dictionary containing the Peak columns the user wants to keep and the name the column should be renamed to.
+'optionsDict' = Dictionary containing options and the user choices to those options.
+'verbose' = Boolean value that controls the output to the console. 
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'stats' = A list of stats produced by the CleanupPeakTable function.
+'''
+
+def tidyData(excelFilePath, colsToKeepDict, optionsDict, verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("tidyData")
+    
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        validateTidyDataInput(excelFilePath, colsToKeepDict, optionsDict, verbose)
+        
+        timer.phase("Read Excel file")
+        try:
+            if verbose:
+                print("Importing "+excelFilePath)
+            # Get data from Excel file
+            compTable = pd.read_excel(excelFilePath, sheet_name = "Compounds")
+            metaTable = pd.read_excel(excelFilePath, sheet_name = "Meta")
+            timer.count(rows = len(compTable.index), cells = compTable.size + metaTable.size, bytes = os.path.getsize(excelFilePath))
+            if verbose:
+                print("Imported "+excelFilePath)
+        
+        # If the Excel file doesn't have the correct sheets
+        except ValueError:
+            raise ValueError("ValueError", "Make sure "+excelFilePath+" has the Compounds and Meta sheets")
+       
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+    
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+        
+        # Create the Data table and Peak table
+        dataTable, peakTable, report, stats = createTidyTables(compTable, metaTable, colsToKeepDict, optionsDict, verbose, excelFilePath, timer)
+        
+        timer.phase("Save Excel file")
+        try:
+            if verbose:
+                print("Updating "+excelFilePath)
+            # Append Meta sheet, Data sheet, and Peak sheet to excel file
+            with pd.ExcelWriter(excelFilePath, engine="openpyxl") as writer:  
+                compTable.to_excel(writer, sheet_name='Compounds', index=False)
+                metaTable.to_excel(writer, sheet_name='Meta', index=False)
+                dataTable.to_excel(writer, sheet_name='Data', index=False)
+                peakTable.to_excel(writer, sheet_name='Peak', index=False)
+            timer.count(rows = len(dataTable.index) + len(peakTable.index), cells = dataTable.size + peakTable.size, bytes = os.path.getsize(excelFilePath))
+       
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+    
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+        
+        report.append("Updated "+excelFilePath)
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+            print("\nStats:")
+            for i in stats:
+                print(i)
+        else:
+            return report, stats
+    
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:    
+            raise e
+
+
+#####################################################################################
+## Function: createTidyTables()
+#####################################################################################
+'''
+This function creates the Data table and Peak table from the Compounds table and Meta table.
+It is used by tidyData() and tidyFrames().
+
+INPUT:
+'compTable' = The Compounds table produced by CD as a dataframe.
+'metaTable' = The Meta table as a dataframe.
+'colsToKeepDict' = Dictionary containing the Peak columns the user wants to keep and the name the column should be renamed to.
+'optionsDict' = Dictionary containing options and the user choices to those options.
+'verbose' = Boolean value that controls the output to the console. 
+'sourceName' = The name of the tables used in messages.
+'timer' = A PhaseTimer that times the phases.
+
+OUTPUT:
+'dataTable' = The Data table as a dataframe.
+'peakTable' = The Peak table as a dataframe.
+'report' = A list of messages produced by the CleanupPeakTable function.
+'stats' = A list of stats produced by the CleanupPeakTable function.
+'''
+
+def createTidyTables(compTable, metaTable, colsToKeepDict, optionsDict, verbose, sourceName, timer):
+    timer.phase("Create Peak table")
+    if verbose:
+        print("Creating Peak sheet")
+    peakTable = compTable.copy()
+    
+    # Make sure the original name is in the peak table
+    if "Name" not in peakTable.columns:
+        raise ValueError("ValueError", "Column \"Name\" can't be found in "+sourceName)
+    
+    prefix = optionsDict["UIDPrefix"]
+    
+    # Create lists containing peak Idx and the UID data
+    peakIdxList = list(range(1, len(peakTable.index) + 1))
+    uidList = [prefix + str(x) for x in peakIdxList]
+    
+    # Create new columns called 'Idx' and 'UID'  
+    peakTable["Idx"] = peakIdxList
+    peakTable["UID"] = uidList        
+    
+    timer.phase("Create Data table")
+    try: 
+        if verbose:
+            print("Creating Data sheet")
+        # Create Data dataframe with Filename and Idx data
+        dataTable = pd.DataFrame(data=metaTable["Filename"])
+        dataIdxList = list(range(1, len(dataTable.index) + 1))
+        dataTable["Idx"] = dataIdxList
+    except KeyError:
+        raise KeyError("MetaTable must contain column: \"Filename\"")
+    
+    areaDict = {}
+
+    index = 0
+    # Loop through the peak table and add the Area data to a dictionary
+    for col in peakTable.columns:
+        if col.startswith("Area: "):
+            areaDict[index] = peakTable.loc[:, col]
+            index = index + 1
+
+    if areaDict == {}:
+        raise ValueError("ValueError", "Columns \"Area: \" can't be found in "+sourceName)
+
+    # Create Area data frame, tranpose, change column names, and add to the Data data frame
+    areaTable = pd.DataFrame(data=areaDict)
+    areaTable = areaTable.T
+    areaTable.columns = uidList
+    dataTable = pd.concat([dataTable, areaTable], axis=1)
+    timer.count(rows = len(dataTable.index), cells = areaTable.size)
+
+    report = []
+    stats = []
+    
+    timer.phase("Merge Meta table")
+    if verbose:
+        print("Merging Meta data into Data sheet")
+    # Merge Meta table data into the Data table
+    dataTable = MergeMetaintoData(dataTable, metaTable)
+    
+    timer.phase("Clean Peak table")
+    timer.count(rows = len(peakTable.index), cells = peakTable.size)
+    if verbose:
+        print("Cleaning Peak sheet")
+    # Clean Peak table
+    peakTable, report, stats = CleanupPeakTable(peakTable,colsToKeepDict,optionsDict)
+    
+    timer.phase("Validate tables")
+    if verbose:
+        print("Validating Data sheet and Peak sheet")
+    # Validate the Data table and Peak table
+    dataTable, peakTable = validatingDataPeakTables(dataTable, peakTable, optionsDict)
+
+    return dataTable, peakTable, report, stats
+
+
+#####################################################################################
+## Function: tidyFrames()
+#####################################################################################
+'''
+This function converts a Compounds table and a Meta table into the TidyData format without reading or writing an Excel file.
+The returned Peak table can be passed straight to pushFrame() and pullFrame().
+
+INPUT:
+'compTable' = The Compounds table produced by CD as a dataframe.
+'metaTable' = The Meta table created from that Compounds table as a dataframe.
+'colsToKeepDict' = Dictionary containing the Peak columns the user wants to keep and the name the column should be renamed to.
+'optionsDict' = Dictionary containing options and the user choices to those options.
+'verbose' = Boolean value that controls the output to the console. 
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'dataTable' = The Data table as a dataframe.
+'peakTable' = The Peak table as a dataframe.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'stats' = A list of stats produced by the CleanupPeakTable function.
+'''
+
+def tidyFrames(compTable, metaTable, colsToKeepDict, optionsDict, verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("tidyFrames")
+    
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        
+        # Validate 'compTable' and 'metaTable'
+        if not isinstance(compTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'compTable' is a pandas DataFrame")
+        if not isinstance(metaTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'metaTable' is a pandas DataFrame")
+        validateTidyDataInput("the Compounds table", colsToKeepDict, optionsDict, verbose)
+        
+        dataTable, peakTable, report, stats = createTidyTables(compTable, metaTable, colsToKeepDict, optionsDict, verbose, "the Compounds table", timer)
+        
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+            print("\nStats:")
+            for i in stats:
+                print(i)
+        return dataTable, peakTable, report, stats
+    
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:    
+            raise e
+
+
+#####################################################################################
+## Function: getCDSampleFileNames()
+#####################################################################################
+'''
+This function gets the names of the sample files that were processed by CD, in the order
+their areas are stored in the Area column of the CD results file.
+The names are read from the WorkflowInputFiles table and ordered by FileID.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+
+OUTPUT:
+'sampleFileNameList' = A list of the sample file names without their folders.
+'''
+
+def getCDSampleFileNames(cdResultsFilePath, cursor):
+    try:
+        cursor.execute("SELECT FileName FROM WorkflowInputFiles ORDER BY FileID;")
+        sampleFileNameList = []
+        for fileName in cursor.fetchall():
+            # CD stores the full Windows path of each sample file
+            sampleFileNameList.append(str(fileName[0]).replace("\\", "/").split("/")[-1])
+
+        if sampleFileNameList == []:
+            raise ValueError("ValueError", "No sample files can be found in "+cdResultsFilePath)
+
+        return sampleFileNameList
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: areaBytesToArray()
+#####################################################################################
+'''
+This function receives the area bytes of a compound and converts those bytes into an array with one area per sample file.
+CD stores each area as a little-endian double followed by a flag byte, the area is missing if the flag byte is 0.
+Areas stored as plain doubles without flag bytes are also accepted.
+
+INPUT:
+'areaBytes' = The bytes stored in the Area column of the CD results file.
+'sampleCount' = The number of sample files.
+
+OUTPUT:
+'areaArray' = A float array with one area per sample file. Missing areas are NaN.
+'''
+
+def areaBytesToArray(areaBytes, sampleCount):
+    if areaBytes is None:
+        return np.full(sampleCount, np.nan)
+
+    # One double and one flag byte per sample file
+    if len(areaBytes) == 9 * sampleCount:
+        areaRecords = np.frombuffer(areaBytes, dtype=np.dtype([("value", "<f8"), ("flag", "u1")]))
+        return np.where(areaRecords["flag"] != 0, areaRecords["value"], np.nan)
+
+    # One double per sample file
+    if len(areaBytes) == 8 * sampleCount:
+        return np.frombuffer(areaBytes, dtype="<f8").astype(float)
+
+    raise ValueError("ValueError", "The Area bytes have "+str(len(areaBytes))+" bytes, which doesn't match the "+str(sampleCount)+" sample files in the CD results file")
+
+
+#####################################################################################
+## Function: createTidyTablesFromCD()
+#####################################################################################
+'''
+This function creates the Data table and Peak table straight from the compound table of a CD results file.
+The compounds are streamed from SQLite with fetchmany() into preallocated arrays, so the Compounds table
+never has to be exported to Excel. Only the columns named in 'colsToKeepDict' are read.
+It is used by tidyCDFrames() and tidyCDResultsFile().
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'metaTable' = The Meta table as a dataframe. The Filename column must match the sample file names in the CD results file.
+'colsToKeepDict' = Dictionary containing the Peak columns the user wants to keep and the name the column should be renamed to.
+'optionsDict' = Dictionary containing options and the user choices to those options.
+'verbose' = Boolean value that controls the output to the console.
+'timer' = A PhaseTimer that times the phases.
+'chunkSize' = The number of compounds to fetch at a time.
+'areaColName' = The DB name of the column that holds the areas for each sample file.
+
+OUTPUT:
+'dataTable' = The Data table as a dataframe.
+'peakTable' = The Peak table as a dataframe, with the compoundID column.
+'report' = A list of messages produced by the CleanupPeakTable function.
+'stats' = A list of stats produced by the CleanupPeakTable function.
+'''
+
+def createTidyTablesFromCD(cdResultsFilePath, cursor, metaTable, colsToKeepDict, optionsDict, verbose, timer, chunkSize = 10000, areaColName = "Area"):
+    try:
+        # Match the Meta table rows to the sample files in the CD results file
+        # The names are compared without their extensions and case
+        sampleFileNameList = getCDSampleFileNames(cdResultsFilePath, cursor)
+        sampleCount = len(sampleFileNameList)
+        sampleIndexDict = {}
+        for i in range(sampleCount):
+            sampleIndexDict[os.path.splitext(sampleFileNameList[i])[0].lower()] = i
+
+        if "Filename" not in metaTable.columns:
+            raise KeyError("MetaTable must contain column: \"Filename\"")
+        metaTable = metaTable.reset_index(drop=True)
+        sampleIndexList = []
+        for fileName in metaTable["Filename"]:
+            key = os.path.splitext(str(fileName).replace("\\", "/").split("/")[-1])[0].lower()
+            if key not in sampleIndexDict:
+                raise ValueError("ValueError", "The Meta table file \""+str(fileName)+"\" can't be found in "+cdResultsFilePath)
+            sampleIndexList.append(sampleIndexDict[key])
+
+        # Get the ID of compound table
+        cursor.execute("SELECT DataTypeID FROM DataTypes WHERE TableName = 'ConsolidatedUnknownCompoundItems';")
+        compoundTblID = cursor.fetchall()[0][0]
+
+        # Get the custom data types and their IDs from CD, then store those values in a dictionary
+        # The dictionary keys will be the IDs and the dictionary values will be the data types
+        cursor.execute("SELECT Value, Name FROM CustomDataTypes;")
+        cdDataTypeDict = {}
+        for dataType in cursor.fetchall():
+            cdDataTypeDict[dataType[0]] = dataType[1]
+
+        # Only read the columns that will be kept in the Peak table
+        # Binary columns can't be shown in the Peak table, except for Tags
+        cursor.execute("SELECT DBColumnName, Property_DisplayName, CustomDataType FROM DataTypesColumns WHERE DataTypeID = (?);", (compoundTblID, ))
+        colTupleList = []
+        for colDBName, colDisplayName, dataTypeID in cursor.fetchall():
+            if colDBName in ["ID", areaColName] or colDisplayName in [colTuple[1] for colTuple in colTupleList]:
+                continue
+            if cdDataTypeDict.get(dataTypeID) == "Binary" and colDisplayName != "Tags":
+                continue
+            if colDisplayName == "Name" or colDisplayName in colsToKeepDict:
+                colTupleList.append((colDBName, colDisplayName, cdDataTypeDict.get(dataTypeID)))
+            else:
+                for name in colsToKeepDict:
+                    if name.startswith("<") and name.endswith(">") and colDisplayName.startswith(name[1:-1]):
+                        colTupleList.append((colDBName, colDisplayName, cdDataTypeDict.get(dataTypeID)))
+                        break
+
+        if "Name" not in [colTuple[1] for colTuple in colTupleList]:
+            raise ValueError("ValueError", "Column \"Name\" can't be found in "+cdResultsFilePath)
+
+        timer.phase("Read from CD results file")
+        if verbose:
+            print("Reading compounds from "+cdResultsFilePath)
+        cursor.execute("SELECT COUNT(*) FROM ConsolidatedUnknownCompoundItems;")
+        peakCount = cursor.fetchall()[0][0]
+
+        # Preallocate an array for each column, and a sample x peak array for the areas
+        idArray = np.zeros(peakCount, dtype=np.int64)
+        areaArray = np.full((sampleCount, peakCount), np.nan)
+        colArrayList = []
+        for colTuple in colTupleList:
+            if colTuple[2] == "Double":
+                colArrayList.append(np.full(peakCount, np.nan))
+            elif colTuple[2] == "Boolean":
+                colArrayList.append(np.zeros(peakCount, dtype=bool))
+            else:
+                colArrayList.append(np.empty(peakCount, dtype=object))
+
+        # Tag bytes are only converted once for each different value
+        # A second cursor is used so the compound rows can keep being fetched
+        tagStringDict = {}
+        tagCursor = cursor.connection.cursor()
+
+        cursor.execute("SELECT ID, "+areaColName+", "+", ".join([colTuple[0] for colTuple in colTupleList])+" FROM ConsolidatedUnknownCompoundItems ORDER BY ID;")
+        start = 0
+        while True:
+            rowList = cursor.fetchmany(chunkSize)
+            if rowList == []:
+                break
+            end = start + len(rowList)
+
+            idArray[start:end] = [row[0] for row in rowList]
+            areaArray[:, start:end] = np.stack([areaBytesToArray(row[1], sampleCount) for row in rowList], axis=1)
+
+            for i in range(len(colTupleList)):
+                valueList = [row[i + 2] for row in rowList]
+                if colTupleList[i][1] == "Tags":
+                    for j in range(len(valueList)):
+                        if valueList[j] not in tagStringDict:
+                            tagStringDict[valueList[j]] = tagBytesToString(valueList[j], cdResultsFilePath, tagCursor)
+                        valueList[j] = tagStringDict[valueList[j]]
+                elif colTupleList[i][2] == "Boolean":
+                    valueList = [value is not None and bool(value) for value in valueList]
+                colArrayList[i][start:end] = valueList
+            start = end
+        tagCursor.close()
+        timer.count(rows = peakCount, cells = peakCount * (len(colTupleList) + sampleCount))
+
+        timer.phase("Create Peak table")
+        if verbose:
+            print("Creating Peak sheet")
+        peakTable = pd.DataFrame({colTupleList[i][1]: colArrayList[i] for i in range(len(colTupleList))})
+
+        prefix = optionsDict["UIDPrefix"]
+
+        # Create lists containing peak Idx and the UID data
+        peakIdxList = list(range(1, peakCount + 1))
+        uidList = [prefix + str(x) for x in peakIdxList]
+
+        # Create new columns called 'Idx' and 'UID'
+        peakTable["Idx"] = peakIdxList
+        peakTable["UID"] = uidList
+
+        timer.phase("Create Data table")
+        if verbose:
+            print("Creating Data sheet")
+        # Create Data dataframe with Filename and Idx data, then add the areas of each sample file
+        dataTable = pd.DataFrame(data=metaTable["Filename"])
+        dataTable["Idx"] = list(range(1, len(dataTable.index) + 1))
+        areaTable = pd.DataFrame(areaArray[sampleIndexList, :], columns=uidList)
+        dataTable = pd.concat([dataTable, areaTable], axis=1)
+
+        timer.phase("Merge Meta table")
+        if verbose:
+            print("Merging Meta data into Data sheet")
+        # Merge Meta table data into the Data table
+        dataTable = MergeMetaintoData(dataTable, metaTable)
+
+        timer.phase("Clean Peak table")
+        timer.count(rows = len(peakTable.index), cells = peakTable.size)
+        if verbose:
+            print("Cleaning Peak sheet")
+        # Clean Peak table
+        peakTable, report, stats = CleanupPeakTable(peakTable,colsToKeepDict,optionsDict)
+
+        timer.phase("Validate tables")
+        if verbose:
+            print("Validating Data sheet and Peak sheet")
+        # Validate the Data table and Peak table
+        dataTable, peakTable = validatingDataPeakTables(dataTable, peakTable, optionsDict)
+
+        # The compound IDs are already known, so pushFrame() and pullFrame() don't have to match the peaks by MW and RT
+        IDData = pd.DataFrame(idArray[peakTable["Idx"].to_numpy() - 1], columns = ["compoundID"])
+        peakTable = pd.concat([IDData, peakTable], axis=1)
+
+        return dataTable, peakTable, report, stats
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: tidyCDFrames()
+#####################################################################################
+'''
+This function converts a CD results file and a Meta table into the TidyData format without
+exporting the Compounds table from CD or reading or writing an Excel file.
+The CD results file is opened read-only.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'metaTable' = The Meta table as a dataframe. The Filename column must match the sample file names in the CD results file.
+'colsToKeepDict' = Dictionary containing the Peak columns the user wants to keep and the name the column should be renamed to.
+'optionsDict' = Dictionary containing options and the user choices to those options.
+'verbose' = Boolean value that controls the output to the console.
+'chunkSize' = The number of compounds to fetch at a time (default is 10000).
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up (default is 5.0).
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'dataTable' = The Data table as a dataframe.
+'peakTable' = The Peak table as a dataframe, with the compoundID column.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'stats' = A list of stats produced by the CleanupPeakTable function.
+'''
+
+def tidyCDFrames(cdResultsFilePath, metaTable, colsToKeepDict, optionsDict, verbose = True, chunkSize = 10000, busyTimeout = 5.0, timer = None):
+    conn = None
+    cursor = None
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("tidyCDFrames")
+    
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+
+        # Validate 'metaTable' and 'chunkSize'
+        if not isinstance(metaTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'metaTable' is a pandas DataFrame")
+        if type(chunkSize) != int or chunkSize < 1:
+            raise TypeError("TypeError", "Make sure 'chunkSize' is a positive integer value")
+        validateTidyDataInput(cdResultsFilePath, colsToKeepDict, optionsDict, verbose)
+        validateCDResultsFileOnly(cdResultsFilePath, busyTimeout)
+
+        timer.phase("Open CD results file")
+        conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True, busyTimeout = busyTimeout)
+        cursor = conn.cursor()
+
+        dataTable, peakTable, report, stats = createTidyTablesFromCD(cdResultsFilePath, cursor, metaTable, colsToKeepDict, optionsDict, verbose, timer, chunkSize)
+
+        cursor.close()
+        conn.close()
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+            print("\nStats:")
+            for i in stats:
+                print(i)
+        return dataTable, peakTable, report, stats
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        # Close the connection to the Compound Discoverer file
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: tidyCDResultsFile()
+#####################################################################################
+'''
+This function converts a CD results file into the TidyData format and saves the Data sheet and Peak sheet to an Excel file.
+Only the Meta sheet is needed in the Excel file, the Compounds table doesn't have to be exported from CD.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'excelFilePath' = The path to an Excel file with a Meta sheet.
+'colsToKeepDict' = Dictionary containing the Peak columns the user wants to keep and the name the column should be renamed to.
+'optionsDict' = Dictionary containing options and the user choices to those options.
+'verbose' = Boolean value that controls the output to the console.
+'chunkSize' = The number of compounds to fetch at a time (default is 10000).
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up (default is 5.0).
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'stats' = A list of stats produced by the CleanupPeakTable function.
+'''
+
+def tidyCDResultsFile(cdResultsFilePath, excelFilePath, colsToKeepDict, optionsDict, verbose = True, chunkSize = 10000, busyTimeout = 5.0, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("tidyCDResultsFile")
+    
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        validateTidyDataInput(excelFilePath, colsToKeepDict, optionsDict, verbose)
+
+        timer.phase("Read Excel file")
+        try:
+            if verbose:
+                print("Importing "+excelFilePath)
+            metaTable = pd.read_excel(excelFilePath, sheet_name = "Meta")
+            timer.count(rows = len(metaTable.index), cells = metaTable.size, bytes = os.path.getsize(excelFilePath))
+            if verbose:
+                print("Imported "+excelFilePath)
+
+        # If the Excel file doesn't have the correct sheet
+        except ValueError:
+            raise ValueError("ValueError", "Make sure "+excelFilePath+" has the Meta sheet")
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        # Create the Data table and Peak table
+        dataTable, peakTable, report, stats = tidyCDFrames(cdResultsFilePath, metaTable, colsToKeepDict, optionsDict, False, chunkSize, busyTimeout, timer)
+
+        timer.phase("Save Excel file")
+        try:
+            if verbose:
+                print("Updating "+excelFilePath)
+            # Add the Data sheet and Peak sheet to the Excel file, the other sheets are kept
+            with pd.ExcelWriter(
+                excelFilePath,
+                mode="a",
+                engine="openpyxl",
+                if_sheet_exists="replace",
+            ) as writer:
+                dataTable.to_excel(writer, sheet_name='Data', index=False)
+                peakTable.to_excel(writer, sheet_name='Peak', index=False)
+            timer.count(rows = len(dataTable.index) + len(peakTable.index), cells = dataTable.size + peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        report.append("Updated "+excelFilePath)
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+            print("\nStats:")
+            for i in stats:
+                print(i)
+        else:
+            return report, stats
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: getBoolArray()
+#####################################################################################
+'''
+This function converts a column with missing values to a boolean array, missing values are False.
+fillna(False) on an object column is deprecated in pandas because it downcasts the column, so the missing values are masked instead.
+
+INPUT:
+'series' = A column of a dataframe.
+
+OUTPUT:
+'boolArray' = A boolean array with one value for each row.
+'''
+
+def getBoolArray(series):
+    return series.notna().to_numpy() & series.astype(bool).to_numpy()
+
+
+#####################################################################################
+## Function: getQCMatrix()
+#####################################################################################
+'''
+This function gets the areas of the Data table as a matrix with one row for each sample file and one column for each peak,
+and the QC, Blank, and Sample flags created by validatingDataPeakTables().
+
+INPUT:
+'dataTable' = The Data table as a dataframe.
+'peakTable' = The Peak table as a dataframe.
+'sourceName' = The name of the tables used in messages.
+
+OUTPUT:
+'areaMatrix' = A float array of the areas, missing areas are NaN.
+'flagDict' = A dictionary with the keys "QC", "Blank", and "Sample". The values are boolean arrays with one value for each sample file.
+'batchArray' = An array of the Batch of each sample file.
+'''
+
+def getQCMatrix(dataTable, peakTable, sourceName):
+    if "UID" not in peakTable.columns:
+        raise ValueError("ValueError", "Column \"UID\" can't be found in the Peak table of "+sourceName)
+    for col in ["QC", "Blank", "Sample", "Batch"]:
+        if col not in dataTable.columns:
+            raise ValueError("ValueError", "Column \""+col+"\" can't be found in the Data table of "+sourceName+", make sure the tables were created by tidyData()")
+
+    uidList = peakTable["UID"].tolist()
+    missingList = [uid for uid in uidList if uid not in dataTable.columns]
+    if missingList != []:
+        raise ValueError("ValueError", "The peaks "+", ".join([str(uid) for uid in missingList[:10]])+" can't be found in the Data table of "+sourceName)
+
+    # Only the columns that aren't numeric are converted, text areas become NaN
+    areaTable = dataTable[uidList]
+    textColList = areaTable.select_dtypes(exclude="number").columns
+    if len(textColList) > 0:
+        areaTable = areaTable.copy()
+        areaTable[textColList] = areaTable[textColList].apply(pd.to_numeric, errors="coerce")
+    areaMatrix = areaTable.to_numpy(dtype=float)
+    flagDict = {}
+    for col in ["QC", "Blank", "Sample"]:
+        flagDict[col] = getBoolArray(dataTable[col])
+
+    return areaMatrix, flagDict, dataTable["Batch"].to_numpy()
+
+
+#####################################################################################
+## Function: getColumnMoments()
+#####################################################################################
+'''
+This function gets the number of values, the mean, and the sum of the squared differences from the mean of each column
+of a matrix, ignoring missing values. Moments of different rows can be combined with combineQCMoments().
+
+INPUT:
+'matrix' = A float array, missing values are NaN.
+
+OUTPUT:
+'count' = An array of the number of values in each column.
+'mean' = An array of the mean of each column, NaN if a column has no values.
+'squareSum' = An array of the sum of the squared differences from the mean of each column.
+'''
+
+def getColumnMoments(matrix):
+    present = ~np.isnan(matrix)
+    count = present.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(present, matrix, 0.0).sum(axis=0) / count
+        squareSum = (np.where(present, matrix - mean, 0.0) ** 2).sum(axis=0)
+
+    return count, mean, squareSum
+
+
+#####################################################################################
+## Function: getColumnMeanStd()
+#####################################################################################
+'''
+This function gets the mean and standard deviation of each column of a matrix, ignoring missing values.
+The standard deviation is NaN if a column has less than two values.
+
+INPUT:
+'matrix' = A float array, missing values are NaN.
+
+OUTPUT:
+'count' = An array of the number of values in each column.
+'mean' = An array of the mean of each column.
+'std' = An array of the sample standard deviation of each column.
+'''
+
+def getColumnMeanStd(matrix):
+    count, mean, squareSum = getColumnMoments(matrix)
+    std = np.where(count > 1, np.sqrt(squareSum / np.maximum(count - 1, 1)), np.nan)
+
+    return count, mean, std
+
+
+# The sums kept for each peak so the QC metrics can be updated when a batch is appended, see getQCMoments()
+qcMomentColList = ["qcCount", "qcMean", "qcSquareSum", "sampleCount", "sampleMean", "sampleSquareSum",
+                   "blankCount", "blankSum", "injectionCount", "missingCount"]
+
+
+#####################################################################################
+## Function: getQCMoments()
+#####################################################################################
+'''
+This function gets the sums that the QC metrics of every peak are calculated from (see calculateQCMetrics()) for a group of sample files.
+The sums of two groups of sample files can be combined with combineQCMoments(), so the QC metrics of a study can be updated
+from the new sample files only.
+
+INPUT:
+'areaMatrix' = A float array of the areas with one row for each sample file and one column for each peak.
+'flagDict' = A dictionary of the QC, Blank, and Sample flags of the sample files, see getQCMatrix().
+
+OUTPUT:
+'momentDict' = A dictionary with the keys in qcMomentColList. The values are arrays with one value for each peak.
+'''
+
+def getQCMoments(areaMatrix, flagDict):
+    momentDict = {}
+    momentDict["qcCount"], momentDict["qcMean"], momentDict["qcSquareSum"] = getColumnMoments(areaMatrix[flagDict["QC"]])
+    momentDict["sampleCount"], momentDict["sampleMean"], momentDict["sampleSquareSum"] = getColumnMoments(areaMatrix[flagDict["Sample"]])
+
+    # A peak that is missing from a Blank wasn't detected in that Blank
+    blankMatrix = areaMatrix[flagDict["Blank"]]
+    momentDict["blankCount"] = np.full(areaMatrix.shape[1], len(blankMatrix))
+    momentDict["blankSum"] = np.nan_to_num(blankMatrix, nan=0.0).sum(axis=0)
+
+    # The missing values are counted in the QCs and Samples
+    injectionMatrix = areaMatrix[flagDict["QC"] | flagDict["Sample"]]
+    momentDict["injectionCount"] = np.full(areaMatrix.shape[1], len(injectionMatrix))
+    momentDict["missingCount"] = np.isnan(injectionMatrix).sum(axis=0)
+
+    return momentDict
+
+
+#####################################################################################
+## Function: combineQCMoments()
+#####################################################################################
+'''
+This function combines the sums of two groups of sample files created by getQCMoments(), as if they were calculated
+from all the sample files at once. The means and squared differences are combined with the parallel variance formula
+of Chan et al., so the sample files don't have to be read again.
+
+INPUT:
+'momentDict' = A dictionary of the sums of the first group of sample files.
+'newMomentDict' = A dictionary of the sums of the second group of sample files.
+
+OUTPUT:
+'momentDict' = A dictionary of the sums of both groups of sample files.
+'''
+
+def combineQCMoments(momentDict, newMomentDict):
+    combinedDict = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for group in ["qc", "sample"]:
+            count = np.asarray(momentDict[group+"Count"], dtype=float)
+            newCount = np.asarray(newMomentDict[group+"Count"], dtype=float)
+            totalCount = count + newCount
+
+            # The mean of a group without values is NaN, it doesn't add to the combined mean
+            mean = np.where(count > 0, momentDict[group+"Mean"], 0.0)
+            newMean = np.where(newCount > 0, newMomentDict[group+"Mean"], 0.0)
+            delta = newMean - mean
+            combinedDict[group+"Count"] = totalCount
+            combinedDict[group+"Mean"] = np.where(totalCount > 0, (count * mean + newCount * newMean) / totalCount, np.nan)
+            combinedDict[group+"SquareSum"] = (np.nan_to_num(momentDict[group+"SquareSum"]) + np.nan_to_num(newMomentDict[group+"SquareSum"])
+                                                + np.where(totalCount > 0, delta ** 2 * count * newCount / totalCount, 0.0))
+
+    for name in ["blankCount", "blankSum", "injectionCount", "missingCount"]:
+        combinedDict[name] = np.asarray(momentDict[name], dtype=float) + np.asarray(newMomentDict[name], dtype=float)
+
+    return combinedDict
+
+
+#####################################################################################
+## Function: getQCMetricsFromMoments()
+#####################################################################################
+'''
+This function calculates the QC metrics of every peak from the sums created by getQCMoments() or combineQCMoments(),
+see qcMetricsFrames().
+
+INPUT:
+'momentDict' = A dictionary with the keys in qcMomentColList.
+
+OUTPUT:
+'metricDict' = A dictionary with the keys "qcRSD", "dRatio", "blankRatio", and "percentMissing". The values are arrays with one value for each peak.
+'''
+
+def getQCMetricsFromMoments(momentDict):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        qcCount = np.asarray(momentDict["qcCount"], dtype=float)
+        sampleCount = np.asarray(momentDict["sampleCount"], dtype=float)
+        qcMean = np.asarray(momentDict["qcMean"], dtype=float)
+        qcStd = np.where(qcCount > 1, np.sqrt(momentDict["qcSquareSum"] / np.maximum(qcCount - 1, 1)), np.nan)
+        sampleStd = np.where(sampleCount > 1, np.sqrt(momentDict["sampleSquareSum"] / np.maximum(sampleCount - 1, 1)), np.nan)
+        blankCount = np.asarray(momentDict["blankCount"], dtype=float)
+        injectionCount = np.asarray(momentDict["injectionCount"], dtype=float)
+        blankMean = np.where(blankCount > 0, momentDict["blankSum"] / blankCount, np.nan)
+
+        metricDict = {
+            "qcRSD": 100 * qcStd / qcMean,
+            "dRatio": 100 * qcStd / sampleStd,
+            "blankRatio": 100 * blankMean / qcMean,
+            "percentMissing": np.where(injectionCount > 0, 100 * momentDict["missingCount"] / injectionCount, np.nan),
+        }
+
+    # Metrics that can't be calculated are NaN rather than infinite
+    for name in metricDict:
+        metricDict[name] = np.where(np.isfinite(metricDict[name]), metricDict[name], np.nan)
+
+    return metricDict
+
+
+#####################################################################################
+## Function: calculateQCMetrics()
+#####################################################################################
+'''
+This function calculates the QC metrics of every peak for a group of sample files, see qcMetricsFrames().
+
+INPUT:
+'areaMatrix' = A float array of the areas with one row for each sample file and one column for each peak.
+'flagDict' = A dictionary of the QC, Blank, and Sample flags of the sample files, see getQCMatrix().
+
+OUTPUT:
+'metricDict' = A dictionary with the keys "qcRSD", "dRatio", "blankRatio", and "percentMissing". The values are arrays with one value for each peak.
+'''
+
+def calculateQCMetrics(areaMatrix, flagDict):
+    return getQCMetricsFromMoments(getQCMoments(areaMatrix, flagDict))
+
+
+#####################################################################################
+## Function: qcMetricsFrames()
+#####################################################################################
+'''
+This function calculates the QC metrics of every peak from the TidyData Data and Peak tables, and adds them to the Peak table
+as the columns qcRSD, dRatio, blankRatio, and percentMissing, so they can be pushed to CD with pushFrame() or updateCDResultsFile().
+The metrics are calculated for all the sample files, and also for each batch if there is more than one batch
+(e.g. qcRSD_Batch1). The QC, Blank, and Sample flags created by validatingDataPeakTables() are used to find the sample files.
+All the peaks are calculated at once with NumPy, so the time doesn't depend on the number of loops in Python.
+
+qcRSD = 100 * the standard deviation of the QCs / the mean of the QCs
+dRatio = 100 * the standard deviation of the QCs / the standard deviation of the Samples
+blankRatio = 100 * the mean of the Blanks / the mean of the QCs, peaks missing from a Blank count as 0
+percentMissing = The percentage of QCs and Samples that the peak is missing from
+
+INPUT:
+'dataTable' = The Data table created by tidyData() as a dataframe.
+'peakTable' = The Peak table created by tidyData() as a dataframe.
+'verbose' = Boolean value that controls the output to the console.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'peakTable' = A copy of the Peak table with the QC metric columns.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def qcMetricsFrames(dataTable, peakTable, verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("qcMetricsFrames")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+
+        # Validate 'dataTable' and 'peakTable'
+        if not isinstance(dataTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'dataTable' is a pandas DataFrame")
+        if not isinstance(peakTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'peakTable' is a pandas DataFrame")
+
+        # Validate 'verbose'
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+        report = []
+        timer.phase("Read area matrix")
+        areaMatrix, flagDict, batchArray = getQCMatrix(dataTable, peakTable, "the tables")
+        timer.count(rows = areaMatrix.shape[0], cells = areaMatrix.size)
+        if flagDict["QC"].sum() < 2:
+            raise ValueError("ValueError", "There have to be at least 2 QCs to calculate the QC metrics")
+
+        timer.phase("Calculate QC metrics")
+        if verbose:
+            print("Calculating QC metrics")
+        peakTable = peakTable.copy()
+        for name, values in calculateQCMetrics(areaMatrix, flagDict).items():
+            peakTable[name] = values
+
+        # Calculate the metrics of each batch
+        batchList = sorted(set(batchArray.tolist()))
+        if len(batchList) > 1:
+            for batch in batchList:
+                batchMask = batchArray == batch
+                batchFlagDict = {}
+                for col in flagDict:
+                    batchFlagDict[col] = flagDict[col][batchMask]
+                for name, values in calculateQCMetrics(areaMatrix[batchMask], batchFlagDict).items():
+                    peakTable[name+"_Batch"+str(batch)] = values
+        timer.count(rows = areaMatrix.shape[1], cells = areaMatrix.size * len(batchList))
+
+        report.append("QC metrics calculated for "+str(areaMatrix.shape[1])+" peaks in "+str(len(batchList))+" batches ("
+                      +str(int(flagDict["QC"].sum()))+" QCs, "+str(int(flagDict["Sample"].sum()))+" Samples, "+str(int(flagDict["Blank"].sum()))+" Blanks)")
+        report.append(str(int(((peakTable["qcRSD"] < 20) & (peakTable["dRatio"] < 40)).sum()))+" peaks have qcRSD < 20 and dRatio < 40")
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        return peakTable, report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: qcMetrics()
+#####################################################################################
+'''
+This function calculates the QC metrics of every peak in an Excel file created by tidyData(), and saves them in the Peak sheet,
+see qcMetricsFrames(). The new columns can then be pushed to CD with updateCDResultsFile(), e.g.
+excelColList = ["Name", "qcRSD", "dRatio", "blankRatio", "Checked"].
+
+INPUT:
+'excelFilePath' = The path to an Excel file created by tidyData().
+'peakSheetName' = The name of the Peak sheet (default is "Peak").
+'dataSheetName' = The name of the Data sheet (default is "Data").
+'newPeakSheetName' = The name of the sheet to save the Peak table with the QC metrics in (default is ""),
+    if this value is left as "", the Peak sheet is updated.
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def qcMetrics(excelFilePath, peakSheetName = "Peak", dataSheetName = "Data", newPeakSheetName = "", verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("qcMetrics")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+
+        # Validate the arguments
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+        if type(peakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
+        if type(dataSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'dataSheetName' is a string value")
+        if type(newPeakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'newPeakSheetName' is a string value")
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+        if newPeakSheetName == "":
+            newPeakSheetName = peakSheetName
+
+        timer.phase("Read Excel file")
+        try:
+            if verbose:
+                print("Importing "+excelFilePath)
+            peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)
+            dataTable = pd.read_excel(excelFilePath, sheet_name = dataSheetName)
+            timer.count(rows = len(peakTable.index) + len(dataTable.index), cells = peakTable.size + dataTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If the Excel file doesn't have the correct sheets
+        except ValueError:
+            raise ValueError("ValueError", "Make sure "+excelFilePath+" has the "+peakSheetName+" and "+dataSheetName+" sheets")
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        peakTable, report = qcMetricsFrames(dataTable, peakTable, False, timer)
+
+        timer.phase("Save Excel file")
+        try:
+            if verbose:
+                print("Saving changes to sheet \""+newPeakSheetName+"\"")
+            with pd.ExcelWriter(
+                excelFilePath,
+                mode="a",
+                engine="openpyxl",
+                if_sheet_exists="replace",
+            ) as writer:
+                peakTable.to_excel(writer, sheet_name=newPeakSheetName, index=False)
+            timer.count(rows = len(peakTable.index), cells = peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+        report.append("QC metrics saved to sheet \""+newPeakSheetName+"\" of "+excelFilePath)
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: getMomentTable()
+#####################################################################################
+'''
+This function gets the sums of the QC metrics of every peak (see getQCMoments()) as a table with one row for each peak,
+so they can be saved with the TidyData and updated by appendBatch().
+
+INPUT:
+'dataTable' = The Data table created by tidyData() as a dataframe.
+'peakTable' = The Peak table created by tidyData() as a dataframe.
+'sourceName' = The name of the tables used in messages.
+
+OUTPUT:
+'momentTable' = A dataframe with the columns UID and the columns in qcMomentColList.
+'''
+
+def getMomentTable(dataTable, peakTable, sourceName):
+    areaMatrix, flagDict, batchArray = getQCMatrix(dataTable, peakTable, sourceName)
+    momentTable = pd.DataFrame(getQCMoments(areaMatrix, flagDict), columns = qcMomentColList)
+    momentTable.insert(0, "UID", peakTable["UID"].to_numpy())
+
+    return momentTable
+
+
+#####################################################################################
+## Function: getBatchDataRows()
+#####################################################################################
+'''
+This function creates the Data table rows of a new batch of sample files from the Area columns of a Compounds table
+and the Meta rows of the new sample files. The rows are validated with validatingDataPeakTables(), and against the Data table
+they are appended to: the sample files can't already be in the Data table, and the Batch and Order values have to be larger
+than the ones in the Data table.
+
+The peaks are matched to the Peak table by the UID column of the Compounds table if it has one, otherwise the Compounds table
+has to have the same rows as the Compounds table the Peak table was created from, and the peaks are matched by Idx.
+The Area columns have to be in the same order as the rows of the Meta table, as for tidyData().
+
+INPUT:
+'compTable' = A Compounds table with the Area columns of the new sample files as a dataframe.
+'metaTable' = The Meta table of the new sample files as a dataframe.
+'peakTable' = The Peak table created by tidyData() as a dataframe.
+'dataColList' = The columns of the Data table the rows are appended to.
+'dataInfoTable' = The columns Idx, Filename, Order, and Batch of the Data table the rows are appended to as a dataframe.
+'sourceName' = The name of the tables used in messages.
+
+OUTPUT:
+'dataTable' = The Data table rows of the new sample files, with the columns in 'dataColList'.
+'''
+
+def getBatchDataRows(compTable, metaTable, peakTable, dataColList, dataInfoTable, sourceName):
+    if "Filename" not in metaTable.columns:
+        raise KeyError("KeyError", "The Meta table of "+sourceName+" must contain column: \"Filename\"")
+    for col in ["Idx", "Filename", "Order", "Batch"]:
+        if col not in dataInfoTable.columns:
+            raise ValueError("ValueError", "Column \""+col+"\" can't be found in the Data table, make sure it was created by tidyData()")
+    if "UID" not in peakTable.columns:
+        raise ValueError("ValueError", "Column \"UID\" can't be found in the Peak table, make sure it was created by tidyData()")
+
+    areaColList = [col for col in compTable.columns if str(col).startswith("Area: ")]
+    if areaColList == []:
+        raise ValueError("ValueError", "Columns \"Area: \" can't be found in "+sourceName)
+    if len(areaColList) != len(metaTable.index):
+        raise ValueError("ValueError", "The Compounds table of "+sourceName+" has "+str(len(areaColList))+" Area columns, but the Meta table has "
+                         +str(len(metaTable.index))+" rows, make sure there is one Area column for each sample file in the Meta table")
+
+    # Match the rows of the Compounds table to the peaks
+    uidList = peakTable["UID"].tolist()
+    if "UID" in compTable.columns:
+        if compTable["UID"].duplicated().any():
+            raise ValueError("ValueError", "The values of column \"UID\" of "+sourceName+" have to be unique")
+        missingList = [uid for uid in uidList if uid not in set(compTable["UID"])]
+        if missingList != []:
+            raise ValueError("ValueError", "The peaks "+", ".join([str(uid) for uid in missingList[:10]])+" can't be found in "+sourceName)
+        areaTable = compTable.set_index("UID").loc[uidList, areaColList]
+    else:
+        if "Idx" not in peakTable.columns:
+            raise ValueError("ValueError", "Column \"Idx\" can't be found in the Peak table, add a UID column to "+sourceName+" to match the peaks")
+        idxArray = peakTable["Idx"].to_numpy(dtype=int)
+        if len(compTable.index) < idxArray.max():
+            raise ValueError("ValueError", sourceName+" has "+str(len(compTable.index))+" compounds, but the Peak table has peaks up to Idx "
+                             +str(idxArray.max())+", add a UID column to "+sourceName+" to match the peaks")
+        areaTable = compTable[areaColList].iloc[idxArray - 1]
+
+    # Create the Data rows in the same way as createTidyTables(), the Idx values continue from the Data table
+    dataTable = pd.DataFrame(data=metaTable["Filename"]).reset_index(drop=True)
+    lastIdx = int(dataInfoTable["Idx"].max()) if len(dataInfoTable.index) > 0 else 0
+    dataTable["Idx"] = list(range(lastIdx + 1, lastIdx + len(dataTable.index) + 1))
+    areaTable = pd.DataFrame(areaTable.to_numpy().T, columns = uidList)
+    dataTable = pd.concat([dataTable, areaTable], axis=1)
+    dataTable = MergeMetaintoData(dataTable, metaTable.reset_index(drop=True)).reset_index(drop=True)
+    dataTable, peakTable = validatingDataPeakTables(dataTable, peakTable, None)
+
+    # The new sample files have to come after the sample files in the Data table
+    repeatedList = sorted(set(dataTable["Filename"]) & set(dataInfoTable["Filename"]))
+    if repeatedList != []:
+        raise ValueError("ValueError", "The sample files "+", ".join([str(name) for name in repeatedList[:10]])+" are already in the Data table")
+    if len(dataInfoTable.index) > 0:
+        if dataTable["Batch"].min() <= dataInfoTable["Batch"].max():
+            raise ValueError("ValueError", "The Batch values of "+sourceName+" have to be larger than "+str(dataInfoTable["Batch"].max())+", the last batch in the Data table")
+        if dataTable["Order"].min() <= dataInfoTable["Order"].max():
+            raise ValueError("ValueError", "The Order values of "+sourceName+" have to be larger than "+str(dataInfoTable["Order"].max())+", the last Order in the Data table")
+
+    # The Data table can't get new columns without rewriting it
+    extraList = [col for col in dataTable.columns if col not in dataColList]
+    if extraList != []:
+        raise ValueError("ValueError", "The columns "+", ".join([str(col) for col in extraList[:10]])+" of "+sourceName+" can't be found in the Data table")
+
+    return dataTable.reindex(columns = dataColList)
+
+
+#####################################################################################
+## Function: appendBatchTables()
+#####################################################################################
+'''
+This function creates the Data table rows of a new batch (see getBatchDataRows()) and updates the QC metrics of the Peak table
+from the new rows only. It is used by appendBatch() and appendBatchFrames().
+
+If the Peak table has the QC metrics added by qcMetricsFrames(), the sums of the metrics are combined with the sums of the new rows
+(see combineQCMoments()), so the metrics are the same as if qcMetricsFrames() was run on the whole Data table.
+The metrics of the new batches are added as new columns (e.g. qcRSD_Batch2), and the metrics of the other batches don't change.
+
+INPUT:
+'dataInfoTable' = The columns Idx, Filename, Order, and Batch of the Data table the rows are appended to as a dataframe.
+'dataColList' = The columns of the Data table the rows are appended to.
+'peakTable' = The Peak table created by tidyData() as a dataframe.
+'compTable' = A Compounds table with the Area columns of the new sample files as a dataframe.
+'metaTable' = The Meta table of the new sample files as a dataframe.
+'momentTable' = The sums of the QC metrics of the Data table created by getMomentTable(), None if the Peak table doesn't have QC metrics.
+'verbose' = Boolean value that controls the output to the console.
+'sourceName' = The name of the tables used in messages.
+'timer' = A PhaseTimer that times the phases.
+
+OUTPUT:
+'newDataTable' = The Data table rows of the new sample files.
+'peakTable' = A copy of the Peak table with the updated QC metrics.
+'momentTable' = The updated sums of the QC metrics, None if the Peak table doesn't have QC metrics.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def appendBatchTables(dataInfoTable, dataColList, peakTable, compTable, metaTable, momentTable, verbose, sourceName, timer):
+    timer.phase("Create Data rows")
+    if verbose:
+        print("Creating the Data rows of the new batch")
+    newDataTable = getBatchDataRows(compTable, metaTable, peakTable, dataColList, dataInfoTable, sourceName)
+    timer.count(rows = len(newDataTable.index), cells = newDataTable.size)
+
+    newBatchList = sorted(set(newDataTable["Batch"].tolist()))
+    report = [str(len(newDataTable.index))+" sample files appended to the Data table in batch "+", ".join([str(batch) for batch in newBatchList])]
+
+    peakTable = peakTable.copy()
+    if momentTable is not None:
+        timer.phase("Update QC metrics")
+        if verbose:
+            print("Updating QC metrics")
+        if momentTable["UID"].tolist() != peakTable["UID"].tolist():
+            raise ValueError("ValueError", "The peaks of the QC metric sums don't match the Peak table, run qcMetrics() again before appending a batch")
+        areaMatrix, flagDict, batchArray = getQCMatrix(newDataTable, peakTable, sourceName)
+
+        # A study with one batch doesn't have batch metrics yet, its batch metrics are the metrics of the study
+        oldBatchList = sorted(set(dataInfoTable["Batch"].tolist()))
+        if len(oldBatchList) == 1 and "qcRSD_Batch"+str(oldBatchList[0]) not in peakTable.columns:
+            for name in ["qcRSD", "dRatio", "blankRatio", "percentMissing"]:
+                if name in peakTable.columns:
+                    peakTable[name+"_Batch"+str(oldBatchList[0])] = peakTable[name]
+
+        momentDict = {}
+        for col in qcMomentColList:
+            momentDict[col] = momentTable[col].to_numpy(dtype=float)
+        momentDict = combineQCMoments(momentDict, getQCMoments(areaMatrix, flagDict))
+        for name, values in getQCMetricsFromMoments(momentDict).items():
+            peakTable[name] = values
+
+        # Only the metrics of the new batches are calculated
+        for batch in newBatchList:
+            batchMask = batchArray == batch
+            batchFlagDict = {}
+            for col in flagDict:
+                batchFlagDict[col] = flagDict[col][batchMask]
+            for name, values in calculateQCMetrics(areaMatrix[batchMask], batchFlagDict).items():
+                peakTable[name+"_Batch"+str(batch)] = values
+        timer.count(rows = areaMatrix.shape[1], cells = areaMatrix.size)
+
+        momentTable = pd.DataFrame(momentDict, columns = qcMomentColList)
+        momentTable.insert(0, "UID", peakTable["UID"].to_numpy())
+        report.append("QC metrics updated for "+str(areaMatrix.shape[1])+" peaks ("+str(int(flagDict["QC"].sum()))+" QCs, "
+                      +str(int(flagDict["Sample"].sum()))+" Samples, "+str(int(flagDict["Blank"].sum()))+" Blanks appended)")
+
+    return newDataTable, peakTable, momentTable, report
+
+
+#####################################################################################
+## Function: appendBatchFrames()
+#####################################################################################
+'''
+This function appends a new batch of sample files to the TidyData Data table without reading or writing an Excel file,
+see appendBatch(). Only the new rows are created and validated, and the QC metrics of the Peak table are updated from the new rows only.
+
+INPUT:
+'dataTable' = The Data table created by tidyData() as a dataframe.
+'peakTable' = The Peak table created by tidyData() as a dataframe.
+'compTable' = A Compounds table with the Area columns of the new sample files as a dataframe, see getBatchDataRows().
+'metaTable' = The Meta table of the new sample files as a dataframe.
+'momentTable' = The sums of the QC metrics returned by an earlier appendBatchFrames() (default is None),
+    if this value is left as None and the Peak table has QC metrics, the sums are calculated from the Data table.
+'verbose' = Boolean value that controls the output to the console.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'dataTable' = The Data table with the rows of the new sample files.
+'peakTable' = A copy of the Peak table with the updated QC metrics.
+'momentTable' = The updated sums of the QC metrics, pass it to the next appendBatchFrames(). None if the Peak table doesn't have QC metrics.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def appendBatchFrames(dataTable, peakTable, compTable, metaTable, momentTable = None, verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("appendBatchFrames")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+
+        # Validate the tables
+        for name, table in [("dataTable", dataTable), ("peakTable", peakTable), ("compTable", compTable), ("metaTable", metaTable)]:
+            if not isinstance(table, pd.DataFrame):
+                raise TypeError("TypeError", "Make sure '"+name+"' is a pandas DataFrame")
+        if momentTable is not None and not isinstance(momentTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'momentTable' is a pandas DataFrame or None")
+
+        # Validate 'verbose'
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+        # The sums of the QC metrics are only calculated from the whole Data table once
+        if momentTable is None and "qcRSD" in peakTable.columns:
+            timer.phase("Calculate QC metric sums")
+            momentTable = getMomentTable(dataTable, peakTable, "the tables")
+        if "qcRSD" not in peakTable.columns:
+            momentTable = None
+
+        dataInfoTable = dataTable.reindex(columns = ["Idx", "Filename", "Order", "Batch"])
+        newDataTable, peakTable, momentTable, report = appendBatchTables(dataInfoTable, dataTable.columns.tolist(), peakTable, compTable, metaTable, momentTable, verbose, "the new batch", timer)
+        dataTable = pd.concat([dataTable, newDataTable], ignore_index=True)
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        return dataTable, peakTable, momentTable, report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: appendBatch()
+#####################################################################################
+'''
+This function appends a new batch of sample files to an Excel file created by tidyData(), without converting the whole study again.
+The new batch is read from an Excel file with a Compounds sheet that has the Area columns of the new sample files,
+and a Meta sheet with the rows of the new sample files (see getBatchDataRows()).
+
+Only the columns Idx, Filename, Order, and Batch of the Data sheet are read, the new rows are written after the last row
+of the Data sheet and the Meta sheet, and the Peak sheet is updated in place. If the Peak sheet has the QC metrics added by qcMetrics(),
+they are updated from the new rows only with the sums saved in the moment sheet (see appendBatchTables()). The moment sheet is
+created from the whole Data sheet the first time a batch is appended. The Compounds sheet isn't changed.
+
+INPUT:
+'excelFilePath' = The path to an Excel file created by tidyData().
+'batchFilePath' = The path to an Excel file with the Compounds sheet and Meta sheet of the new batch.
+'peakSheetName' = The name of the Peak sheet (default is "Peak").
+'dataSheetName' = The name of the Data sheet (default is "Data").
+'metaSheetName' = The name of the Meta sheet (default is "Meta").
+'momentSheetName' = The name of the sheet to save the sums of the QC metrics in (default is "QCMoments").
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def appendBatch(excelFilePath, batchFilePath, peakSheetName = "Peak", dataSheetName = "Data", metaSheetName = "Meta", momentSheetName = "QCMoments", verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("appendBatch")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+
+        # Validate the arguments
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+        if type(batchFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'batchFilePath' is a string value")
+        if type(peakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
+        if type(dataSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'dataSheetName' is a string value")
+        if type(metaSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'metaSheetName' is a string value")
+        if type(momentSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'momentSheetName' is a string value")
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+        timer.phase("Read new batch")
+        try:
+            if verbose:
+                print("Importing "+batchFilePath)
+            compTable = pd.read_excel(batchFilePath, sheet_name = "Compounds")
+            metaTable = pd.read_excel(batchFilePath, sheet_name = "Meta")
+            timer.count(rows = len(metaTable.index), cells = compTable.size + metaTable.size, bytes = os.path.getsize(batchFilePath))
+
+        # If the Excel file doesn't have the correct sheets
+        except ValueError:
+            raise ValueError("ValueError", "Make sure "+batchFilePath+" has the Compounds and Meta sheets")
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+batchFilePath)
+
+        timer.phase("Read Excel file")
+        try:
+            if verbose:
+                print("Importing "+excelFilePath)
+            # Only the columns needed to validate the new rows are read from the Data sheet
+            with pd.ExcelFile(excelFilePath, engine="openpyxl") as excelFile:
+                sheetNameList = excelFile.sheet_names
+                peakTable = excelFile.parse(peakSheetName)
+                dataColList = excelFile.parse(dataSheetName, nrows = 0).columns.tolist()
+                metaColList = excelFile.parse(metaSheetName, nrows = 0).columns.tolist()
+                missingList = [col for col in ["Idx", "Filename", "Order", "Batch"] if col not in dataColList]
+                if missingList != []:
+                    raise KeyError("KeyError", "Column \""+missingList[0]+"\" can't be found in the "+dataSheetName+" sheet, make sure it was created by tidyData()")
+                dataInfoTable = excelFile.parse(dataSheetName, usecols = ["Idx", "Filename", "Order", "Batch"])
+
+                # The whole Data sheet is only read the first time, to calculate the sums of the QC metrics
+                momentTable = None
+                dataTable = None
+                if "qcRSD" in peakTable.columns:
+                    if momentSheetName in sheetNameList:
+                        momentTable = excelFile.parse(momentSheetName)
+                    else:
+                        dataTable = excelFile.parse(dataSheetName)
+            timer.count(rows = len(peakTable.index) + len(dataInfoTable.index), cells = peakTable.size + dataInfoTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If the Excel file doesn't have the correct sheets
+        except ValueError:
+            raise ValueError("ValueError", "Make sure "+excelFilePath+" has the "+peakSheetName+", "+dataSheetName+", and "+metaSheetName+" sheets")
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        if dataTable is not None:
+            timer.phase("Calculate QC metric sums")
+            if verbose:
+                print("Calculating the QC metric sums from the "+dataSheetName+" sheet")
+            momentTable = getMomentTable(dataTable, peakTable, excelFilePath)
+            timer.count(rows = len(dataTable.index), cells = dataTable.size)
+
+        newDataTable, peakTable, momentTable, report = appendBatchTables(dataInfoTable, dataColList, peakTable, compTable, metaTable, momentTable, verbose, batchFilePath, timer)
+
+        # The Meta sheet can't get new columns without rewriting it
+        extraList = [col for col in metaTable.columns if col not in metaColList]
+        if extraList != []:
+            raise ValueError("ValueError", "The columns "+", ".join([str(col) for col in extraList[:10]])+" of the Meta sheet of "+batchFilePath+" can't be found in the "+metaSheetName+" sheet")
+        metaTable = metaTable.reindex(columns = metaColList)
+
+        timer.phase("Save Excel file")
+        try:
+            if verbose:
+                print("Appending the new batch to "+excelFilePath)
+            # The new rows are written after the last rows of the sheets, the other rows aren't written again
+            with pd.ExcelWriter(
+                excelFilePath,
+                mode="a",
+                engine="openpyxl",
+                if_sheet_exists="overlay",
+            ) as writer:
+                newDataTable.to_excel(writer, sheet_name=dataSheetName, startrow=writer.book[dataSheetName].max_row, header=False, index=False)
+                metaTable.to_excel(writer, sheet_name=metaSheetName, startrow=writer.book[metaSheetName].max_row, header=False, index=False)
+                peakTable.to_excel(writer, sheet_name=peakSheetName, index=False)
+                if momentTable is not None:
+                    momentTable.to_excel(writer, sheet_name=momentSheetName, index=False)
+            timer.count(rows = len(newDataTable.index) + len(peakTable.index), cells = newDataTable.size + peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+        report.append("Updated "+excelFilePath)
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: getSplineMatrices()
+#####################################################################################
+'''
+This function creates the matrices of a cubic smoothing spline through the QCs of a batch.
+A smoothing spline is linear in the values it is fitted to, so the same matrices fit every peak that has the same QCs.
+The knots are scaled to the range 0 to 1, so the smoothing values don't depend on the Order values.
+
+INPUT:
+'knotArray' = A sorted array of the Order values of the QCs, at least 3 values.
+'evalArray' = An array of the Order values to evaluate the spline at.
+'smoothingList' = A list of smoothing values, larger values give smoother splines (a straight line at the limit).
+
+OUTPUT:
+'hatArray' = An array of the diagonals of the smoother matrix for each smoothing value, used for leave-one-out cross-validation.
+'fitArray' = An array of the smoother matrices for each smoothing value, the fitted values at the knots are fitArray[i] @ values.
+'evalMatrixArray' = An array of the matrices for each smoothing value that give the spline at 'evalArray' from the values at the knots.
+'''
+
+def getSplineMatrices(knotArray, evalArray, smoothingList):
+    start = knotArray[0]
+    scale = knotArray[-1] - knotArray[0]
+    x = (knotArray - start) / scale
+    t = (np.asarray(evalArray, dtype=float) - start) / scale
+    n = len(x)
+    h = np.diff(x)
+
+    # The second differences (Q) and the penalty on the second derivative (R) of a natural cubic spline
+    Q = np.zeros((n, n - 2))
+    R = np.zeros((n - 2, n - 2))
+    for j in range(1, n - 1):
+        Q[j - 1, j - 1] = 1 / h[j - 1]
+        Q[j, j - 1] = -1 / h[j - 1] - 1 / h[j]
+        Q[j + 1, j - 1] = 1 / h[j]
+        R[j - 1, j - 1] = (h[j - 1] + h[j]) / 3
+        if j < n - 2:
+            R[j - 1, j] = h[j] / 6
+            R[j, j - 1] = h[j] / 6
+    gammaMatrix = np.linalg.solve(R, Q.T)
+    K = Q @ gammaMatrix
+
+    # The spline through the values at the knots, evaluated at 't', for each knot set to 1 and the others set to 0
+    gamma = np.vstack([np.zeros(n), gammaMatrix, np.zeros(n)])
+    identity = np.eye(n)
+    i = np.clip(np.searchsorted(x, t, side="right") - 1, 0, n - 2)
+    left = t - x[i]
+    right = x[i + 1] - t
+    hi = h[i][:, None]
+    interpMatrix = (left[:, None] * identity[i + 1] + right[:, None] * identity[i]) / hi \
+        - left[:, None] * right[:, None] / 6 * ((1 + left[:, None] / hi) * gamma[i + 1] + (1 + right[:, None] / hi) * gamma[i])
+
+    # A natural spline is a straight line outside the knots
+    before = t < x[0]
+    if before.any():
+        slope = (identity[1] - identity[0]) / h[0] - h[0] * gamma[1] / 6
+        interpMatrix[before] = identity[0] + (t[before] - x[0])[:, None] * slope
+    after = t > x[-1]
+    if after.any():
+        slope = (identity[-1] - identity[-2]) / h[-1] + h[-1] * gamma[-2] / 6
+        interpMatrix[after] = identity[-1] + (t[after] - x[-1])[:, None] * slope
+
+    fitArray = np.array([np.linalg.inv(identity + smoothing * K) for smoothing in smoothingList])
+    hatArray = np.array([np.diag(fit) for fit in fitArray])
+    evalMatrixArray = interpMatrix[None, :, :] @ fitArray
+
+    return hatArray, fitArray, evalMatrixArray
+
+
+# The smoothing values tried by the QC-RSC cross-validation, the Order values are scaled to 0 to 1
+qcrscSmoothingList = [10.0 ** (i / 2) for i in range(-12, 5)]
+
+# The number of QCs a batch needs for the QC RSD after the QC-RSC correction to be reported without a warning
+qcrscMinReliableQCs = 6
+
+
+#####################################################################################
+## Function: correctDriftChunk()
+#####################################################################################
+'''
+This function corrects the signal drift of a chunk of peaks with QC-RSC, see qcrscFrames().
+It runs in a worker process of qcrscFrames(). The peaks that have the same QCs in a batch share the spline matrices,
+so all of those peaks are fitted with matrix products.
+
+INPUT:
+'areaMatrix' = A float array of the areas with one row for each sample file and one column for each peak in the chunk.
+'orderArray' = An array of the Order of each sample file.
+'batchArray' = An array of the Batch of each sample file.
+'qcArray' = A boolean array, True for the QCs.
+'minQCs' = The smallest number of QCs a peak needs in a batch to be corrected in that batch.
+
+OUTPUT:
+'correctedMatrix' = A float array of the corrected areas.
+'fitDict' = A dictionary of the fit diagnostics, with the keys 'column', 'batch', 'qcCount', 'smoothing', 'cvRSD',
+    'qcRSDBefore', 'qcRSDAfter', and 'corrected'. Each value is a list with one value for each peak in each batch.
+    'qcRSDAfter' is measured on held-out QCs: each QC is corrected with the spline fitted without it, because the spline
+    fitted with every QC goes almost through the QCs when a batch only has a few of them.
+'''
+
+def correctDriftChunk(areaMatrix, orderArray, batchArray, qcArray, minQCs = 3):
+    correctedMatrix = areaMatrix.copy()
+    fitDict = {"column": [], "batch": [], "qcCount": [], "smoothing": [], "cvRSD": [], "qcRSDBefore": [], "qcRSDAfter": [], "corrected": []}
+    peakCount = areaMatrix.shape[1]
+
+    # The QCs of every batch are scaled to the median of all the QCs, so the batches line up
+    with np.errstate(invalid="ignore"):
+        qcMatrix = areaMatrix[qcArray]
+        targetArray = np.full(peakCount, np.nan)
+        hasQC = (~np.isnan(qcMatrix)).any(axis=0)
+        if hasQC.any():
+            targetArray[hasQC] = np.nanmedian(qcMatrix[:, hasQC], axis=0)
+
+    for batch in sorted(set(batchArray.tolist())):
+        batchRows = np.where(batchArray == batch)[0]
+        batchRows = batchRows[np.argsort(orderArray[batchRows], kind="stable")]
+        qcRows = batchRows[qcArray[batchRows]]
+        batchMatrix = areaMatrix[batchRows]
+        qcMatrix = areaMatrix[qcRows]
+        presentMatrix = ~np.isnan(qcMatrix)
+
+        batchFitDict = {"smoothing": np.full(peakCount, np.nan), "cvRSD": np.full(peakCount, np.nan), "corrected": np.zeros(peakCount, dtype=bool)}
+        batchCorrected = batchMatrix.copy()
+
+        # The QCs corrected with the spline fitted without them, the peaks that aren't corrected keep their areas
+        heldOutMatrix = qcMatrix.copy()
+
+        # Group the peaks by the QCs they have in this batch
+        if len(qcRows) > 0:
+            patternArray, inverseArray = np.unique(presentMatrix.T, axis=0, return_inverse=True)
+            inverseArray = np.asarray(inverseArray).reshape(-1)
+        else:
+            patternArray, inverseArray = np.zeros((0, 0), dtype=bool), np.zeros(peakCount, dtype=int)
+
+        for p in range(len(patternArray)):
+            pattern = patternArray[p]
+            colArray = np.where(inverseArray == p)[0]
+            if pattern.sum() < max(minQCs, 3):
+                continue
+
+            knotArray = orderArray[qcRows[pattern]].astype(float)
+            hatArray, fitArray, evalMatrixArray = getSplineMatrices(knotArray, orderArray[batchRows], qcrscSmoothingList)
+            Y = qcMatrix[pattern][:, colArray]
+
+            # Choose the smoothing of each peak by leave-one-out cross-validation
+            with np.errstate(invalid="ignore", divide="ignore"):
+                residualArray = (Y[None, :, :] - fitArray @ Y) / (1 - hatArray[:, :, None])
+                cvArray = np.sqrt(np.mean(residualArray ** 2, axis=1))
+
+            # The areas are divided by the spline, so only the smoothing values that give a positive spline at every sample file are used
+            splineArray = evalMatrixArray @ Y
+            positiveArray = (splineArray > 0).all(axis=1)
+            cvArray = np.where(np.isfinite(cvArray), cvArray, np.inf)
+            best = np.argmin(np.where(positiveArray, cvArray, np.inf), axis=0)
+
+            # The spline at every sample file of the batch, with the smoothing chosen for each peak
+            splineMatrix = np.take_along_axis(splineArray, best[None, None, :], axis=0)[0]
+            valid = positiveArray[best, np.arange(len(colArray))] & np.isfinite(targetArray[colArray])
+            validCols = colArray[valid]
+            batchCorrected[:, validCols] = batchMatrix[:, validCols] / splineMatrix[:, valid] * targetArray[validCols]
+
+            # The leave-one-out spline at each QC is (fit - hat * area) / (1 - hat), a QC is left out if that isn't positive
+            with np.errstate(invalid="ignore", divide="ignore"):
+                hatMatrix = hatArray[best].T
+                looMatrix = (np.take_along_axis(fitArray @ Y, best[None, None, :], axis=0)[0] - hatMatrix * Y) / (1 - hatMatrix)
+                heldOutArray = np.where(looMatrix > 0, Y / looMatrix * targetArray[colArray], np.nan)
+            heldOutMatrix[np.ix_(np.where(pattern)[0], validCols)] = heldOutArray[:, valid]
+
+            batchFitDict["smoothing"][colArray] = np.array(qcrscSmoothingList)[best]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                batchFitDict["cvRSD"][colArray] = 100 * cvArray[best, np.arange(len(colArray))] / np.mean(Y, axis=0)
+            batchFitDict["corrected"][validCols] = True
+
+        correctedMatrix[batchRows] = batchCorrected
+
+        # The QC RSD of the batch before and after the correction, the RSD after the correction is measured on the held-out QCs
+        qcPosition = qcArray[batchRows]
+        qcCount, qcMeanBefore, qcStdBefore = getColumnMeanStd(batchMatrix[qcPosition])
+        heldOutCount, qcMeanAfter, qcStdAfter = getColumnMeanStd(heldOutMatrix)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            qcRSDBefore = 100 * qcStdBefore / qcMeanBefore
+            qcRSDAfter = 100 * qcStdAfter / qcMeanAfter
+
+        fitDict["column"].extend(range(peakCount))
+        fitDict["batch"].extend([batch] * peakCount)
+        fitDict["qcCount"].extend(qcCount.tolist())
+        fitDict["smoothing"].extend(batchFitDict["smoothing"].tolist())
+        fitDict["cvRSD"].extend(batchFitDict["cvRSD"].tolist())
+        fitDict["qcRSDBefore"].extend(qcRSDBefore.tolist())
+        fitDict["qcRSDAfter"].extend(qcRSDAfter.tolist())
+        fitDict["corrected"].extend(batchFitDict["corrected"].tolist())
+
+    return correctedMatrix, fitDict
+
+
+#####################################################################################
+## Function: qcrscFrames()
+#####################################################################################
+'''
+This function corrects the signal drift of every peak in the TidyData Data table with QC-RSC (QC robust spline correction).
+For each peak and batch, a cubic smoothing spline is fitted to the QC areas across the injection Order, with the smoothing chosen
+by leave-one-out cross-validation, and the areas of every sample file are divided by the spline. The areas are then multiplied
+by the median of the peak's QCs across all batches, so the batches line up.
+A peak is left as it is in a batch if it has less than 'minQCs' QCs in that batch, or if its spline isn't positive everywhere.
+The peaks are split into chunks that are corrected in parallel in worker processes.
+
+INPUT:
+'dataTable' = The Data table created by tidyData() as a dataframe, with the QC flags created by validatingDataPeakTables().
+'peakTable' = The Peak table created by tidyData() as a dataframe.
+'maxWorkers' = The maximum number of worker processes (default is None), if this value is left as None, one worker is used for each CPU.
+    If this value is 1, the peaks are corrected in this process.
+'chunkSize' = The number of peaks in each chunk (default is 1000).
+'minQCs' = The smallest number of QCs a peak needs in a batch to be corrected in that batch (default is 3).
+'verbose' = Boolean value that controls the output to the console.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'dataTable' = A copy of the Data table with the corrected areas.
+'fitTable' = A dataframe of the fit diagnostics with one row for each peak in each batch, and the columns
+    UID, Batch, qcCount, smoothing, cvRSD (the cross-validation error as a percentage of the QC mean), qcRSDBefore,
+    qcRSDAfter (measured on held-out QCs, see correctDriftChunk()), and corrected.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+    A warning is added if a batch has less than 'qcrscMinReliableQCs' QCs, because the RSD after the correction isn't reliable then.
+'''
+
+def qcrscFrames(dataTable, peakTable, maxWorkers = None, chunkSize = 1000, minQCs = 3, verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("qcrscFrames")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+
+        # Validate 'dataTable' and 'peakTable'
+        if not isinstance(dataTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'dataTable' is a pandas DataFrame")
+        if not isinstance(peakTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'peakTable' is a pandas DataFrame")
+        if "Order" not in dataTable.columns:
+            raise ValueError("ValueError", "Column \"Order\" can't be found in the Data table of the tables, make sure the tables were created by tidyData()")
+
+        # Validate 'maxWorkers', 'chunkSize', and 'minQCs'
+        if maxWorkers is not None:
+            if type(maxWorkers) != int:
+                raise TypeError("TypeError", "Make sure 'maxWorkers' is an integer value")
+            if maxWorkers < 1:
+                raise ValueError("ValueError", "Make sure 'maxWorkers' is at least 1")
+        if type(chunkSize) != int or chunkSize < 1:
+            raise TypeError("TypeError", "Make sure 'chunkSize' is a positive integer value")
+        if type(minQCs) != int or minQCs < 3:
+            raise ValueError("ValueError", "Make sure 'minQCs' is an integer value of at least 3")
+
+        # Validate 'verbose'
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+        timer.phase("Read area matrix")
+        areaMatrix, flagDict, batchArray = getQCMatrix(dataTable, peakTable, "the tables")
+        orderArray = pd.to_numeric(dataTable["Order"], errors="coerce").to_numpy(dtype=float)
+        if np.isnan(orderArray).any():
+            raise ValueError("ValueError", "Make sure the \"Order\" column of the Data table has a number for every sample file")
+        for batch in set(batchArray.tolist()):
+            if len(set(orderArray[batchArray == batch].tolist())) != (batchArray == batch).sum():
+                raise ValueError("ValueError", "Make sure the \"Order\" values of the Data table are unique in each batch")
+        timer.count(rows = areaMatrix.shape[0], cells = areaMatrix.size)
+
+        # Split the peaks into chunks, each chunk is corrected in a worker process
+        timer.phase("Correct drift")
+        chunkList = [(start, min(start + chunkSize, areaMatrix.shape[1])) for start in range(0, areaMatrix.shape[1], chunkSize)]
+        if maxWorkers is None:
+            maxWorkers = os.cpu_count() or 1
+        maxWorkers = max(1, min(maxWorkers, len(chunkList)))
+        if verbose:
+            print("Correcting "+str(areaMatrix.shape[1])+" peaks in "+str(len(chunkList))+" chunks with "+str(maxWorkers)+" workers")
+
+        outputList = []
+        if maxWorkers == 1:
+            for start, end in chunkList:
+                outputList.append(correctDriftChunk(areaMatrix[:, start:end], orderArray, batchArray, flagDict["QC"], minQCs))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+                futureList = [executor.submit(correctDriftChunk, areaMatrix[:, start:end], orderArray, batchArray, flagDict["QC"], minQCs) for start, end in chunkList]
+                for future in futureList:
+                    outputList.append(future.result())
+        timer.count(rows = areaMatrix.shape[1], cells = areaMatrix.size)
+
+        # Put the chunks back together
+        timer.phase("Create tables")
+        uidArray = peakTable["UID"].to_numpy()
+        correctedMatrix = np.empty_like(areaMatrix)
+        fitTableList = []
+        for (start, end), (correctedChunk, fitDict) in zip(chunkList, outputList):
+            correctedMatrix[:, start:end] = correctedChunk
+            fitChunk = pd.DataFrame(fitDict)
+            fitChunk.insert(0, "UID", uidArray[start + fitChunk.pop("column").to_numpy()])
+            fitTableList.append(fitChunk)
+
+        fitTable = pd.concat(fitTableList, ignore_index=True)
+        fitTable = fitTable.rename(columns={"batch": "Batch"}).sort_values(by=["Batch"], kind="stable", ignore_index=True)
+        # The corrected areas replace the area columns in one step, assigning them one column at a time is slow
+        uidList = peakTable["UID"].tolist()
+        areaTable = pd.DataFrame(correctedMatrix, columns=uidList, index=dataTable.index)
+        dataTable = pd.concat([dataTable.drop(columns=uidList), areaTable], axis=1)[dataTable.columns]
+
+        report = []
+        batchCount = fitTable["Batch"].nunique()
+        correctedCount = int(fitTable.groupby("UID", sort=False)["corrected"].all().sum())
+        report.append(str(correctedCount)+" of "+str(areaMatrix.shape[1])+" peaks corrected in all "+str(batchCount)+" batches")
+        report.append("Median QC RSD of the batches "+str(round(float(np.nanmedian(fitTable["qcRSDBefore"])), 2))+"% before and "
+                      +str(round(float(np.nanmedian(fitTable["qcRSDAfter"])), 2))+"% after the correction (held-out QCs)")
+
+        # With only a few QCs, every held-out QC is at the edge of the spline or far from the other QCs
+        qcBatchCount = pd.Series(flagDict["QC"]).groupby(batchArray).sum()
+        fewQCList = [str(batch) for batch in qcBatchCount.index if qcBatchCount[batch] < qcrscMinReliableQCs]
+        if fewQCList != []:
+            report.append("WARNING: the batches "+", ".join(fewQCList)+" have less than "+str(qcrscMinReliableQCs)+" QCs, the QC RSD after the correction of these batches isn't reliable")
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        return dataTable, fitTable, report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: qcrsc()
+#####################################################################################
+'''
+This function corrects the signal drift of every peak in an Excel file created by tidyData() with QC-RSC, see qcrscFrames().
+The corrected Data table and the fit diagnostics are saved in new sheets, so the original areas are kept.
+
+INPUT:
+'excelFilePath' = The path to an Excel file created by tidyData().
+'peakSheetName' = The name of the Peak sheet (default is "Peak").
+'dataSheetName' = The name of the Data sheet (default is "Data").
+'newDataSheetName' = The name of the sheet to save the corrected Data table in (default is "DataQCRSC").
+'fitSheetName' = The name of the sheet to save the fit diagnostics in (default is "QCRSCFit").
+'maxWorkers' = The maximum number of worker processes (default is None), if this value is left as None, one worker is used for each CPU.
+'chunkSize' = The number of peaks in each chunk (default is 1000).
+'minQCs' = The smallest number of QCs a peak needs in a batch to be corrected in that batch (default is 3).
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def qcrsc(excelFilePath, peakSheetName = "Peak", dataSheetName = "Data", newDataSheetName = "DataQCRSC", fitSheetName = "QCRSCFit", maxWorkers = None, chunkSize = 1000, minQCs = 3, verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("qcrsc")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+
+        # Validate the arguments
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+        for name, value in [("peakSheetName", peakSheetName), ("dataSheetName", dataSheetName), ("newDataSheetName", newDataSheetName), ("fitSheetName", fitSheetName)]:
+            if type(value) != str or value == "":
+                raise TypeError("TypeError", "Make sure '"+name+"' is a string value")
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+        timer.phase("Read Excel file")
+        try:
+            if verbose:
+                print("Importing "+excelFilePath)
+            peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)
+            dataTable = pd.read_excel(excelFilePath, sheet_name = dataSheetName)
+            timer.count(rows = len(peakTable.index) + len(dataTable.index), cells = peakTable.size + dataTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If the Excel file doesn't have the correct sheets
+        except ValueError:
+            raise ValueError("ValueError", "Make sure "+excelFilePath+" has the "+peakSheetName+" and "+dataSheetName+" sheets")
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        dataTable, fitTable, report = qcrscFrames(dataTable, peakTable, maxWorkers, chunkSize, minQCs, False, timer)
+
+        timer.phase("Save Excel file")
+        try:
+            if verbose:
+                print("Saving sheets \""+newDataSheetName+"\" and \""+fitSheetName+"\"")
+            with pd.ExcelWriter(
+                excelFilePath,
+                mode="a",
+                engine="openpyxl",
+                if_sheet_exists="replace",
+            ) as writer:
+                dataTable.to_excel(writer, sheet_name=newDataSheetName, index=False)
+                fitTable.to_excel(writer, sheet_name=fitSheetName, index=False)
+            timer.count(rows = len(dataTable.index) + len(fitTable.index), cells = dataTable.size + fitTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+        report.append("Corrected Data saved to sheet \""+newDataSheetName+"\" and fit diagnostics saved to sheet \""+fitSheetName+"\" of "+excelFilePath)
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: parseFilterRule()
+#####################################################################################
+'''
+This function splits a filter rule, e.g. "qcRSD > 20", into the column, the comparison, and the value.
+The value is a number, True, False, or a string in quotes, e.g. "Name == 'Unknown'".
+
+INPUT:
+'rule' = The rule as a string.
+
+OUTPUT:
+'colName' = The name of the column.
+'operator' = The comparison, one of ">", ">=", "<", "<=", "==", or "!=".
+'value' = The value the column is compared to.
+'''
+
+def parseFilterRule(rule):
+    if type(rule) != str:
+        raise TypeError("TypeError", "Make sure the filter rule "+str(rule)+" is a string value")
+    match = re.fullmatch(r"\s*(.+?)\s*(>=|<=|==|!=|>|<)\s*(.+?)\s*", rule)
+    if match is None:
+        raise ValueError("ValueError", "Make sure the filter rule \""+rule+"\" is written as a column, a comparison (>, >=, <, <=, ==, or !=), and a value, e.g. \"qcRSD > 20\"")
+    colName, operator, value = match.groups()
+
+    if value in ["True", "False"]:
+        value = value == "True"
+    elif len(value) > 1 and value[0] == value[-1] and value[0] in ["'", "\""]:
+        value = value[1:-1]
+    else:
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValueError("ValueError", "Make sure the value of the filter rule \""+rule+"\" is a number, True, False, or a string in quotes")
+    if type(value) == str and operator not in ["==", "!="]:
+        raise ValueError("ValueError", "Make sure the filter rule \""+rule+"\" uses == or != to compare strings")
+
+    return colName, operator, value
+
+
+# The comparisons that can be used in filter rules, and the names of the NumPy functions that compare whole columns
+filterOperatorDict = {
+    ">": "greater",
+    ">=": "greater_equal",
+    "<": "less",
+    "<=": "less_equal",
+    "==": "equal",
+    "!=": "not_equal",
+}
+
+
+#####################################################################################
+## Function: filterFrames()
+#####################################################################################
+'''
+This function flags the peaks in a Peak table that match a set of filter rules. Each rule set adds a boolean column to the
+Peak table with the name of the rule set, and the Checked column is set to True for the peaks that match the rule sets.
+The rules are compared with whole columns at once, so thousands of peaks are flagged in one call.
+Missing values never match a rule, e.g. a peak without a qcRSD isn't flagged by "qcRSD > 20".
+
+INPUT:
+'peakTable' = The Peak table as a dataframe, e.g. with the QC metrics added by qcMetricsFrames().
+'ruleDict' = A dictionary of rule sets. The keys are the names of the flag columns, and the values are a rule or a list of rules
+    that all have to match, e.g. {"HighRSD": "qcRSD > 20", "InBlank": ["blankRatio > 30", "qcRSD > 10"]}. See parseFilterRule().
+'match' = "any" to check the peaks that match at least one rule set, or "all" to check the peaks that match every rule set (default is "any").
+    The Checked column is replaced, so peaks that no longer match are unchecked.
+'verbose' = Boolean value that controls the output to the console.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'peakTable' = A copy of the Peak table with the flag columns and the Checked column.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def filterFrames(peakTable, ruleDict, match = "any", verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("filterFrames")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+
+        # Validate 'peakTable'
+        if not isinstance(peakTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'peakTable' is a pandas DataFrame")
+
+        # Validate 'ruleDict' and parse each rule
+        if type(ruleDict) != dict or ruleDict == {}:
+            raise TypeError("TypeError", "Make sure 'ruleDict' is a dictionary with at least one rule set")
+        parsedRuleDict = {}
+        for flagName, ruleList in ruleDict.items():
+            if type(flagName) != str or flagName == "":
+                raise TypeError("TypeError", "Make sure the names of the rule sets are string values")
+            if flagName in ["Checked", "Tags", "Name", "compoundID"]:
+                raise ValueError("ValueError", "Make sure the rule set \""+flagName+"\" doesn't have the name of a column used by CD")
+            if type(ruleList) == str:
+                ruleList = [ruleList]
+            if type(ruleList) != list or ruleList == []:
+                raise TypeError("TypeError", "Make sure the rule set \""+flagName+"\" is a rule or a list of rules")
+            parsedRuleDict[flagName] = [parseFilterRule(rule) for rule in ruleList]
+
+        # The flag columns are replaced when the rules are run again, but a column used by a rule can't be replaced
+        for flagName, parsedRuleList in parsedRuleDict.items():
+            for colName, operator, value in parsedRuleList:
+                if colName not in peakTable.columns:
+                    raise ValueError("ValueError", "Column \""+colName+"\" used by the rule set \""+flagName+"\" can't be found in the Peak table")
+                if colName in parsedRuleDict:
+                    raise ValueError("ValueError", "Make sure the rule set \""+colName+"\" doesn't have the name of a column used by a rule")
+
+        # Validate 'match'
+        if match not in ["any", "all"]:
+            raise ValueError("ValueError", "Make sure 'match' is \"any\" or \"all\"")
+
+        # Validate 'verbose'
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+        # Compare whole columns with the rules, missing values and values that aren't numbers never match a numeric rule
+        timer.phase("Apply rules")
+        flagDict = {}
+        for flagName, parsedRuleList in parsedRuleDict.items():
+            flagArray = np.ones(len(peakTable.index), dtype=bool)
+            for colName, operator, value in parsedRuleList:
+                if type(value) == float:
+                    colArray = pd.to_numeric(peakTable[colName], errors="coerce").to_numpy(dtype=float)
+                    with np.errstate(invalid="ignore"):
+                        ruleArray = getattr(np, filterOperatorDict[operator])(colArray, value) & ~np.isnan(colArray)
+                else:
+                    colSeries = peakTable[colName]
+                    ruleArray = getattr(np, filterOperatorDict[operator])(colSeries.to_numpy(dtype=object), value).astype(bool) & colSeries.notna().to_numpy()
+                flagArray &= ruleArray
+            flagDict[flagName] = flagArray
+        timer.count(rows = len(peakTable.index), cells = len(peakTable.index) * sum([len(i) for i in parsedRuleDict.values()]))
+
+        if match == "any":
+            checkedArray = np.logical_or.reduce(list(flagDict.values()))
+        else:
+            checkedArray = np.logical_and.reduce(list(flagDict.values()))
+
+        timer.phase("Create tables")
+        peakTable = peakTable.copy()
+        for flagName, flagArray in flagDict.items():
+            peakTable[flagName] = flagArray
+        peakTable["Checked"] = checkedArray
+
+        report = []
+        for flagName, flagArray in flagDict.items():
+            report.append(str(int(flagArray.sum()))+" of "+str(len(flagArray))+" peaks flagged by \""+flagName+"\"")
+        report.append(str(int(checkedArray.sum()))+" of "+str(len(checkedArray))+" peaks Checked")
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        return peakTable, report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: getFilterTagList()
+#####################################################################################
+'''
+This function gets the Tags that filterFeatures() writes to a CD results file, and makes sure the CD results file has enough Tags for them
+before anything is written. The Tags already in the Tags column of the Peak table and the names of the rule sets each need a Tag in CD,
+a rule set with the same name as a Tag in the Tags column reuses that Tag (the flags of the rule set replace it).
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'peakTable' = The Peak table as a dataframe.
+'ruleNameList' = A list of the names of the rule sets.
+'busyTimeout' = The number of seconds SQLite waits for a lock held by another process before giving up (default is 5.0).
+
+OUTPUT:
+'tagList' = A list of the Tag columns to pass to pushFrame().
+'''
+
+def getFilterTagList(cdResultsFilePath, peakTable, ruleNameList, busyTimeout = 5.0):
+    # An empty Tags column is read from Excel as numbers, so it is only kept if it has Tags in it
+    tagList = list(ruleNameList)
+    tagSet = set()
+    if "Tags" in peakTable.columns and peakTable.dtypes["Tags"] == "object":
+        tagList = ["Tags"] + tagList
+        for tagString in peakTable["Tags"].dropna():
+            for tag in str(tagString).split(";"):
+                if tag.strip() != "":
+                    tagSet.add(tag.strip())
+
+    conn = connectToCDResultsFile(cdResultsFilePath, True, busyTimeout)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT BoxID FROM DataDistributionBoxExtendedData WHERE Name = 'EntityItemTagVisibility';")
+        cdTagNum = len(cursor.fetchall())
+        cursor.close()
+    finally:
+        conn.close()
+
+    tagNum = len(tagSet | set(ruleNameList))
+    if tagNum > cdTagNum:
+        raise ValueError("ValueError", cdResultsFilePath+" has "+str(cdTagNum)+" Tags, but "+str(len(tagSet))+" are used by the Tags column and the "
+                         +str(len(ruleNameList))+" rule sets need "+str(tagNum - len(tagSet))+" more. Use fewer rule sets, name a rule set after a Tag "
+                         +"in the Tags column to reuse it, or set 'pushTags' to False to only write the Checked column")
+
+    return tagList
+
+
+#####################################################################################
+## Function: filterFeatures()
+#####################################################################################
+'''
+This function flags the peaks in the Peak sheet of an Excel file that match a set of filter rules, see filterFrames(),
+and saves the flag columns and the Checked column to the Peak sheet.
+If a CD results file is given, the Checked column and the flag columns (as Tags) are also written to the CD results file
+with pushFrame() in one transaction, so the peaks don't have to be checked by hand in the Excel file and pushed one by one.
+The Tags that were already in the Tags column are kept, so the CD results file needs a free Tag for each rule set,
+this is checked before anything is written, see getFilterTagList().
+
+INPUT:
+'excelFilePath' = The path to an Excel file, e.g. an Excel file created by tidyData() with the QC metrics added by qcMetrics().
+'ruleDict' = A dictionary of rule sets, see filterFrames().
+'cdResultsFilePath' = The path to a CD results file (default is None), if this value is left as None, only the Excel file is updated.
+'peakSheetName' = The name of the Peak sheet (default is "Peak").
+'match' = "any" or "all", see filterFrames() (default is "any").
+'newPeakSheetName' = The name of the sheet to save the flagged Peak table in (default is ""),
+    if this value is left as "", the Peak sheet is updated.
+'pushTags' = Boolean value, if False, only the Checked column is written to the CD results file and the Tags aren't changed (default is True).
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+'backupFilePath' = The path of a sidecar file to keep the snapshot of the CD results file in (default is None).
+    If this value is left as None, the snapshot is kept in 'cdResultsFilePath' + ".backup" until the changes are committed. See updateCDResultsFile().
+'busyTimeout' = The number of seconds SQLite waits for a lock held by another process before giving up (default is 5.0).
+'lockRetries' = The number of times to retry starting the write transaction if the CD results file is locked (default is 5).
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def filterFeatures(excelFilePath, ruleDict, cdResultsFilePath = None, peakSheetName = "Peak", match = "any", newPeakSheetName = "", pushTags = True, verbose = True, backupFilePath = None, busyTimeout = 5.0, lockRetries = 5, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("filterFeatures")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+
+        # Validate the arguments
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+        if cdResultsFilePath is not None and type(cdResultsFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
+        if type(peakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
+        if type(newPeakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'newPeakSheetName' is a string value")
+        if type(pushTags) != bool:
+            raise TypeError("TypeError", "Make sure 'pushTags' is a boolean value")
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+        if newPeakSheetName == "":
+            newPeakSheetName = peakSheetName
+        if cdResultsFilePath is not None and os.path.exists(cdResultsFilePath) == False:
+            raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
+
+        timer.phase("Read Excel file")
+        try:
+            if verbose:
+                print("Importing "+excelFilePath)
+            peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)
+            timer.count(rows = len(peakTable.index), cells = peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If the Excel file doesn't have the correct sheet
+        except ValueError:
+            raise ValueError("ValueError", "Can't find "+peakSheetName+" in "+excelFilePath)
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        peakTable, report = filterFrames(peakTable, ruleDict, match, False, timer)
+
+        # Write the Checked column and the Tags to CD in one transaction, the compoundID column is added to the peak table if it's missing
+        if cdResultsFilePath is not None:
+            if verbose:
+                print("Updating "+cdResultsFilePath)
+            # The Tags in CD aren't changed if there is no tag list
+            tagList = None
+            if pushTags:
+                tagList = getFilterTagList(cdResultsFilePath, peakTable, list(ruleDict.keys()), busyTimeout)
+            peakTable, newReport = pushFrame(cdResultsFilePath, peakTable, ["Checked"], tagList, False, False, True, backupFilePath, busyTimeout, lockRetries, timer = timer)
+            report = report + newReport
+
+        timer.phase("Save Excel file")
+        try:
+            if verbose:
+                print("Saving changes to sheet \""+newPeakSheetName+"\"")
+            with pd.ExcelWriter(
+                excelFilePath,
+                mode="a",
+                engine="openpyxl",
+                if_sheet_exists="replace",
+            ) as writer:
+                peakTable.to_excel(writer, sheet_name=newPeakSheetName, index=False)
+            timer.count(rows = len(peakTable.index), cells = peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+        report.append("Flags saved to sheet \""+newPeakSheetName+"\" of "+excelFilePath)
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+# The default MSI levels, from the last cell of CDExcelNotebook.ipynb
+defaultMSILevelDict = {
+    "0": [["goodRT", "mzVault"]],
+    "1": ["goodRT", "mzVault"],
+    "2": ["putativeCompound"],
+    "3": ["putativeClass"],
+}
+
+
+#####################################################################################
+## Function: validateMSILevelDict()
+#####################################################################################
+'''
+This function makes sure an MSI level dictionary is valid, see msiFrames().
+
+INPUT:
+'msiLevelDict' = A dictionary of MSI levels.
+
+OUTPUT:
+'tagNameList' = A list of the unique Tags used by the MSI levels.
+'''
+
+def validateMSILevelDict(msiLevelDict):
+    if type(msiLevelDict) != dict or msiLevelDict == {}:
+        raise TypeError("TypeError", "Make sure 'msiLevelDict' is a dictionary with at least one MSI level")
+    tagNameList = []
+    for level, ruleList in msiLevelDict.items():
+        if type(level) not in [str, int]:
+            raise TypeError("TypeError", "Make sure the MSI levels are string or integer values")
+        if type(ruleList) != list or ruleList == []:
+            raise TypeError("TypeError", "Make sure MSI level \""+str(level)+"\" is a list of Tags")
+        for rule in ruleList:
+            if type(rule) == str:
+                rule = [rule]
+            if type(rule) != list or rule == [] or any(type(tag) != str for tag in rule):
+                raise TypeError("TypeError", "Make sure MSI level \""+str(level)+"\" is a list of Tags or lists of Tags")
+            for tag in rule:
+                if tag not in tagNameList:
+                    tagNameList.append(tag)
+    return tagNameList
+
+
+#####################################################################################
+## Function: getTagMatrix()
+#####################################################################################
+'''
+This function gets a boolean matrix of the Tags of each peak, with one column for each Tag.
+The Tag columns added by updateExcelFile() are used, and if a Tag doesn't have a column, 
+it is decoded from the Tags column of the peak table.
+
+INPUT:
+'peakTable' = The peak table as a dataframe.
+'tagNameList' = A list of Tag names.
+'sourceName' = The name of the peak table used in messages.
+
+OUTPUT:
+'tagMatrix' = A boolean array with one row for each peak and one column for each Tag in 'tagNameList'.
+'''
+
+def getTagMatrix(peakTable, tagNameList, sourceName):
+    tagMatrix = np.zeros((len(peakTable.index), len(tagNameList)), dtype=bool)
+    dummyTable = None
+    for i, tag in enumerate(tagNameList):
+        if tag in peakTable.columns:
+            # Tag columns read from Excel are boolean, binary, or "True"/"False" strings
+            if pd.api.types.is_string_dtype(peakTable.dtypes[tag]):
+                tagMatrix[:, i] = peakTable[tag].astype(str).str.strip().str.upper().isin(["TRUE", "1"]).to_numpy()
+            else:
+                tagMatrix[:, i] = getBoolArray(peakTable[tag])
+
+        elif "Tags" in peakTable.columns and pd.api.types.is_string_dtype(peakTable.dtypes["Tags"]):
+            # Split the Tags column into one column for each Tag once, e.g. "goodRT; mzVault"
+            if dummyTable is None:
+                dummyTable = peakTable["Tags"].fillna("").astype(str).str.replace(r"\s*;\s*", ";", regex=True).str.strip().str.get_dummies(sep=";")
+            if tag in dummyTable.columns:
+                tagMatrix[:, i] = dummyTable[tag].to_numpy().astype(bool)
+
+        else:
+            raise ValueError("ValueError", "Tag \""+tag+"\" can't be found in the columns or the Tags column of "+sourceName)
+
+    return tagMatrix
+
+
+#####################################################################################
+## Function: msiFrames()
+#####################################################################################
+'''
+This function adds an MSI column to a peak table with the MSI level of each peak, based on the Tags of the peak.
+The MSI levels are checked in the order of 'msiLevelDict', and each peak gets the first level it matches.
+Each level is a boolean mask over the Tag matrix of the peak table, so the levels of every peak are set at once.
+
+INPUT:
+'peakTable' = The peak table as a dataframe, e.g. with the Tag columns added by updateExcelFile().
+'msiLevelDict' = A dictionary of MSI levels (default is None), if this value is left as None, defaultMSILevelDict is used.
+    The keys are the MSI levels, and the values are lists of Tags. A peak matches a level if it has any of the Tags in the list,
+    and a list of Tags in the list only matches if the peak has all of them, e.g. {"0": [["goodRT", "mzVault"]], "1": ["goodRT", "mzVault"]}.
+'msiColName' = The name of the MSI column (default is "MSI").
+'checkUnassigned' = Boolean value, default is True. If True, the Checked column is set to True for the peaks that don't match any MSI level.
+'verbose' = Boolean value that controls the output to the console.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'peakTable' = A copy of the peak table with the MSI column.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def msiFrames(peakTable, msiLevelDict = None, msiColName = "MSI", checkUnassigned = True, verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("msiFrames")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        if not isinstance(peakTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'peakTable' is a pandas DataFrame")
+        if msiLevelDict is None:
+            msiLevelDict = defaultMSILevelDict
+        tagNameList = validateMSILevelDict(msiLevelDict)
+        if type(msiColName) != str or msiColName == "":
+            raise TypeError("TypeError", "Make sure 'msiColName' is a string value")
+        if type(checkUnassigned) != bool:
+            raise TypeError("TypeError", "Make sure 'checkUnassigned' is a boolean value")
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+        timer.phase("Decode tags")
+        tagMatrix = getTagMatrix(peakTable, tagNameList, "the peak table")
+        timer.count(rows = tagMatrix.shape[0], cells = tagMatrix.size)
+
+        # One mask for each MSI level, np.select() gives each peak the first level it matches
+        timer.phase("Assign MSI levels")
+        maskList = []
+        levelList = []
+        for level, ruleList in msiLevelDict.items():
+            mask = np.zeros(len(peakTable.index), dtype=bool)
+            for rule in ruleList:
+                if type(rule) == str:
+                    rule = [rule]
+                mask |= tagMatrix[:, [tagNameList.index(tag) for tag in rule]].all(axis=1)
+            maskList.append(mask)
+            levelList.append(str(level))
+        msiArray = np.select(maskList, levelList, default="")
+        timer.count(rows = len(msiArray))
+
+        peakTable = peakTable.copy()
+        peakTable[msiColName] = msiArray
+        unassignedArray = msiArray == ""
+        if checkUnassigned:
+            if "Checked" in peakTable.columns:
+                peakTable["Checked"] = getBoolArray(peakTable["Checked"]) | unassignedArray
+            else:
+                peakTable["Checked"] = unassignedArray
+
+        report = []
+        for level in dict.fromkeys(levelList):
+            report.append(str(int((msiArray == level).sum()))+" of "+str(len(msiArray))+" peaks are MSI level "+level)
+        report.append(str(int(unassignedArray.sum()))+" of "+str(len(msiArray))+" peaks don't match an MSI level")
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        return peakTable, report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: assignMSI()
+#####################################################################################
+'''
+This function adds an MSI column to the Peak sheet of an Excel file, see msiFrames().
+The MSI column can also be added by updateExcelFile() with 'msiLevelDict', so the Excel file is only saved once.
+
+INPUT:
+'excelFilePath' = The path to an Excel file, e.g. an Excel file updated by updateExcelFile().
+'peakSheetName' = The name of the Peak sheet (default is "Peak").
+'msiLevelDict' = A dictionary of MSI levels, see msiFrames() (default is None).
+'newPeakSheetName' = The name of the sheet to save the Peak table in (default is ""),
+    if this value is left as "", the Peak sheet is updated.
+'checkUnassigned' = Boolean value, see msiFrames() (default is True).
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def assignMSI(excelFilePath, peakSheetName = "Peak", msiLevelDict = None, newPeakSheetName = "", checkUnassigned = True, verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("assignMSI")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+        if type(peakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
+        if type(newPeakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'newPeakSheetName' is a string value")
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+        if newPeakSheetName == "":
+            newPeakSheetName = peakSheetName
+
+        timer.phase("Read Excel file")
+        try:
+            if verbose:
+                print("Importing "+excelFilePath)
+            peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)
+            timer.count(rows = len(peakTable.index), cells = peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If the Excel file doesn't have the correct sheet
+        except ValueError:
+            raise ValueError("ValueError", "Can't find "+peakSheetName+" in "+excelFilePath)
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        peakTable, report = msiFrames(peakTable, msiLevelDict, "MSI", checkUnassigned, False, timer)
+
+        # Put the MSI column after the Notes column, like the notebook did
+        leftCols = [col for col in ["Idx", "compoundID", "UID", "Name", "Notes", "MSI"] if col in peakTable.columns]
+        peakTable = peakTable[leftCols + [c for c in peakTable if c not in leftCols]]
+
+        timer.phase("Save Excel file")
+        try:
+            if verbose:
+                print("Saving changes to sheet \""+newPeakSheetName+"\"")
+            with pd.ExcelWriter(
+                excelFilePath,
+                mode="a",
+                engine="openpyxl",
+                if_sheet_exists="replace",
+            ) as writer:
+                peakTable.to_excel(writer, sheet_name=newPeakSheetName, index=False)
+            timer.count(rows = len(peakTable.index), cells = peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+        report.append("MSI levels saved to sheet \""+newPeakSheetName+"\" of "+excelFilePath)
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: getFeatureGroups()
+#####################################################################################
+'''
+This function groups features whose molecular weight and retention time are within a tolerance of each other.
+The features are sorted by molecular weight, and np.searchsorted() finds the end of the molecular weight window of each feature.
+The features in each window are compared to it one offset at a time, so each comparison is a vectorized pass over all the features.
+Features are in the same group if they are linked by a chain of matching pairs, the groups are found by propagating the smallest
+position in each group along the pairs.
+
+INPUT:
+'mwArray' = A float array of the molecular weights.
+'rtArray' = A float array of the retention times.
+'mwTolerance' = The molecular weight tolerance in ppm.
+'rtTolerance' = The retention time tolerance in minutes.
+
+OUTPUT:
+'groupArray' = An integer array with the group of each feature, numbered from 1 in order of molecular weight.
+'''
+
+def getFeatureGroups(mwArray, rtArray, mwTolerance, rtTolerance):
+    featureCount = len(mwArray)
+    if featureCount == 0:
+        return np.zeros(0, dtype=int)
+    order = np.argsort(mwArray, kind="stable")
+    mwArray = mwArray[order]
+    rtArray = rtArray[order]
+
+    # The end of the molecular weight window of each feature, the windows of the other features only overlap it if they are in it
+    windowEnd = np.searchsorted(mwArray, mwArray * (1 + mwTolerance * 1e-6), side="right")
+    maxOffset = int((windowEnd - np.arange(featureCount)).max()) - 1
+
+    # Find the pairs of features that match, one offset in the sorted order at a time
+    leftList = []
+    rightList = []
+    for offset in range(1, maxOffset + 1):
+        left = np.arange(featureCount - offset)
+        right = left + offset
+        match = (right < windowEnd[left]) & (np.abs(rtArray[right] - rtArray[left]) <= rtTolerance)
+        leftList.append(left[match])
+        rightList.append(right[match])
+
+    # Each feature starts in its own group, and takes the smallest label of the features it matches until nothing changes
+    labelArray = np.arange(featureCount)
+    if leftList != []:
+        left = np.concatenate(leftList)
+        right = np.concatenate(rightList)
+        while len(left) > 0:
+            newLabelArray = labelArray.copy()
+            np.minimum.at(newLabelArray, right, labelArray[left])
+            np.minimum.at(newLabelArray, left, labelArray[right])
+            newLabelArray = newLabelArray[newLabelArray]
+            if np.array_equal(newLabelArray, labelArray):
+                break
+            labelArray = newLabelArray
+
+    groupArray = np.empty(featureCount, dtype=int)
+    groupArray[order] = np.unique(labelArray, return_inverse=True)[1] + 1
+    return groupArray
+
+
+#####################################################################################
+## Function: createGroupTables()
+#####################################################################################
+'''
+This function groups the features of a table by molecular weight and retention time, see getFeatureGroups(),
+and chooses a representative of each group. It is used by groupFrames() and groupCDFeatures().
+
+INPUT:
+'featureTable' = A dataframe of the features.
+'mwName' = The name of the molecular weight column.
+'rtName' = The name of the retention time column.
+'idName' = The name of the column used to list the features of each group, or None to use the row numbers.
+'mwTolerance' = The molecular weight tolerance in ppm.
+'rtTolerance' = The retention time tolerance in minutes.
+'representativeCol' = The name of the column used to choose the representative of each group, or None to use the first feature of each group.
+'representativeMax' = Boolean value, if True the feature with the largest value of 'representativeCol' is the representative,
+    otherwise the feature with the smallest value.
+'sourceName' = The name of the table used in messages.
+
+OUTPUT:
+'featureTable' = A copy of the feature table with the groupID, groupSize, and groupRepresentative columns.
+'groupTable' = A dataframe with one row for each group of more than one feature.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def createGroupTables(featureTable, mwName, rtName, idName, mwTolerance, rtTolerance, representativeCol, representativeMax, sourceName):
+    mwArray = pd.to_numeric(featureTable[mwName], errors="coerce").to_numpy(dtype=float)
+    rtArray = pd.to_numeric(featureTable[rtName], errors="coerce").to_numpy(dtype=float)
+    if np.isnan(mwArray).any() or np.isnan(rtArray).any():
+        raise ValueError("ValueError", "At least one of the cells in the "+mwName+" or "+rtName+" columns of "+sourceName+" are empty")
+
+    groupArray = getFeatureGroups(mwArray, rtArray, mwTolerance, rtTolerance)
+    sizeArray = np.bincount(groupArray)[groupArray]
+
+    # Sort the features of each group so the representative is first, then keep the first feature of each group
+    positionArray = np.arange(len(groupArray))
+    if representativeCol is None:
+        sortTable = pd.DataFrame({"group": groupArray, "position": positionArray})
+        sortTable = sortTable.sort_values(["group", "position"])
+    else:
+        scoreArray = pd.to_numeric(featureTable[representativeCol], errors="coerce").to_numpy(dtype=float)
+        if representativeMax:
+            scoreArray = -scoreArray
+        sortTable = pd.DataFrame({"group": groupArray, "score": scoreArray, "position": positionArray})
+        sortTable = sortTable.sort_values(["group", "score", "position"], na_position="last")
+    representativeArray = np.zeros(len(groupArray), dtype=bool)
+    representativeArray[sortTable.drop_duplicates("group")["position"].to_numpy()] = True
+
+    featureTable = featureTable.copy()
+    featureTable["groupID"] = groupArray
+    featureTable["groupSize"] = sizeArray
+    featureTable["groupRepresentative"] = representativeArray
+
+    # Summarize the groups of more than one feature, the representative is listed first
+    if idName is None:
+        idArray = positionArray
+    else:
+        idArray = featureTable[idName].to_numpy()
+    memberTable = pd.DataFrame({"groupID": groupArray, "id": idArray, "mw": mwArray, "rt": rtArray, "representative": representativeArray})
+    memberTable = memberTable.iloc[sortTable["position"].to_numpy()]
+    memberTable = memberTable[sizeArray[memberTable.index] > 1]
+    groupTable = memberTable.groupby("groupID", sort=True).agg(
+        groupSize=("id", "size"),
+        representative=("id", "first"),
+        members=("id", lambda idSeries: "; ".join([str(i) for i in idSeries])),
+        minMW=("mw", "min"),
+        maxMW=("mw", "max"),
+        minRT=("rt", "min"),
+        maxRT=("rt", "max"),
+    ).reset_index()
+    groupTable["rangeMWppm"] = (groupTable["maxMW"] - groupTable["minMW"]) / groupTable["minMW"] * 1e6
+    groupTable["rangeRT"] = groupTable["maxRT"] - groupTable["minRT"]
+
+    report = []
+    groupedCount = int(groupTable["groupSize"].sum()) if len(groupTable.index) > 0 else 0
+    report.append(str(groupedCount)+" of "+str(len(groupArray))+" features of "+sourceName+" are in "+str(len(groupTable.index))+" groups of more than one feature (within "+str(mwTolerance)+" ppm and "+str(rtTolerance)+" minutes)")
+    if len(groupTable.index) > 0:
+        report.append("The largest group has "+str(int(groupTable["groupSize"].max()))+" features")
+
+    return featureTable, groupTable, report
+
+
+#####################################################################################
+## Function: validateGroupInput()
+#####################################################################################
+'''
+This function makes sure the user input for grouping features is valid.
+
+INPUT:
+'mwTolerance' = The molecular weight tolerance in ppm.
+'rtTolerance' = The retention time tolerance in minutes.
+'representativeCol' = The name of the column used to choose the representative of each group, or None.
+'representativeMax' = Boolean value, see createGroupTables().
+'verbose' = Boolean value that controls the output to the console.
+'''
+
+def validateGroupInput(mwTolerance, rtTolerance, representativeCol, representativeMax, verbose):
+    if type(mwTolerance) not in [int, float] or mwTolerance < 0:
+        raise TypeError("TypeError", "Make sure 'mwTolerance' is a positive numeric value")
+    if type(rtTolerance) not in [int, float] or rtTolerance < 0:
+        raise TypeError("TypeError", "Make sure 'rtTolerance' is a positive numeric value")
+    if representativeCol is not None and type(representativeCol) != str:
+        raise TypeError("TypeError", "Make sure 'representativeCol' is a string value")
+    if type(representativeMax) != bool:
+        raise TypeError("TypeError", "Make sure 'representativeMax' is a boolean value")
+    if type(verbose) != bool:
+        raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+
+#####################################################################################
+## Function: groupFrames()
+#####################################################################################
+'''
+This function groups the peaks of a peak table whose molecular weight and retention time are within a tolerance of each other,
+so peaks that may be the same feature can be seen and resolved at once. See getFeatureGroups().
+The groupID, groupSize, and groupRepresentative columns are added to the peak table. Every peak has a groupID,
+peaks that aren't close to any other peak are in a group of their own.
+
+INPUT:
+'peakTable' = The peak table as a dataframe, with an MW and an RT column.
+'mwTolerance' = The molecular weight tolerance in ppm (default is 5.0).
+'rtTolerance' = The retention time tolerance in minutes (default is 0.1).
+'representativeCol' = The name of the column used to choose the representative of each group, e.g. "mzCloudMatch" (default is None).
+    If this value is None, the first peak of each group in the peak table is the representative.
+'representativeMax' = Boolean value, default is True. If True, the peak with the largest value of 'representativeCol' is the representative,
+    otherwise the peak with the smallest value, e.g. for "qcRSD".
+'verbose' = Boolean value that controls the output to the console.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'peakTable' = A copy of the peak table with the group columns.
+'groupTable' = A dataframe with one row for each group of more than one peak, with the UIDs of its peaks and the ranges of their MW and RT.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def groupFrames(peakTable, mwTolerance = 5.0, rtTolerance = 0.1, representativeCol = None, representativeMax = True, verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("groupFrames")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        if not isinstance(peakTable, pd.DataFrame):
+            raise TypeError("TypeError", "Make sure 'peakTable' is a pandas DataFrame")
+        validateGroupInput(mwTolerance, rtTolerance, representativeCol, representativeMax, verbose)
+        mwName, rtName = getMWRTColumnNames(peakTable, "the peak table")
+        if representativeCol is not None and representativeCol not in peakTable.columns:
+            raise ValueError("ValueError", "Column \""+representativeCol+"\" can't be found in the peak table")
+
+        # The peaks are listed by UID, or by compoundID if there isn't a UID column
+        idName = None
+        for col in ["UID", "compoundID"]:
+            if col in peakTable.columns:
+                idName = col
+                break
+
+        timer.phase("Group features")
+        peakTable, groupTable, report = createGroupTables(peakTable.reset_index(drop=True), mwName, rtName, idName, mwTolerance, rtTolerance, representativeCol, representativeMax, "the peak table")
+        timer.count(rows = len(peakTable.index))
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        return peakTable, groupTable, report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: groupFeatures()
+#####################################################################################
+'''
+This function groups the peaks of the Peak sheet of an Excel file by molecular weight and retention time, see groupFrames().
+The group columns are saved to the Peak sheet, and the groups of more than one peak are saved to a new sheet.
+
+INPUT:
+'excelFilePath' = The path to an Excel file.
+'peakSheetName' = The name of the Peak sheet (default is "Peak").
+'mwTolerance' = The molecular weight tolerance in ppm (default is 5.0).
+'rtTolerance' = The retention time tolerance in minutes (default is 0.1).
+'representativeCol' = The name of the column used to choose the representative of each group, see groupFrames() (default is None).
+'representativeMax' = Boolean value, see groupFrames() (default is True).
+'newPeakSheetName' = The name of the sheet to save the Peak table in (default is ""),
+    if this value is left as "", the Peak sheet is updated.
+'groupSheetName' = The name of the sheet to save the groups in (default is "Groups").
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def groupFeatures(excelFilePath, peakSheetName = "Peak", mwTolerance = 5.0, rtTolerance = 0.1, representativeCol = None, representativeMax = True, newPeakSheetName = "", groupSheetName = "Groups", verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("groupFeatures")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+        if type(peakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
+        if type(newPeakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'newPeakSheetName' is a string value")
+        if type(groupSheetName) != str or groupSheetName == "":
+            raise TypeError("TypeError", "Make sure 'groupSheetName' is a string value")
+        validateGroupInput(mwTolerance, rtTolerance, representativeCol, representativeMax, verbose)
+        if newPeakSheetName == "":
+            newPeakSheetName = peakSheetName
+
+        timer.phase("Read Excel file")
+        try:
+            if verbose:
+                print("Importing "+excelFilePath)
+            peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)
+            timer.count(rows = len(peakTable.index), cells = peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If the Excel file doesn't have the correct sheet
+        except ValueError:
+            raise ValueError("ValueError", "Can't find "+peakSheetName+" in "+excelFilePath)
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        peakTable, groupTable, report = groupFrames(peakTable, mwTolerance, rtTolerance, representativeCol, representativeMax, False, timer)
+
+        timer.phase("Save Excel file")
+        try:
+            if verbose:
+                print("Saving changes to sheets \""+newPeakSheetName+"\" and \""+groupSheetName+"\"")
+            with pd.ExcelWriter(
+                excelFilePath,
+                mode="a",
+                engine="openpyxl",
+                if_sheet_exists="replace",
+            ) as writer:
+                peakTable.to_excel(writer, sheet_name=newPeakSheetName, index=False)
+                groupTable.to_excel(writer, sheet_name=groupSheetName, index=False)
+            timer.count(rows = len(peakTable.index) + len(groupTable.index), cells = peakTable.size + groupTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+        report.append("Groups saved to sheets \""+newPeakSheetName+"\" and \""+groupSheetName+"\" of "+excelFilePath)
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: groupCDFeatures()
+#####################################################################################
+'''
+This function groups the compounds of a Compound Discoverer (CD) results file whose molecular weight and retention time 
+are within a tolerance of each other, see getFeatureGroups(). Only the ID, MolecularWeight, and RetentionTime columns 
+(and 'representativeCol') are read, with a read-only connection.
+These are the compounds that createCompoundIDColumns() can't match to a single peak.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'mwTolerance' = The molecular weight tolerance in ppm (default is 5.0).
+'rtTolerance' = The retention time tolerance in minutes (default is 0.1).
+'representativeCol' = The display name of the CD column used to choose the representative of each group, e.g. "mzCloud Best Match" (default is None).
+    If this value is None, the compound with the smallest ID in each group is the representative.
+'representativeMax' = Boolean value, see groupFrames() (default is True).
+'verbose' = Boolean value that controls the output to the console.
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up (default is 5.0).
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'compTable' = A dataframe of the compounds, with the ID, MolecularWeight, RetentionTime, and group columns.
+'groupTable' = A dataframe with one row for each group of more than one compound, with the IDs of its compounds and the ranges of their MW and RT.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def groupCDFeatures(cdResultsFilePath, mwTolerance = 5.0, rtTolerance = 0.1, representativeCol = None, representativeMax = True, verbose = True, busyTimeout = 5.0, timer = None):
+    conn = None
+    cursor = None
+
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("groupCDFeatures")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        if type(cdResultsFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
+        validateGroupInput(mwTolerance, rtTolerance, representativeCol, representativeMax, verbose)
+        if os.path.exists(cdResultsFilePath) == False:
+            raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
+
+        timer.phase("Open CD results file")
+        if verbose:
+            print("Connecting to "+cdResultsFilePath)
+        conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True, busyTimeout = busyTimeout)
+        cursor = conn.cursor()
+        validateCDResultsFile(cursor, cdResultsFilePath)
+
+        timer.phase("Read compound table")
+        colDBNameList = ["ID", "MolecularWeight", "RetentionTime"]
+        if representativeCol is not None:
+            colTuple = getCompoundColumns(cdResultsFilePath, cursor, [representativeCol])[0]
+            if colTuple[2] == "Binary":
+                raise ValueError("ValueError", "Column \""+representativeCol+"\" is stored as bytes and can't be used to choose the representatives")
+            colDBNameList.append(colTuple[0])
+        cursor.execute("SELECT "+", ".join(colDBNameList)+" FROM ConsolidatedUnknownCompoundItems ORDER BY ID;")
+        compTable = pd.DataFrame(cursor.fetchall(), columns = colDBNameList)
+        timer.count(rows = len(compTable.index), cells = compTable.size)
+        cursor.close()
+        conn.close()
+
+        timer.phase("Group features")
+        if representativeCol is not None:
+            representativeCol = colDBNameList[-1]
+        compTable, groupTable, report = createGroupTables(compTable, "MolecularWeight", "RetentionTime", "ID", mwTolerance, rtTolerance, representativeCol, representativeMax, cdResultsFilePath)
+        timer.count(rows = len(compTable.index))
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        return compTable, groupTable, report
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        timer.abort()
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+        if verbose:
+            print("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+        else:
+            raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: getCandidatePairs()
+#####################################################################################
+'''
+This function finds the pairs of features of two tables whose molecular weight and retention time are within a tolerance.
+The features of the second table are sorted by molecular weight, and np.searchsorted() finds the window of each feature 
+of the first table, so each feature is only compared to the few features in its window, one offset at a time.
+
+INPUT:
+'mwArrayA' = A float array of the molecular weights of the first table.
+'rtArrayA' = A float array of the retention times of the first table.
+'mwArrayB' = A float array of the molecular weights of the second table.
+'rtArrayB' = A float array of the retention times of the second table.
+'mwTolerance' = The molecular weight tolerance in ppm.
+'rtTolerance' = The retention time tolerance in minutes.
+
+OUTPUT:
+'pairA' = An array of the positions of the paired features in the first table.
+'pairB' = An array of the positions of the paired features in the second table.
+'''
+
+def getCandidatePairs(mwArrayA, rtArrayA, mwArrayB, rtArrayB, mwTolerance, rtTolerance):
+    order = np.argsort(mwArrayB, kind="stable")
+    sortedMWArrayB = mwArrayB[order]
+    windowStart = np.searchsorted(sortedMWArrayB, mwArrayA * (1 - mwTolerance * 1e-6), side="left")
+    windowEnd = np.searchsorted(sortedMWArrayB, mwArrayA * (1 + mwTolerance * 1e-6), side="right")
+    maxWidth = int((windowEnd - windowStart).max()) if len(mwArrayA) > 0 else 0
+
+    pairListA = []
+    pairListB = []
+    positionArrayA = np.arange(len(mwArrayA))
+    for offset in range(maxWidth):
+        sortedPositionB = windowStart + offset
+        inWindow = sortedPositionB < windowEnd
+        positionA = positionArrayA[inWindow]
+        positionB = order[sortedPositionB[inWindow]]
+        match = np.abs(rtArrayB[positionB] - rtArrayA[positionA]) <= rtTolerance
+        pairListA.append(positionA[match])
+        pairListB.append(positionB[match])
+
+    if pairListA == []:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    return np.concatenate(pairListA), np.concatenate(pairListB)
+
+
+#####################################################################################
+## Function: getRTDriftModel()
+#####################################################################################
+'''
+This function models the retention time drift of a table of features against a reference table.
+The anchors are the features that have exactly one match in the reference table within 'mwTolerance' and 'driftWindow',
+and whose match has no other match. The anchors are split into bins of retention time, and the drift is the median 
+difference in retention time of each bin, interpolated between the bins.
+
+INPUT:
+'mwArray' = A float array of the molecular weights.
+'rtArray' = A float array of the retention times.
+'refMWArray' = A float array of the molecular weights of the reference table.
+'refRTArray' = A float array of the retention times of the reference table.
+'mwTolerance' = The molecular weight tolerance in ppm.
+'driftWindow' = The largest retention time drift in minutes.
+'driftBins' = The number of retention time bins.
+'minAnchors' = The smallest number of anchors needed to model the drift.
+
+OUTPUT:
+'driftArray' = A float array of the drift of each feature, subtract it from 'rtArray' to correct the drift,
+    or None if there weren't enough anchors.
+'anchorCount' = The number of anchors.
+'''
+
+def getRTDriftModel(mwArray, rtArray, refMWArray, refRTArray, mwTolerance, driftWindow, driftBins, minAnchors):
+    pairA, pairB = getCandidatePairs(mwArray, rtArray, refMWArray, refRTArray, mwTolerance, driftWindow)
+    unique = (np.bincount(pairA, minlength=len(mwArray))[pairA] == 1) & (np.bincount(pairB, minlength=len(refMWArray))[pairB] == 1)
+    pairA = pairA[unique]
+    pairB = pairB[unique]
+    if len(pairA) < minAnchors:
+        return None, len(pairA)
+
+    # The median drift of each bin of anchors, the bins have the same number of anchors
+    anchorRTArray = rtArray[pairA]
+    anchorDriftArray = rtArray[pairA] - refRTArray[pairB]
+    order = np.argsort(anchorRTArray, kind="stable")
+    binList = np.array_split(order, min(driftBins, len(order)))
+    binRTArray = np.array([np.median(anchorRTArray[b]) for b in binList])
+    binDriftArray = np.array([np.median(anchorDriftArray[b]) for b in binList])
+
+    return np.interp(rtArray, binRTArray, binDriftArray), len(pairA)
+
+
+#####################################################################################
+## Function: getMinCostAssignment()
+#####################################################################################
+'''
+This function finds the assignment of the rows of a cost matrix to its columns with the lowest total cost (the Hungarian algorithm
+with potentials). Each row is assigned to at most one column and each column to at most one row, and as many rows or columns as
+possible are assigned. It is only used for the small matrices of alignFrames(), so it doesn't need SciPy.
+
+INPUT:
+'costMatrix' = A float array with one row for each item of the first list and one column for each item of the second list.
+
+OUTPUT:
+'rowArray' = An array of the positions of the assigned rows.
+'colArray' = An array of the positions of the columns they are assigned to.
+'''
+
+def getMinCostAssignment(costMatrix):
+    transposed = costMatrix.shape[0] > costMatrix.shape[1]
+    if transposed:
+        costMatrix = costMatrix.T
+    rowCount, colCount = costMatrix.shape
+    u = np.zeros(rowCount + 1)
+    v = np.zeros(colCount + 1)
+    match = np.zeros(colCount + 1, dtype=int)
+    way = np.zeros(colCount + 1, dtype=int)
+
+    # Add the rows one at a time, following the shortest augmenting path of reduced costs
+    for row in range(1, rowCount + 1):
+        match[0] = row
+        col0 = 0
+        minArray = np.full(colCount + 1, np.inf)
+        used = np.zeros(colCount + 1, dtype=bool)
+        while True:
+            used[col0] = True
+            reduced = costMatrix[match[col0] - 1] - u[match[col0]] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < minArray[1:])
+            minArray[1:][better] = reduced[better]
+            way[1:][better] = col0
+            candidates = np.where(free, minArray[1:], np.inf)
+            col1 = int(np.argmin(candidates)) + 1
+            delta = candidates[col1 - 1]
+            u[match[used]] += delta
+            v[used] -= delta
+            minArray[1:][free] -= delta
+            col0 = col1
+            if match[col0] == 0:
+                break
+        while col0 != 0:
+            col1 = way[col0]
+            match[col0] = match[col1]
+            col0 = col1
+
+    colArray = np.nonzero(match[1:])[0]
+    rowArray = match[1:][colArray] - 1
+    if transposed:
+        return colArray, rowArray
+    return rowArray, colArray
+
+
+#####################################################################################
+## Function: getAlignmentRows()
+#####################################################################################
+'''
+This function splits a group of features found by getFeatureGroups() into aligned rows. The features of the reference table start the rows,
+then the features of each other table are assigned to the rows by nearest neighbour with getMinCostAssignment(), so as many features 
+as possible are aligned and the total distance is the smallest. A feature can only join a row if it is within the tolerances of every feature 
+in the row and the row doesn't have a feature of its table yet, otherwise it starts a new row.
+
+INPUT:
+'fileArray' = An array of the table of each feature of the group.
+'mwArray' = A float array of the molecular weights of the features.
+'rtArray' = A float array of the retention times of the features, after the drift is corrected.
+'mwTolerance' = The molecular weight tolerance in ppm.
+'rtTolerance' = The retention time tolerance in minutes.
+'referenceIndex' = The position of the reference table.
+
+OUTPUT:
+'rowArray' = An array of the row of each feature, numbered from 0.
+'''
+
+def getAlignmentRows(fileArray, mwArray, rtArray, mwTolerance, rtTolerance, referenceIndex):
+    rowArray = np.full(len(fileArray), -1)
+    memberList = []
+
+    # The reference table goes first, then the other tables in order
+    fileList = sorted(set(fileArray.tolist()), key=lambda file: (file != referenceIndex, file))
+    for file in fileList:
+        positionArray = np.nonzero(fileArray == file)[0]
+        if memberList != []:
+            # The cost is the distance to the middle of the row, the features outside the tolerances of a row can't join it
+            costMatrix = np.empty((len(memberList), len(positionArray)))
+            allowed = np.empty(costMatrix.shape, dtype=bool)
+            for i, memberArray in enumerate(memberList):
+                mwDiff = np.abs(mwArray[positionArray][:, None] - mwArray[memberArray][None, :])
+                mwLimit = np.minimum(mwArray[positionArray][:, None], mwArray[memberArray][None, :]) * mwTolerance * 1e-6
+                rtDiff = np.abs(rtArray[positionArray][:, None] - rtArray[memberArray][None, :])
+                allowed[i] = ((mwDiff <= mwLimit) & (rtDiff <= rtTolerance)).all(axis=1)
+                rowMW = mwArray[memberArray].mean()
+                costMatrix[i] = (np.abs(mwArray[positionArray] - rowMW) / (rowMW * mwTolerance * 1e-6 + 1e-12)
+                                 + np.abs(rtArray[positionArray] - rtArray[memberArray].mean()) / (rtTolerance + 1e-12))
+
+            # Every allowed pair costs less than any pair that isn't allowed, so the most features are aligned
+            blockedCost = 4.0 * (min(costMatrix.shape) + 1)
+            costMatrix = np.where(allowed, np.minimum(costMatrix, 4.0), blockedCost)
+            assignedRows, assignedCols = getMinCostAssignment(costMatrix)
+            keep = allowed[assignedRows, assignedCols]
+            for row, col in zip(assignedRows[keep], assignedCols[keep]):
+                rowArray[positionArray[col]] = row
+                memberList[row] = np.append(memberList[row], positionArray[col])
+
+        # The features that weren't aligned start new rows
+        for position in positionArray:
+            if rowArray[position] == -1:
+                rowArray[position] = len(memberList)
+                memberList.append(np.array([position]))
+
+    return rowArray
+
+
+#####################################################################################
+## Function: getAlignmentLabels()
+#####################################################################################
+'''
+This function gets a label for each file of an alignment from the file names, e.g. "batch1" for "./data/batch1.cdResult".
+The ID and RT columns of each file in the alignment table are named after these labels, e.g. "ID_batch1".
+
+INPUT:
+'filePathList' = A list of file paths.
+
+OUTPUT:
+'labelList' = A list of unique labels, in the order of 'filePathList'.
+'''
+
+def getAlignmentLabels(filePathList):
+    labelList = []
+    for filePath in filePathList:
+        label = os.path.splitext(os.path.basename(filePath))[0]
+        newLabel = label
+        count = 1
+        while newLabel in labelList:
+            count = count + 1
+            newLabel = label+"_"+str(count)
+        labelList.append(newLabel)
+    return labelList
+
+
+#####################################################################################
+## Function: alignFrames()
+#####################################################################################
+'''
+This function aligns the features of several tables, e.g. the compound tables of CD results files, by molecular weight 
+and retention time, and gives each aligned feature a shared alignID. 
+If 'correctDrift' is True, the retention times of each table are first corrected to those of the reference table, see getRTDriftModel().
+The features of all the tables are then grouped with getFeatureGroups(). A group with at most one feature of each table, whose features
+are all within the tolerances of each other, is aligned in one row. The other groups are split into rows by nearest neighbour with
+getAlignmentRows(), so the features in a row are always within the tolerances of each other.
+The features are sorted by molecular weight, and only the groups that need it are split one at a time, so the alignment takes close to linear time.
+
+INPUT:
+'featureTableList' = A list of dataframes with the columns ID, MolecularWeight, and RetentionTime.
+'labelList' = A list of the labels of the tables, see getAlignmentLabels().
+'mwTolerance' = The molecular weight tolerance in ppm (default is 5.0).
+'rtTolerance' = The retention time tolerance in minutes, after the drift is corrected (default is 0.1).
+'correctDrift' = Boolean value, default is False. If True, the retention time drift of each table is corrected before aligning.
+'referenceIndex' = The position of the reference table in 'featureTableList' (default is 0).
+'driftWindow' = The largest retention time drift in minutes (default is 1.0).
+'driftBins' = The number of retention time bins of the drift model (default is 10).
+'minAnchors' = The smallest number of anchors needed to correct the drift of a table (default is 20).
+'verbose' = Boolean value that controls the output to the console.
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'alignTable' = A dataframe with one row for each aligned feature. The columns are alignID, MW, RT (in the time of the reference table), 
+    fileCount, and an ID_<label> and RT_<label> column for each table.
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def alignFrames(featureTableList, labelList, mwTolerance = 5.0, rtTolerance = 0.1, correctDrift = False, referenceIndex = 0, driftWindow = 1.0, driftBins = 10, minAnchors = 20, verbose = True, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("alignFrames")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        if type(featureTableList) != list or len(featureTableList) < 2 or not all(isinstance(table, pd.DataFrame) for table in featureTableList):
+            raise TypeError("TypeError", "Make sure 'featureTableList' is a list of at least two pandas DataFrames")
+        if type(labelList) != list or len(labelList) != len(featureTableList) or len(set(labelList)) != len(labelList):
+            raise TypeError("TypeError", "Make sure 'labelList' is a list of unique labels, one for each table")
+        for table, label in zip(featureTableList, labelList):
+            for col in ["ID", "MolecularWeight", "RetentionTime"]:
+                if col not in table.columns:
+                    raise ValueError("ValueError", "Column \""+col+"\" can't be found in the table of "+str(label))
+        validateGroupInput(mwTolerance, rtTolerance, None, True, verbose)
+        if type(correctDrift) != bool:
+            raise TypeError("TypeError", "Make sure 'correctDrift' is a boolean value")
+        if type(referenceIndex) != int or referenceIndex < 0 or referenceIndex >= len(featureTableList):
+            raise ValueError("ValueError", "Make sure 'referenceIndex' is the position of one of the tables")
+        if type(driftWindow) not in [int, float] or driftWindow <= 0:
+            raise TypeError("TypeError", "Make sure 'driftWindow' is a positive numeric value")
+        if type(driftBins) != int or driftBins < 1 or type(minAnchors) != int or minAnchors < 2:
+            raise TypeError("TypeError", "Make sure 'driftBins' is a positive integer value and 'minAnchors' is an integer value of at least 2")
+
+        report = []
+        mwArrayList = []
+        rtArrayList = []
+        for table in featureTableList:
+            mwArrayList.append(pd.to_numeric(table["MolecularWeight"], errors="coerce").to_numpy(dtype=float))
+            rtArrayList.append(pd.to_numeric(table["RetentionTime"], errors="coerce").to_numpy(dtype=float))
+        for mwArray, rtArray, label in zip(mwArrayList, rtArrayList, labelList):
+            if np.isnan(mwArray).any() or np.isnan(rtArray).any():
+                raise ValueError("ValueError", "At least one of the molecular weights or retention times of "+str(label)+" is empty")
+
+        # Correct the retention times of each table to the time of the reference table
+        correctedRTArrayList = list(rtArrayList)
+        if correctDrift:
+            timer.phase("Model RT drift")
+            refMWArray = mwArrayList[referenceIndex]
+            refRTArray = rtArrayList[referenceIndex]
+            for i in range(len(featureTableList)):
+                if i == referenceIndex:
+                    continue
+                driftArray, anchorCount = getRTDriftModel(mwArrayList[i], rtArrayList[i], refMWArray, refRTArray, mwTolerance, driftWindow, driftBins, minAnchors)
+                timer.count(rows = len(mwArrayList[i]))
+                if driftArray is None:
+                    report.append("WARNING: only "+str(anchorCount)+" anchors were found in "+str(labelList[i])+", RT drift not corrected")
+                else:
+                    correctedRTArrayList[i] = rtArrayList[i] - driftArray
+                    report.append("RT drift of "+str(labelList[i])+" corrected with "+str(anchorCount)+" anchors (median drift "+str(round(float(np.median(driftArray)), 4))+" minutes, largest "+str(round(float(np.abs(driftArray).max()), 4))+" minutes)")
+
+        # Group the features of all the tables together
+        timer.phase("Align features")
+        fileArray = np.concatenate([np.full(len(mwArray), i) for i, mwArray in enumerate(mwArrayList)])
+        idArray = np.concatenate([table["ID"].to_numpy() for table in featureTableList])
+        mwArray = np.concatenate(mwArrayList)
+        rtArray = np.concatenate(rtArrayList)
+        correctedRTArray = np.concatenate(correctedRTArrayList)
+        groupArray = getFeatureGroups(mwArray, correctedRTArray, mwTolerance, rtTolerance)
+        timer.count(rows = len(mwArray))
+
+        # A group is one row if it has at most one feature of each table and its features are all within the tolerances of each other,
+        # the other groups are split into rows by nearest neighbour
+        featureTable = pd.DataFrame({"group": groupArray, "file": fileArray, "ID": idArray, "mw": mwArray, "rt": rtArray, "correctedRT": correctedRTArray})
+        groupBy = featureTable.groupby("group")
+        mwMin = groupBy["mw"].transform("min").to_numpy()
+        simple = ((groupBy["file"].transform("size") == groupBy["file"].transform("nunique")).to_numpy()
+                  & (groupBy["mw"].transform("max").to_numpy() - mwMin <= mwMin * mwTolerance * 1e-6)
+                  & (groupBy["correctedRT"].transform("max").to_numpy() - groupBy["correctedRT"].transform("min").to_numpy() <= rtTolerance))
+        rankArray = np.zeros(len(featureTable.index), dtype=int)
+        splitGroupArray = np.unique(groupArray[~simple])
+        if len(splitGroupArray) > 0:
+            order = np.argsort(groupArray, kind="stable")
+            groupStart = np.searchsorted(groupArray[order], splitGroupArray, side="left")
+            groupEnd = np.searchsorted(groupArray[order], splitGroupArray, side="right")
+            for start, end in zip(groupStart, groupEnd):
+                positionArray = order[start:end]
+                rankArray[positionArray] = getAlignmentRows(fileArray[positionArray], mwArray[positionArray], correctedRTArray[positionArray], mwTolerance, rtTolerance, referenceIndex)
+        featureTable["rank"] = rankArray
+        splitRowCount = len(featureTable.loc[~simple, ["group", "rank"]].drop_duplicates().index)
+
+        # One row for each aligned feature, numbered in order of molecular weight
+        timer.phase("Create tables")
+        keyTable = featureTable[["group", "rank"]].drop_duplicates().sort_values(["group", "rank"])
+        keyTable["alignID"] = np.arange(1, len(keyTable.index) + 1)
+        featureTable = featureTable.merge(keyTable, on=["group", "rank"])
+        alignTable = featureTable.groupby("alignID").agg(MW=("mw", "mean"), RT=("correctedRT", "mean"), fileCount=("file", "size")).reset_index()
+        for i, label in enumerate(labelList):
+            fileTable = featureTable[featureTable["file"] == i].set_index("alignID")
+            alignTable["ID_"+label] = alignTable["alignID"].map(fileTable["ID"]).astype("Int64")
+            alignTable["RT_"+label] = alignTable["alignID"].map(fileTable["rt"])
+        timer.count(rows = len(alignTable.index), cells = alignTable.size)
+
+        fileCountArray = alignTable["fileCount"].to_numpy()
+        report.append(str(len(mwArray))+" features of "+str(len(labelList))+" files aligned into "+str(len(alignTable.index))+" features (within "+str(mwTolerance)+" ppm and "+str(rtTolerance)+" minutes)")
+        report.append(str(int((fileCountArray == len(labelList)).sum()))+" features are in every file, "+str(int((fileCountArray == 1).sum()))+" are only in one file")
+        if len(splitGroupArray) > 0:
+            report.append("WARNING: "+str(len(splitGroupArray))+" groups of close features were split into "+str(splitRowCount)+" rows, so the features of each row "
+                          +"are from different files and within the tolerances of each other")
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        return alignTable, report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: alignCDResultsFiles()
+#####################################################################################
+'''
+This function aligns the compounds of several Compound Discoverer (CD) results files, see alignFrames().
+Only the ID, MolecularWeight, and RetentionTime columns are read from each file, with a read-only connection.
+The alignment table can be saved to a sheet of an Excel file, and values added to that sheet can then be pushed 
+to all the aligned files with updateCDResultsFile().
+
+INPUT:
+'cdResultsFilePathList' = A list of the paths to at least two CD results files.
+'excelFilePath' = The path to an Excel file to save the alignment table in (default is None), if this value is left as None, 
+    the alignment table is only returned. A new Excel file is created if it doesn't exist.
+'alignmentSheetName' = The name of the sheet to save the alignment table in (default is "Alignment").
+'mwTolerance', 'rtTolerance', 'correctDrift', 'referenceIndex', 'driftWindow', 'driftBins', 'minAnchors' = See alignFrames().
+'verbose' = Boolean value that controls the output to the console.
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up (default is 5.0).
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'alignTable' = The alignment table as a dataframe, see alignFrames().
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def alignCDResultsFiles(cdResultsFilePathList, excelFilePath = None, alignmentSheetName = "Alignment", mwTolerance = 5.0, rtTolerance = 0.1, correctDrift = False, referenceIndex = 0, driftWindow = 1.0, driftBins = 10, minAnchors = 20, verbose = True, busyTimeout = 5.0, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("alignCDResultsFiles")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        if type(cdResultsFilePathList) != list or len(cdResultsFilePathList) < 2 or not all(type(filePath) == str for filePath in cdResultsFilePathList):
+            raise TypeError("TypeError", "Make sure 'cdResultsFilePathList' is a list of at least two string values")
+        if excelFilePath is not None and type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+        if type(alignmentSheetName) != str or alignmentSheetName == "":
+            raise TypeError("TypeError", "Make sure 'alignmentSheetName' is a string value")
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+        for cdResultsFilePath in cdResultsFilePathList:
+            if os.path.exists(cdResultsFilePath) == False:
+                raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
+
+        # Read the ID, MW, and RT of each file
+        timer.phase("Read compound tables")
+        featureTableList = []
+        for cdResultsFilePath in cdResultsFilePathList:
+            if verbose:
+                print("Reading "+cdResultsFilePath)
+            conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True, busyTimeout = busyTimeout)
+            cursor = conn.cursor()
+            try:
+                validateCDResultsFile(cursor, cdResultsFilePath)
+                cursor.execute("SELECT ID, MolecularWeight, RetentionTime FROM ConsolidatedUnknownCompoundItems ORDER BY ID;")
+                featureTableList.append(pd.DataFrame(cursor.fetchall(), columns = ["ID", "MolecularWeight", "RetentionTime"]))
+            except sqlite3.OperationalError:
+                raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+            finally:
+                cursor.close()
+                conn.close()
+            timer.count(rows = len(featureTableList[-1].index), cells = featureTableList[-1].size)
+
+        alignTable, report = alignFrames(featureTableList, getAlignmentLabels(cdResultsFilePathList), mwTolerance, rtTolerance, correctDrift, referenceIndex, driftWindow, driftBins, minAnchors, False, timer)
+
+        if excelFilePath is not None:
+            timer.phase("Save Excel file")
+            try:
+                if verbose:
+                    print("Saving the alignment table to sheet \""+alignmentSheetName+"\"")
+                if os.path.exists(excelFilePath):
+                    with pd.ExcelWriter(
+                        excelFilePath,
+                        mode="a",
+                        engine="openpyxl",
+                        if_sheet_exists="replace",
+                    ) as writer:
+                        alignTable.to_excel(writer, sheet_name=alignmentSheetName, index=False)
+                else:
+                    alignTable.to_excel(excelFilePath, sheet_name=alignmentSheetName, index=False)
+                timer.count(rows = len(alignTable.index), cells = alignTable.size, bytes = os.path.getsize(excelFilePath))
+
+            # If permission to the Excel file was denied
+            except PermissionError:
+                raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+            report.append("Alignment table saved to sheet \""+alignmentSheetName+"\" of "+excelFilePath)
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        return alignTable, report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: updateAlignedCDResultsFiles()
+#####################################################################################
+'''
+This function imports data from one Excel sheet into several aligned Compound Discoverer (CD) results files, 
+see alignCDResultsFiles(). Each file is updated with pushFrame(), using its ID_<label> column of the alignment table
+as the compoundID column, so the peaks don't have to be matched by MW and RT again.
+updateCDResultsFile() passes a list of CD results files to this function.
+
+Every file is checked before any of them is changed: the arguments, the schema of the file, and that the aligned IDs are still
+in its compound table. The update isn't atomic across the files though, each file is written in its own transaction.
+If a file fails, it is rolled back (or restored from its snapshot with 'fastWrite'), but the files updated before it keep
+their changes, and the error lists which files were updated.
+
+INPUT:
+'cdResultsFilePathList' = A list of the paths to the aligned CD results files, the same files that were passed to alignCDResultsFiles().
+'excelFilePath' = The path to an Excel file.
+'peakSheetName' = The name of the Excel sheet with the values to import. If it doesn't have the ID_<label> columns,
+    it needs an alignID column, and the ID_<label> columns are read from 'alignmentSheetName'.
+'alignmentSheetName' = The name of the sheet with the alignment table (default is "Alignment").
+'excelColList', 'tagList', 'incremental', 'fastWrite', 'busyTimeout', 'lockRetries' = See updateCDResultsFile().
+'verbose' = Boolean value that controls the output to the console. 
+    If False, hide outputs and return the outputs as a list.
+'backupDirectory' = The directory to keep the fast write snapshots in, one file for each CD results file (default is None).
+    If this value is left as None, each snapshot is kept next to its CD results file, see updateCDResultsFile().
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def updateAlignedCDResultsFiles(cdResultsFilePathList, excelFilePath, peakSheetName, alignmentSheetName = "Alignment", excelColList = None, tagList = None, verbose = True, incremental = False, fastWrite = False, backupDirectory = None, busyTimeout = 5.0, lockRetries = 5, timer = None):
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("updateAlignedCDResultsFiles")
+
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+        if type(cdResultsFilePathList) != list or cdResultsFilePathList == [] or not all(type(filePath) == str for filePath in cdResultsFilePathList):
+            raise TypeError("TypeError", "Make sure 'cdResultsFilePathList' is a list of string values")
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+        if type(peakSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'peakSheetName' is a string value")
+        if alignmentSheetName is not None and type(alignmentSheetName) != str:
+            raise TypeError("TypeError", "Make sure 'alignmentSheetName' is a string value")
+        if backupDirectory is not None and (type(backupDirectory) != str or not os.path.isdir(backupDirectory)):
+            raise ValueError("ValueError", "Make sure 'backupDirectory' is an existing directory")
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+        labelList = getAlignmentLabels(cdResultsFilePathList)
+
+        timer.phase("Read Excel file")
+        try:
+            if verbose:
+                print("Importing data from "+excelFilePath)
+            peakTable = pd.read_excel(excelFilePath, sheet_name = peakSheetName)
+            timer.count(rows = len(peakTable.index), cells = peakTable.size, bytes = os.path.getsize(excelFilePath))
+
+        # If the Excel file doesn't have the correct sheet
+        except ValueError:
+            raise ValueError("ValueError", "Can't find "+peakSheetName+" in "+excelFilePath)
+
+        # If the Excel file can't be found
+        except FileNotFoundError:
+            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+        # If permission to the Excel file was denied
+        except PermissionError:
+            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+        # Get the ID columns from the alignment sheet if the peak sheet doesn't have them
+        idColList = ["ID_"+label for label in labelList]
+        if not all(col in peakTable.columns for col in idColList):
+            if alignmentSheetName is None or alignmentSheetName == peakSheetName:
+                raise ValueError("ValueError", "Make sure \""+peakSheetName+"\" has the columns "+", ".join(idColList)+" or give the name of the alignment sheet")
+            if "alignID" not in peakTable.columns:
+                raise ValueError("ValueError", "Column \"alignID\" can't be found in \""+peakSheetName+"\", it is needed to find the aligned compounds")
+            try:
+                alignTable = pd.read_excel(excelFilePath, sheet_name = alignmentSheetName)
+
+            # If the Excel file doesn't have the correct sheet
+            except ValueError:
+                raise ValueError("ValueError", "Can't find "+alignmentSheetName+" in "+excelFilePath)
+
+            for col in ["alignID"] + idColList:
+                if col not in alignTable.columns:
+                    raise ValueError("ValueError", "Column \""+col+"\" can't be found in \""+alignmentSheetName+"\", make sure the same CD results files were aligned")
+            peakTable = peakTable.drop(columns=[col for col in idColList if col in peakTable.columns]).merge(alignTable[["alignID"] + idColList], on="alignID", how="left")
+
+        # Check every file before any of them is changed, using its IDs as the compoundID column
+        timer.phase("Validate CD results files")
+        fileTableList = []
+        backupFilePathList = []
+        for cdResultsFilePath, label in zip(cdResultsFilePathList, labelList):
+            if verbose:
+                print("Validating "+cdResultsFilePath)
+            fileTable = peakTable[peakTable["ID_"+label].notna()].drop(columns=[col for col in ["compoundID"] if col in peakTable.columns])
+            fileTable.insert(0, "compoundID", fileTable["ID_"+label].astype("int64"))
+            fileTable = fileTable.drop(columns=idColList).reset_index(drop=True)
+
+            backupFilePath = None
+            if backupDirectory is not None:
+                backupFilePath = os.path.join(backupDirectory, label+".backup")
+            validateUpdateCDInput(cdResultsFilePath, None, None, excelColList, tagList, False, incremental, fastWrite, backupFilePath, busyTimeout, lockRetries, fileTable)
+            validateCDResultsFileOnly(cdResultsFilePath, busyTimeout)
+            conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True, busyTimeout = busyTimeout)
+            try:
+                idSet = set(row[0] for row in conn.execute("SELECT ID FROM ConsolidatedUnknownCompoundItems;"))
+            finally:
+                conn.close()
+            missingList = [compoundID for compoundID in fileTable["compoundID"].tolist() if compoundID not in idSet]
+            if missingList != []:
+                raise ValueError("ValueError", "The IDs "+", ".join([str(compoundID) for compoundID in missingList[:10]])+" of column \"ID_"+label+"\" can't be found in "
+                                 +cdResultsFilePath+", make sure the alignment table was created from the same files. No files were changed")
+            fileTableList.append(fileTable)
+            backupFilePathList.append(backupFilePath)
+            timer.count(rows = len(fileTable.index))
+
+        # Update each file with the rows that were aligned to it, each file is updated in its own transaction
+        report = []
+        updatedList = []
+        for cdResultsFilePath, fileTable, backupFilePath in zip(cdResultsFilePathList, fileTableList, backupFilePathList):
+            if verbose:
+                print("Updating "+cdResultsFilePath)
+            try:
+                fileTable, newReport = pushFrame(cdResultsFilePath, fileTable, excelColList, tagList, False, incremental, fastWrite, backupFilePath, busyTimeout, lockRetries, timer = timer)
+            except Exception as e:
+                updatedString = ", ".join(updatedList) if updatedList != [] else "none"
+                raise RuntimeError("RuntimeError", cdResultsFilePath+" couldn't be updated and was rolled back ("+str(e)+"). The files updated before it keep their changes: "+updatedString)
+            updatedList.append(cdResultsFilePath)
+            report.append(cdResultsFilePath+": "+str(len(fileTable.index))+" of "+str(len(peakTable.index))+" rows are aligned to this file")
+            report = report + newReport
+
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: getCompoundColumns()
+#####################################################################################
+'''
+This function gets the DB name, display name, and data type of the columns of the compound table.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'colDisplayNameList' = A list of column display names to get. If this value is None, all columns are returned.
+
+OUTPUT:
+'colTupleList' = A list of tuples. Each tuple contains a column's DB name, display name, and the name of its CD data type.
+'''
+
+def getCompoundColumns(cdResultsFilePath, cursor, colDisplayNameList = None):
+    try:
+        cursor.execute("SELECT c.DBColumnName, c.Property_DisplayName, t.Name FROM DataTypesColumns c \
+                        LEFT JOIN CustomDataTypes t ON c.CustomDataType = t.Value \
+                        WHERE c.DataTypeID = (SELECT DataTypeID FROM DataTypes WHERE TableName = 'ConsolidatedUnknownCompoundItems');")
+        colTupleList = cursor.fetchall()
+
+        if colDisplayNameList is None:
+            return colTupleList
+
+        # Keep the order the columns were asked for
+        colTupleDict = {}
+        for colTuple in colTupleList:
+            if colTuple[1] not in colTupleDict:
+                colTupleDict[colTuple[1]] = colTuple
+        selectedColTupleList = []
+        for colDisplayName in colDisplayNameList:
+            if colDisplayName not in colTupleDict:
+                raise ValueError("ValueError", "Column \""+str(colDisplayName)+"\" can't be found in "+cdResultsFilePath)
+            selectedColTupleList.append(colTupleDict[colDisplayName])
+
+        return selectedColTupleList
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+
+#####################################################################################
+## Function: compoundRowsToDataFrame()
+#####################################################################################
+'''
+This function converts a chunk of rows fetched from the compound table into a dataframe.
+Each column gets the pandas dtype of its CD data type, so every chunk of a table has the same dtypes.
+Tags are converted to tag strings, other binary columns are converted to hex strings.
+
+INPUT:
+'rowList' = A list of rows fetched from the compound table.
+'colTupleList' = A list of tuples. Each tuple contains a column's DB name, display name, and the name of its CD data type.
+'cdResultsFilePath' = The path to a CD results file.
+'tagCursor' = An SQLite cursor used to convert the Tags.
+'tagStringDict' = A dictionary of tag bytes that have already been converted, it is updated by this function.
+
+OUTPUT:
+'chunkTable' = The rows as a dataframe with the column display names.
+'''
+
+def compoundRowsToDataFrame(rowList, colTupleList, cdResultsFilePath, tagCursor, tagStringDict):
+    dtypeDict = {"Double": "float64", "Int32": "Int64", "Int64": "Int64", "Boolean": "boolean"}
+
+    colDict = {}
+    for i in range(len(colTupleList)):
+        colDisplayName = colTupleList[i][1]
+        dataType = colTupleList[i][2]
+        valueList = [row[i] for row in rowList]
+
+        if colDisplayName == "Tags":
+            for j in range(len(valueList)):
+                if valueList[j] not in tagStringDict:
+                    tagStringDict[valueList[j]] = tagBytesToString(valueList[j], cdResultsFilePath, tagCursor)
+                valueList[j] = tagStringDict[valueList[j]]
+            colDict[colDisplayName] = pd.array(valueList, dtype=object)
+        elif dataType == "Binary":
+            colDict[colDisplayName] = pd.array([None if value is None else bytes(value).hex() for value in valueList], dtype=object)
+        elif dataType == "Boolean":
+            colDict[colDisplayName] = pd.array([None if value is None else bool(value) for value in valueList], dtype="boolean")
+        elif dataType in dtypeDict:
+            colDict[colDisplayName] = pd.array(valueList, dtype=dtypeDict[dataType])
+        else:
+            colDict[colDisplayName] = pd.array(valueList, dtype=object)
+
+    return pd.DataFrame(colDict)
+
+
+#####################################################################################
+## Function: exportCompounds()
+#####################################################################################
+'''
+This function exports the compound table of a CD results file to a Parquet, CSV, or Excel file.
+The compounds are streamed from SQLite with fetchmany() and written one chunk at a time,
+so only one chunk is held in memory and tables with millions of compounds can be exported.
+The Excel file is written in openpyxl's write-only mode. If there are more compounds than fit on one Excel sheet,
+the rest are written to the sheets "Compounds 2", "Compounds 3", etc.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'outputFilePath' = The path of the file to create. The format is chosen from the extension (.parquet, .csv, or .xlsx).
+'columns' = A list of the column display names to export. If this value is None, all columns are exported.
+'chunkSize' = The number of compounds to fetch and write at a time (default is 50000).
+'decodeBinary' = Boolean value that controls whether or not binary columns other than Tags are exported as hex strings.
+    If this value is False, those columns are skipped (default is False).
+'verbose' = Boolean value that controls the output to the console.
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up (default is 5.0).
+'timer' = A PhaseTimer used to time the phases of the run, see PhaseTimer. If this value is None, the phases are timed
+    but the timings aren't added to the report (default is None).
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'''
+
+def exportCompounds(cdResultsFilePath, outputFilePath, columns = None, chunkSize = 50000, decodeBinary = False, verbose = True, busyTimeout = 5.0, timer = None):
+    conn = None
+    cursor = None
+    report = []
+    # Time the phases of the run, a summary is only added to the report if a timer was given
+    reportTiming = timer is not None
+    if timer is None:
+        timer = PhaseTimer()
+    timer.begin("exportCompounds")
+    
+    try:
+        timer.phase("Validate arguments")
+        if verbose:
+            print("Validating arguments")
+
+        # Validate the arguments
+        if type(cdResultsFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
+        if type(outputFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'outputFilePath' is a string value")
+        if columns is not None and (type(columns) != list or not all(type(col) == str for col in columns)):
+            raise TypeError("TypeError", "Make sure 'columns' is a list of string values")
+        if type(chunkSize) != int or chunkSize < 1:
+            raise TypeError("TypeError", "Make sure 'chunkSize' is a positive integer value")
+        if type(decodeBinary) != bool:
+            raise TypeError("TypeError", "Make sure 'decodeBinary' is a boolean value")
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+        outputFormat = os.path.splitext(outputFilePath)[1].lower()
+        if outputFormat not in [".parquet", ".csv", ".xlsx"]:
+            raise ValueError("ValueError", "Make sure 'outputFilePath' ends with .parquet, .csv, or .xlsx")
+
+        timer.phase("Open CD results file")
+        validateCDResultsFileOnly(cdResultsFilePath, busyTimeout)
+        conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True, busyTimeout = busyTimeout)
+        cursor = conn.cursor()
+        tagCursor = conn.cursor()
+
+        # Binary columns can only be exported as hex strings, except for Tags
+        colTupleList = []
+        for colTuple in getCompoundColumns(cdResultsFilePath, cursor, columns):
+            if colTuple[2] == "Binary" and colTuple[1] != "Tags" and not decodeBinary:
+                report.append("WARNING: \""+str(colTuple[1])+"\" is stored as bytes, column skipped")
+            else:
+                colTupleList.append(colTuple)
+        if colTupleList == []:
+            raise ValueError("ValueError", "There are no columns to export")
+
+        # The optional writers are only imported when they are needed
+        if outputFormat == ".parquet":
+            try:
+                pa = importlib.import_module("pyarrow")
+                pq = importlib.import_module("pyarrow.parquet")
+            except ImportError:
+                raise ImportError("ImportError", "Make sure pyarrow is installed to export Parquet files")
+            typeDict = {"Double": pa.float64(), "Int32": pa.int64(), "Int64": pa.int64(), "Boolean": pa.bool_()}
+            schema = pa.schema([(colTuple[1], typeDict.get(colTuple[2], pa.string())) for colTuple in colTupleList])
+            writer = pq.ParquetWriter(outputFilePath, schema)
+        elif outputFormat == ".xlsx":
+            try:
+                openpyxl = importlib.import_module("openpyxl")
+            except ImportError:
+                raise ImportError("ImportError", "Make sure openpyxl is installed to export Excel files")
+            writer = openpyxl.Workbook(write_only=True)
+
+        if verbose:
+            print("Exporting compounds from "+cdResultsFilePath)
+        cursor.execute("SELECT "+", ".join([colTuple[0] for colTuple in colTupleList])+" FROM ConsolidatedUnknownCompoundItems ORDER BY ID;")
+
+        # Excel sheets can hold 1,048,576 rows, including the header row
+        sheetRowLimit = 1048575
+        sheet = None
+        sheetRowCount = 0
+        sheetCount = 0
+
+        tagStringDict = {}
+        rowCount = 0
+        try:
+            while True:
+                timer.phase("Read from CD results file")
+                rowList = cursor.fetchmany(chunkSize)
+                if rowList == []:
+                    break
+                chunkTable = compoundRowsToDataFrame(rowList, colTupleList, cdResultsFilePath, tagCursor, tagStringDict)
+                timer.count(rows = len(rowList), cells = chunkTable.size)
+                
+                timer.phase("Write "+outputFormat[1:]+" file")
+                timer.count(rows = len(rowList), cells = chunkTable.size)
+
+                if outputFormat == ".parquet":
+                    writer.write_table(pa.Table.from_pandas(chunkTable, schema=schema, preserve_index=False))
+                elif outputFormat == ".csv":
+                    chunkTable.to_csv(outputFilePath, mode="w" if rowCount == 0 else "a", header=rowCount == 0, index=False)
+                else:
+                    for values in chunkTable.astype(object).where(chunkTable.notna(), None).values.tolist():
+                        if sheet is None or sheetRowCount == sheetRowLimit:
+                            sheetCount += 1
+                            sheet = writer.create_sheet("Compounds" if sheetCount == 1 else "Compounds "+str(sheetCount))
+                            sheet.append([colTuple[1] for colTuple in colTupleList])
+                            sheetRowCount = 0
+                        sheet.append(values)
+                        sheetRowCount += 1
+
+                rowCount += len(rowList)
+                if verbose:
+                    print(str(rowCount)+" compounds exported")
+
+            # Write the header even if there are no compounds
+            if rowCount == 0 and outputFormat == ".csv":
+                pd.DataFrame(columns=[colTuple[1] for colTuple in colTupleList]).to_csv(outputFilePath, index=False)
+            if sheet is None and outputFormat == ".xlsx":
+                writer.create_sheet("Compounds").append([colTuple[1] for colTuple in colTupleList])
+
+        finally:
+            timer.phase("Write "+outputFormat[1:]+" file")
+            if outputFormat == ".parquet":
+                writer.close()
+            elif outputFormat == ".xlsx":
+                writer.save(outputFilePath)
+
+        tagCursor.close()
+        cursor.close()
+        conn.close()
+
+        if sheetCount > 1:
+            report.append("WARNING: the compounds didn't fit on one Excel sheet, they were split over "+str(sheetCount)+" sheets")
+        timer.count(bytes = os.path.getsize(outputFilePath))
+        report.append("Exported "+str(rowCount)+" compounds and "+str(len(colTupleList))+" columns from "+cdResultsFilePath+" to "+outputFilePath)
+        timingReport = timer.end()
+        if reportTiming:
+            report = report + timingReport
+
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report
+
+    # If permission to the output file was denied
+    except PermissionError:
+        timer.abort()
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+        if verbose:
+            print("Couldn't gain permission to "+outputFilePath+". Make sure the file is not open in another program")
+        else:
+            raise PermissionError("PermissionError", "Couldn't gain permission to "+outputFilePath+". Make sure the file is not open in another program")
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        timer.abort()
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+#####################################################################################
+## Function: getCompoundWhereClause()
+#####################################################################################
+'''
+This function converts filters on column display names into an SQLite WHERE clause on the compound table.
+The column names are resolved to DB names with DataTypesColumns and the values are passed as parameters.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'cursor' = An SQLite cursor.
+'where' = A dictionary of column display names and the values they must be equal to, e.g. {"Checked": False},
+    or a list of tuples, each tuple contains a column display name, an operator, and a value, e.g. [("RT [min]", "<", 5.0)].
+    The operators are =, !=, <, <=, >, >=, LIKE, IN, NOT IN, IS NULL, and IS NOT NULL. IN and NOT IN take a list of values,
+    IS NULL and IS NOT NULL take None. The Tags column takes the operators HAS ALL, HAS ANY, and HAS NONE with a Tag name
+    or a list of Tag names, e.g. [("Tags", "HAS ANY", ["goodRT", "mzVault"])]. If this value is None, all compounds are returned.
+
+OUTPUT:
+'whereClause' = The WHERE clause, or an empty string if there are no filters.
+'paramList' = A list of the values for the WHERE clause.
+'''
+
+def getCompoundWhereClause(cdResultsFilePath, cursor, where):
+    if where is None:
+        return "", []
+
+    if type(where) == dict:
+        filterList = [(colDisplayName, "=", value) for colDisplayName, value in where.items()]
+    elif type(where) == list and all(type(condition) == tuple and len(condition) == 3 for condition in where):
+        filterList = where
+    else:
+        raise TypeError("TypeError", "Make sure 'where' is a dictionary or a list of (column, operator, value) tuples")
+
+    conditionList = []
+    paramList = []
+    tagPositionDict = None
+    colTupleList = getCompoundColumns(cdResultsFilePath, cursor, [condition[0] for condition in filterList])
+    for i in range(len(filterList)):
+        colDBName, colDisplayName, dataType = colTupleList[i]
+        operator = str(filterList[i][1]).upper().strip()
+        value = filterList[i][2]
+
+        # The Tags are checked in the tag bytes by SQLite
+        if colDisplayName == "Tags" and operator in ["HAS ALL", "HAS ANY", "HAS NONE"]:
+            if tagPositionDict is None:
+                tagPositionDict = getTagPositions(cdResultsFilePath, cursor)
+            if type(value) == str:
+                value = [value]
+            condition, tagParamList = getTagCondition(cdResultsFilePath, tagPositionDict, value, operator[4:].lower())
+            conditionList.append(condition)
+            paramList.extend(tagParamList)
+            continue
+
+        if dataType == "Binary":
+            raise ValueError("ValueError", "Column \""+colDisplayName+"\" is stored as bytes and can't be filtered, the Tags column can only be filtered with HAS ALL, HAS ANY, or HAS NONE")
+
+        # Booleans are stored as integers
+        if type(value) == bool:
+            value = int(value)
+
+        if operator in ["=", "!=", "<", "<=", ">", ">=", "LIKE"]:
+            conditionList.append(colDBName+" "+operator+" (?)")
+            paramList.append(value)
+        elif operator in ["IN", "NOT IN"]:
+            if type(value) not in [list, tuple] or len(value) == 0:
+                raise ValueError("ValueError", "Make sure the value for "+operator+" on column \""+colDisplayName+"\" is a list with at least one value")
+            conditionList.append(colDBName+" "+operator+" ("+", ".join(["(?)"] * len(value))+")")
+            paramList.extend([int(item) if type(item) == bool else item for item in value])
+        elif operator in ["IS NULL", "IS NOT NULL"]:
+            conditionList.append(colDBName+" "+operator)
+        else:
+            raise ValueError("ValueError", "The operator \""+str(filterList[i][1])+"\" can't be used, use =, !=, <, <=, >, >=, LIKE, IN, NOT IN, IS NULL, or IS NOT NULL")
+
+    if conditionList == []:
+        return "", []
+    return " WHERE "+" AND ".join(conditionList), paramList
+
+
+#####################################################################################
+## Function: iterCompoundChunks()
+#####################################################################################
+'''
+This function yields the compounds selected by readCompounds() one chunk at a time.
+The connection to the CD results file is closed when the last chunk has been read or the iterator is closed.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'conn' = The read-only SQLite connection.
+'cursor' = An SQLite cursor that has executed the SELECT statement.
+'colTupleList' = A list of tuples. Each tuple contains a column's DB name, display name, and the name of its CD data type.
+'chunkSize' = The number of compounds in each chunk.
+
+OUTPUT:
+'chunkTable' = A dataframe with up to 'chunkSize' compounds.
+'''
+
+def iterCompoundChunks(cdResultsFilePath, conn, cursor, colTupleList, chunkSize):
+    tagCursor = conn.cursor()
+    tagStringDict = {}
+    try:
+        while True:
+            rowList = cursor.fetchmany(chunkSize)
+            if rowList == []:
+                break
+            yield compoundRowsToDataFrame(rowList, colTupleList, cdResultsFilePath, tagCursor, tagStringDict)
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+    finally:
+        tagCursor.close()
+        cursor.close()
+        conn.close()
+
+
+#####################################################################################
+## Function: readCompounds()
+#####################################################################################
+'''
+This function reads the compound table of a CD results file into a dataframe without going through Excel.
+Only the chosen columns are read, and the filters are run by SQLite, so only the matching compounds are loaded.
+The columns get the pandas dtype of their CD data type (float64, Int64, boolean, or object), and Tags are converted to tag strings.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'columns' = A list of the column display names to read. If this value is None, all columns that aren't stored as bytes are read,
+    along with Tags.
+'where' = The filters, see getCompoundWhereClause(). If this value is None, all compounds are read.
+'chunkSize' = If this value is None, one dataframe is returned. Otherwise an iterator of dataframes with up to 'chunkSize' compounds is returned.
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up (default is 5.0).
+
+OUTPUT:
+'compTable' = A dataframe with the column display names, or an iterator of dataframes if 'chunkSize' is set.
+'''
+
+def readCompounds(cdResultsFilePath, columns = None, where = None, chunkSize = None, busyTimeout = 5.0):
+    # Validate the arguments
+    if type(cdResultsFilePath) != str:
+        raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
+    if columns is not None and (type(columns) != list or not all(type(col) == str for col in columns) or len(columns) == 0):
+        raise TypeError("TypeError", "Make sure 'columns' is a list of string values")
+    if chunkSize is not None and (type(chunkSize) != int or chunkSize < 1):
+        raise TypeError("TypeError", "Make sure 'chunkSize' is a positive integer value")
+
+    # If the results file can't be found
+    if os.path.exists(cdResultsFilePath) == False:
+        raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
+
+    conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True, busyTimeout = busyTimeout)
+    cursor = conn.cursor()
+    try:
+        validateCDResultsFile(cursor, cdResultsFilePath)
+
+        # Binary columns can't be read, except for Tags
+        if columns is None:
+            colTupleList = [colTuple for colTuple in getCompoundColumns(cdResultsFilePath, cursor) if colTuple[2] != "Binary" or colTuple[1] == "Tags"]
+        else:
+            colTupleList = getCompoundColumns(cdResultsFilePath, cursor, columns)
+            for colTuple in colTupleList:
+                if colTuple[2] == "Binary" and colTuple[1] != "Tags":
+                    raise ValueError("ValueError", "Column \""+colTuple[1]+"\" is stored as bytes and can't be read")
+
+        whereClause, paramList = getCompoundWhereClause(cdResultsFilePath, cursor, where)
+        cursor.execute("SELECT "+", ".join([colTuple[0] for colTuple in colTupleList])+" FROM ConsolidatedUnknownCompoundItems"+whereClause+" ORDER BY ID;", paramList)
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        cursor.close()
+        conn.close()
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+    # Other errors
+    except Exception as e:
+        cursor.close()
+        conn.close()
+        raise e
+
+    # The iterator closes the connection when it's done
+    chunkIterator = iterCompoundChunks(cdResultsFilePath, conn, cursor, colTupleList, chunkSize or 50000)
+    if chunkSize is not None:
+        return chunkIterator
+
+    chunkList = list(chunkIterator)
+    if chunkList == []:
+        return compoundRowsToDataFrame([], colTupleList, cdResultsFilePath, None, {})
+    if len(chunkList) == 1:
+        return chunkList[0]
+    return pd.concat(chunkList, ignore_index=True)
+
+
+#####################################################################################
+## Function: getBatchJobs()
+#####################################################################################
+'''
+This function reads the jobs of a batch run from a JSON manifest file.
+The manifest is a list of jobs, each job is a dictionary with the name of the function to run and its arguments, e.g.
+[{"function": "updateCDResultsFile", "args": {"cdResultsFilePath": "a.cdResult", "excelFilePath": "a.xlsx", "peakSheetName": "Peak"}}]
+
+INPUT:
+'manifestFilePath' = The path to a JSON manifest file.
+
+OUTPUT:
+'jobList' = A list of job dictionaries.
+'''
+
+def getBatchJobs(manifestFilePath):
+    try:
+        with open(manifestFilePath, "r") as manifestFile:
+            jobList = json.load(manifestFile)
+
+    # If the manifest file can't be found
+    except FileNotFoundError:
+        raise FileNotFoundError("FileNotFoundError", "Can't find "+manifestFilePath)
+
+    # If the manifest file isn't valid JSON
+    except json.JSONDecodeError:
+        raise ValueError("ValueError", "Make sure "+manifestFilePath+" is a valid JSON file")
+
+    # A single job doesn't need to be in a list
+    if type(jobList) == dict:
+        jobList = [jobList]
+
+    return jobList
+
+
+#####################################################################################
+## Function: validateRunBatchInput()
+#####################################################################################
+'''
+This function does some basic validation of the user input.
+
+INPUT:
+'jobList' = A list of job dictionaries.
+'maxWorkers' = The maximum number of worker processes, or None.
+'verbose' = Boolean value that controls the output to the console.
+'''
+
+def validateRunBatchInput(jobList, maxWorkers, verbose):
+    # Validate 'jobList'
+    if type(jobList) != list:
+        raise TypeError("TypeError", "Make sure 'jobList' is a list or the path to a JSON manifest file")
+    for job in jobList:
+        if type(job) != dict:
+            raise TypeError("TypeError", "Make sure all jobs are dictionaries")
+        if "function" not in job or job["function"] not in batchFunctionDict:
+            raise ValueError("ValueError", "Make sure the 'function' of each job is one of "+", ".join(batchFunctionDict))
+        if type(job.get("args", {})) != dict:
+            raise TypeError("TypeError", "Make sure the 'args' of each job is a dictionary")
+        
+    # Validate 'maxWorkers'
+    if maxWorkers is not None:
+        if type(maxWorkers) != int:
+            raise TypeError("TypeError", "Make sure 'maxWorkers' is an integer value")
+        if maxWorkers < 1:
+            raise ValueError("ValueError", "Make sure 'maxWorkers' is at least 1")
+
+    # Validate 'verbose'
+    if type(verbose) != bool:
+        raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+
+#####################################################################################
+## Function: getBatchJobPathSet()
+#####################################################################################
+'''
+This function gets the files a job reads or writes, from every argument that ends with 'FilePath' or 'FilePathList'.
+The paths are made absolute, so two spellings of the same file are found to be the same file.
+
+INPUT:
+'job' = A job dictionary.
+
+OUTPUT:
+'pathSet' = A set of absolute file paths.
+'''
+
+def getBatchJobPathSet(job):
+    pathSet = set()
+    for argName, value in job.get("args", {}).items():
+        if argName.endswith("FilePathList") and type(value) == list:
+            pathList = value
+        elif argName.endswith("FilePath"):
+            pathList = [value]
         else:
-            # Make sure the first three columns of Peak are 'Idx', 'Name', and 'Label'
-            peakTable = peakTable[['Idx', 'UID', 'Name'] + [c for c in peakTable if c not in ['Idx', 'UID', 'Name']]] 
-            
-    stats = [];
-            
-    # Get the sum of rows that have a MS2 hit
-    if optionsDict["MSHit"]:
-    
-        # Add new column to Peak table with False values, 
-        # these values will be changed to True during the upcoming loop if there is a ms2Hit
-        peakTable["ms2Hit"] = False
+            continue
+        for path in pathList:
+            if type(path) == str and path != "":
+                pathSet.add(os.path.normcase(os.path.abspath(path)))
+    return pathSet
+
+
+#####################################################################################
+## Function: getBatchJobGroups()
+#####################################################################################
+'''
+This function groups the jobs of a batch run so jobs that share a file are always in the same group.
+Two jobs are put in the same group if they use a common file, and the groups are merged with union-find,
+so a chain of jobs (e.g. tidyData(a.xlsx), updateCDResultsFile(a.cdResult, a.xlsx), alignCDResultsFiles([a.cdResult, b.cdResult]))
+ends up in one group.
+
+INPUT:
+'jobList' = A list of job dictionaries.
+
+OUTPUT:
+'groupList' = A list of groups in the order of their first job. Each group is a list of tuples,
+    each tuple contains the index of the job in the manifest and the job dictionary.
+'''
+
+def getBatchJobGroups(jobList):
+    # 'parentList' holds the parent of each job in the union-find forest
+    parentList = list(range(len(jobList)))
+
+    def findRoot(index):
+        while parentList[index] != index:
+            parentList[index] = parentList[parentList[index]]
+            index = parentList[index]
+        return index
+
+    # Join each job with the first job that used the same file
+    firstJobDict = {}
+    for index, job in enumerate(jobList):
+        for path in getBatchJobPathSet(job):
+            if path in firstJobDict:
+                rootA = findRoot(firstJobDict[path])
+                rootB = findRoot(index)
+                if rootA != rootB:
+                    parentList[max(rootA, rootB)] = min(rootA, rootB)
+            else:
+                firstJobDict[path] = index
+
+    # The jobs of each group stay in the order they are listed
+    groupDict = {}
+    for index, job in enumerate(jobList):
+        root = findRoot(index)
+        if root not in groupDict:
+            groupDict[root] = []
+        groupDict[root].append((index, job))
+
+    return list(groupDict.values())
+
+
+#####################################################################################
+## Function: runBatchJobs()
+#####################################################################################
+'''
+This function runs the jobs of one group in order (see getBatchJobGroups()). It runs in a worker process of runBatch().
+The functions are never allowed to prompt the user or print to the console, so 'verbose' is set to False,
+and updateExcelFile() overwrites the sheets it read from unless new sheet names are given.
+
+INPUT:
+'indexedJobList' = A list of tuples. Each tuple contains the index of the job in the manifest and the job dictionary.
+
+OUTPUT:
+'resultList' = A list of result dictionaries, one for each job. Each dictionary has the keys 
+    'job', 'function', 'status' ("ok" or "error"), 'report', 'error', 'seconds', and 'timing' (see PhaseTimer.toDict()). 
+    tidyData() jobs also have 'stats' and syncBoth() jobs also have 'conflicts'.
+'''
+
+def runBatchJobs(indexedJobList):
+    resultList = []
+    for index, job in indexedJobList:
+        functionName = job["function"]
+        args = dict(job.get("args", {}))
+        args["verbose"] = False
+        args["timer"] = PhaseTimer()
         
-        # If the MS2 column is in Peak, loop through each row of Peak, and track ms2Hits
-        if 'MS2' in peakTable.columns:
-            ms2hits = 0
-            for i in range(len(peakTable.index)):
-                if peakTable.at[i,"MS2"] != "No MS2":
-                    ms2hits = ms2hits + 1
-                    peakTable.at[i,"ms2Hit"] = True
-            
-            stats.append(str(ms2hits) + " peaks with MS2 spectra")
+        # Don't ask the user if the sheets should be overwritten
+        if functionName == "updateExcelFile":
+            if args.get("newPeakSheetName", "") == "" and "peakSheetName" in args:
+                args["newPeakSheetName"] = args["peakSheetName"]
+            if args.get("newDataSheetName", "") == "" and args.get("dataSheetName") is not None:
+                args["newDataSheetName"] = args["dataSheetName"]
+
+        result = {"job": index, "function": functionName, "status": "ok", "report": [], "error": None}
+        startTime = time.perf_counter()
+        try:
+            output = batchFunctionDict[functionName](**args)
+            if functionName == "tidyData":
+                result["report"], result["stats"] = output
+            elif functionName == "syncBoth":
+                result["report"], result["conflicts"] = output
+            else:
+                result["report"] = output
+        
+        # A failed job doesn't stop the other jobs, the type of the error is kept because some errors have no message
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = type(e).__name__
+            messageList = [str(arg) for arg in e.args if str(arg) != type(e).__name__]
+            if messageList != []:
+                result["error"] += ": "+", ".join(messageList)
+        result["seconds"] = round(time.perf_counter() - startTime, 3)
+        result["timing"] = args["timer"].toDict()
+        resultList.append(result)
+
+    return resultList
+
+
+#####################################################################################
+## Function: runBatch()
+#####################################################################################
+'''
+This function runs tidyData(), updateCDResultsFile(), updateExcelFile(), and syncBoth() jobs without user input.
+The jobs that share any file (including each file of a list of CD results files) are put in the same group (see getBatchJobGroups()),
+each group runs in its own worker process, and the jobs of a group run in the order they are listed, 
+so two workers never use the same file at the same time.
+
+INPUT:
+'jobList' = A list of job dictionaries or the path to a JSON manifest file (see getBatchJobs()).
+    Each job has the name of the 'function' to run and a dictionary of its 'args'.
+'maxWorkers' = The maximum number of worker processes (default is None), 
+    if this value is left as None, one worker is used for each group of jobs, up to the number of CPUs.
+'verbose' = Boolean value that controls the output to the console. 
+    If False, hide outputs and return the outputs as a list.
+
+OUTPUT:
+'resultList' = A list of result dictionaries in the order of the jobs (see runBatchJobs()).
+'''
+
+def runBatch(jobList, maxWorkers = None, verbose = True):
+    try:
+        if type(jobList) == str:
+            jobList = getBatchJobs(jobList)
+        validateRunBatchInput(jobList, maxWorkers, verbose)
+
+        # Jobs that share a file run in the same worker
+        groupList = getBatchJobGroups(jobList)
+
+        if maxWorkers is None:
+            maxWorkers = max(1, min(len(groupList), os.cpu_count() or 1))
+
+        resultList = []
+        startTime = time.perf_counter()
+        if groupList != []:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+                futureList = [executor.submit(runBatchJobs, group) for group in groupList]
+                for future in concurrent.futures.as_completed(futureList):
+                    for result in future.result():
+                        resultList.append(result)
+                        if verbose:
+                            if result["status"] == "ok":
+                                print("Job "+str(result["job"])+" ("+result["function"]+") finished in "+str(result["seconds"])+" seconds")
+                            else:
+                                print("Job "+str(result["job"])+" ("+result["function"]+") failed: "+result["error"])
+        resultList.sort(key=lambda result: result["job"])
+
+        if verbose:
+            errorCount = len([result for result in resultList if result["status"] == "error"])
+            print(str(len(resultList))+" jobs run in "+str(round(time.perf_counter() - startTime, 3))+" seconds, "+str(errorCount)+" failed")
+        else:
+            return resultList
+
+    # Print error messages to console if verbose is true,
+    # otherwise raise an exception
+    except Exception as e:
+        if verbose:
+            print(e)
+        else:
+            raise e
+
+
+# The functions that can be run by runBatch()
+batchFunctionDict = {
+    "tidyData": tidyData,
+    "updateCDResultsFile": updateCDResultsFile,
+    "updateExcelFile": updateExcelFile,
+    "syncBoth": syncBoth,
+    "exportCompounds": exportCompounds,
+    "qcMetrics": qcMetrics,
+    "appendBatch": appendBatch,
+    "qcrsc": qcrsc,
+    "filterFeatures": filterFeatures,
+    "assignMSI": assignMSI,
+    "groupFeatures": groupFeatures,
+    "alignCDResultsFiles": alignCDResultsFiles,
+}
+
+
+#####################################################################################
+## Function: getCDResultsFileSchema()
+#####################################################################################
+'''
+This function gets the columns of the compound table of a Compound Discoverer (CD) results file.
+Only SQLite is used, so this function is fast enough to check a CD results file before running a sync.
+
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'verbose' = Boolean value that controls the output to the console. 
+    If False, hide outputs and return the outputs as a list.
+
+OUTPUT:
+'report' = A list of messages that can be printed to console if 'verbose' is True.
+'columnList' = A list of tuples. Each tuple contains the column DB name, display name, and CD data type.
+'''
+
+def getCDResultsFileSchema(cdResultsFilePath, verbose = True):
+    conn = None
+    cursor = None
+    report = []
+
+    try:
+        # Validate 'cdResultsFilePath'
+        if type(cdResultsFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
+
+        # Validate 'verbose'
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+
+        # If the results file can't be found
+        if os.path.exists(cdResultsFilePath) == False:
+            raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
+
+        conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True)
+        cursor = conn.cursor()
+        validateCDResultsFile(cursor, cdResultsFilePath)
+
+        cursor.execute("SELECT COUNT(*) FROM ConsolidatedUnknownCompoundItems;")
+        report.append(cdResultsFilePath+" has "+str(cursor.fetchall()[0][0])+" compounds")
+
+        cursor.execute("SELECT c.DBColumnName, c.Property_DisplayName, t.Name FROM DataTypesColumns c \
+                        LEFT JOIN CustomDataTypes t ON c.CustomDataType = t.Value \
+                        WHERE c.DataTypeID = (SELECT DataTypeID FROM DataTypes WHERE TableName = 'ConsolidatedUnknownCompoundItems');")
+        columnList = cursor.fetchall()
+        for colDBName, colDisplayName, dataType in columnList:
+            report.append("Column: \""+str(colDisplayName)+"\" ("+str(colDBName)+", "+str(dataType)+")")
+
+        cursor.close()
+        conn.close()
+
+        if verbose:
+            for i in report:
+                print(i)
+        else:
+            return report, columnList
+
+    # Operational Error
+    except sqlite3.OperationalError:
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+        if verbose:
+            print("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+        else:
+            raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
+
+    # Get info about other errors
+    except Exception as e:
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+        if verbose:
+            print(e)
+        else:
+            raise e
 
-    # Peak cleaning stats.
 
-    # Get the indexes for the column that start with 'mzList_'
-    found = -1
-    for i in range(len(peakTable.columns)):
-        if peakTable.columns[i].startswith("mzList_"):
-            found = i
-            
-    # Get the number of mass hits
-    massHit = []
-    massHitSum = 0
-    if found != -1:
-        for i in range(len(peakTable.index)):
-            if peakTable.iloc[i, found] != "No matches found":
-                massHit.append(1)
-                massHitSum = massHitSum + 1
-            else:
-                massHit.append(0)
-    else:
-        massHit = [0] * len(peakTable.index)
+#####################################################################################
+## Function: validateCDResultsFileOnly()
+#####################################################################################
+'''
+This function checks that a CD results file exists and is compatible, without changing it.
+It is used by the --validate-only option of the command line interface.
 
-    # Get the number of vault hits
-    vaultHit = []
-    vaultHitSum = 0
-    if "mzVaultMatch" in peakTable.columns:   
-        for i in range(len(peakTable.index)):
-            if float(peakTable.at[i, "mzVaultMatch"]) > optionsDict["mzmatch"]:
-                vaultHit.append(1)
-                vaultHitSum = vaultHitSum + 1
-            else:
-                vaultHit.append(0)
-    else:
-        vaultHit = [0] * len(peakTable.index)
-        
-    # Get the number of cloud hits
-    cloudHit = []
-    cloudHitSum = 0
-    if "mzCloudMatch" in peakTable.columns:   
-        for i in range(len(peakTable.index)):
-            if float(peakTable.at[i, "mzCloudMatch"]) > optionsDict["mzmatch"]:
-                cloudHit.append(1)
-                cloudHitSum = cloudHitSum + 1
-            else:
-                cloudHit.append(0)
-    else:
-        cloudHit = [0] * len(peakTable.index)
-            
-    # Get the number of mass, vault, and cloud hits        
-    peakTable["Hit"] = 0
-    hitSum = 0
-    for i in range(len(peakTable.index)):
-        hit = cloudHit[i] + vaultHit[i]*10 + 100*massHit[i] 
-        peakTable.at[i, "Hit"] = hit
-        if hit > 0:
-            hitSum = hitSum + 1
+INPUT:
+'cdResultsFilePath' = The path to a CD results file.
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up.
 
-    stats.append(str(massHitSum) + " MassList hits")
-    stats.append(str(vaultHitSum) + " mzVault hits")
-    stats.append(str(cloudHitSum) + " mzCloud hits")
-    if hitSum == 1:
-        stats.append(str(hitSum) + " unique hit")
-    else:
-        stats.append(str(hitSum) + " unique hits")
+OUTPUT:
+'report' = A list of messages that can be printed to console.
+'''
 
-    return peakTable, report, stats
+def validateCDResultsFileOnly(cdResultsFilePath, busyTimeout = 5.0):
+    # If the results file can't be found
+    if os.path.exists(cdResultsFilePath) == False:
+        raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
+
+    conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True, busyTimeout = busyTimeout)
+    try:
+        validateCDResultsFile(conn.cursor(), cdResultsFilePath)
+    finally:
+        conn.close()
+
+    return [cdResultsFilePath+" is valid"]
 
 
 #####################################################################################
-## MergeMetaintoData()
+## Function: getExcelSheetSizes()
 #####################################################################################
 '''
-This function merges Meta columns into the Data table
+This function gets the size and the header row of every sheet in an Excel (.xlsx) file without parsing the cells.
+The size is read from the dimension element at the start of each sheet's XML, and only the XML up to the end of
+the first row is parsed. The shared strings are only read up to the last string used by a header.
 
 INPUT:
-'dataTable' = The Data table.
-'metaTable' = The Meta table.
+'excelFilePath' = The path to an Excel file.
 
 OUTPUT:
-'dataTable' = The Data table after Meta columns have been added.
+'sheetSizeDict' = A dictionary with the sheet names as the keys. The values are dictionaries with the keys 'rows' and 'cols'
+    (None if the sheet doesn't have a dimension element) and 'header' (a list of the values in the first row).
 '''
 
-def MergeMetaintoData(dataTable, metaTable):
+def getExcelSheetSizes(excelFilePath):
+    mainNS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    try:
+        sheetSizeDict = {}
+        with zipfile.ZipFile(excelFilePath) as excelZip:
+            workbook = ET.fromstring(excelZip.read("xl/workbook.xml"))
+            for sheet in workbook.iter(mainNS+"sheet"):
+                sheetName = sheet.get("name")
+                sheetSize = {"rows": None, "cols": None, "header": []}
 
-    # Make sure Meta table contains the necessary columns
-    metaHeader = metaTable.columns
-    if all(item in metaHeader for item in ["Filename", "Batch", "Order", "SampleID", "SampleType"]) == False:
-        raise Exception("MetaTable must contain columns: 'Filename','Batch','Order','SampleID' & 'SampleType'")
-    
-    # Make sure Data table contains the necessary columns    
-    dataHeader = dataTable.columns            
-    if all(item in dataHeader for item in ["Idx", "Filename"]) == False:
-        raise Exception("DataTable must contain columns: 'Idx','Filename'")        
-    
-    # Sort Data and Meta tables by the 'Filename' column, 
-    # and check that the 'Filename' columns are identical in both tables
-    tempData = dataTable.sort_values(by=["Filename"])
-    
-    tempMeta = metaTable.sort_values(by=["Filename"])
-    dataFilenames = tempData["Filename"]        
-    metaFilenames = tempMeta["Filename"]
-    if dataFilenames.equals(metaFilenames) == False:
-        raise Exception("MetaTable & DataTable must have identical Filenames")
-    
-    # Drop 'Filename' from the Meta table becasue we don't need it any more,
-    # but we do still need it in the Data table
-    tempMeta = tempMeta.drop(columns=['Filename'])
-    
-    # If their are any duplicate columns still in the Data and Meta tables,
-    # remove that column from the Data table
-    for i in tempData.columns:
-        if i in tempMeta.columns:
-            tempData = tempData.drop(columns=i)
-        
-    # Concatinate the Data and Meta tables,
-    # there should be no duplicate columns now
-    tempData = pd.concat([tempData, tempMeta], axis=1)
-    
-    # Make sure the first two columns of Data are 'Idx', and 'Filename',
-    # then the next columns should be the Meta columns, followed by the other Data columns
-    tempCols = ['Idx', 'Filename'] 
-    for i in tempMeta.columns:
-        tempCols.append(i)
-    tempData = tempData[tempCols + [c for c in tempData if c not in tempCols]] 
-    
-    # Sort Data by 'Idx' before returning Data
-    dataTable = tempData.sort_values(by=['Idx'])
-    return dataTable
+                with excelZip.open(getExcelSheetXMLPath(excelZip, excelFilePath, sheetName)) as sheetFile:
+                    for event, element in ET.iterparse(sheetFile, events=("end", )):
+                        # The dimension is the range of the used cells, e.g. A1:AG301
+                        if element.tag == mainNS+"dimension":
+                            match = re.match(r"\$?([A-Z]+)\$?(\d+)$", element.get("ref", "").split(":")[-1])
+                            if match:
+                                sheetSize["cols"] = 0
+                                for letter in match.group(1):
+                                    sheetSize["cols"] = sheetSize["cols"] * 26 + ord(letter) - 64
+                                sheetSize["rows"] = int(match.group(2))
+
+                        # Stop after the first row, strings are stored as an index into the shared strings
+                        elif element.tag == mainNS+"row":
+                            for cell in element.iter(mainNS+"c"):
+                                if cell.get("t") == "inlineStr":
+                                    sheetSize["header"].append("".join([text.text or "" for text in cell.iter(mainNS+"t")]))
+                                else:
+                                    value = cell.find(mainNS+"v")
+                                    if value is None:
+                                        sheetSize["header"].append(None)
+                                    elif cell.get("t") == "s":
+                                        sheetSize["header"].append(int(value.text))
+                                    else:
+                                        sheetSize["header"].append(value.text)
+                            break
+
+                        # The sheet has no rows
+                        elif element.tag == mainNS+"sheetData":
+                            break
+
+                # Shared string indexes are replaced after all the sheets have been read
+                sheetSize["sharedIndexes"] = [i for i in range(len(sheetSize["header"])) if type(sheetSize["header"][i]) == int]
+                sheetSizeDict[sheetName] = sheetSize
+
+            # Read the shared strings up to the last one that is used by a header
+            maxIndex = max([sheetSize["header"][i] for sheetSize in sheetSizeDict.values() for i in sheetSize["sharedIndexes"]], default = -1)
+            sharedStringList = []
+            if maxIndex >= 0 and "xl/sharedStrings.xml" in excelZip.namelist():
+                with excelZip.open("xl/sharedStrings.xml") as sharedStringsFile:
+                    for event, element in ET.iterparse(sharedStringsFile, events=("end", )):
+                        if element.tag == mainNS+"si":
+                            sharedStringList.append("".join([text.text or "" for text in element.iter(mainNS+"t")]))
+                            element.clear()
+                            if len(sharedStringList) > maxIndex:
+                                break
+
+            for sheetSize in sheetSizeDict.values():
+                for i in sheetSize.pop("sharedIndexes"):
+                    if sheetSize["header"][i] < len(sharedStringList):
+                        sheetSize["header"][i] = sharedStringList[sheetSize["header"][i]]
+                    else:
+                        sheetSize["header"][i] = None
+
+        return sheetSizeDict
+
+    # If the Excel file can't be found
+    except FileNotFoundError:
+        raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
+
+    # If permission to the Excel file was denied
+    except PermissionError:
+        raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
+
+    # If the Excel file isn't an .xlsx file
+    except zipfile.BadZipFile:
+        raise ValueError("ValueError", excelFilePath+" is not an .xlsx file")
 
 
 #####################################################################################
-## validatingDataPeakTables()
+## Function: getCDResultsFileSize()
 #####################################################################################
 '''
-This function validates the Data table and Peak table.
+This function gets the numbers of compounds, sample files, and Tags in a CD results file, and the names of its compound columns.
+Only counts and the column definitions are read, so this function is fast for CD results files of any size.
 
 INPUT:
-'dataTable' = The Data table.
-'peakTable' = The Peak table.
-'optionsDict' = Dictionary containing options and the values the user chose for those options.
+'cdResultsFilePath' = The path to a CD results file.
+'busyTimeout' = The number of seconds to wait for a lock held by another process before giving up (default is 5.0).
 
 OUTPUT:
-'dataTable' = The Data table after validation.
-'peakTable' = The Peak table after validation.
-
+'cdSizeDict' = A dictionary with the keys 'compounds', 'samples', 'tags' (the number of visible Tags), 'columns' (the number of
+    compound columns), 'binaryColumns', 'editableColumns' (a list of the display names of the editable columns), and 'bytes' (the file size).
 '''
 
-def validatingDataPeakTables(dataTable, peakTable, optionsDict):
+def getCDResultsFileSize(cdResultsFilePath, busyTimeout = 5.0):
+    # If the results file can't be found
+    if os.path.exists(cdResultsFilePath) == False:
+        raise FileNotFoundError("FileNotFoundError", cdResultsFilePath+" can't be found")
 
-    #column names
-    peakHeader = peakTable.columns
+    conn = connectToCDResultsFile(cdResultsFilePath, readOnly = True, busyTimeout = busyTimeout)
+    cursor = conn.cursor()
+    try:
+        validateCDResultsFile(cursor, cdResultsFilePath)
+        cdSizeDict = {"bytes": os.path.getsize(cdResultsFilePath)}
 
-    # if UID or Name not in peak columns
-    if "UID" not in peakHeader or "Name" not in peakHeader:
-        raise Exception("TidyData:PeakTableError", "PeakTable must contain columns ''UID'' & ''Name''")
+        cursor.execute("SELECT COUNT(*) FROM ConsolidatedUnknownCompoundItems;")
+        cdSizeDict["compounds"] = cursor.fetchall()[0][0]
+        cursor.execute("SELECT COUNT(*) FROM WorkflowInputFiles;")
+        cdSizeDict["samples"] = cursor.fetchall()[0][0]
+        cdSizeDict["tags"] = len([tag for tag, (position, visible) in getTagPositions(cdResultsFilePath, cursor).items() if visible])
 
-    # Make sure all values in the 'UID' column are unique
-    peakList = peakTable["UID"]
-    peaks = peakList.duplicated()
-    if True in peaks.values:
-        raise Exception("TidyData:PeakTableError", "All ''Names'' in the PeakSheet must be unique.")
-    
-    # Make sure the peak names are identical in the DataSheet and PeakSheet
-    peakList = peakList.values
-    dataHeader = dataTable.columns
-    dataHeader = dataHeader.values
-    temp = []
-    for i in dataHeader:
-        if i in peakList:
-            temp.append(i)
-    if len(peakList) != len(temp):
-        raise Exception("TidyData:DataTableError", "The peak names in the DataSheet should be unique, and exactly match the peak names in the PeakSheet.")
-    else:
-        for i in range(len(peakList)):
-            if peakList[i] != temp[i]:
-                raise Exception("TidyData:DataTableError", "The peak names in the DataSheet should be unique, and exactly match the peak names in the PeakSheet.")
+        cursor.execute("SELECT c.Property_DisplayName, c.Grid_AllowEdit, t.Name FROM DataTypesColumns c \
+                        LEFT JOIN CustomDataTypes t ON c.CustomDataType = t.Value \
+                        WHERE c.DataTypeID = (SELECT DataTypeID FROM DataTypes WHERE TableName = 'ConsolidatedUnknownCompoundItems');")
+        columnList = cursor.fetchall()
+        cdSizeDict["columns"] = len(columnList)
+        cdSizeDict["binaryColumns"] = len([column for column in columnList if column[2] == "Binary"])
+        cdSizeDict["editableColumns"] = [column[0] for column in columnList if column[1] == 1]
 
-    # Make sure SampleID, SampleType, Order, and Batch are in data columns
-    if "SampleID" not in dataHeader or "SampleType" not in dataHeader or "Order" not in dataHeader or "Batch" not in dataHeader:
-        raise Exception("TidyData:DataTableError", "DataTable must contain columns ''SampleID'', ''SampleType'', ''Order'', & ''Batch''")
+        return cdSizeDict
 
-    # Make sure SampleIDs are strings
-    if dataTable.dtypes["SampleID"] != "object":
-        dataTable["SampleID"] = dataTable["SampleID"].apply(str)
-    
-    # A list containing the valid sample types
-    validSampleTypes = ["Sample", "QC", "Blank", "Reference"]
-    
-    # Make sure the Data table is sorted by Batch then Order,
-    # and make sure the Order values are increasing integers
-    dataTable = dataTable.sort_values(by=['Batch', 'Order'])
-    prevOrder = -1
-    prevBatch = -1
-    batchSum = 0
-    for i in range(len(dataTable.index)):
-        currOrder = dataTable.at[i, "Order"]
-        if currOrder.dtype == "int64" and currOrder > prevOrder:
-            prevOrder = currOrder
-        else:
-            raise Exception("TidyData:QCRSCDataTableError", "DataTable ''Order'' column must contain unique increasing integer values matching to increasing batch number.")
-        
-        # Make sure the Batch values are integers with no missing values
-        currBatch = dataTable.at[i, "Batch"]
-        if currBatch.dtype != "int64" or currBatch is None:
-            raise Exception("QCRSC:DataTableError", "DataTable ''Batch'' column must contain integer values and no missing values")
-        if currBatch > prevBatch:
-            batchSum = batchSum + 1
-            prevBatch = currBatch
-            
-        # Make sure the Sample types are valid
-        currSampleType = dataTable.at[i, "SampleType"]
-        if currSampleType not in validSampleTypes:
-            raise Exception("QCRSC:QCRSCDataTableError", "DataTable ''SampleType'' column values must be one of the following: ''Sample'',''QC'',''Blank'', or ''Reference''")
-        
-    # Remove Data columns that share names with sample types
-    if "QC" in dataHeader:
-        dataTable = dataTable.drop(columns=['QC'])
-    if "Reference" in dataHeader:
-        dataTable = dataTable.drop(columns=['Reference'])
-    if "Blank" in dataHeader:
-        dataTable = dataTable.drop(columns=['Blank'])
-    if "Sample" in dataHeader:
-        dataTable = dataTable.drop(columns=['Sample'])
-        
-    # Add sample types columns and set to boolean values 
-    qcSum = 0
-    for i in range(len(dataTable.index)):
-        currSampleType = dataTable.at[i, "SampleType"]
-        if currSampleType == "QC":    
-            qcSum = qcSum + 1
-            dataTable.loc[i,["QC","Blank","Reference","Sample"]] = [True,False,False,False]         
-        elif currSampleType == "Blank":
-            dataTable.loc[i,["QC","Blank","Reference","Sample"]] = [False,True,False,False]
-        elif currSampleType == "Reference":
-            dataTable.loc[i,["QC","Blank","Reference","Sample"]] = [False,False,True,False]
-        elif currSampleType == "Sample":
-            dataTable.loc[i,["QC","Blank","Reference","Sample"]] = [False,False,False,True]
+    # Operational Error
+    except sqlite3.OperationalError:
+        raise sqlite3.OperationalError("SQLite3:OperationalError: It's possible the connection to "+cdResultsFilePath+" was interrupted, multiple processed are trying to access the same file, the CD results file has been corrupted, or you're using a version of Compound Discoverer that is not compatible with CDExcelMessenger (CDExcelMessenger was tested with CD 3.3).")
 
-    # Make sure their are at least 3 QCs samples for each Batch
-    if qcSum < batchSum*3:
-        raise Exception("QCRSC:DataTableError", "There has to be 3 or more QCs per batch for this data to be valid for QC assessment!")
-    
-    # Make sure the column in the Data table are ordered correctly,
-    # the order will be 'firstCols', 'midCols', then the 'peakList'
-    midCols = ["SampleType", "Order", "Batch", "QC", "Blank", "Reference", "Sample"]
-    firstCols = []
-    for i in dataTable.columns:
-        if i not in peakList and i not in midCols:
-            firstCols.append(i)
-    firstCols = firstCols + midCols
-    dataTable = dataTable[firstCols + [c for c in dataTable if c not in firstCols]] 
-    
-    return dataTable, peakTable
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# Rough costs used by estimate(), measured with CDExcelBenchmark.py on the fixtures of CDExcelFixtures.py.
+# Run the benchmark and adjust these values if the estimates are far off on another machine.
+estimateCostDict = {
+    "baseRSSBytes": 65 * 1048576,               # Python with pandas and openpyxl imported
+    "readBytesPerCell": 300,                    # Reading a cell into a DataFrame
+    "writeBytesPerCell": 200,                   # Writing a cell to a new Excel file
+    "rewriteBytesPerCell": 400,                 # Loading a cell of an existing Excel file and saving it again
+    "fileBytesPerCell": 7,                      # The size of a cell in an .xlsx file, if the Excel file is empty
+    "exportBytesPerCell": 10,                   # The size of a cell in a CSV or Parquet file
+    "cdBytesPerValue": 16,                      # The size of a value written to the CD results file
+    "secondsPerCellRead": 0.00001,
+    "secondsPerCellWritten": 0.000015,
+    "secondsPerCellRewritten": 0.00003,         # openpyxl loads and saves every cell of an existing Excel file
+    "secondsPerStatement": 0.00002,
+    "secondsPerRowScanned": 0.00000055,         # The MW and RT match rounds both columns of every compound once for each row
+    "alignStatementsPerFile": 70,               # The statements run to validate a CD results file and read its MW and RT
+}
+
+# The sheet size limits of Excel
+excelMaxRows = 1048576
+excelMaxCols = 16384
 
 
 #####################################################################################
-## validatingTidyDataInput()
+## Function: estimateJob()
 #####################################################################################
 '''
-This function makes sure the user input for creating the TidyData is all valid
+This function estimates the cost of a job from the sizes of its files, see estimate().
+The number of SQL statements is counted from the way each function uses SQLite, so it assumes every row has Tags
+and that every row changed since the last sync. The time, bytes written, and peak RSS use the costs in estimateCostDict.
+If the Peak sheet doesn't have a compoundID column, the compound IDs are matched by MW and RT the first time the Peak sheet
+is pushed, which scans the compound table once for each row and saves the Excel file again.
+qcrsc() is estimated for one batch, the time of the fits isn't included.
 
 INPUT:
-'excelFilePath' = The path to an Excel file.
-'colsToKeepDict' = Dictionary containing the Peak columns the user wants to keep and the name the column should be renamed to.
-'optionsDict' = Dictionary containing options and the user choices to those options.
-'verbose' = Boolean value that controls the output to the console. 
+'functionName' = The name of the function, one of estimateFunctionList.
+'args' = A dictionary of the arguments of the function.
+'writtenSheetDict' = A dictionary of the sheets written by the earlier jobs of the run (default is None). The keys are
+    the absolute paths of the Excel files, the values are dictionaries of sheet sizes like the ones of getExcelSheetSizes().
+    The sheets written by this job are added to it, so e.g. a push after tidyData() knows the new Peak sheet has no compoundID column.
+
+OUTPUT:
+'estimateDict' = A dictionary with the keys 'statements', 'rowsScanned', 'cellsRead', 'cellsWritten', 'excelBytes', 'cdBytes',
+    'outputBytes', 'bytesWritten', 'peakRSSBytes', 'seconds', 'sheets' (a list of the sheets that are written, with their 'rows' and 'cols'),
+    and 'warnings'.
 '''
 
-def validateTidyDataInput(excelFilePath, colsToKeepDict, optionsDict, verbose):
-    # Validate 'excelFilePath'
-    if type(excelFilePath) != str:
-        raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
-    
-    # Validate 'colsToKeepDict'
-    try:
-        for key, value in colsToKeepDict.items():
-            if type(key) != str:
-                raise ValueError("ValueError", "Make sure all keys in 'colsToKeepDict' are string values")
-            if type(value) != str:
-                raise ValueError("ValueError", "Make sure all values in 'colsToKeepDict' are string values")
-                
-    # If 'colsToKeepDict' isn't a dictionary
-    except AttributeError:
-        raise ValueError("ValueError", "Make sure 'colsToKeepDict' is a dictionary")
-    
-    # Validate 'optionsDict'
-    try:
-        if type(optionsDict["CIMCBlib"]) != bool:
-            raise TypeError("TypeError", "Make sure you set 'CIMCBlib' to a boolean value")
-        if type(optionsDict["MSHit"]) != bool:
-            raise TypeError("TypeError", "Make sure you set 'MSHit' to a boolean value")
-        if type(optionsDict["mzmatch"]) != int and type(optionsDict["mzmatch"] != float):
-            raise TypeError("TypeError", "Make sure you set 'mzmatch' to a float or an integer value")
-        if type(optionsDict["UIDPrefix"]) != str:
-            raise TypeError("TypeError", "Make sure you set 'UIDPrefix' to a string value")
+def estimateJob(functionName, args, writtenSheetDict = None):
+    cost = estimateCostDict
+    estimateDict = {"statements": 0, "rowsScanned": 0, "cellsRead": 0, "cellsWritten": 0, "cellsRewritten": 0,
+                    "excelBytes": 0, "cdBytes": 0, "outputBytes": 0, "sheets": [], "warnings": []}
+    if writtenSheetDict is None:
+        writtenSheetDict = {}
 
-    # If 'optionsDict' isn't a dictionary
-    except TypeError:
-        raise TypeError("TypeError", "Make sure 'optionsDict' is a dictionary")
-        
-    # If one of the Keys can't be found
-    except KeyError:
-        raise KeyError("KeyError", "Make sure 'optionsDict' has the keys 'CIMCBlib', 'MSHit', 'mzmatch', 'ColumnWarning', and 'UIDPrefix'")
+    # Get the sizes of the files
+    cdSizeDict = None
+    if functionName in ["tidyCDResultsFile", "updateCDResultsFile", "updateExcelFile", "syncBoth", "exportCompounds"] or (functionName == "filterFeatures" and args.get("cdResultsFilePath") is not None):
+        if type(args.get("cdResultsFilePath")) != str:
+            raise TypeError("TypeError", "Make sure 'cdResultsFilePath' is a string value")
+        cdSizeDict = getCDResultsFileSize(args["cdResultsFilePath"], args.get("busyTimeout", 5.0))
 
-    # Validate 'verbose'
-    if type(verbose) != bool:
-        raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
+    sheetSizeDict = {}
+    workbookCells = 0
+    fileBytesPerCell = cost["fileBytesPerCell"]
+    excelFilePath = args.get("excelFilePath")
+    excelKey = None
+    if functionName not in ["exportCompounds", "alignCDResultsFiles"] or excelFilePath is not None:
+        if type(excelFilePath) != str:
+            raise TypeError("TypeError", "Make sure 'excelFilePath' is a string value")
+        excelKey = os.path.normcase(os.path.abspath(excelFilePath))
+
+        # alignCDResultsFiles() creates the Excel file, and an earlier job of the run may have created it
+        if os.path.exists(excelFilePath) or (functionName != "alignCDResultsFiles" and excelKey not in writtenSheetDict):
+            sheetSizeDict = getExcelSheetSizes(excelFilePath)
+        for sheetName, sheetSize in sheetSizeDict.items():
+            if sheetSize["rows"] is None:
+                estimateDict["warnings"].append("WARNING: the size of the sheet \""+sheetName+"\" can't be read, the sheet isn't included in the estimate")
+            else:
+                workbookCells += sheetSize["rows"] * sheetSize["cols"]
+        if workbookCells > 0:
+            fileBytesPerCell = os.path.getsize(excelFilePath) / workbookCells
+
+        # The sheets written by earlier jobs of the run replace the sheets in the file
+        for sheetName, sheetSize in writtenSheetDict.get(excelKey, {}).items():
+            if sheetName in sheetSizeDict and sheetSizeDict[sheetName]["rows"] is not None:
+                workbookCells -= sheetSizeDict[sheetName]["rows"] * sheetSizeDict[sheetName]["cols"]
+            sheetSizeDict[sheetName] = sheetSize
+            workbookCells += sheetSize["rows"] * sheetSize["cols"]
+
+    # The headers of the sheets this job writes, so the jobs after it can be estimated
+    newHeaderDict = {}
+
+    # Get the size of a sheet, the sheet has to exist
+    def getSheet(sheetName):
+        if sheetName not in sheetSizeDict:
+            raise ValueError("ValueError", "Can't find "+str(sheetName)+" in "+args["excelFilePath"])
+        if sheetSizeDict[sheetName]["rows"] is None:
+            return {"rows": 0, "cols": 0, "header": sheetSizeDict[sheetName]["header"] or []}
+        return {"rows": sheetSizeDict[sheetName]["rows"], "cols": sheetSizeDict[sheetName]["cols"], "header": sheetSizeDict[sheetName]["header"] or []}
+
+    # The whole Excel file is loaded and saved again with the updated sheets, each sheet is a tuple of its name, size, and header
+    def rewriteSheets(outputSheetList):
+        for sheetName, sheetRowCount, sheetColCount, header in outputSheetList:
+            estimateDict["sheets"].append({"sheet": sheetName, "rows": sheetRowCount, "cols": sheetColCount})
+            estimateDict["cellsRewritten"] += sheetRowCount * sheetColCount
+            newHeaderDict[sheetName] = header
+        estimateDict["cellsRewritten"] += workbookCells - sum([sheetSizeDict[sheetName]["rows"] * sheetSizeDict[sheetName]["cols"]
+                                                               for sheetName in set([outputSheet[0] for outputSheet in outputSheetList])
+                                                               if sheetName in sheetSizeDict and sheetSizeDict[sheetName]["rows"] is not None])
+
+    # The compound IDs are matched by MW and RT with one scan of the compound table, then written with one statement for each row, see createCompoundIDColumns()
+    def matchCompoundIDs(rowCount):
+        estimateDict["statements"] += 1 + rowCount
+        estimateDict["rowsScanned"] += cdSizeDict["compounds"]
+
+    # The number of different tag strings is limited by the number of Tags
+    if cdSizeDict is not None:
+        tagStringCount = min(cdSizeDict["compounds"], 2 ** min(cdSizeDict["tags"], 32))
+
+    if functionName == "tidyData" or functionName == "tidyCDResultsFile":
+        colsToKeepDict = args.get("colsToKeepDict")
+        if type(colsToKeepDict) != dict:
+            raise TypeError("TypeError", "Make sure 'colsToKeepDict' is a dictionary")
+        metaSheet = getSheet("Meta")
+        sampleCount = max(metaSheet["rows"] - 1, 0)
+
+        if functionName == "tidyData":
+            compoundSheet = getSheet("Compounds")
+            compoundCount = max(compoundSheet["rows"] - 1, 0)
+            peakColCount = min(compoundSheet["cols"], len(colsToKeepDict)) + 3
+            estimateDict["cellsRead"] = compoundSheet["rows"] * compoundSheet["cols"] + metaSheet["rows"] * metaSheet["cols"]
+            outputSheetList = [("Compounds", compoundSheet["rows"], compoundSheet["cols"]), ("Meta", metaSheet["rows"], metaSheet["cols"])]
+            newHeaderDict["Compounds"] = compoundSheet["header"]
+            newHeaderDict["Meta"] = metaSheet["header"]
+
+        else:
+            compoundCount = cdSizeDict["compounds"]
+            peakColCount = len(colsToKeepDict) + 3
+            estimateDict["statements"] = 60 + 3 * tagStringCount
+            estimateDict["cellsRead"] = metaSheet["rows"] * metaSheet["cols"] + compoundCount * (len(colsToKeepDict) + cdSizeDict["samples"])
+            estimateDict["cellsRewritten"] = workbookCells
+            outputSheetList = []
+
+        # The Data sheet has a column for each compound, the Peak sheet has a row for each compound
+        # The new Peak sheet doesn't have a compoundID column
+        outputSheetList = outputSheetList + [("Data", sampleCount + 1, compoundCount + metaSheet["cols"] + 1), ("Peak", compoundCount + 1, peakColCount)]
+        newHeaderDict["Data"] = None
+        newHeaderDict["Peak"] = ["Idx", "UID"] + [str(colName) for colName in colsToKeepDict.values()]
+        for sheetName, rowCount, colCount in outputSheetList:
+            estimateDict["sheets"].append({"sheet": sheetName, "rows": rowCount, "cols": colCount})
+            estimateDict["cellsWritten"] += rowCount * colCount
+
+    elif functionName in ["updateCDResultsFile", "updateExcelFile", "syncBoth"]:
+        peakSheet = getSheet(args.get("peakSheetName"))
+        rowCount = max(peakSheet["rows"] - 1, 0)
+        header = peakSheet["header"]
+        matchIDs = "compoundID" not in header
+
+        # The columns that are synced, if no columns are chosen the editable CD columns in the peak sheet are synced
+        excelColList = args.get("excelColList")
+        if excelColList is None:
+            colList = [col for col in cdSizeDict["editableColumns"] if col in header]
+        else:
+            colList = list(excelColList)
+        if functionName == "updateCDResultsFile":
+            syncTags = excelColList is None or args.get("tagList") is not None
+        else:
+            syncTags = "Tags" in colList
+        colCount = len([col for col in colList if col not in ["Tags", "Notes", "originalName"]])
+
+        estimateDict["statements"] = 40 + rowCount * colCount
+        estimateDict["cellsRead"] = peakSheet["rows"] * peakSheet["cols"]
+
+        # The compound IDs are matched by MW and RT, then the Excel file is saved with the compoundID column
+        if matchIDs:
+            matchCompoundIDs(rowCount)
+            if functionName == "updateCDResultsFile":
+                rewriteSheets([(args.get("peakSheetName"), peakSheet["rows"], peakSheet["cols"] + 1, ["compoundID"] + header)])
+            else:
+                estimateDict["cellsRewritten"] += workbookCells + rowCount
+
+        if functionName == "updateCDResultsFile":
+            # The Notes column is always updated
+            colCount += 1
+            estimateDict["statements"] += rowCount
+            estimateDict["cdBytes"] = rowCount * colCount * cost["cdBytesPerValue"]
+
+            # Each tag string is converted to bytes with two statements
+            if syncTags:
+                estimateDict["statements"] += 3 * rowCount
+                estimateDict["cdBytes"] += rowCount * 2 * cdSizeDict["tags"]
+            if args.get("fastWrite", False):
+                estimateDict["cdBytes"] += cdSizeDict["bytes"]
+                estimateDict["warnings"].append("fastWrite backs up "+args["cdResultsFilePath"]+" ("+str(round(cdSizeDict["bytes"] / 1048576, 1))+" MB) before writing")
+
+        else:
+            # The values are read from CD for each row, each different tag string is converted once
+            if syncTags:
+                estimateDict["statements"] += rowCount + cdSizeDict["tags"] + 3 * tagStringCount
+            newColCount = len([col for col in colList if col not in header]) + (1 if matchIDs else 0)
+            if syncTags:
+                newColCount += cdSizeDict["tags"]
+
+            newHeader = (["compoundID"] if matchIDs else []) + header + [col for col in colList if col not in header]
+            outputSheetList = [(args.get("newPeakSheetName") or args.get("peakSheetName"), peakSheet["rows"], peakSheet["cols"] + newColCount, newHeader)]
+
+            if functionName == "syncBoth":
+                # All the synced CD columns are read with one statement, the changed values are written to CD,
+                # each changed tag string is converted to bytes with two statements, and the sync state is saved for each row
+                estimateDict["statements"] += rowCount
+                estimateDict["cellsRead"] += cdSizeDict["compounds"] * (colCount + 1)
+                estimateDict["cdBytes"] = rowCount * colCount * cost["cdBytesPerValue"]
+                if syncTags:
+                    estimateDict["statements"] += 2 * rowCount
+                    estimateDict["cdBytes"] += rowCount * 2 * cdSizeDict["tags"]
+            else:
+                if args.get("dataSheetName") is not None:
+                    dataSheet = getSheet(args["dataSheetName"])
+                    estimateDict["cellsRead"] += dataSheet["rows"] * dataSheet["cols"]
+                    outputSheetList.append((args.get("newDataSheetName") or args["dataSheetName"], dataSheet["rows"], dataSheet["cols"], dataSheet["header"]))
+
+            rewriteSheets(outputSheetList)
+
+        if args.get("incremental", False):
+            estimateDict["warnings"].append("The estimate is for a full sync, an incremental sync only reads and writes the rows that changed")
+
+    elif functionName in ["qcMetrics", "assignMSI", "groupFeatures", "filterFeatures"]:
+        peakSheetName = args.get("peakSheetName", "Peak")
+        peakSheet = getSheet(peakSheetName)
+        rowCount = max(peakSheet["rows"] - 1, 0)
+        header = peakSheet["header"]
+        estimateDict["cellsRead"] = peakSheet["rows"] * peakSheet["cols"]
+        outputSheetList = []
+
+        # The columns added to the Peak sheet
+        if functionName == "qcMetrics":
+            dataSheet = getSheet(args.get("dataSheetName", "Data"))
+            estimateDict["cellsRead"] += dataSheet["rows"] * dataSheet["cols"]
+            newColList = ["qcRSD", "dRatio", "blankRatio", "percentMissing"]
+        elif functionName == "assignMSI":
+            newColList = ["MSI"]
+        elif functionName == "groupFeatures":
+            # At most half of the peaks can be in groups of more than one peak
+            newColList = ["groupID", "groupSize", "groupRepresentative"]
+            outputSheetList.append((args.get("groupSheetName", "Groups"), rowCount // 2 + 1, 10, None))
+        else:
+            ruleDict = args.get("ruleDict")
+            if type(ruleDict) != dict:
+                raise TypeError("TypeError", "Make sure 'ruleDict' is a dictionary")
+            newColList = [str(ruleName) for ruleName in ruleDict] + ["Checked"]
+        newColList = [col for col in newColList if col not in header]
+        outputSheetList.insert(0, (args.get("newPeakSheetName") or peakSheetName, peakSheet["rows"], peakSheet["cols"] + len(newColList), header + newColList))
+        rewriteSheets(outputSheetList)
+
+        # filterFeatures() pushes the Checked column, and the rule sets as Tags, in one transaction
+        if cdSizeDict is not None:
+            estimateDict["statements"] += 40 + 2 * rowCount
+            estimateDict["cdBytes"] = rowCount * 2 * cost["cdBytesPerValue"]
+            if args.get("pushTags", True):
+                estimateDict["statements"] += 3 * rowCount
+                estimateDict["cdBytes"] += rowCount * 2 * cdSizeDict["tags"]
+            if "compoundID" not in header:
+                matchCompoundIDs(rowCount)
+            estimateDict["cdBytes"] += cdSizeDict["bytes"]
+            estimateDict["warnings"].append(args["cdResultsFilePath"]+" ("+str(round(cdSizeDict["bytes"] / 1048576, 1))+" MB) is backed up before writing")
+
+    elif functionName == "appendBatch":
+        if type(args.get("batchFilePath")) != str:
+            raise TypeError("TypeError", "Make sure 'batchFilePath' is a string value")
+        batchSizeDict = getExcelSheetSizes(args["batchFilePath"])
+        for sheetName in ["Compounds", "Meta"]:
+            if sheetName not in batchSizeDict or batchSizeDict[sheetName]["rows"] is None:
+                raise ValueError("ValueError", "Can't find "+sheetName+" in "+args["batchFilePath"])
+        newRowCount = max(batchSizeDict["Meta"]["rows"] - 1, 0)
+
+        peakSheetName = args.get("peakSheetName", "Peak")
+        dataSheetName = args.get("dataSheetName", "Data")
+        metaSheetName = args.get("metaSheetName", "Meta")
+        momentSheetName = args.get("momentSheetName", "QCMoments")
+        peakSheet = getSheet(peakSheetName)
+        dataSheet = getSheet(dataSheetName)
+        metaSheet = getSheet(metaSheetName)
+
+        # Only 4 columns of the Data sheet are read, unless the moment sheet is created from the whole Data sheet
+        estimateDict["cellsRead"] = sum([sheetSize["rows"] * sheetSize["cols"] for sheetSize in [batchSizeDict["Compounds"], batchSizeDict["Meta"], peakSheet]]) + 4 * dataSheet["rows"]
+        if momentSheetName not in sheetSizeDict:
+            estimateDict["cellsRead"] += dataSheet["rows"] * dataSheet["cols"]
+        rewriteSheets([(dataSheetName, dataSheet["rows"] + newRowCount, dataSheet["cols"], dataSheet["header"]),
+                       (metaSheetName, metaSheet["rows"] + newRowCount, metaSheet["cols"], metaSheet["header"]),
+                       (peakSheetName, peakSheet["rows"], peakSheet["cols"], peakSheet["header"]),
+                       (momentSheetName, peakSheet["rows"], len(qcMomentColList) + 1, None)])
+
+    elif functionName == "qcrsc":
+        peakSheet = getSheet(args.get("peakSheetName", "Peak"))
+        dataSheet = getSheet(args.get("dataSheetName", "Data"))
+        estimateDict["cellsRead"] = peakSheet["rows"] * peakSheet["cols"] + dataSheet["rows"] * dataSheet["cols"]
+
+        # The corrected Data sheet has the same size as the Data sheet, the fit sheet has a row for each peak and batch
+        rewriteSheets([(args.get("newDataSheetName", "DataQCRSC"), dataSheet["rows"], dataSheet["cols"], dataSheet["header"]),
+                       (args.get("fitSheetName", "QCRSCFit"), peakSheet["rows"], 8, None)])
+
+    elif functionName == "alignCDResultsFiles":
+        cdResultsFilePathList = args.get("cdResultsFilePathList")
+        if type(cdResultsFilePathList) != list or len(cdResultsFilePathList) < 2 or not all([type(path) == str for path in cdResultsFilePathList]):
+            raise TypeError("TypeError", "Make sure 'cdResultsFilePathList' is a list of at least two paths")
+        featureCount = 0
+        for cdResultsFilePath in cdResultsFilePathList:
+            featureCount += getCDResultsFileSize(cdResultsFilePath, args.get("busyTimeout", 5.0))["compounds"]
+
+        # Only ID, MW, and RT are read, the alignment table has a row for each feature at most
+        estimateDict["statements"] = cost["alignStatementsPerFile"] * len(cdResultsFilePathList)
+        estimateDict["cellsRead"] = 3 * featureCount
+        if excelFilePath is not None:
+            alignSheet = (args.get("alignmentSheetName", "Alignment"), featureCount + 1, 4 + 2 * len(cdResultsFilePathList), None)
+            if sheetSizeDict == {}:
+                estimateDict["sheets"].append({"sheet": alignSheet[0], "rows": alignSheet[1], "cols": alignSheet[2]})
+                estimateDict["cellsWritten"] = alignSheet[1] * alignSheet[2]
+                newHeaderDict[alignSheet[0]] = None
+            else:
+                rewriteSheets([alignSheet])
+
+    elif functionName == "exportCompounds":
+        if type(args.get("outputFilePath")) != str:
+            raise TypeError("TypeError", "Make sure 'outputFilePath' is a string value")
+        compoundCount = cdSizeDict["compounds"]
+        chunkSize = args.get("chunkSize", 50000)
+        if args.get("columns") is not None:
+            colCount = len(args["columns"])
+        elif args.get("decodeBinary", False):
+            colCount = cdSizeDict["columns"]
+        else:
+            colCount = cdSizeDict["columns"] - cdSizeDict["binaryColumns"]
+
+        # The compounds are streamed one chunk at a time, each different tag string is converted once
+        estimateDict["statements"] = 60 + 3 * tagStringCount
+        estimateDict["cellsRead"] = min(compoundCount, chunkSize) * colCount
+        if args["outputFilePath"].lower().endswith(".xlsx"):
+            # Compounds that don't fit on one sheet go on the next sheet
+            for i in range(max(1, -(-compoundCount // (excelMaxRows - 1)))):
+                estimateDict["sheets"].append({"sheet": "Compounds" if i == 0 else "Compounds"+str(i + 1), "rows": min(compoundCount - i * (excelMaxRows - 1), excelMaxRows - 1) + 1, "cols": colCount})
+            estimateDict["outputBytes"] = (compoundCount + 1) * colCount * fileBytesPerCell
+        else:
+            estimateDict["outputBytes"] = (compoundCount + 1) * colCount * cost["exportBytesPerCell"]
+
+        if colCount > excelMaxCols and args["outputFilePath"].lower().endswith(".xlsx"):
+            estimateDict["warnings"].append("WARNING: the export would have "+str(colCount)+" columns, Excel sheets can only have "+str(excelMaxCols)+" columns")
+
+    # Excel can't open sheets that are larger than its limits
+    if excelKey is not None:
+        for sheet in estimateDict["sheets"]:
+            if sheet["rows"] > excelMaxRows:
+                estimateDict["warnings"].append("WARNING: the sheet \""+str(sheet["sheet"])+"\" would have "+str(sheet["rows"])+" rows, Excel sheets can only have "+str(excelMaxRows)+" rows")
+            if sheet["cols"] > excelMaxCols:
+                estimateDict["warnings"].append("WARNING: the sheet \""+str(sheet["sheet"])+"\" would have "+str(sheet["cols"])+" columns, Excel sheets can only have "+str(excelMaxCols)+" columns")
+        estimateDict["excelBytes"] = round((estimateDict["cellsWritten"] + estimateDict["cellsRewritten"]) * fileBytesPerCell)
+
+    estimateDict["bytesWritten"] = round(estimateDict["excelBytes"] + estimateDict["cdBytes"] + estimateDict["outputBytes"])
+    estimateDict["outputBytes"] = round(estimateDict["outputBytes"])
+    estimateDict["peakRSSBytes"] = round(cost["baseRSSBytes"] + estimateDict["cellsRead"] * cost["readBytesPerCell"]
+                                         + estimateDict["cellsWritten"] * cost["writeBytesPerCell"] + estimateDict["cellsRewritten"] * cost["rewriteBytesPerCell"])
+    estimateDict["seconds"] = round(estimateDict["cellsRead"] * cost["secondsPerCellRead"] + estimateDict["cellsWritten"] * cost["secondsPerCellWritten"]
+                                    + estimateDict["cellsRewritten"] * cost["secondsPerCellRewritten"]
+                                    + estimateDict["statements"] * cost["secondsPerStatement"] + estimateDict["rowsScanned"] * cost["secondsPerRowScanned"], 3)
+
+    # Keep the sizes of the written sheets for the next jobs of the run
+    if excelKey is not None:
+        if excelKey not in writtenSheetDict:
+            writtenSheetDict[excelKey] = {}
+        for sheet in estimateDict["sheets"]:
+            if sheet["sheet"] in newHeaderDict:
+                writtenSheetDict[excelKey][sheet["sheet"]] = {"rows": sheet["rows"], "cols": sheet["cols"], "header": newHeaderDict[sheet["sheet"]]}
+
+    return estimateDict
+
+
+# The functions that can be estimated by estimate()
+estimateFunctionList = ["tidyData", "tidyCDResultsFile", "updateCDResultsFile", "updateExcelFile", "syncBoth", "exportCompounds",
+                        "qcMetrics", "appendBatch", "qcrsc", "filterFeatures", "assignMSI", "groupFeatures", "alignCDResultsFiles"]
 
 
 #####################################################################################
-## tidyData()
+## Function: estimate()
 #####################################################################################
 '''
-This function converts an Excel file into the TidyData format.
-This function expects the Excel file to have a Compounds table produced by CD and 
-a Meta table created from that Compounds table.
+This function estimates how long jobs will take, how many SQL statements they will run, how many bytes they will write,
+and their peak memory (RSS), without running them. Only cheap metadata is read: the number of compounds with SQLite,
+the size of each Excel sheet from its dimension element, and the header rows. A warning is added if a sheet that would be
+written is larger than Excel's limits (1,048,576 rows and 16,384 columns).
+The jobs are estimated in order, so a job is estimated with the sheets written by the jobs before it.
+The estimates are rough, see estimateJob() and estimateCostDict.
 
 INPUT:
-'excelFilePath' = The path to an Excel file.
-'colsToKeepDict' = Dictionary containing the Peak columns the user wants to keep and the name the column should be renamed to.
-'optionsDict' = Dictionary containing options and the user choices to those options.
-'verbose' = Boolean value that controls the output to the console. 
+'jobList' = A job dictionary, a list of job dictionaries, or the path to a JSON manifest file (see runBatch()).
+    Each job has the name of the 'function' to estimate and a dictionary of its 'args'. Jobs of functions that runBatch() can run
+    but that aren't in estimateFunctionList are skipped.
+'verbose' = Boolean value that controls the output to the console.
+    If False, hide outputs and return the outputs as a list.
 
 OUTPUT:
 'report' = A list of messages that can be printed to console if 'verbose' is True.
-'stats' = A list of stats produced by the CleanupPeakTable function.
+'estimateList' = A list of estimate dictionaries in the order of the jobs (see estimateJob()),
+    with the keys 'job', 'function', 'status' ("ok", "skipped", or "error"), and 'error'.
 '''
 
-def tidyData(excelFilePath, colsToKeepDict, optionsDict, verbose = True):
+def estimate(jobList, verbose = True):
     try:
-        if verbose:
-            print("Validating arguments")
-        validateTidyDataInput(excelFilePath, colsToKeepDict, optionsDict, verbose)
-        
-        try:
-            if verbose:
-                print("Importing "+excelFilePath)
-            # Get data from Excel file
-            compTable = pd.read_excel(excelFilePath, sheet_name = "Compounds")
-            peakTable = pd.read_excel(excelFilePath, sheet_name = "Compounds")
-            metaTable = pd.read_excel(excelFilePath, sheet_name = "Meta")
-            if verbose:
-                print("Imported "+excelFilePath)
-                print("Creating Peak sheet")
-        
-        # If the Excel file doesn't have the correct sheets
-        except ValueError:
-            raise ValueError("ValueError", "Make sure "+excelFilePath+" has the Compounds and Meta sheets")
-       
-        # If the Excel file can't be found
-        except FileNotFoundError:
-            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
-    
-        # If permission to the Excel file was denied
-        except PermissionError:
-            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
-                
-        # Make sure the original name is in the peak table
-        if "Name" not in peakTable.columns:
-            raise ValueError("ValueError", "Column \"Name\" can't be found in "+excelFilePath)
-        
-        prefix = optionsDict["UIDPrefix"]
-        
-        # Create lists containing peak Idx and the UID data
-        peakIdxList = list(range(1, len(peakTable.index) + 1))
-        uidList = [prefix + str(x) for x in peakIdxList]
-        
-        # Create new columns called 'Idx' and 'UID'  
-        peakTable["Idx"] = peakIdxList
-        peakTable["UID"] = uidList        
-        
-        try: 
-            if verbose:
-                print("Creating Data sheet")
-            # Create Data dataframe with Filename and Idx data
-            dataTable = pd.DataFrame(data=metaTable["Filename"])
-            dataIdxList = list(range(1, len(dataTable.index) + 1))
-            dataTable["Idx"] = dataIdxList
-        except KeyError:
-            raise KeyError("MetaTable must contain column: \"Filename\"")
-        
-        areaDict = {}
+        if type(jobList) == str:
+            jobList = getBatchJobs(jobList)
+        if type(jobList) == dict:
+            jobList = [jobList]
+
+        # Validate 'jobList'
+        if type(jobList) != list:
+            raise TypeError("TypeError", "Make sure 'jobList' is a job dictionary, a list of job dictionaries, or the path to a JSON manifest file")
+        for job in jobList:
+            if type(job) != dict:
+                raise TypeError("TypeError", "Make sure all jobs are dictionaries")
+            if "function" not in job or (job["function"] not in estimateFunctionList and job["function"] not in batchFunctionDict):
+                raise ValueError("ValueError", "Make sure the 'function' of each job is one of "+", ".join(estimateFunctionList + [functionName for functionName in batchFunctionDict if functionName not in estimateFunctionList]))
+            if type(job.get("args", {})) != dict:
+                raise TypeError("TypeError", "Make sure the 'args' of each job is a dictionary")
+
+        # Validate 'verbose'
+        if type(verbose) != bool:
+            raise TypeError("TypeError", "Make sure 'verbose' is a boolean value")
 
-        index = 0
-        # Loop through the peak table and add the Area data to a dictionary
-        for col in peakTable.columns:
-            if col.startswith("Area: "):
-                areaDict[index] = peakTable.loc[:, col]
-                index = index + 1
-    
-        if areaDict == {}:
-            raise ValueError("ValueError", "Columns \"Area: \" can't be found in "+excelFilePath)
-    
-        # Create Area data frame, tranpose, change column names, and add to the Data data frame
-        areaTable = pd.DataFrame(data=areaDict)
-        areaTable = areaTable.T
-        areaTable.columns = uidList
-        dataTable = pd.concat([dataTable, areaTable], axis=1)
-    
         report = []
-        stats = []
-        
-        if verbose:
-            print("Merging Meta data into Data sheet")
-        # Merge Meta table data into the Data table
-        dataTable = MergeMetaintoData(dataTable, metaTable)
-        
-        if verbose:
-            print("Cleaning Peak sheet")
-        # Clean Peak table
-        peakTable, report, stats = CleanupPeakTable(peakTable,colsToKeepDict,optionsDict)
-        
-        if verbose:
-            print("Validating Data sheet and Peak sheet")
-        # Validate the Data table and Peak table
-        dataTable, peakTable = validatingDataPeakTables(dataTable, peakTable, optionsDict)
-        
-        try:
-            if verbose:
-                print("Updating "+excelFilePath)
-            # Append Meta sheet, Data sheet, and Peak sheet to excel file
-            with pd.ExcelWriter(excelFilePath, engine="openpyxl") as writer:  
-                compTable.to_excel(writer, sheet_name='Compounds', index=False)
-                metaTable.to_excel(writer, sheet_name='Meta', index=False)
-                dataTable.to_excel(writer, sheet_name='Data', index=False)
-                peakTable.to_excel(writer, sheet_name='Peak', index=False)
-       
-        # If the Excel file can't be found
-        except FileNotFoundError:
-            raise FileNotFoundError("FileNotFoundError", "Can't find "+excelFilePath)
-    
-        # If permission to the Excel file was denied
-        except PermissionError:
-            raise PermissionError("PermissionError", "Couldn't gain permission to the Excel File. Make sure "+excelFilePath+" is not open in another program")
-        
-        report.append("Updated "+excelFilePath)
+        estimateList = []
+        writtenSheetDict = {}
+        for index, job in enumerate(jobList):
+            functionName = job["function"]
+            if functionName not in estimateFunctionList:
+                estimateList.append({"job": index, "function": functionName, "status": "skipped", "error": None})
+                report.append("Job "+str(index)+" ("+functionName+") skipped, "+functionName+"() can't be estimated")
+                continue
+
+            # A job that can't be estimated doesn't stop the other jobs
+            try:
+                estimateDict = {"job": index, "function": functionName, "status": "ok", "error": None}
+                estimateDict.update(estimateJob(functionName, job.get("args", {}), writtenSheetDict))
+                report.append("Job "+str(index)+" ("+functionName+"): about "+str(round(estimateDict["seconds"], 1))+" seconds, "
+                              +str(estimateDict["statements"])+" SQL statements, "+str(round(estimateDict["bytesWritten"] / 1048576, 1))+" MB written, "
+                              +str(round(estimateDict["peakRSSBytes"] / 1048576, 1))+" MB peak RSS")
+                for warning in estimateDict["warnings"]:
+                    report.append("    "+warning)
+            except Exception as e:
+                estimateDict = {"job": index, "function": functionName, "status": "error", "error": str(e)}
+                report.append("Job "+str(index)+" ("+functionName+") can't be estimated: "+str(e))
+            estimateList.append(estimateDict)
+
+        okList = [estimateDict for estimateDict in estimateList if estimateDict["status"] == "ok"]
+        report.append(str(len(jobList))+" jobs: about "+str(round(sum([estimateDict["seconds"] for estimateDict in okList]), 1))+" seconds if run one at a time, "
+                      +str(round(max([estimateDict["peakRSSBytes"] for estimateDict in okList], default = 0) / 1048576, 1))+" MB peak RSS for the largest job")
+
         if verbose:
             for i in report:
                 print(i)
-            print("\nStats:")
-            for i in stats:
-                print(i)
         else:
-            return report, stats
-    
+            return report, estimateList
+
     # Print error messages to console if verbose is true,
     # otherwise raise an exception
     except Exception as e:
         if verbose:
             print(e)
-        else:    
+        else:
             raise e
+
+
+#####################################################################################
+## Function: main()
+#####################################################################################
+'''
+This function is the command line interface of CDExcelMessenger.py, e.g.
+python -m CDExcelMessenger push results.cdResult data.xlsx --sheet Peak --incremental
+python -m CDExcelMessenger push results.cdResult data.xlsx --sheet Peak --timing --timing-log timing.jsonl
+python -m CDExcelMessenger pull results.cdResult data.xlsx --sheet Peak --profile pull.prof --top-allocations 10 --audit-sql
+python -m CDExcelMessenger pull results.cdResult data.xlsx --sheet Peak --data-sheet Data
+python -m CDExcelMessenger pull results.cdResult data.xlsx --sheet Peak --new-sheet PeakNew --msi
+python -m CDExcelMessenger msi data.xlsx --sheet PeakNew --level "0=goodRT&mzVault" --level "1=goodRT" --level "1=mzVault"
+python -m CDExcelMessenger tidy data.xlsx --config tidy.json
+python -m CDExcelMessenger qc data.xlsx --sheet Peak --data-sheet Data
+python -m CDExcelMessenger append data.xlsx batch2.xlsx
+python -m CDExcelMessenger qcrsc data.xlsx --workers 8 --chunk-size 500
+python -m CDExcelMessenger filter data.xlsx --rule "HighRSD=qcRSD > 20" --rule "InBlank=blankRatio > 30" --cd-results results.cdResult
+python -m CDExcelMessenger group data.xlsx --mw-tolerance 5 --rt-tolerance 0.1 --representative qcRSD --min
+python -m CDExcelMessenger group results.cdResult --output groups.csv
+python -m CDExcelMessenger align batch1.cdResult batch2.cdResult batch3.cdResult --excel study.xlsx --drift
+python -m CDExcelMessenger push batch1.cdResult study.xlsx --sheet Alignment --columns Name Checked --aligned batch2.cdResult batch3.cdResult
+python -m CDExcelMessenger schema results.cdResult
+python -m CDExcelMessenger batch manifest.json --workers 4 --output results.json
+python -m CDExcelMessenger estimate manifest.json --output estimates.json
+
+pandas is only imported by the subcommands that read or write Excel files, so --help, --validate-only, 
+schema, and estimate start without it. The pull subcommand never asks for user input, it overwrites the sheets 
+it read from unless new sheet names are given.
+
+INPUT:
+'argList' = A list of command line arguments (default is None), if this value is left as None, sys.argv is used.
+
+OUTPUT:
+'exitCode' = 0 if the command succeeded, otherwise 1.
+'''
+
+def main(argList = None):
+    parser = argparse.ArgumentParser(prog="CDExcelMessenger", description="Pass data between Excel files and Compound Discoverer results files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    tidyParser = subparsers.add_parser("tidy", help="Convert an Excel file exported from CD into the TidyData format")
+    tidyParser.add_argument("excelFilePath", help="The path to an Excel file")
+    tidyParser.add_argument("--config", required=True, help="The path to a JSON file with the keys 'colsToKeepDict' and 'optionsDict'")
+
+    pushParser = subparsers.add_parser("push", help="Update a CD results file from an Excel file (updateCDResultsFile)")
+    pushParser.add_argument("cdResultsFilePath", help="The path to a CD results file")
+    pushParser.add_argument("excelFilePath", help="The path to an Excel file")
+    pushParser.add_argument("--sheet", required=True, help="The name of the Excel sheet containing the peak table")
+    pushParser.add_argument("--columns", nargs="+", default=None, help="The Excel columns to update")
+    pushParser.add_argument("--tags", nargs="+", default=None, help="The Tag columns to use")
+    pushParser.add_argument("--incremental", action="store_true", help="Only update the rows that changed since the last sync")
+    pushParser.add_argument("--fast-write", action="store_true", help="Write in one transaction with relaxed sync settings and a backup")
+    pushParser.add_argument("--backup", default=None, help="The path of a sidecar backup file for --fast-write")
+    pushParser.add_argument("--busy-timeout", type=float, default=5.0, help="Seconds to wait for a lock held by another process")
+    pushParser.add_argument("--lock-retries", type=int, default=5, help="Number of times to retry if the CD results file is locked")
+    pushParser.add_argument("--aligned", nargs="+", default=None, help="The other CD results files of an alignment, all the files are updated")
+    pushParser.add_argument("--alignment-sheet", default="Alignment", help="The name of the Excel sheet containing the alignment table for --aligned")
+    pushParser.add_argument("--validate-only", action="store_true", help="Only validate the arguments and the CD results file")
+
+    pullParser = subparsers.add_parser("pull", help="Update an Excel file from a CD results file (updateExcelFile)")
+    pullParser.add_argument("cdResultsFilePath", help="The path to a CD results file")
+    pullParser.add_argument("excelFilePath", help="The path to an Excel file")
+    pullParser.add_argument("--sheet", required=True, help="The name of the Excel sheet containing the peak table")
+    pullParser.add_argument("--data-sheet", default=None, help="The name of the Excel sheet containing the data table")
+    pullParser.add_argument("--columns", nargs="+", default=None, help="The Excel columns to update")
+    pullParser.add_argument("--remove-checked", action="store_true", help="Delete the rows that are Checked in CD")
+    pullParser.add_argument("--new-sheet", default="", help="The name of the new peak sheet, the peak sheet is overwritten if left out")
+    pullParser.add_argument("--new-data-sheet", default="", help="The name of the new data sheet, the data sheet is overwritten if left out")
+    pullParser.add_argument("--incremental", action="store_true", help="Skip the update if nothing changed since the last sync")
+    pullParser.add_argument("--busy-timeout", type=float, default=5.0, help="Seconds to wait for a lock held by another process")
+    pullParser.add_argument("--msi", action="store_true", help="Add an MSI column from the Tag columns with the default MSI levels")
+    pullParser.add_argument("--validate-only", action="store_true", help="Only validate the arguments and the CD results file")
+
+    qcParser = subparsers.add_parser("qc", help="Add the QC metrics of each peak to the Peak sheet of an Excel file created by tidy")
+    qcParser.add_argument("excelFilePath", help="The path to an Excel file")
+    qcParser.add_argument("--sheet", default="Peak", help="The name of the Excel sheet containing the peak table")
+    qcParser.add_argument("--data-sheet", default="Data", help="The name of the Excel sheet containing the data table")
+    qcParser.add_argument("--new-sheet", default="", help="The name of the new peak sheet, the peak sheet is updated if left out")
+
+    appendParser = subparsers.add_parser("append", help="Append a new batch of sample files to an Excel file created by tidy and update the QC metrics")
+    appendParser.add_argument("excelFilePath", help="The path to an Excel file")
+    appendParser.add_argument("batchFilePath", help="The path to an Excel file with the Compounds sheet and Meta sheet of the new batch")
+    appendParser.add_argument("--sheet", default="Peak", help="The name of the Excel sheet containing the peak table")
+    appendParser.add_argument("--data-sheet", default="Data", help="The name of the Excel sheet containing the data table")
+    appendParser.add_argument("--meta-sheet", default="Meta", help="The name of the Excel sheet containing the meta table")
+    appendParser.add_argument("--moment-sheet", default="QCMoments", help="The name of the sheet to save the sums of the QC metrics in")
+
+    qcrscParser = subparsers.add_parser("qcrsc", help="Correct the signal drift of each peak in an Excel file created by tidy with QC-RSC")
+    qcrscParser.add_argument("excelFilePath", help="The path to an Excel file")
+    qcrscParser.add_argument("--sheet", default="Peak", help="The name of the Excel sheet containing the peak table")
+    qcrscParser.add_argument("--data-sheet", default="Data", help="The name of the Excel sheet containing the data table")
+    qcrscParser.add_argument("--new-data-sheet", default="DataQCRSC", help="The name of the sheet to save the corrected data table in")
+    qcrscParser.add_argument("--fit-sheet", default="QCRSCFit", help="The name of the sheet to save the fit diagnostics in")
+    qcrscParser.add_argument("--workers", type=int, default=None, help="The maximum number of worker processes, one for each CPU if left out")
+    qcrscParser.add_argument("--chunk-size", type=int, default=1000, help="The number of peaks corrected by a worker at a time")
+    qcrscParser.add_argument("--min-qcs", type=int, default=3, help="The smallest number of QCs a peak needs in a batch to be corrected")
+
+    filterParser = subparsers.add_parser("filter", help="Flag the peaks that match a set of rules and write the flags to a CD results file")
+    filterParser.add_argument("excelFilePath", help="The path to an Excel file")
+    filterParser.add_argument("--rule", action="append", required=True, help="A rule set as NAME=RULE, e.g. \"HighRSD=qcRSD > 20\", a NAME used more than once needs all its rules to match")
+    filterParser.add_argument("--cd-results", default=None, help="The path to a CD results file to write the Checked column and the Tags to")
+    filterParser.add_argument("--sheet", default="Peak", help="The name of the Excel sheet containing the peak table")
+    filterParser.add_argument("--match", default="any", choices=["any", "all"], help="Check the peaks that match any rule set or all the rule sets")
+    filterParser.add_argument("--new-sheet", default="", help="The name of the new peak sheet, the peak sheet is updated if left out")
+    filterParser.add_argument("--no-tags", action="store_true", help="Only write the Checked column to the CD results file, not the rule sets as Tags")
+    filterParser.add_argument("--backup", default=None, help="The path of a sidecar backup file for the write to the CD results file")
+    filterParser.add_argument("--busy-timeout", type=float, default=5.0, help="Seconds to wait for a lock held by another process")
+    filterParser.add_argument("--lock-retries", type=int, default=5, help="Number of times to retry if the CD results file is locked")
+
+    msiParser = subparsers.add_parser("msi", help="Add an MSI column to the Peak sheet of an Excel file from the Tags of each peak")
+    msiParser.add_argument("excelFilePath", help="The path to an Excel file")
+    msiParser.add_argument("--sheet", default="Peak", help="The name of the Excel sheet containing the peak table")
+    msiParser.add_argument("--level", action="append", default=None, help="An MSI level as LEVEL=TAG or LEVEL=TAG&TAG, in order of precedence, the default MSI levels are used if left out")
+    msiParser.add_argument("--new-sheet", default="", help="The name of the new peak sheet, the peak sheet is updated if left out")
+    msiParser.add_argument("--keep-unassigned", action="store_true", help="Don't set Checked for the peaks that don't match an MSI level")
+
+    groupParser = subparsers.add_parser("group", help="Group the peaks of an Excel file, or the compounds of a CD results file, with close MW and RT")
+    groupParser.add_argument("filePath", help="The path to an Excel file, or to a CD results file (.cdResult)")
+    groupParser.add_argument("--sheet", default="Peak", help="The name of the Excel sheet containing the peak table")
+    groupParser.add_argument("--mw-tolerance", type=float, default=5.0, help="The molecular weight tolerance in ppm")
+    groupParser.add_argument("--rt-tolerance", type=float, default=0.1, help="The retention time tolerance in minutes")
+    groupParser.add_argument("--representative", default=None, help="The column used to choose the representative of each group")
+    groupParser.add_argument("--min", action="store_true", help="Choose the feature with the smallest value of --representative instead of the largest")
+    groupParser.add_argument("--new-sheet", default="", help="The name of the new peak sheet, the peak sheet is updated if left out")
+    groupParser.add_argument("--group-sheet", default="Groups", help="The name of the sheet to save the groups in")
+    groupParser.add_argument("--output", default=None, help="The path of a CSV or Excel file to save the groups of a CD results file in")
+    groupParser.add_argument("--busy-timeout", type=float, default=5.0, help="Seconds to wait for a lock held by another process")
+
+    alignParser = subparsers.add_parser("align", help="Align the compounds of several CD results files by MW and RT")
+    alignParser.add_argument("cdResultsFilePaths", nargs="+", help="The paths to at least two CD results files")
+    alignParser.add_argument("--excel", default=None, help="The path of an Excel file to save the alignment table in")
+    alignParser.add_argument("--sheet", default="Alignment", help="The name of the sheet to save the alignment table in")
+    alignParser.add_argument("--output", default=None, help="The path of a CSV file to save the alignment table in")
+    alignParser.add_argument("--mw-tolerance", type=float, default=5.0, help="The molecular weight tolerance in ppm")
+    alignParser.add_argument("--rt-tolerance", type=float, default=0.1, help="The retention time tolerance in minutes, after the drift is corrected")
+    alignParser.add_argument("--drift", action="store_true", help="Correct the retention time drift of each file to the reference file before aligning")
+    alignParser.add_argument("--reference", type=int, default=0, help="The position of the reference file in the list")
+    alignParser.add_argument("--drift-window", type=float, default=1.0, help="The largest retention time drift in minutes")
+    alignParser.add_argument("--busy-timeout", type=float, default=5.0, help="Seconds to wait for a lock held by another process")
+
+    exportParser = subparsers.add_parser("export", help="Export the compound table of a CD results file to a Parquet, CSV, or Excel file")
+    exportParser.add_argument("cdResultsFilePath", help="The path to a CD results file")
+    exportParser.add_argument("outputFilePath", help="The path of the file to create (.parquet, .csv, or .xlsx)")
+    exportParser.add_argument("--columns", nargs="+", default=None, help="The columns to export, all columns are exported if left out")
+    exportParser.add_argument("--chunk-size", type=int, default=50000, help="The number of compounds to write at a time")
+    exportParser.add_argument("--decode-binary", action="store_true", help="Export binary columns as hex strings instead of skipping them")
+    exportParser.add_argument("--busy-timeout", type=float, default=5.0, help="Seconds to wait for a lock held by another process")
+
+    for subparser in [tidyParser, pushParser, pullParser, qcParser, appendParser, qcrscParser, filterParser, msiParser, groupParser, alignParser, exportParser]:
+        subparser.add_argument("--timing", action="store_true", help="Add the time taken by each phase to the output")
+        subparser.add_argument("--timing-log", default=None, help="The path of a file to append the timings of the run to as JSON lines")
+        subparser.add_argument("--profile", default=None, help="The path of a .prof file to save the cProfile stats of the run to")
+        subparser.add_argument("--top-allocations", type=int, default=0, help="Report the peak memory of each phase and the lines that allocated the most memory during the run")
+        subparser.add_argument("--audit-sql", action="store_true", help="Count the SQL statements by shape and flag full table scans")
+
+    schemaParser = subparsers.add_parser("schema", help="List the columns of the compound table of a CD results file")
+    schemaParser.add_argument("cdResultsFilePath", help="The path to a CD results file")
+
+    batchParser = subparsers.add_parser("batch", help="Run the jobs in a JSON manifest file without user input")
+    batchParser.add_argument("manifest", help="The path to a JSON manifest file")
+    batchParser.add_argument("--workers", type=int, default=None, help="The maximum number of worker processes")
+    batchParser.add_argument("--output", default=None, help="The path of a JSON file to save the results in")
+
+    estimateParser = subparsers.add_parser("estimate", help="Estimate the time, SQL statements, bytes written, and memory of the jobs in a JSON manifest file")
+    estimateParser.add_argument("manifest", help="The path to a JSON manifest file")
+    estimateParser.add_argument("--output", default=None, help="The path of a JSON file to save the estimates in")
+
+    args = parser.parse_args(argList)
+
+    try:
+        # The phases are only timed if they are added to the output, logged, profiled, or audited
+        timer = None
+        if getattr(args, "timing", False) or getattr(args, "timing_log", None) is not None or getattr(args, "profile", None) is not None or getattr(args, "top_allocations", 0) != 0 or getattr(args, "audit_sql", False):
+            timer = PhaseTimer(args.timing_log, args.profile, args.top_allocations, args.audit_sql)
+
+        if args.command == "tidy":
+            try:
+                with open(args.config, "r") as configFile:
+                    config = json.load(configFile)
+            except FileNotFoundError:
+                raise FileNotFoundError("FileNotFoundError", "Can't find "+args.config)
+            if type(config) != dict or "colsToKeepDict" not in config or "optionsDict" not in config:
+                raise KeyError("KeyError", "Make sure "+args.config+" has the keys 'colsToKeepDict' and 'optionsDict'")
+            report, stats = tidyData(args.excelFilePath, config["colsToKeepDict"], config["optionsDict"], verbose = False, timer = timer)
+            report = report + ["", "Stats:"] + stats
+
+        elif args.command == "push":
+            if args.validate_only:
+                validateUpdateCDInput(args.cdResultsFilePath, args.excelFilePath, args.sheet, args.columns, args.tags, False, args.incremental, args.fast_write, args.backup, args.busy_timeout, args.lock_retries)
+                report = validateCDResultsFileOnly(args.cdResultsFilePath, args.busy_timeout)
+            else:
+                cdResultsFilePath = args.cdResultsFilePath
+                if args.aligned is not None:
+                    cdResultsFilePath = [args.cdResultsFilePath] + args.aligned
+                report = updateCDResultsFile(cdResultsFilePath, args.excelFilePath, args.sheet, args.columns, args.tags, False, args.incremental, args.fast_write, args.backup, args.busy_timeout, args.lock_retries, args.alignment_sheet, timer)
+
+        elif args.command == "pull":
+            newPeakSheetName = args.new_sheet
+            if newPeakSheetName == "":
+                newPeakSheetName = args.sheet
+            newDataSheetName = args.new_data_sheet
+            if newDataSheetName == "" and args.data_sheet is not None:
+                newDataSheetName = args.data_sheet
+            if args.validate_only:
+                validateUpdateExcelInput(args.cdResultsFilePath, args.excelFilePath, args.sheet, args.data_sheet, args.columns, args.remove_checked, newPeakSheetName, newDataSheetName, False, args.incremental, args.busy_timeout)
+                report = validateCDResultsFileOnly(args.cdResultsFilePath, args.busy_timeout)
+            else:
+                msiLevelDict = None
+                if args.msi:
+                    msiLevelDict = defaultMSILevelDict
+                report = updateExcelFile(args.cdResultsFilePath, args.excelFilePath, args.sheet, args.data_sheet, args.columns, args.remove_checked, newPeakSheetName, newDataSheetName, False, args.incremental, args.busy_timeout, msiLevelDict, timer)
+
+        elif args.command == "qc":
+            report = qcMetrics(args.excelFilePath, args.sheet, args.data_sheet, args.new_sheet, False, timer)
+
+        elif args.command == "append":
+            report = appendBatch(args.excelFilePath, args.batchFilePath, args.sheet, args.data_sheet, args.meta_sheet, args.moment_sheet, False, timer)
+
+        elif args.command == "qcrsc":
+            report = qcrsc(args.excelFilePath, args.sheet, args.data_sheet, args.new_data_sheet, args.fit_sheet, args.workers, args.chunk_size, args.min_qcs, False, timer)
+
+        elif args.command == "filter":
+            ruleDict = {}
+            for rule in args.rule:
+                if "=" not in rule:
+                    raise ValueError("ValueError", "Make sure the rule \""+rule+"\" is written as NAME=RULE, e.g. \"HighRSD=qcRSD > 20\"")
+                flagName, rule = rule.split("=", 1)
+                ruleDict.setdefault(flagName.strip(), []).append(rule)
+            report = filterFeatures(args.excelFilePath, ruleDict, args.cd_results, args.sheet, args.match, args.new_sheet, not args.no_tags, False, args.backup, args.busy_timeout, args.lock_retries, timer)
+
+        elif args.command == "msi":
+            msiLevelDict = None
+            if args.level is not None:
+                msiLevelDict = {}
+                for level in args.level:
+                    if "=" not in level:
+                        raise ValueError("ValueError", "Make sure the MSI level \""+level+"\" is written as LEVEL=TAG or LEVEL=TAG&TAG, e.g. \"0=goodRT&mzVault\"")
+                    level, rule = level.split("=", 1)
+                    msiLevelDict.setdefault(level.strip(), []).append([tag.strip() for tag in rule.split("&")])
+            report = assignMSI(args.excelFilePath, args.sheet, msiLevelDict, args.new_sheet, not args.keep_unassigned, False, timer)
+
+        elif args.command == "group":
+            if args.filePath.endswith(".cdResult"):
+                compTable, groupTable, report = groupCDFeatures(args.filePath, args.mw_tolerance, args.rt_tolerance, args.representative, not args.min, False, args.busy_timeout, timer)
+                if args.output is not None:
+                    if args.output.endswith(".xlsx"):
+                        groupTable.to_excel(args.output, sheet_name=args.group_sheet, index=False)
+                    else:
+                        groupTable.to_csv(args.output, index=False)
+                    report.append("Groups saved to "+args.output)
+            else:
+                report = groupFeatures(args.filePath, args.sheet, args.mw_tolerance, args.rt_tolerance, args.representative, not args.min, args.new_sheet, args.group_sheet, False, timer)
+
+        elif args.command == "align":
+            alignTable, report = alignCDResultsFiles(args.cdResultsFilePaths, args.excel, args.sheet, args.mw_tolerance, args.rt_tolerance, args.drift, args.reference, args.drift_window, verbose = False, busyTimeout = args.busy_timeout, timer = timer)
+            if args.output is not None:
+                alignTable.to_csv(args.output, index=False)
+                report.append("Alignment table saved to "+args.output)
+
+        elif args.command == "export":
+            report = exportCompounds(args.cdResultsFilePath, args.outputFilePath, args.columns, args.chunk_size, args.decode_binary, False, args.busy_timeout, timer)
+
+        elif args.command == "schema":
+            report, columnList = getCDResultsFileSchema(args.cdResultsFilePath, verbose = False)
+
+        elif args.command == "batch":
+            resultList = runBatch(args.manifest, args.workers, verbose = False)
+            report = []
+            for result in resultList:
+                if result["status"] == "ok":
+                    report.append("Job "+str(result["job"])+" ("+result["function"]+") finished in "+str(result["seconds"])+" seconds")
+                else:
+                    report.append("Job "+str(result["job"])+" ("+result["function"]+") failed: "+result["error"])
+            if args.output is not None:
+                with open(args.output, "w") as outputFile:
+                    json.dump(resultList, outputFile, indent=2, default=str)
+
+            if any(result["status"] == "error" for result in resultList):
+                for i in report:
+                    print(i)
+                return 1
+
+        elif args.command == "estimate":
+            report, estimateList = estimate(args.manifest, verbose = False)
+            if args.output is not None:
+                with open(args.output, "w") as outputFile:
+                    json.dump(estimateList, outputFile, indent=2)
+
+            if any(estimateDict["status"] == "error" for estimateDict in estimateList):
+                for i in report:
+                    print(i)
+                return 1
+
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    for i in report:
+        print(i)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())